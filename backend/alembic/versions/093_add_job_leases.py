@@ -0,0 +1,33 @@
+"""scheduled_jobs leases — claimed runs carry an owner and an expiry
+
+The waker now runs claimed jobs concurrently and across instances. A claim
+records which worker holds the row and until when; the worker heartbeats the
+lease while the run is in flight. A row whose lease lapsed (its worker
+crashed or was redeployed) goes back to pending on the next waker tick instead
+of waiting for a restart of that same instance.
+
+Revision ID: 093
+Revises: 092
+Create Date: 2026-08-10
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '093'
+down_revision = '092'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('scheduled_jobs', sa.Column('claimed_by', sa.String(), nullable=True))
+    op.add_column('scheduled_jobs', sa.Column(
+        'lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_scheduled_jobs_status_lease', 'scheduled_jobs',
+                    ['status', 'lease_expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_scheduled_jobs_status_lease', table_name='scheduled_jobs')
+    op.drop_column('scheduled_jobs', 'lease_expires_at')
+    op.drop_column('scheduled_jobs', 'claimed_by')
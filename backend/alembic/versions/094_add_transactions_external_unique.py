@@ -0,0 +1,42 @@
+"""transactions — unique (user_id, account_id, external_id) for bulk upsert
+
+Transaction sync now writes each account's activities with a single
+INSERT ... ON CONFLICT per chunk instead of a select + insert/update per row,
+which needs a unique target. Duplicate rows left behind by the old per-row
+path are collapsed to the most recently updated one first, and blank
+external_ids become NULL so they never collide.
+
+Revision ID: 094
+Revises: 093
+Create Date: 2026-08-14
+"""
+from alembic import op
+
+revision = '094'
+down_revision = '093'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE transactions SET external_id = NULL WHERE external_id = ''")
+    op.execute("""
+        DELETE FROM transactions t
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, account_id, external_id
+                ORDER BY updated_at DESC, created_at DESC
+            ) AS rn
+            FROM transactions
+            WHERE external_id IS NOT NULL
+        ) d
+        WHERE t.id = d.id AND d.rn > 1
+    """)
+    op.create_unique_constraint(
+        'uq_transactions_user_account_external', 'transactions',
+        ['user_id', 'account_id', 'external_id'],
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_transactions_user_account_external', 'transactions', type_='unique')
@@ -0,0 +1,26 @@
+"""chat_messages.token_count — tokenizer count persisted with each message
+
+Context budgeting (compaction threshold, pruner, stream timeouts) now counts
+tokens with the model's tokenizer instead of chars/4. The count is taken once
+when a message is written so reloading a long chat doesn't re-tokenize it.
+Existing rows stay NULL and are counted lazily on load.
+
+Revision ID: 095
+Revises: 094
+Create Date: 2026-08-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '095'
+down_revision = '094'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('chat_messages', sa.Column('token_count', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('chat_messages', 'token_count')
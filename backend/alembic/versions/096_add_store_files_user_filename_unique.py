@@ -0,0 +1,37 @@
+"""store_files — unique (user_id, filename) for bulk upsert
+
+Store sync now writes every changed file with a single INSERT ... ON CONFLICT
+instead of a select + insert/update per file, which needs a unique target.
+Duplicate rows are collapsed to the most recently updated one first.
+
+Revision ID: 096
+Revises: 095
+Create Date: 2026-08-21
+"""
+from alembic import op
+
+revision = '096'
+down_revision = '095'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        DELETE FROM store_files s
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, filename
+                ORDER BY updated_at DESC, created_at DESC
+            ) AS rn
+            FROM store_files
+        ) d
+        WHERE s.id = d.id AND d.rn > 1
+    """)
+    op.create_unique_constraint(
+        'uq_store_files_user_filename', 'store_files', ['user_id', 'filename'],
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_store_files_user_filename', 'store_files', type_='unique')
@@ -89,10 +89,22 @@ class Settings(BaseSettings):
         default=None,
         description="SnapTrade consumer key (secret)"
     )
+    SNAPTRADE_MAX_WORKERS: int = Field(
+        default=16,
+        description="Threads for blocking SnapTrade SDK calls (per-account fan-out)"
+    )
+    SNAPTRADE_CALL_TIMEOUT_SECONDS: float = Field(
+        default=20.0,
+        description="Per-call timeout for SnapTrade positions/balance requests"
+    )
     FMP_API_KEY: Optional[str] = Field(
         default=None,
         description="Financial Modeling Prep API key"
     )
+    FMP_QUOTES_PER_MINUTE: int = Field(
+        default=600,
+        description="Upstream /quote calls per minute allowed by QuoteService (keep under the FMP plan limit)"
+    )
     POLYGON_API_KEY: Optional[str] = Field(
         default=None,
         description="Polygon.io API key for market data"
@@ -142,6 +154,13 @@ class Settings(BaseSettings):
             "and installs packages at runtime (slower, less reliable)."
         )
     )
+    E2B_SANDBOX_POOL_SIZE: int = Field(
+        default=0,
+        description=(
+            "Number of pre-warmed sandboxes (skills already loaded) kept ready "
+            "for users with no live or resumable sandbox. 0 disables the pool."
+        )
+    )
 
     # =========================================================================
     # Supabase Storage & Auth
@@ -200,6 +219,14 @@ class Settings(BaseSettings):
             "conversational history that still fits comfortably in the window."
         )
     )
+    CHAT_HISTORY_CACHE_SIZE: int = Field(
+        default=256,
+        description="Chats whose parsed history is kept in-process between turns (LRU)"
+    )
+    CHAT_HISTORY_CACHE_MAX_CHARS: int = Field(
+        default=50_000_000,
+        description="Upper bound on message content held by the chat history cache (chars)"
+    )
 
     # =========================================================================
     # Agent Tool Configuration
@@ -298,6 +325,18 @@ class Settings(BaseSettings):
         description="Max recent chats to include in dream context"
     )
 
+    # =========================================================================
+    # Scheduled jobs (waker)
+    # =========================================================================
+    JOB_MAX_CONCURRENCY: int = Field(
+        default=4,
+        description="Max scheduled-job runs in flight per backend instance"
+    )
+    JOB_MAX_PER_USER: int = Field(
+        default=1,
+        description="Max scheduled-job runs in flight per user, across instances"
+    )
+
     # =========================================================================
     # Observability (LangFuse)
     # =========================================================================
@@ -0,0 +1,132 @@
+"""
+Token Accounting - the one place that counts tokens for context budgeting.
+
+The session pruner, compaction threshold, stream timeouts and cache
+diagnostics all size the conversation through this module, so they agree
+with each other and with the model:
+
+- Tokenizers come from LiteLLM, which ships them in the wheel (the Claude
+  tokenizer and tiktoken's cl100k BPE file), so nothing is downloaded at
+  runtime. Claude models use the Claude tokenizer, everything else cl100k;
+  if neither loads, counting falls back to chars/4.
+- Counts are memoized per (tokenizer, text). The key is the text's length +
+  hash, not the text, so the memo doesn't pin large tool outputs in memory;
+  str hashes are cached on the object, so a repeat lookup for a message that's
+  already in the loop's list costs no rescan.
+- Chat rows persist their count (chat_messages.token_count) and ChatHistory
+  keeps a running total, so the compaction check never re-tokenizes history.
+
+Only text is counted: content strings, text blocks and tool call arguments,
+the same parts the old chars/4 estimates looked at.
+"""
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.config import Config
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CHARS_PER_TOKEN = 4
+_MEMO_MAX = 50_000
+
+# model → (tokenizer key, encode-and-count fn or None for chars/4)
+_tokenizers: Dict[str, Tuple[str, Optional[Callable[[str], int]]]] = {}
+_memo: "OrderedDict[Tuple[str, int, int], int]" = OrderedDict()
+
+
+def _load_tokenizer(model: str) -> Tuple[str, Optional[Callable[[str], int]]]:
+    try:
+        if "claude" in model.lower():
+            # LiteLLM's own lookup only knows the Claude names in its model
+            # list, so newer ones would silently get cl100k; match the family.
+            from litellm.utils import claude_json_str
+            from tokenizers import Tokenizer
+
+            tokenizer = _shared("claude", lambda: Tokenizer.from_str(claude_json_str))
+            return "claude", lambda text: len(tokenizer.encode(text).ids)
+
+        from litellm.litellm_core_utils.default_encoding import encoding
+
+        return f"tiktoken:{encoding.name}", lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        logger.warning(f"No tokenizer for {model} ({e}); using chars/{CHARS_PER_TOKEN}")
+        return "chars", None
+
+
+_loaded: Dict[str, Any] = {}
+
+
+def _shared(name: str, load: Callable[[], Any]) -> Any:
+    if name not in _loaded:
+        _loaded[name] = load()
+    return _loaded[name]
+
+
+def _tokenizer_for(model: Optional[str]) -> Tuple[str, Optional[Callable[[str], int]]]:
+    model = model or Config.AGENT_LLM_MODEL
+    entry = _tokenizers.get(model)
+    if entry is None:
+        entry = _tokenizers[model] = _load_tokenizer(model)
+    return entry
+
+
+def count_text(text: str, model: Optional[str] = None) -> int:
+    """Tokens in `text` for `model` (defaults to the agent model)."""
+    if not text:
+        return 0
+    key, encode = _tokenizer_for(model)
+    if encode is None:
+        return len(text) // CHARS_PER_TOKEN
+
+    memo_key = (key, len(text), hash(text))
+    hit = _memo.get(memo_key)
+    if hit is not None:
+        _memo.move_to_end(memo_key)
+        return hit
+    try:
+        n = encode(text)
+    except Exception:
+        n = len(text) // CHARS_PER_TOKEN
+    _memo[memo_key] = n
+    if len(_memo) > _MEMO_MAX:
+        _memo.popitem(last=False)
+    return n
+
+
+def _texts(content: Any, tool_calls: Optional[Iterable[Any]]) -> List[str]:
+    texts: List[str] = []
+    if isinstance(content, str):
+        texts.append(content)
+    elif isinstance(content, list):
+        texts.extend(
+            b.get("text", "") for b in content
+            if isinstance(b, dict) and isinstance(b.get("text"), str)
+        )
+    for tc in tool_calls or []:
+        fn = tc.get("function", {}) if isinstance(tc, dict) else getattr(tc, "function", {})
+        args = fn.get("arguments", "") if isinstance(fn, dict) else ""
+        if isinstance(args, str):
+            texts.append(args)
+    return texts
+
+
+def message_tokens(msg: Dict[str, Any], model: Optional[str] = None) -> int:
+    """Tokens in one OpenAI-format message dict."""
+    return sum(count_text(t, model) for t in _texts(msg.get("content"), msg.get("tool_calls")))
+
+
+def messages_tokens(messages: Iterable[Dict[str, Any]], model: Optional[str] = None) -> int:
+    return sum(message_tokens(m, model) for m in messages)
+
+
+def content_tokens(content: Any, tool_calls: Optional[Iterable[Any]] = None, model: Optional[str] = None) -> int:
+    """Tokens for raw content (+ tool calls), e.g. a DB row before it's a dict."""
+    if isinstance(content, str) and content.startswith("["):
+        # Multimodal content is stored as a JSON string.
+        try:
+            content = json.loads(content)
+        except (json.JSONDecodeError, ValueError):
+            pass
+    return sum(count_text(t, model) for t in _texts(content, tool_calls))
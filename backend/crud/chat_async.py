@@ -1,12 +1,13 @@
 """
 Async CRUD operations for chats and chat messages
 """
-from typing import List, Optional, Set
+from typing import List, Optional, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, exists, or_, and_
 from sqlalchemy.orm import selectinload, load_only
 from models.chat_models import Chat, ChatMessageDB as ChatMessage
 from models.jobs import ScheduledJob
+from core.token_accounting import content_tokens
 from datetime import datetime
 
 
@@ -240,7 +241,8 @@ async def create_message(
     tool_results: Optional[dict] = None,
     tool_call_id: Optional[str] = None,
     name: Optional[str] = None,
-    latency_ms: Optional[int] = None
+    latency_ms: Optional[int] = None,
+    token_count: Optional[int] = None
 ) -> ChatMessage:
     """
     Create a new chat message (OpenAI format)
@@ -257,7 +259,10 @@ async def create_message(
         tool_call_id: Optional tool call ID (for 'tool' role messages)
         name: Optional tool name (for 'tool' role messages)
         latency_ms: Optional latency in milliseconds (for 'assistant' role messages)
+        token_count: Token count of content + tool call args (computed if omitted)
     """
+    if token_count is None:
+        token_count = content_tokens(content, tool_calls)
     db_message = ChatMessage(
         chat_id=chat_id,
         role=role,
@@ -268,12 +273,16 @@ async def create_message(
         tool_results=tool_results,
         tool_call_id=tool_call_id,
         name=name,
-        latency_ms=latency_ms
+        latency_ms=latency_ms,
+        token_count=token_count
     )
     db.add(db_message)
     await db.commit()
     await db.refresh(db_message)
     
+    from services.chat_history_cache import chat_history_cache
+    chat_history_cache.record(db_message)
+    
     # Update chat's updated_at timestamp
     db_chat = await get_chat(db, chat_id)
     if db_chat:
@@ -297,17 +306,38 @@ async def update_message_resource(
         db_message.resource_id = resource_id
         await db.commit()
         await db.refresh(db_message)
+        from services.chat_history_cache import chat_history_cache
+        chat_history_cache.invalidate(db_message.chat_id)
     return db_message
 
 
-async def get_chat_messages(db: AsyncSession, chat_id: str) -> List[ChatMessage]:
-    """Get all messages for a chat, ordered by sequence"""
+async def get_chat_messages(
+    db: AsyncSession, chat_id: str, from_sequence: Optional[int] = None
+) -> List[ChatMessage]:
+    """Get all messages for a chat (or those at/after from_sequence), ordered by sequence"""
+    query = select(ChatMessage).where(ChatMessage.chat_id == chat_id)
+    if from_sequence is not None:
+        query = query.where(ChatMessage.sequence >= from_sequence)
+    result = await db.execute(query.order_by(ChatMessage.sequence.asc()))
+    return list(result.scalars().all())
+
+
+async def get_history_state(db: AsyncSession, chat_id: str) -> Tuple[int, Optional[int], Optional[int]]:
+    """
+    (row count, max message id, sequence of the latest compaction row) in one query.
+    
+    Ids are never reused, so any insert moves max id and any delete moves the
+    count — enough to tell whether a cached copy of the chat is still current.
+    """
     result = await db.execute(
-        select(ChatMessage)
-        .where(ChatMessage.chat_id == chat_id)
-        .order_by(ChatMessage.sequence.asc())
+        select(
+            func.count(ChatMessage.id),
+            func.max(ChatMessage.id),
+            func.max(ChatMessage.sequence).filter(ChatMessage.role == "compaction"),
+        ).where(ChatMessage.chat_id == chat_id)
     )
-    return list(result.scalars().all())
+    count, max_id, compaction_sequence = result.one()
+    return count, max_id, compaction_sequence
 
 
 async def get_chat_messages_for_display(
@@ -408,16 +438,20 @@ async def delete_messages_by_ids(db: AsyncSession, message_ids: List[int]) -> in
     return len(messages)
 
 
-async def cleanup_incomplete_tool_sequences(db: AsyncSession, chat_id: str) -> int:
+async def cleanup_incomplete_tool_sequences(
+    db: AsyncSession, chat_id: str, messages: Optional[list] = None
+) -> int:
     """
     Remove incomplete tool call sequences that violate Anthropic requirements.
     
     Deletes assistant tool_calls that are not immediately followed by their tool
-    results, along with any orphaned tool messages.
+    results, along with any orphaned tool messages. Pass `messages` to check
+    an already-loaded slice of the chat instead of reading every row.
     """
     import json
     
-    messages = await get_chat_messages(db, chat_id)
+    if messages is None:
+        messages = await get_chat_messages(db, chat_id)
     if not messages:
         return 0
     
@@ -3,9 +3,10 @@ CRUD operations for user-scoped memory store files and dreams.
 """
 import uuid
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict
 
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.store import StoreFile, Dream
@@ -69,6 +70,52 @@ async def upsert_store_file(
     return file
 
 
+async def get_store_file_digests(
+    db: AsyncSession,
+    user_id: str,
+) -> Dict[str, str]:
+    """Return {filename: md5 hex of content} without loading the contents."""
+    result = await db.execute(
+        select(StoreFile.filename, func.md5(func.coalesce(StoreFile.content, "")))
+        .where(StoreFile.user_id == user_id)
+    )
+    return {filename: digest for filename, digest in result.all()}
+
+
+async def bulk_upsert_store_files(
+    db: AsyncSession,
+    user_id: str,
+    files: Dict[str, str],
+    file_type: str = "store",
+) -> int:
+    """
+    Insert-or-update many store files ({filename: content}) in one statement.
+    Returns the number of rows written. Caller commits.
+    """
+    if not files:
+        return 0
+    stmt = pg_insert(StoreFile).values([
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "filename": filename,
+            "content": content,
+            "file_type": file_type,
+        }
+        for filename, content in files.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "filename"],
+        set_={
+            "content": stmt.excluded.content,
+            "file_type": stmt.excluded.file_type,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+    return len(files)
+
+
 # ============================================================================
 # Dreams
 # ============================================================================
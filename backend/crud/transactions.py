@@ -2,7 +2,9 @@
 CRUD operations for transactions
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, desc, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
 from models.brokerage import Transaction, PortfolioSnapshot, TradeAnalytics, TransactionSyncJob
@@ -124,6 +126,63 @@ def upsert_transaction(
         return transaction, True
 
 
+# Rows per INSERT statement. Each row binds 8 params (the 7 columns plus the
+# client-side uuid default for id); asyncpg allows 32767 per statement, so a
+# chunk can never exceed 32767 // 8 = 4095 rows.
+PARAMS_PER_ROW = 8
+MAX_CHUNK_SIZE = 32767 // PARAMS_PER_ROW
+UPSERT_CHUNK_SIZE = 1000
+
+
+async def bulk_upsert_transactions_async(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+) -> tuple[int, int]:
+    """
+    Insert-or-update many transactions, one statement per chunk.
+    Rows need user_id, account_id, symbol, transaction_type, transaction_date,
+    external_id and data. Rows sharing an external_id collapse to the last one;
+    rows without one are always inserted.
+    Returns (inserted, updated). Caller commits.
+    """
+    deduped: Dict[Any, Dict[str, Any]] = {}
+    for i, row in enumerate(rows):
+        ext = row.get("external_id") or None
+        key = (row["user_id"], row["account_id"], ext) if ext else i
+        deduped[key] = {
+            "user_id": row["user_id"],
+            "account_id": row["account_id"],
+            "symbol": row["symbol"].upper(),
+            "transaction_type": row["transaction_type"].upper(),
+            "transaction_date": row["transaction_date"],
+            "external_id": ext,
+            "data": row["data"],
+        }
+    values = list(deduped.values())
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+
+    inserted = updated = 0
+    for start in range(0, len(values), chunk_size):
+        stmt = pg_insert(Transaction).values(values[start:start + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "account_id", "external_id"],
+            set_={
+                "symbol": stmt.excluded.symbol,
+                "transaction_type": stmt.excluded.transaction_type,
+                "transaction_date": stmt.excluded.transaction_date,
+                "data": stmt.excluded.data,
+                "updated_at": func.now(),
+            },
+        ).returning(literal_column("(xmax = 0)").label("inserted"))
+        for (is_new,) in (await db.execute(stmt)).all():
+            if is_new:
+                inserted += 1
+            else:
+                updated += 1
+    return inserted, updated
+
+
 def create_portfolio_snapshot(
     db: Session,
     user_id: str,
@@ -258,3 +317,50 @@ def get_latest_sync_job(db: Session, user_id: str) -> Optional[TransactionSyncJo
         TransactionSyncJob.user_id == user_id
     ).order_by(desc(TransactionSyncJob.created_at)).first()
 
+
+async def create_sync_job_async(
+    db: AsyncSession,
+    user_id: str,
+    status: str,
+    data: Dict[str, Any]
+) -> TransactionSyncJob:
+    """Create a sync job record (async). Caller commits."""
+    job = TransactionSyncJob(
+        user_id=user_id,
+        status=status,
+        data=data
+    )
+    db.add(job)
+    await db.flush()
+    await db.refresh(job)
+    return job
+
+
+async def update_sync_job_async(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    status: str,
+    data: Dict[str, Any],
+    completed_at: Optional[datetime] = None
+) -> Optional[TransactionSyncJob]:
+    """Update sync job status (async). Caller commits."""
+    job = await db.get(TransactionSyncJob, job_id)
+    if job:
+        job.status = status
+        job.data = data
+        if completed_at:
+            job.completed_at = completed_at
+        await db.flush()
+    return job
+
+
+async def get_latest_sync_job_async(db: AsyncSession, user_id: str) -> Optional[TransactionSyncJob]:
+    """Get the most recent sync job for a user (async)"""
+    result = await db.execute(
+        select(TransactionSyncJob)
+        .filter(TransactionSyncJob.user_id == user_id)
+        .order_by(desc(TransactionSyncJob.created_at))
+        .limit(1)
+    )
+    return result.scalars().first()
+
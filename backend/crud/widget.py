@@ -7,7 +7,7 @@ import secrets
 import uuid
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import String, select, update as sa_update, or_
+from sqlalchemy import String, case, select, update as sa_update, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.widget import Widget
@@ -194,10 +194,14 @@ async def clone_widget(
     return clone
 
 
-async def increment_view_count(db: AsyncSession, widget_id: str) -> None:
+async def add_view_counts(db: AsyncSession, counts: Dict[str, int]) -> None:
+    """Add buffered views to many widgets in one UPDATE (see services/widget_views)."""
+    if not counts:
+        return
     await db.execute(
         sa_update(Widget)
-        .where(Widget.id == widget_id)
-        .values(view_count=Widget.view_count + 1)
+        .where(Widget.id.in_(list(counts)))
+        .values(view_count=Widget.view_count + case(counts, value=Widget.id, else_=0))
+        .execution_options(synchronize_session=False)
     )
     await db.commit()
@@ -147,6 +147,8 @@ import asyncio
 
 # Background task for monitoring connection pool
 _pool_monitor_task = None
+# Background task keeping the pre-warmed sandbox pool filled
+_sandbox_pool_task = None
 
 async def monitor_connection_pool():
     """Background task to monitor connection pool usage"""
@@ -178,7 +180,7 @@ async def monitor_connection_pool():
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    global _pool_monitor_task
+    global _pool_monitor_task, _sandbox_pool_task
     from services.storage import storage_service
     from core.database import get_pool_status
 
@@ -193,6 +195,17 @@ async def startup_event():
     _pool_monitor_task = asyncio.create_task(monitor_connection_pool())
     logger.info("Started connection pool monitoring")
 
+    # Hash the skills tree once up front; sandbox calls then reuse the
+    # manifest and only re-stat it periodically.
+    from modules.tools.skills_manifest import skills_manifest
+    await asyncio.to_thread(skills_manifest.refresh, True)
+    logger.info("Built skills manifest")
+
+    # Keep pre-warmed E2B sandboxes ready for cold users (no-op when
+    # E2B_SANDBOX_POOL_SIZE is 0).
+    from modules.tools.implementations.code_execution import run_sandbox_pool_loop
+    _sandbox_pool_task = asyncio.create_task(run_sandbox_pool_loop())
+
     # Start the scheduled-job waker (file-backed jobs)
     from services.job_scheduler import run_job_loop
     asyncio.create_task(run_job_loop())
@@ -224,6 +237,11 @@ async def startup_event():
     asyncio.create_task(run_scoring_loop())
     logger.info("Started trade-idea scoring sweep")
 
+    # Flush buffered public widget view counts in batches
+    from services.widget_views import run_view_flush_loop
+    asyncio.create_task(run_view_flush_loop())
+    logger.info("Started widget view flush loop")
+
     # Initialize Supabase Storage bucket (if configured)
     if storage_service.is_available():
         logger.info("Initializing Supabase Storage...")
@@ -238,7 +256,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    global _pool_monitor_task
+    global _pool_monitor_task, _sandbox_pool_task
 
     # Stop pool monitor
     if _pool_monitor_task:
@@ -249,6 +267,29 @@ async def shutdown_event():
             pass
         logger.info("Stopped connection pool monitoring")
 
+    # Stop refilling, then kill pre-warmed sandboxes — nothing could claim
+    # them after this process exits.
+    if _sandbox_pool_task:
+        _sandbox_pool_task.cancel()
+        try:
+            await _sandbox_pool_task
+        except asyncio.CancelledError:
+            pass
+    from modules.tools.implementations.code_execution import drain_sandbox_pool
+    try:
+        drained = await drain_sandbox_pool()
+        if drained:
+            logger.info(f"Killed {drained} pre-warmed sandbox(es)")
+    except Exception as e:
+        logger.warning(f"Sandbox pool drain failed: {e}")
+
+    # Write views buffered since the last periodic flush
+    from services.widget_views import view_counter
+    try:
+        await view_counter.flush()
+    except Exception as e:
+        logger.warning(f"Final widget view flush failed: {e}")
+
 
 @app.get("/")
 async def root():
@@ -258,13 +299,20 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Health check endpoint with database pool status"""
+    """Health check endpoint with database pool, sandbox, scheduler and tool timing status"""
     from core.database import get_pool_status
+    from modules.tools.implementations.code_execution import get_sandbox_metrics
+    from modules.tools.runner import get_tool_timings
+    from services.job_scheduler import scheduler_stats
 
     pool_status = get_pool_status()
+    sandbox = get_sandbox_metrics()
+    scheduler = scheduler_stats()
+    tools = get_tool_timings()
 
     if not pool_status.get('pooled', True):
-        return {"status": "healthy", "database_pool": {"mode": "nullpool"}}
+        return {"status": "healthy", "database_pool": {"mode": "nullpool"},
+                "sandbox": sandbox, "scheduler": scheduler, "tools": tools}
 
     usage_percent = (pool_status['checked_out'] / pool_status['total']) * 100 if pool_status['total'] > 0 else 0
     return {
@@ -275,7 +323,10 @@ async def health():
             "total": pool_status['total'],
             "usage_percent": round(usage_percent, 1),
             "overflow_active": pool_status['overflow']
-        }
+        },
+        "sandbox": sandbox,
+        "scheduler": scheduler,
+        "tools": tools,
     }
 
 
@@ -50,6 +50,10 @@ class Transaction(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint('user_id', 'account_id', 'external_id', name='uq_transactions_user_account_external'),
+    )
+
     def __repr__(self):
         return f"<Transaction(id='{self.id}', symbol='{self.symbol}', type='{self.transaction_type}')>"
 
@@ -52,6 +52,7 @@ class ChatMessageDB(Base):
     name = Column(String, nullable=True)
     latency_ms = Column(Integer, nullable=True)
     resource_id = Column(String, nullable=True, index=True)
+    token_count = Column(Integer, nullable=True)  # tokenizer count of content + tool call args
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     def __repr__(self):
@@ -27,6 +27,12 @@ class ScheduledJob(Base):
 
     status = Column(String, nullable=False, default="pending", index=True)
 
+    # Set while a run is in flight: which waker holds the row and until when.
+    # The holder heartbeats the lease; a lapsed lease means the worker died and
+    # the row goes back to pending.
+    claimed_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
     # Set on Finch-provisioned built-ins ("morning_brief", "heartbeat", …).
     # Doubles as the idempotency handle for schedule(): one row per key per user.
     # Built-ins are exempt from the per-user limits and are pausable, not
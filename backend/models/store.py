@@ -1,7 +1,7 @@
 """
 User-scoped memory store models: StoreFile and Dream.
 """
-from sqlalchemy import Column, String, DateTime, Text, Integer
+from sqlalchemy import Column, String, DateTime, Text, Integer, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 from core.database import Base
@@ -19,6 +19,10 @@ class StoreFile(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "filename", name="uq_store_files_user_filename"),
+    )
+
     def __repr__(self):
         return f"<StoreFile(user='{self.user_id}', filename='{self.filename}')>"
 
@@ -213,7 +213,7 @@ class BaseAgent:
                     # Prune old tool results from in-memory context before each LLM call.
                     # This is transient — the database and chat_history are not affected.
                     # needs_compaction signals the caller to trigger early compaction.
-                    messages_for_llm, needs_compaction = prune_messages(messages)
+                    messages_for_llm, needs_compaction = prune_messages(messages, llm_config.model)
 
                     if needs_compaction:
                         self._needs_early_compaction = True
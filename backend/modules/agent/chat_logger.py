@@ -8,11 +8,19 @@ Directory structure:
 - chat_logs/{date}/{HHMMSS}_{chat_id}/executors/{agent_id}/conversation.json
 
 The datetime prefix ensures chronological ordering when browsing folders.
+
+Writes are write-behind: messages.jsonl is appended in batches by a
+background thread and conversation.json is re-materialized from it only
+every SNAPSHOT_INTERVAL seconds (and at exit), instead of re-serializing the
+whole conversation after every message.
 """
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 from datetime import datetime
+import atexit
 import json
+import threading
+import time
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -133,13 +141,239 @@ def get_existing_master_log_dir(chat_id: str, backend_dir: Path) -> Path | None:
     return get_existing_log_dir(chat_id, backend_dir, agent_type="master")
 
 
+# Seconds between batched appends to messages.jsonl.
+FLUSH_INTERVAL = 0.5
+# Minimum seconds between conversation.json rewrites for one log directory.
+# The snapshot is a readable copy of messages.jsonl, so it can lag.
+SNAPSHOT_INTERVAL = 30.0
+# Log directories idle this long are dropped from memory (reloaded from meta.json).
+_IDLE_SECONDS = 600.0
+
+
+class _LogState:
+    """
+    State for one log directory, shared by every ChatLogger open on it in
+    this process (a chat turn usually opens several handlers on the same dir).
+    """
+    
+    def __init__(self, log_dir: Path):
+        self.log_dir = log_dir
+        self.conversation_file = log_dir / "conversation.json"
+        self.messages_file = log_dir / "messages.jsonl"
+        self.meta_file = log_dir / "meta.json"
+        self.identity: Dict[str, Any] = {}
+        self.model: Optional[str] = None
+        self.cache_history: List[Dict[str, Any]] = []
+        self.message_count = 0
+        # Snapshot-only fields from the last LLM turn (system_prompt, tools, last_usage, ...)
+        self.header: Dict[str, Any] = {}
+        self.pending: List[str] = []
+        self.snapshot_dirty = False
+        self.meta_dirty = False
+        self.snapshot_at = 0.0
+        self.touched_at = time.monotonic()
+        self._load()
+    
+    def _load(self) -> None:
+        # meta.json is small and holds everything an open needs; only legacy
+        # directories (written before it existed) fall back to the big files.
+        try:
+            if self.meta_file.exists():
+                meta = json.loads(self.meta_file.read_text())
+                self.identity = meta.get("identity", {})
+                self.model = meta.get("model")
+                self.cache_history = meta.get("cache_history", [])
+                self.message_count = meta.get("message_count", 0)
+                return
+            if self.messages_file.exists():
+                with open(self.messages_file, "rb") as f:
+                    self.message_count = sum(1 for line in f if line.strip())
+            if self.conversation_file.exists():
+                existing = json.loads(self.conversation_file.read_text())
+                self.identity = {k: existing[k] for k in ("user_id", "chat_id", "agent_type", "agent_id")
+                                 if k in existing}
+                self.model = existing.get("model")
+                self.cache_history = existing.get("cache_summary", {}).get("history", [])
+        except Exception as e:
+            logger.warning(f"Failed to load chat log state for {self.log_dir}: {e}")
+    
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "identity": dict(self.identity),
+            "model": self.model,
+            "cache_history": list(self.cache_history),
+            "message_count": self.message_count,
+        }
+    
+    def write_snapshot(self, header: Dict[str, Any], meta: Dict[str, Any]) -> None:
+        """Materialize conversation.json from messages.jsonl plus the latest header."""
+        messages = []
+        if self.messages_file.exists():
+            with open(self.messages_file, "r") as f:
+                messages = [json.loads(line) for line in f if line.strip()]
+        data = {
+            **self.identity,
+            "model": meta["model"],
+            "updated_at": datetime.now().isoformat(),
+            "system_prompt": header.get("system_prompt"),
+            "messages": messages,
+            "message_count": len(messages),
+        }
+        for key in ("last_usage", "note", "tools"):
+            if key in header:
+                data[key] = header[key]
+        if "cache_summary" in header:
+            data["cache_summary"] = header["cache_summary"]
+        elif meta["cache_history"]:
+            data["cache_summary"] = {"history": meta["cache_history"]}
+        
+        temp_file = self.conversation_file.with_suffix('.tmp')
+        with open(temp_file, "w") as f:
+            json.dump(data, f, indent=2)
+        temp_file.replace(self.conversation_file)
+        logger.debug(f"💾 Saved conversation snapshot ({len(messages)} messages)")
+
+
+class _ChatLogWriter:
+    """
+    Background writer for all chat logs in the process.
+    
+    Message appends are queued and written in batches every FLUSH_INTERVAL
+    (one open+write per file per batch). conversation.json is rewritten at
+    most once per SNAPSHOT_INTERVAL per directory, plus on flush(force=True)
+    and at interpreter exit.
+    """
+    
+    def __init__(self):
+        self._states: Dict[Path, _LogState] = {}
+        self._lock = threading.Lock()      # guards state fields
+        self._io_lock = threading.Lock()   # one flush at a time, keeps appends ordered
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def state(self, log_dir: Path) -> _LogState:
+        with self._lock:
+            st = self._states.get(log_dir)
+            if st is None:
+                st = self._states[log_dir] = _LogState(log_dir)
+            st.touched_at = time.monotonic()
+            return st
+    
+    def append(self, st: _LogState, line: str) -> None:
+        with self._lock:
+            st.pending.append(line)
+            st.message_count += 1
+            st.meta_dirty = True
+        self._ensure_thread()
+    
+    def set_identity(self, st: _LogState, identity: Dict[str, Any]) -> None:
+        """Stamp who the log belongs to. Kept in meta.json, so a state evicted
+        while idle comes back with it."""
+        with self._lock:
+            if st.identity != identity:
+                st.identity = identity
+                st.meta_dirty = True
+    
+    def rewrite(self, st: _LogState, lines: List[str]) -> None:
+        """Replace messages.jsonl wholesale. Queued appends are superseded."""
+        with self._io_lock:
+            with self._lock:
+                st.pending = []
+                st.message_count = len(lines)
+                st.meta_dirty = True
+            st.log_dir.mkdir(parents=True, exist_ok=True)
+            with open(st.messages_file, "w") as f:
+                f.writelines(lines)
+    
+    def mark_dirty(self, st: _LogState) -> None:
+        with self._lock:
+            st.snapshot_dirty = True
+            st.meta_dirty = True
+        self._ensure_thread()
+    
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+            self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Chat log flush failed: {e}", exc_info=True)
+    
+    def flush(self, force: bool = False) -> None:
+        """Write queued appends and meta; snapshots when due (or all dirty ones if force)."""
+        with self._io_lock:
+            now = time.monotonic()
+            with self._lock:
+                appends, metas, snapshots = [], [], []
+                for st in list(self._states.values()):
+                    if st.pending:
+                        appends.append((st, st.pending))
+                        st.pending = []
+                    if st.meta_dirty:
+                        metas.append((st, st.meta()))
+                        st.meta_dirty = False
+                    if st.snapshot_dirty and (force or now - st.snapshot_at >= SNAPSHOT_INTERVAL):
+                        snapshots.append((st, dict(st.header), st.meta()))
+                        st.snapshot_dirty = False
+                        st.snapshot_at = now
+                    elif not st.snapshot_dirty and not st.pending and now - st.touched_at > _IDLE_SECONDS:
+                        del self._states[st.log_dir]
+            
+            for st, lines in appends:
+                try:
+                    st.log_dir.mkdir(parents=True, exist_ok=True)
+                    with open(st.messages_file, "a") as f:
+                        f.write("".join(lines))
+                except Exception as e:
+                    logger.error(f"Failed to append {len(lines)} message(s) to log: {e}")
+            for st, meta in metas:
+                try:
+                    st.log_dir.mkdir(parents=True, exist_ok=True)
+                    temp_file = st.meta_file.with_suffix('.tmp')
+                    temp_file.write_text(json.dumps(meta))
+                    temp_file.replace(st.meta_file)
+                except Exception as e:
+                    logger.error(f"Failed to write chat log meta: {e}")
+            for st, header, meta in snapshots:
+                try:
+                    st.write_snapshot(header, meta)
+                except Exception as e:
+                    logger.error(f"Failed to write conversation snapshot: {e}", exc_info=True)
+
+
+chat_log_writer = _ChatLogWriter()
+atexit.register(chat_log_writer.flush, True)
+
+
+def _system_prompt_text(system_prompt) -> Optional[str]:
+    if isinstance(system_prompt, list):
+        # Claude format with cache control
+        return "\n".join([
+            block.get("text", "") 
+            for block in system_prompt 
+            if block.get("type") == "text"
+        ])
+    return system_prompt or None
+
+
 class ChatLogger:
     """
     Chat logger - saves full conversation state with tool results.
     
     Structure:
-    - conversation.json: Full conversation including tool results
-    - messages.jsonl: Append-only message log for reconstructing history
+    - messages.jsonl: Append-only message log (source of truth)
+    - conversation.json: Periodic readable snapshot of messages.jsonl plus the
+      last turn's system prompt, tools and cache stats
+    - meta.json: Small index (identity, model, cache history, message count) read on open
+    
+    Writes are queued to a background writer, so logging never blocks the
+    stream on disk I/O. Call flush() to force everything out.
     
     This logger captures the complete conversation cycle:
     1. User message
@@ -157,38 +391,39 @@ class ChatLogger:
         self.conversation_file = log_dir / "conversation.json"
         self.messages_file = log_dir / "messages.jsonl"
         
-        # Model that is actually running this chat. Stamped as soon as it is
-        # resolved (before the first LLM call) so a stream that crashes early
-        # still records which model ran, instead of leaving model unknown.
-        self.model: Optional[str] = None
-
-        # In-memory message buffer for building complete conversation
-        self._messages: List[Dict[str, Any]] = []
-        
-        # Load existing messages from file if it exists
-        if self.messages_file.exists():
-            try:
-                with open(self.messages_file, "r") as f:
-                    self._messages = [json.loads(line) for line in f if line.strip()]
-                logger.debug(f"📂 Loaded {len(self._messages)} messages from existing log")
-            except Exception as e:
-                logger.warning(f"Failed to load existing messages: {e}")
-                self._messages = []
-        
-        # Load existing cache history from conversation file if it exists
-        self.cache_history = []
-        if self.conversation_file.exists():
-            try:
-                with open(self.conversation_file, "r") as f:
-                    existing_data = json.load(f)
-                    cache_summary = existing_data.get("cache_summary", {})
-                    self.cache_history = cache_summary.get("history", [])
-                    # Carry forward a model already recorded by an earlier
-                    # handler for this chat (handlers share the same file).
-                    self.model = existing_data.get("model") or self.model
-            except Exception as e:
-                logger.warning(f"Failed to load existing cache history: {e}")
-                self.cache_history = []
+        chat_log_writer.set_identity(chat_log_writer.state(log_dir), {
+            "user_id": user_id,
+            "chat_id": chat_id,
+            "agent_type": agent_type,
+            "agent_id": agent_id,
+        })
+    
+    @property
+    def _state(self) -> _LogState:
+        return chat_log_writer.state(self.log_dir)
+    
+    # Model that is actually running this chat. Stamped as soon as it is
+    # resolved (before the first LLM call) so a stream that crashes early
+    # still records which model ran, instead of leaving model unknown.
+    # Shared by every handler logging to the same directory.
+    @property
+    def model(self) -> Optional[str]:
+        return self._state.model
+    
+    @model.setter
+    def model(self, value: Optional[str]) -> None:
+        st = self._state
+        if value != st.model:
+            st.model = value
+            chat_log_writer.mark_dirty(st)
+    
+    @property
+    def cache_history(self) -> List[Dict[str, Any]]:
+        return self._state.cache_history
+    
+    @property
+    def message_count(self) -> int:
+        return self._state.message_count
     
     def add_message(self, message: Dict[str, Any], update_snapshot: bool = True):
         """
@@ -196,7 +431,7 @@ class ChatLogger:
         
         Args:
             message: Message dict with role, content, etc.
-            update_snapshot: Whether to update the conversation.json snapshot
+            update_snapshot: Whether conversation.json should pick this up
         """
         # Add timestamp for tracking
         message_with_time = {
@@ -204,19 +439,14 @@ class ChatLogger:
             "logged_at": datetime.now().isoformat()
         }
         
-        self._messages.append(message_with_time)
-        
-        # Append to jsonl file immediately (append-only, always safe)
+        st = self._state
         try:
-            self.log_dir.mkdir(parents=True, exist_ok=True)
-            with open(self.messages_file, "a") as f:
-                f.write(json.dumps(message_with_time) + "\n")
+            chat_log_writer.append(st, json.dumps(message_with_time) + "\n")
         except Exception as e:
             logger.error(f"Failed to append message to log: {e}")
         
-        # Update conversation snapshot if requested
         if update_snapshot:
-            self._write_conversation_snapshot()
+            chat_log_writer.mark_dirty(st)
     
     def add_tool_results(self, tool_messages: List[Dict[str, Any]]):
         """
@@ -226,11 +456,8 @@ class ChatLogger:
             tool_messages: List of tool result messages
         """
         for msg in tool_messages:
-            # Don't update snapshot on each message, we'll do one update at the end
             self.add_message(msg, update_snapshot=False)
-        
-        # Update snapshot once after all tool results are added
-        self._write_conversation_snapshot()
+        chat_log_writer.mark_dirty(self._state)
         
         logger.info(f"💾 Added {len(tool_messages)} tool result messages to conversation log")
     
@@ -258,120 +485,45 @@ class ChatLogger:
             system_prompt: System prompt (Claude format, may be list of blocks)
             tools: Full tool definitions sent to LLM
         """
-        # Add the assistant response to our message log
-        self.add_message(assistant_response)
-        
-        # Update the conversation snapshot file
-        self._write_conversation_file(
-            messages=self._messages.copy(),
-            usage_data=usage_data,
-            model=model,
-            system_prompt=system_prompt,
-            tools=tools
-        )
-    
-    def _write_conversation_snapshot(self):
-        """
-        Write a quick conversation snapshot with current messages.
-        Used for continuous saving during the conversation.
-        """
-        try:
-            self.log_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Build minimal conversation snapshot
-            data = {
-                "user_id": self.user_id,
-                "chat_id": self.chat_id,
-                "agent_type": self.agent_type,
-                "agent_id": self.agent_id,
-                "model": self.model,
-                "updated_at": datetime.now().isoformat(),
-                "messages": self._messages,
-                "message_count": len(self._messages)
-            }
-
-            # Include cache summary if we have it
-            if self.cache_history:
-                data["cache_summary"] = {"history": self.cache_history}
-            
-            # Write conversation file atomically
-            temp_file = self.conversation_file.with_suffix('.tmp')
-            with open(temp_file, "w") as f:
-                json.dump(data, f, indent=2)
-            temp_file.replace(self.conversation_file)
-            
-        except Exception as e:
-            logger.error(f"Failed to write conversation snapshot: {e}")
+        self.add_message(assistant_response, update_snapshot=False)
+        self._set_turn_header(usage_data, model, system_prompt, tools)
     
-    def _write_conversation_file(
+    def _set_turn_header(
         self,
-        messages: List[Dict[str, Any]],
         usage_data: Optional[Dict[str, Any]] = None,
         model: str = "unknown",
         system_prompt: Optional[str] = None,
         tools: Optional[List[Dict[str, Any]]] = None
     ):
-        """Write the full conversation snapshot file with all metadata."""
-        try:
-            self.log_dir.mkdir(parents=True, exist_ok=True)
-
-            # Prefer a concretely-known model; keep self.model as the source of
-            # truth so quick snapshots written later stay consistent.
-            if model and model != "unknown":
-                self.model = model
-            model = self.model or model
-
-            # Extract system prompt text
-            system_content = None
-            if isinstance(system_prompt, list):
-                system_content = "\n".join([
-                    block.get("text", "") 
-                    for block in system_prompt 
-                    if block.get("type") == "text"
-                ])
-            elif system_prompt:
-                system_content = system_prompt
-            
-            # Build conversation snapshot
-            data = {
-                "user_id": self.user_id,
-                "chat_id": self.chat_id,
-                "agent_type": self.agent_type,
-                "agent_id": self.agent_id,
-                "model": model,
-                "updated_at": datetime.now().isoformat(),
-                "system_prompt": system_content,
-                "messages": messages,
-                "message_count": len(messages)
-            }
-            
-            # Add usage data
-            if usage_data:
-                data["last_usage"] = usage_data
-                self._update_cache_stats(data, usage_data, messages)
-            
-            if tools:
-                data["tools"] = tools
-            
-            # Write conversation file atomically
-            temp_file = self.conversation_file.with_suffix('.tmp')
-            with open(temp_file, "w") as f:
-                json.dump(data, f, indent=2)
-            temp_file.replace(self.conversation_file)
-            
-            logger.info(f"💾 Saved conversation snapshot ({len(messages)} messages)")
-            
-        except Exception as e:
-            logger.error(f"Failed to write conversation file: {e}", exc_info=True)
+        """Record the last turn's metadata for the next snapshot."""
+        # Prefer a concretely-known model; keep self.model as the source of
+        # truth so later snapshots stay consistent.
+        if model and model != "unknown":
+            self.model = model
+        
+        header: Dict[str, Any] = {"system_prompt": _system_prompt_text(system_prompt)}
+        if usage_data:
+            header["last_usage"] = usage_data
+            self._update_cache_stats(header, usage_data, self.message_count)
+        if tools:
+            header["tools"] = tools
+        
+        st = self._state
+        st.header = header
+        chat_log_writer.mark_dirty(st)
+    
+    def flush(self):
+        """Write everything queued, including an up-to-date conversation.json."""
+        chat_log_writer.flush(force=True)
     
-    def _update_cache_stats(self, data: Dict, usage_data: Dict, messages: List):
+    def _update_cache_stats(self, data: Dict, usage_data: Dict, message_count: int):
         """Update cache statistics in the conversation data."""
         cache_info = usage_data.get("cache", {})
         if not cache_info:
             data["note"] = "Usage statistics unavailable in Claude streaming mode"
             return
         
-        turn_number = len(messages) // 2
+        turn_number = message_count // 2
         
         total_input_tokens = usage_data.get("prompt_tokens", 0)
         cache_read_tokens = cache_info.get("read_tokens", 0)
@@ -384,7 +536,7 @@ class ChatLogger:
         
         cache_entry = {
             "turn": turn_number,
-            "message_count": len(messages),
+            "message_count": message_count,
             "new_input_tokens": new_input_tokens,
             "cache_read_tokens": cache_read_tokens,
             "total_input_tokens": total_input_tokens,
@@ -452,126 +604,13 @@ class ChatLogger:
             system_prompt: System prompt
             tools: Tool definitions
         """
-        self._messages = messages
-        self._write_conversation_file(messages, usage_data, model, system_prompt, tools)
         try:
-            # Create log directory if needed
-            self.log_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Extract system prompt text
-            system_content = None
-            if isinstance(system_prompt, list):
-                # Claude format with cache control
-                system_content = "\n".join([
-                    block.get("text", "") 
-                    for block in system_prompt 
-                    if block.get("type") == "text"
-                ])
-            elif system_prompt:
-                system_content = system_prompt
-            
-            # Build conversation snapshot
-            data = {
-                "user_id": self.user_id,
-                "chat_id": self.chat_id,
-                "model": model,
-                "updated_at": datetime.now().isoformat(),
-                "system_prompt": system_content,
-                "messages": messages,
-                "message_count": len(messages)
-            }
-            
-            # Add usage data from this turn (if available)
-            if usage_data:
-                data["last_usage"] = usage_data
-                
-                # Track cache growth over time
-                cache_info = usage_data.get("cache", {})
-                if cache_info:
-                    turn_number = len(messages) // 2  # Approximate turn number
-                    
-                    # According to Anthropic docs:
-                    # - prompt_tokens = TOTAL input tokens
-                    # - cache_read_input_tokens = tokens from cache
-                    # - cache_creation_input_tokens = tokens being written to cache
-                    # - input_tokens (in detailed response) = tokens AFTER last breakpoint
-                    # Formula: prompt_tokens = cache_read + cache_creation + input_tokens
-                    total_input_tokens = usage_data.get("prompt_tokens", 0)
-                    cache_read_tokens = cache_info.get("read_tokens", 0)
-                    cache_creation_tokens = cache_info.get("creation_tokens", 0)
-                    # Actual new input = cache creation + input tokens after breakpoint
-                    new_input_tokens = cache_creation_tokens + (total_input_tokens - cache_read_tokens - cache_creation_tokens)
-                    
-                    # Calculate cost savings
-                    # Cache reads cost 10% of normal tokens, creation costs 25% more
-                    full_price_cost = total_input_tokens * 1.0  # What we'd pay without cache
-                    actual_cost = new_input_tokens * 1.0 + cache_read_tokens * 0.1  # What we actually pay
-                    cost_savings_pct = ((full_price_cost - actual_cost) / full_price_cost * 100) if full_price_cost > 0 else 0
-                    
-                    cache_entry = {
-                        "turn": turn_number,
-                        "message_count": len(messages),
-                        "new_input_tokens": new_input_tokens,  # Actually new/uncached tokens
-                        "cache_read_tokens": cache_read_tokens,  # Tokens from cache
-                        "total_input_tokens": total_input_tokens,  # Total (as reported by API)
-                        "cache_creation_tokens": cache_info.get("creation_tokens", 0),
-                        "cache_hit": cache_info.get("cache_hit", False),
-                        "cache_hit_rate": f"{(cache_read_tokens / total_input_tokens * 100) if total_input_tokens > 0 else 0:.1f}%",
-                        "cost_savings": f"{cost_savings_pct:.1f}%"
-                    }
-                    self.cache_history.append(cache_entry)
-                    
-                    # Calculate cumulative stats
-                    total_cache_size = sum(entry["cache_creation_tokens"] for entry in self.cache_history)
-                    total_input_all_turns = sum(entry["total_input_tokens"] for entry in self.cache_history)
-                    total_cache_read_all_turns = sum(entry["cache_read_tokens"] for entry in self.cache_history)
-                    
-                    # Calculate cumulative cost savings
-                    total_new_tokens = sum(entry["new_input_tokens"] for entry in self.cache_history)
-                    cumulative_full_cost = total_input_all_turns * 1.0
-                    cumulative_actual_cost = total_new_tokens * 1.0 + total_cache_read_all_turns * 0.1
-                    cumulative_savings_pct = ((cumulative_full_cost - cumulative_actual_cost) / cumulative_full_cost * 100) if cumulative_full_cost > 0 else 0
-                    
-                    data["cache_summary"] = {
-                        "explanation": {
-                            "new_input_tokens": "Tokens sent that weren't in cache (user message + uncached context)",
-                            "cache_creation_tokens": "NEW tokens being added to cache (only content with cache_control breakpoints)",
-                            "cache_read_tokens": "Tokens retrieved from cache (system + tools + cached messages)",
-                            "why_different": "Not all new input is cached - only content at cache_control breakpoints"
-                        },
-                        "this_turn": {
-                            "new_input_tokens": new_input_tokens,
-                            "cache_read_tokens": cache_read_tokens,
-                            "total_input_tokens": total_input_tokens,
-                            "cache_creation_tokens": cache_info.get("creation_tokens", 0),
-                            "cache_hit": cache_info.get("cache_hit", False),
-                            "cache_hit_rate": f"{(cache_read_tokens / total_input_tokens * 100) if total_input_tokens > 0 else 0:.1f}%",
-                            "cost_savings": f"{cost_savings_pct:.1f}%"
-                        },
-                        "cumulative": {
-                            "total_cache_size": total_cache_size,
-                            "total_input_tokens_all_turns": total_input_all_turns,
-                            "total_cache_read_tokens": total_cache_read_all_turns,
-                            "total_new_input_tokens": total_new_tokens,
-                            "avg_cache_hit_rate": f"{(total_cache_read_all_turns / total_input_all_turns * 100) if total_input_all_turns > 0 else 0:.1f}%",
-                            "avg_cost_savings": f"{cumulative_savings_pct:.1f}%"
-                        },
-                        "history": self.cache_history
-                    }
-            else:
+            chat_log_writer.rewrite(self._state, [json.dumps(m) + "\n" for m in messages])
+            self._set_turn_header(usage_data, model, system_prompt, tools)
+            if not usage_data:
                 # Note: Claude streaming doesn't always include usage stats
-                data["note"] = "Usage statistics unavailable in Claude streaming mode"
-            
-            # Add full tool definitions (sent to LLM)
-            if tools:
-                data["tools"] = tools
-            
-            # Replace file with current state
-            with open(self.conversation_file, "w") as f:
-                json.dump(data, f, indent=2)
-            
+                self._state.header["note"] = "Usage statistics unavailable in Claude streaming mode"
+            self.flush()
             logger.info(f"💾 Saved conversation ({len(messages)} messages)")
-            
         except Exception as e:
             logger.error(f"Failed to log conversation: {e}", exc_info=True)
-
@@ -78,8 +78,7 @@ async def _run_memory_flush(chat_id: str, user_id: str, skill_ids: list, db) ->
     should call memory_write for any lasting facts then call idle.
     The user never sees this turn — we consume the stream and discard events.
     """
-    from crud import chat_async
-    from schemas.chat_history import ChatHistory
+    from services.chat_history_cache import chat_history_cache
     from modules.agent.agent_config import create_agent
     from modules.agent.context import AgentContext, generate_agent_id
 
@@ -87,8 +86,7 @@ async def _run_memory_flush(chat_id: str, user_id: str, skill_ids: list, db) ->
 
     try:
         # Load the current (large) history so the agent has context to work from
-        db_messages = await chat_async.get_chat_messages(db, chat_id)
-        chat_history = ChatHistory.from_db_messages(db_messages, chat_id, user_id)
+        chat_history = await chat_history_cache.load(db, chat_id, user_id)
 
         agent_id = generate_agent_id()
         context = AgentContext(
@@ -143,15 +141,13 @@ async def maybe_compact(
         return False
 
     from crud import chat_async
-    from schemas.chat_history import ChatHistory
+    from services.chat_history_cache import chat_history_cache
 
-    db_messages = await chat_async.get_chat_messages(db, chat_id)
-    if not db_messages:
+    history = await chat_history_cache.load(db, chat_id, user_id)
+    if not history.messages:
         return False
 
-    history = ChatHistory.from_db_messages(db_messages, chat_id, user_id)
-    stats = history.get_statistics()
-    estimated_tokens = stats["estimated_tokens"]
+    estimated_tokens = history.token_total
     threshold = _compaction_threshold_tokens()
 
     if not force and estimated_tokens < threshold:
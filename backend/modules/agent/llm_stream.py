@@ -40,6 +40,7 @@ FILE_STREAMING_TOOLS = {'write_chat_file', 'replace_in_chat_file'}
 
 
 from core.model_registry import caching_style, wants_stream_usage, extract_cache_tokens
+from core.token_accounting import message_tokens, messages_tokens
 
 
 
@@ -48,28 +49,13 @@ from core.model_registry import caching_style, wants_stream_usage, extract_cache
 _call_counters: Dict[str, int] = {}
 
 
-def _msg_tokens(msg: Dict[str, Any]) -> int:
-    """Rough token estimate for a single message."""
-    chars = 0
-    content = msg.get("content") or ""
-    if isinstance(content, str):
-        chars += len(content)
-    elif isinstance(content, list):
-        for block in content:
-            if isinstance(block, dict):
-                chars += len(block.get("text", ""))
-    for tc in msg.get("tool_calls") or []:
-        args = tc.get("function", {}).get("arguments", "")
-        chars += len(args) if isinstance(args, str) else 0
-    return chars // 4
-
-
 def _log_cache_diagnostics(
     chat_id: Optional[str],
     call_idx: int,
     messages: List[Dict[str, Any]],
     tools: List[Dict[str, Any]],
     usage_info: Any,
+    model: Optional[str] = None,
 ) -> None:
     """Write per-call cache diagnostics to chat_logs for offline analysis."""
     if not chat_id:
@@ -80,8 +66,11 @@ def _log_cache_diagnostics(
         log_dir = get_chat_log_dir(chat_id, backend_dir)
         cache_log = log_dir / "cache_diagnostics.jsonl"
 
+        msg_tokens = [message_tokens(m, model) for m in messages]
+        prefix_tokens = 0
         breakpoint_positions = []
         for i, msg in enumerate(messages):
+            prefix_tokens += msg_tokens[i]
             content = msg.get("content")
             has_bp = False
             if isinstance(content, list):
@@ -93,17 +82,24 @@ def _log_cache_diagnostics(
                 breakpoint_positions.append({
                     "index": i,
                     "role": msg.get("role", "?"),
-                    "est_tokens": _msg_tokens(msg),
-                    "prefix_tokens": sum(_msg_tokens(messages[j]) for j in range(i + 1)),
+                    "est_tokens": msg_tokens[i],
+                    "prefix_tokens": prefix_tokens,
                 })
 
         tool_bp = None
+        tool_names = []
         for i, t in enumerate(tools or []):
+            tool_names.append(t.get("function", {}).get("name", "?"))
             if "cache_control" in t:
-                tool_bp = {"tool_index": i, "tool_name": t.get("function", {}).get("name", "?")}
+                tool_bp = {"tool_index": i, "tool_name": tool_names[-1]}
+
+        # Same fingerprint call to call means the tools block is byte-identical
+        # and can't be what broke the cached prefix.
+        from modules.tools.registry import tool_registry
+        tools_fp = tool_registry.get_openai_tools_fingerprint(tool_names) if tool_names else None
 
         per_msg = [
-            {"i": i, "role": m.get("role", "?"), "tokens": _msg_tokens(m)}
+            {"i": i, "role": m.get("role", "?"), "tokens": msg_tokens[i]}
             for i, m in enumerate(messages)
         ]
 
@@ -113,6 +109,7 @@ def _log_cache_diagnostics(
             "cache_mode": "automatic",
             "msg_count": len(messages),
             "tool_count": len(tools or []),
+            "tools_fingerprint": tools_fp,
             "breakpoints": breakpoint_positions,
             "tool_breakpoint": tool_bp,
             "messages": per_msg,
@@ -234,9 +231,7 @@ async def stream_llm_response(
     # The API may buffer large tool call arguments (e.g. write_chat_file with
     # a big file_content) and deliver them all at once, so we need generous
     # timeouts — especially mid-tool-call.
-    estimated_tokens = sum(
-        len(str(m.get("content", ""))) // 4 for m in llm_kwargs.get("messages", [])
-    )
+    estimated_tokens = messages_tokens(llm_kwargs.get("messages", []), model_name)
     if estimated_tokens > 200_000:
         chunk_timeout = 600
     elif estimated_tokens > 100_000:
@@ -556,6 +551,7 @@ async def stream_llm_response(
         messages=llm_kwargs.get("messages", []),
         tools=llm_kwargs.get("tools", []),
         usage_info=stream_usage_info,
+        model=model_name,
     )
 
     # Emit end event
@@ -17,13 +17,21 @@ Strategy (adapted from OpenClaw's layered approach):
    is needed.
 
 No soft-trimming (head+tail) — tool results are either kept in full or evicted entirely.
+
+Runs before every LLM call, so it is linear in history length: each message's
+token count (core.token_accounting, memoized across calls) is looked up once
+and evictions adjust a running total instead of re-estimating the whole list.
+The heredoc summary for a bash call is memoized by its arguments, so Phase 0
+only parses calls it hasn't seen before.
 """
-from typing import List, Dict, Any, Tuple, Set
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Set
 import copy
 import json
 import re
 
 from core.config import Config
+from core.token_accounting import count_text, message_tokens, messages_tokens
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -32,30 +40,8 @@ _EVICTED_PLACEHOLDER = "[tool output removed to free context]"
 _CLEARED_ARGS = "{}"
 
 
-def _estimate_tokens(messages: List[Dict[str, Any]]) -> int:
-    total_chars = 0
-    for msg in messages:
-        content = msg.get("content") or ""
-        if isinstance(content, str):
-            total_chars += len(content)
-        elif isinstance(content, list):
-            for block in content:
-                if isinstance(block, dict):
-                    total_chars += len(block.get("text", ""))
-        for tc in msg.get("tool_calls") or []:
-            args = tc.get("function", {}).get("arguments", "")
-            total_chars += len(args) if isinstance(args, str) else 0
-    return total_chars // 4
-
-
-def _content_chars(content) -> int:
-    if not content:
-        return 0
-    if isinstance(content, str):
-        return len(content)
-    if isinstance(content, list):
-        return sum(len(b.get("text", "")) for b in content if isinstance(b, dict))
-    return 0
+def _estimate_tokens(messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+    return messages_tokens(messages, model)
 
 
 def _find_protected_tool_call_ids(messages: List[Dict[str, Any]], keep_last: int) -> set:
@@ -111,6 +97,58 @@ _HEREDOC_OVERWRITE_PATTERN = re.compile(
 
 _MIN_LINES_TO_SUMMARIZE = 15
 
+# bash arguments string → summarized arguments (None = nothing to summarize).
+# Bounded so a long-lived worker doesn't accumulate every script ever written.
+_SUMMARY_CACHE_MAX = 2048
+_summary_cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+
+
+def _summarize_bash_args(args_str) -> Optional[str]:
+    """Summarized JSON arguments for a heredoc-writing bash call, or None."""
+    if not isinstance(args_str, str):
+        return _summarize_bash_args_uncached(args_str)
+    if args_str in _summary_cache:
+        _summary_cache.move_to_end(args_str)
+        return _summary_cache[args_str]
+    summary = _summarize_bash_args_uncached(args_str)
+    _summary_cache[args_str] = summary
+    if len(_summary_cache) > _SUMMARY_CACHE_MAX:
+        _summary_cache.popitem(last=False)
+    return summary
+
+
+def _summarize_bash_args_uncached(args_str) -> Optional[str]:
+    try:
+        args = json.loads(args_str) if isinstance(args_str, str) else args_str
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+    cmd = args.get("cmd", "") if isinstance(args, dict) else ""
+    if not cmd:
+        return None
+
+    new_cmd = cmd
+    any_replaced = False
+    for pattern in (_HEREDOC_OVERWRITE_PATTERN, _HEREDOC_PATTERN):
+        def _replace_match(m):
+            nonlocal any_replaced
+            filepath = m.group(1)
+            body = m.group(3)
+            line_count = body.count("\n") + 1
+            if line_count < _MIN_LINES_TO_SUMMARIZE:
+                return m.group(0)
+            any_replaced = True
+            op = ">>" if pattern is _HEREDOC_PATTERN else ">"
+            return f"# [wrote {line_count} lines to {filepath}]\ncat {op} {filepath} << 'SUMMARIZED'\n# ... content on disk ...\nSUMMARIZED"
+
+        new_cmd = pattern.sub(_replace_match, new_cmd)
+
+    if not any_replaced:
+        return None
+    new_args = dict(args)
+    new_args["cmd"] = new_cmd
+    return json.dumps(new_args)
+
 
 def _summarize_file_writes(messages: List[Dict[str, Any]], protected_ids: Set[str]) -> Tuple[List[Dict[str, Any]], int]:
     """
@@ -139,40 +177,10 @@ def _summarize_file_writes(messages: List[Dict[str, Any]], protected_ids: Set[st
                 new_tool_calls.append(tc)
                 continue
 
-            args_str = fn.get("arguments", "")
-            try:
-                args = json.loads(args_str) if isinstance(args_str, str) else args_str
-            except (json.JSONDecodeError, TypeError):
-                new_tool_calls.append(tc)
-                continue
-
-            cmd = args.get("cmd", "") if isinstance(args, dict) else ""
-            if not cmd:
-                new_tool_calls.append(tc)
-                continue
-
-            new_cmd = cmd
-            any_replaced = False
-            for pattern in (_HEREDOC_OVERWRITE_PATTERN, _HEREDOC_PATTERN):
-                def _replace_match(m):
-                    nonlocal any_replaced
-                    filepath = m.group(1)
-                    body = m.group(3)
-                    line_count = body.count("\n") + 1
-                    if line_count < _MIN_LINES_TO_SUMMARIZE:
-                        return m.group(0)
-                    any_replaced = True
-                    op = ">>" if pattern is _HEREDOC_PATTERN else ">"
-                    return f"# [wrote {line_count} lines to {filepath}]\ncat {op} {filepath} << 'SUMMARIZED'\n# ... content on disk ...\nSUMMARIZED"
-
-                new_cmd = pattern.sub(_replace_match, new_cmd)
-
-            if any_replaced:
-                new_args = dict(args) if isinstance(args, dict) else {"cmd": new_cmd}
-                if isinstance(args, dict):
-                    new_args["cmd"] = new_cmd
+            summary = _summarize_bash_args(fn.get("arguments", ""))
+            if summary is not None:
                 new_tc = copy.deepcopy(tc)
-                new_tc["function"]["arguments"] = json.dumps(new_args)
+                new_tc["function"]["arguments"] = summary
                 new_tool_calls.append(new_tc)
                 changed = True
                 summarized += 1
@@ -189,7 +197,9 @@ def _summarize_file_writes(messages: List[Dict[str, Any]], protected_ids: Set[st
     return result, summarized
 
 
-def prune_messages(messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], bool]:
+def prune_messages(
+    messages: List[Dict[str, Any]], model: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], bool]:
     """
     Return a pruned copy of `messages` suitable for sending to the LLM,
     plus a boolean indicating whether early compaction should be triggered.
@@ -201,7 +211,7 @@ def prune_messages(messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]]
 
     ctx_window = Config.CONTEXT_WINDOW_TOKENS
     keep_last = Config.CONTEXT_PRUNE_KEEP_LAST_ASSISTANTS
-    single_cap_chars = int(ctx_window * Config.CONTEXT_SINGLE_TOOL_RESULT_RATIO * 4)
+    single_cap_tokens = int(ctx_window * Config.CONTEXT_SINGLE_TOOL_RESULT_RATIO)
     budget_tokens = int(ctx_window * Config.CONTEXT_BUDGET_RATIO)
     overflow_tokens = int(ctx_window * Config.CONTEXT_OVERFLOW_RATIO)
 
@@ -213,51 +223,50 @@ def prune_messages(messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]]
     # source in tool call args with a short summary to save context.
     messages, file_write_count = _summarize_file_writes(messages, protected_ids)
 
+    # Per-message token counts, looked up once; every later phase adjusts the
+    # running total by the delta of what it changes.
+    placeholder_tokens = count_text(_EVICTED_PLACEHOLDER, model)
+    costs = [message_tokens(m, model) for m in messages]
+    total_tokens = sum(costs)
+
     # --- Phase 1: Cap oversized individual tool results ---
-    phase1: List[Dict[str, Any]] = []
+    phase1: List[Dict[str, Any]] = list(messages)
+    evictable: List[int] = []
     capped_count = 0
-    for msg in messages:
-        if msg.get("role") == "tool":
-            chars = _content_chars(msg.get("content"))
-            tc_id = msg.get("tool_call_id")
-            if chars > single_cap_chars and tc_id not in protected_ids:
-                msg_copy = copy.copy(msg)
-                msg_copy["content"] = _EVICTED_PLACEHOLDER
-                phase1.append(msg_copy)
-                capped_count += 1
-                if tc_id:
-                    evicted_ids.add(tc_id)
-                continue
-        phase1.append(msg)
+    for i, msg in enumerate(phase1):
+        if msg.get("role") != "tool":
+            continue
+        tc_id = msg.get("tool_call_id")
+        if tc_id in protected_ids:
+            continue
+        if costs[i] > single_cap_tokens:
+            msg_copy = copy.copy(msg)
+            msg_copy["content"] = _EVICTED_PLACEHOLDER
+            phase1[i] = msg_copy
+            total_tokens += placeholder_tokens - costs[i]
+            costs[i] = placeholder_tokens
+            capped_count += 1
+            if tc_id:
+                evicted_ids.add(tc_id)
+        elif msg.get("content") != _EVICTED_PLACEHOLDER:
+            evictable.append(i)
 
     # --- Phase 2: Oldest-first eviction if over budget ---
-    estimated = _estimate_tokens(phase1)
     evicted_count = 0
 
-    if estimated > budget_tokens:
-        # Collect indices of evictable tool results (oldest first, unprotected)
-        evictable: List[int] = []
-        for i, msg in enumerate(phase1):
-            if (
-                msg.get("role") == "tool"
-                and msg.get("tool_call_id") not in protected_ids
-                and msg.get("content") != _EVICTED_PLACEHOLDER
-            ):
-                evictable.append(i)
-
-        # Evict oldest first until under budget
-        phase1 = list(phase1)  # ensure we can mutate
-        for idx in evictable:
-            if _estimate_tokens(phase1) <= budget_tokens:
-                break
-            tc_id = phase1[idx].get("tool_call_id")
-            phase1[idx] = copy.copy(phase1[idx])
-            phase1[idx]["content"] = _EVICTED_PLACEHOLDER
-            evicted_count += 1
-            if tc_id:
-                evicted_ids.add(tc_id)
+    for idx in evictable:
+        if total_tokens <= budget_tokens:
+            break
+        tc_id = phase1[idx].get("tool_call_id")
+        phase1[idx] = copy.copy(phase1[idx])
+        phase1[idx]["content"] = _EVICTED_PLACEHOLDER
+        total_tokens += placeholder_tokens - costs[idx]
+        costs[idx] = placeholder_tokens
+        evicted_count += 1
+        if tc_id:
+            evicted_ids.add(tc_id)
 
-        estimated = _estimate_tokens(phase1)
+    estimated = total_tokens
 
     # --- Phase 2b: Clear tool call arguments for evicted results ---
     if evicted_ids:
@@ -266,10 +275,12 @@ def prune_messages(messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]]
         for i, msg in enumerate(phase1):
             if msg.get("role") != "assistant" or not msg.get("tool_calls"):
                 continue
-            has_evicted = any(tc.get("id") in evicted_ids for tc in msg["tool_calls"])
-            if has_evicted:
+            if any(tc.get("id") in evicted_ids for tc in msg["tool_calls"]):
                 phase1[i] = copy.deepcopy(msg)
-        _clear_tool_call_args(phase1, evicted_ids)
+                _clear_tool_call_args([phase1[i]], evicted_ids)
+                new_cost = message_tokens(phase1[i], model)
+                total_tokens += new_cost - costs[i]
+                costs[i] = new_cost
 
     if capped_count or evicted_count or file_write_count:
         logger.debug(
@@ -280,8 +291,7 @@ def prune_messages(messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]]
         )
 
     # --- Phase 3: Check overflow → signal early compaction ---
-    # Re-estimate after clearing args
-    estimated = _estimate_tokens(phase1)
+    estimated = total_tokens
     needs_compaction = estimated > overflow_tokens
 
     if needs_compaction:
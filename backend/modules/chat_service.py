@@ -12,8 +12,8 @@ from core.config import Config
 from .context_manager import context_manager
 from core.database import get_db_session
 from modules.agent.context import AgentContext, generate_agent_id, register_context, unregister_context
-from schemas.chat_history import ChatHistory
 from crud import chat_async
+from services.chat_history_cache import chat_history_cache
 from utils.logger import get_logger
 from utils.tracing import get_tracer
 from modules.tools import tool_registry
@@ -110,16 +110,16 @@ class ChatService:
                         logger.warning(f"Ignoring non-selectable model '{requested_model}' for chat {chat_id}")
                     effective_model = db_chat.model  # None => default in create_agent
                 
-                # Load chat history using ChatHistory model
-                db_messages = await chat_async.get_chat_messages(db, chat_id)
+                # Load chat history (cached between turns; only the rows since
+                # the latest compaction are read, and only when they changed)
+                db_messages = await chat_history_cache.rows(db, chat_id)
                 
                 # Clean up incomplete tool call sequences (Anthropic requirement)
-                removed_count = await chat_async.cleanup_incomplete_tool_sequences(db, chat_id)
+                removed_count = await chat_async.cleanup_incomplete_tool_sequences(db, chat_id, messages=db_messages)
                 if removed_count > 0:
                     logger.warning(f"Removed {removed_count} incomplete tool message(s) from history")
-                    db_messages = await chat_async.get_chat_messages(db, chat_id)
                 
-                history = ChatHistory.from_db_messages(db_messages, chat_id, user_id)
+                history = await chat_history_cache.load(db, chat_id, user_id)
                 
                 # Save user message FIRST before streaming (to both DB and conversation log)
                 current_sequence = await chat_async.get_next_sequence(db, chat_id)
@@ -528,8 +528,7 @@ class ChatService:
 
     async def get_chat_history(self, chat_id: str, db=None) -> List[dict]:
         async def _run(db):
-            messages = await chat_async.get_chat_messages(db, chat_id)
-            history = ChatHistory.from_db_messages(messages, chat_id, user_id=None)
+            history = await chat_history_cache.load(db, chat_id, user_id=None)
             return history.to_openai_format()
         return await self._with_db(db, _run)
 
@@ -3,7 +3,8 @@ Build portfolio value history from SnapTrade activities + FMP daily prices.
 
 equity[day] = sum(holdings[sym] * close_price[sym]) + cash[day]
 
-- Holdings replayed from activities (buys, sells, splits, option events)
+- Holdings replayed from activities (buys, sells, splits, option events) into a
+  weekday × symbol matrix; equity is one elementwise product + row sum
 - Validated against SnapTrade's current positions; correction applied retroactively
 - Cash anchored to SnapTrade's current cash, adjusted by cumulative activity amounts
 - Daily resolution only (end-of-day close prices)
@@ -15,6 +16,8 @@ from datetime import date, timedelta
 from collections import defaultdict
 import time as _time
 
+import numpy as np
+
 _activities_cache: Dict[Tuple[str, str], Tuple[float, List[dict]]] = {}
 _price_cache: Dict[str, Dict[str, float]] = {}
 _split_cache: Dict[str, List[dict]] = {}
@@ -44,6 +47,7 @@ def build_portfolio_history(
     from modules.tools.clients.snaptrade import snaptrade_tools
     from modules.tools.clients.snaptrade_helpers import _get_session_sync
     from skills.financial_modeling_prep.scripts.api import fmp
+    from skills._shared.bar_store import daily_closes
     from concurrent.futures import ThreadPoolExecutor
     import time
 
@@ -212,51 +216,32 @@ def build_portfolio_history(
 
     all_activities.sort(key=lambda a: a["date"])
 
-    # ── 5. Replay activities day by day ──
+    # ── 5. Replay activities into a weekday × symbol holdings matrix ──
     if use_incremental:
-        holdings = defaultdict(float, cached_holdings)
-        cumulative_cash = cached_cash
+        initial_holdings = dict(cached_holdings)
+        initial_cash = cached_cash
         first_date = date.fromisoformat(activity_start)
     else:
-        holdings: Dict[str, float] = defaultdict(float)
-        cumulative_cash = 0.0
+        initial_holdings = {}
+        initial_cash = 0.0
         first_date = date.fromisoformat(all_activities[0]["date"]) if all_activities else date.today()
 
-    last_date = date.today()
-
-    activities_by_date: Dict[str, List[dict]] = defaultdict(list)
-    for a in all_activities:
-        activities_by_date[a["date"]].append(a)
-
-    daily_state: List[Tuple[str, Dict[str, float], float]] = []
-
-    current = first_date
-    while current <= last_date:
-        d = current.isoformat()
-        for a in activities_by_date.get(d, []):
-            sym = a.get("symbol")
-            atype = a.get("type", "")
-
-            if atype == "_SPLIT" and sym and sym in holdings and holdings[sym] > 0:
-                holdings[sym] = holdings[sym] * a["split_ratio"]
-            elif sym and a.get("units") and atype not in _SKIP_UNITS:
-                holdings[sym] += a["units"]
-                if abs(holdings[sym]) < 0.01:
-                    del holdings[sym]
-
-            cumulative_cash += a.get("amount", 0)
-
-        if current.weekday() < 5:
-            clean = {s: q for s, q in holdings.items() if q > 0.01}
-            daily_state.append((d, dict(clean), cumulative_cash))
-
-        current += timedelta(days=1)
+    days, symbols, qty, cash_by_day = _replay_holdings(
+        all_activities, first_date, date.today(), initial_holdings, initial_cash,
+    )
 
-    if not daily_state:
+    if not days:
         return {"success": False, "error": "No market days computed."}
 
     # ── 6. Correct holdings: snap to actual positions ──
-    replayed_final = daily_state[-1][1]
+    for sym in actual_positions:
+        if sym not in symbols:
+            symbols.append(sym)
+    if len(symbols) > qty.shape[1]:
+        qty = np.hstack([qty, np.zeros((len(days), len(symbols) - qty.shape[1]))])
+    col = {sym: j for j, sym in enumerate(symbols)}
+
+    replayed_final = {sym: float(qty[-1, j]) for j, sym in enumerate(symbols) if qty[-1, j] != 0}
     valid_symbols = set(actual_positions.keys())
 
     # Compute per-symbol correction (actual - replayed)
@@ -273,33 +258,25 @@ def build_portfolio_history(
     # Remove phantoms (replayed > 0 but actual = 0) from all days
     phantoms = {sym for sym, delta in correction.items() if actual_positions.get(sym, 0) < 0.01}
 
-    # Apply corrections retroactively to all days
-    if correction:
-        corrected_state = []
-        for d, h, cc in daily_state:
-            corrected = dict(h)
-            for sym in phantoms:
-                corrected.pop(sym, None)
-            for sym, delta in correction.items():
-                if sym in phantoms:
-                    continue
-                corrected[sym] = corrected.get(sym, 0) + delta
-                if corrected[sym] < 0.01:
-                    corrected.pop(sym, None)
-            corrected_state.append((d, corrected, cc))
-        daily_state = corrected_state
-
-    print(f"📊 {len(daily_state)} market days, {len(valid_symbols)} active positions, {len(correction)} corrections", flush=True)
+    # Apply corrections retroactively to all days (one column op per symbol)
+    for sym, delta in correction.items():
+        j = col[sym]
+        if sym in phantoms:
+            qty[:, j] = 0.0
+        else:
+            shifted = qty[:, j] + delta
+            qty[:, j] = np.where(shifted < 0.01, 0.0, shifted)
+
+    print(f"📊 {len(days)} market days, {len(valid_symbols)} active positions, {len(correction)} corrections", flush=True)
 
     # ── 7. Fetch daily close prices ──
+    held = qty != 0
     symbol_ranges: Dict[str, tuple] = {}
-    for d, h, _ in daily_state:
-        for sym in h:
-            if sym not in symbol_ranges:
-                symbol_ranges[sym] = (d, d)
-            else:
-                symbol_ranges[sym] = (symbol_ranges[sym][0], d)
-    symbol_ranges = {s: r for s, r in symbol_ranges.items() if s}
+    for j in np.flatnonzero(held.any(axis=0)):
+        if not symbols[j]:
+            continue
+        rows = np.flatnonzero(held[:, j])
+        symbol_ranges[symbols[j]] = (days[rows[0]], days[rows[-1]])
 
     to_fetch = {}
     for sym, (from_d, to_d) in symbol_ranges.items():
@@ -315,13 +292,7 @@ def build_portfolio_history(
         def _fetch_price(item):
             sym, (fd, td) = item
             try:
-                data = fmp(f"/historical-price-full/{sym}", {"from": fd, "to": td})
-                prices = {}
-                hist = data.get("historical", []) if isinstance(data, dict) else (data if isinstance(data, list) else [])
-                for bar in hist:
-                    if "date" in bar:
-                        prices[bar["date"]] = bar.get("close", 0)
-                return (sym, prices)
+                return (sym, daily_closes(sym, fd, td))
             except Exception:
                 return (sym, {})
 
@@ -332,28 +303,15 @@ def build_portfolio_history(
         print(f"✅ Prices fetched in {time.time()-t1:.1f}s", flush=True)
 
     # ── 8. Build equity series ──
-    today_cum = daily_state[-1][2]
-
-    new_equity = []
-    for d, h, cum_cash in daily_state:
-        stock_value = 0.0
-        for sym, qty in h.items():
-            prices = _price_cache.get(sym, {})
-            price = prices.get(d)
-            if price is None:
-                dt = date.fromisoformat(d)
-                for i in range(1, 4):
-                    p = (dt - timedelta(days=i)).isoformat()
-                    if p in prices:
-                        price = prices[p]
-                        break
-            if price is not None:
-                stock_value += qty * price
+    prices = _price_matrix(days, symbols, _price_cache)
+    stock_value = (qty * prices).sum(axis=1)
+    cash_on_day = cash_balance - (cash_by_day[-1] - cash_by_day)
+    total = stock_value + cash_on_day
 
-        cash_on_day = cash_balance - (today_cum - cum_cash)
-        total = stock_value + cash_on_day
-        if total > 0:
-            new_equity.append({"date": d, "value": round(total, 2)})
+    new_equity = [
+        {"date": d, "value": round(float(v), 2)}
+        for d, v in zip(days, total) if v > 0
+    ]
 
     # Merge with cached equity for incremental builds
     if use_incremental and cached_equity:
@@ -369,8 +327,8 @@ def build_portfolio_history(
         drift = abs(last_computed - actual_balance) / actual_balance
         print(f"📊 Final: ${last_computed:,.2f} vs actual ${actual_balance:,.2f} (drift={drift:.1%})", flush=True)
 
-    final_holdings = daily_state[-1][1]
-    final_cash = daily_state[-1][2]
+    final_holdings = {sym: float(qty[-1, j]) for j, sym in enumerate(symbols) if qty[-1, j] != 0}
+    final_cash = float(cash_by_day[-1])
 
     print(f"⏱️ Done in {time.time()-t0:.1f}s — {len(equity_series)} daily points", flush=True)
 
@@ -390,6 +348,135 @@ def build_portfolio_history(
     }
 
 
+def _replay_holdings(
+    activities: List[dict],
+    first_date: date,
+    last_date: date,
+    initial_holdings: Dict[str, float],
+    initial_cash: float,
+) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+    """
+    Replay date-sorted activities into (weekdays, symbols, holdings, cash).
+
+    holdings is a weekdays × symbols matrix where each row is the position
+    state after every activity dated on or before that day (weekend activity
+    lands on the following Monday), with positions of 0.01 shares or less
+    shown as 0. cash is the cumulative activity amount per weekday.
+
+    Each symbol is walked only through its own events: a split multiplies a
+    position that is currently held, a position whose magnitude drops under
+    0.01 is closed (reset to exactly 0), and activities outside
+    [first_date, last_date] are ignored. Rows are then filled by
+    searchsorted on event positions — no per-day dict copies.
+    """
+    days: List[str] = []
+    current = first_date
+    while current <= last_date:
+        if current.weekday() < 5:
+            days.append(current.isoformat())
+        current += timedelta(days=1)
+    if not days:
+        return [], [], np.zeros((0, 0)), np.zeros(0)
+
+    lo, hi = first_date.isoformat(), last_date.isoformat()
+    window: List[dict] = []
+    ordinals: List[int] = []
+    for a in activities:
+        d = a.get("date", "")
+        if not (lo <= d <= hi):
+            continue
+        try:
+            parsed = date.fromisoformat(d)
+        except ValueError:
+            continue
+        if parsed.isoformat() != d:
+            continue
+        window.append(a)
+        ordinals.append(parsed.toordinal())
+
+    # Number of in-window events on or before each weekday.
+    day_ordinals = np.array([date.fromisoformat(d).toordinal() for d in days])
+    seen = np.searchsorted(np.array(ordinals, dtype=np.int64), day_ordinals, side="right")
+
+    # Cash: running sum in event order (np.cumsum adds left to right).
+    cash_after = np.cumsum([initial_cash] + [a.get("amount", 0) for a in window])
+    cash_by_day = cash_after[seen]
+
+    # Holdings: per-symbol state transitions, keyed by event position.
+    state: Dict[str, float] = dict(initial_holdings)
+    steps: Dict[str, Tuple[List[int], List[float]]] = {}
+    for i, a in enumerate(window):
+        sym = a.get("symbol")
+        atype = a.get("type", "")
+        if atype == "_SPLIT" and sym and sym in state and state[sym] > 0:
+            state[sym] = state[sym] * a["split_ratio"]
+        elif sym and a.get("units") and atype not in _SKIP_UNITS:
+            state[sym] = state.get(sym, 0.0) + a["units"]
+            if abs(state[sym]) < 0.01:
+                del state[sym]
+        else:
+            continue
+        idx, vals = steps.setdefault(sym, ([], []))
+        idx.append(i)
+        vals.append(state.get(sym, 0.0))
+
+    symbols = list(dict.fromkeys(list(initial_holdings) + list(steps)))
+    qty = np.zeros((len(days), len(symbols)))
+    for j, sym in enumerate(symbols):
+        start = float(initial_holdings.get(sym, 0.0))
+        if sym not in steps:
+            qty[:, j] = start
+            continue
+        idx, vals = steps[sym]
+        # Last step strictly before the day's event cutoff; -1 → initial value.
+        k = np.searchsorted(np.array(idx), seen, side="left") - 1
+        series = np.array([start] + vals)
+        qty[:, j] = series[k + 1]
+
+    qty[qty <= 0.01] = 0.0
+    return days, symbols, qty, cash_by_day
+
+
+def _price_matrix(days: List[str], symbols: List[str], price_cache: Dict[str, Dict[str, float]]) -> np.ndarray:
+    """
+    weekdays × symbols close prices, 0 where no price is usable.
+
+    A day with no close (missing or null) falls back to the nearest of the
+    previous 3 calendar days that has an entry; if that entry is null the
+    position is left unvalued for the day, same as a missing price.
+    """
+    first = date.fromisoformat(days[0]).toordinal() - 3
+    last = date.fromisoformat(days[-1]).toordinal()
+    span = last - first + 1
+    day_pos = np.array([date.fromisoformat(d).toordinal() - first for d in days])
+
+    out = np.zeros((len(days), len(symbols)))
+    for j, sym in enumerate(symbols):
+        prices = price_cache.get(sym)
+        if not prices:
+            continue
+        value = np.full(span, np.nan)
+        has = np.zeros(span, dtype=bool)
+        for d, close in prices.items():
+            try:
+                pos = date.fromisoformat(d).toordinal() - first
+            except (TypeError, ValueError):
+                continue
+            if 0 <= pos < span:
+                has[pos] = True
+                if close is not None:
+                    value[pos] = close
+
+        price = value[day_pos]
+        pending = np.isnan(price)
+        for back in (1, 2, 3):
+            take = pending & has[day_pos - back]
+            price[take] = value[day_pos[take] - back]
+            pending &= ~take
+        out[:, j] = np.where(np.isnan(price), 0.0, price)
+    return out
+
+
 def _extract_ticker(obj) -> str:
     if not obj:
         return ""
@@ -20,7 +20,9 @@ from schemas.snaptrade import (
     SnapTradePositionResponse, SnapTradeAccountResponse
 )
 from schemas.sse import SSEEvent
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
+import time
 
 
 class SnapTradeSession(BaseModel):
@@ -57,6 +59,20 @@ class SnapTradeTools:
         )
         # Cache sessions in memory for performance (but also persist to DB)
         self._sessions: Dict[str, SnapTradeSession] = {}
+        # Dedicated pool for the blocking SDK so a multi-account fan-out
+        # neither starves nor is starved by the loop's default executor.
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.SNAPTRADE_MAX_WORKERS,
+            thread_name_prefix="snaptrade",
+        )
+
+    async def call_sdk(self, fn, timeout: Optional[float] = None):
+        """Run a blocking SDK call on the SnapTrade pool with a timeout."""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, fn),
+            timeout or Config.SNAPTRADE_CALL_TIMEOUT_SECONDS,
+        )
     
     async def _get_session(self, user_id: str) -> Optional[SnapTradeSession]:
         """Get session from cache or database"""
@@ -129,10 +145,8 @@ class SnapTradeTools:
     
     async def _get_accounts(self, user_id: str, user_secret: str) -> List[SnapTradeAccountResponse]:
         """Get user's accounts from SnapTrade and parse with Pydantic"""
-        # Run the synchronous API call in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
+        # Run the synchronous API call on the SnapTrade pool to avoid blocking
+        response = await self.call_sdk(
             lambda: self.client.account_information.list_user_accounts(
                 user_id=user_id,
                 user_secret=user_secret
@@ -154,10 +168,8 @@ class SnapTradeTools:
     
     async def _get_positions_for_account(self, user_id: str, user_secret: str, account_id: str) -> List[Position]:
         """Get positions for a specific account and parse with Pydantic"""
-        # Run the synchronous API call in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
+        # Run the synchronous API call on the SnapTrade pool to avoid blocking
+        response = await self.call_sdk(
             lambda: self.client.account_information.get_user_account_positions(
                 user_id=user_id,
                 user_secret=user_secret,
@@ -189,9 +201,7 @@ class SnapTradeTools:
         get_user_account_balance endpoint because list_user_accounts' balance.total
         is frequently null/stale and can't be relied on for net-of-margin value.
         """
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
+        response = await self.call_sdk(
             lambda: self.client.account_information.get_user_account_balance(
                 user_id=user_id,
                 user_secret=user_secret,
@@ -811,6 +821,7 @@ class SnapTradeTools:
             Dictionary containing portfolio holdings and summary
         """
         try:
+            t_start = time.monotonic()
             print(f"🔍 Checking portfolio for user_id: {user_id}", flush=True)
             
             # Get session from cache or database
@@ -869,59 +880,33 @@ class SnapTradeTools:
             
             # Update activity
             session.last_activity = datetime.now().isoformat()
+            t_accounts = time.monotonic() - t_start
             
             # Map accounts by ID for lookup
             account_map = {acc.id: acc for acc in accounts}
             
-            # Build Account objects with positions
-            accounts_list = []
-            syncing_count = 0
-            
-            for account_id in (session.account_ids or []):
-                account_model = account_map.get(account_id) or SnapTradeAccountResponse(
-                    id=account_id,
-                    name='Unknown Account',
-                    number='',
-                    institution_name='Unknown'
+            # Positions + balance for every account, all at once
+            t_fan = time.monotonic()
+            account_ids = session.account_ids or []
+            results = await asyncio.gather(*[
+                self._load_account(
+                    user_id, session.snaptrade_user_secret, account_id,
+                    account_map.get(account_id) or SnapTradeAccountResponse(
+                        id=account_id,
+                        name='Unknown Account',
+                        number='',
+                        institution_name='Unknown'
+                    ),
                 )
-                
-                status = None
-                try:
-                    positions_list = await self._get_positions_for_account(user_id, session.snaptrade_user_secret, account_id)
-                except Exception as e:
-                    error_str = str(e)
-                    print(f"⚠️ Error fetching positions for account {account_id}: {error_str}", flush=True)
-                    positions_list = []
-                    
-                    if '425' in error_str or '3012' in error_str or 'Too Early' in error_str:
-                        syncing_count += 1
-                        status = 'syncing'
-                    else:
-                        status = 'error'
-                
-                # Net equity = positions + cash, where cash is NEGATIVE on a margin
-                # account (the margin debit). We compute this explicitly rather than
-                # trusting list_user_accounts' balance.total — that field is often
-                # null/stale, and the previous fallback to a bare positions sum
-                # silently dropped margin debt (inflating margin accounts).
-                positions_sum = sum(pos.value for pos in positions_list)
-                cash = 0.0
-                try:
-                    cash = await self._get_cash_for_account(
-                        user_id, session.snaptrade_user_secret, account_id
-                    )
-                except Exception as e:
-                    print(f"⚠️ Cash/balance fetch failed for {account_id}: {str(e)[:80]}", flush=True)
-                    # Fall back to list_user_accounts balance if available, else gross positions.
-                    account_balance = account_model.get_balance()
-                    cash = (account_balance - positions_sum) if account_balance > 0 else 0.0
-                total_value = positions_sum + cash
-
-                accounts_list.append(account_model.to_account(
-                    positions=positions_list,
-                    total_value=total_value,
-                    status=status
-                ))
+                for account_id in account_ids
+            ])
+            accounts_list = [account for account, _ in results]
+            syncing_count = sum(1 for _, status in results if status == 'syncing')
+            print(
+                f"⏱️ get_portfolio: accounts {t_accounts:.2f}s, "
+                f"positions+balances {time.monotonic() - t_fan:.2f}s for {len(account_ids)} account(s)",
+                flush=True,
+            )
             
             # Let Portfolio handle ALL the aggregation!
             portfolio = Portfolio.from_accounts(accounts_list, syncing_count=syncing_count)
@@ -936,6 +921,55 @@ class SnapTradeTools:
                 "message": f"Error fetching portfolio: {str(e)}"
             }
     
+    async def _load_account(
+        self, user_id: str, user_secret: str, account_id: str,
+        account_model: SnapTradeAccountResponse,
+    ) -> tuple:
+        """Fetch one account's positions and cash concurrently.
+
+        Returns (Account, status) where status is None, 'syncing' (SnapTrade
+        still importing — 425/3012) or 'error' (failed or timed out).
+        """
+        positions_res, cash_res = await asyncio.gather(
+            self._get_positions_for_account(user_id, user_secret, account_id),
+            self._get_cash_for_account(user_id, user_secret, account_id),
+            return_exceptions=True,
+        )
+
+        status = None
+        if isinstance(positions_res, BaseException):
+            error_str = str(positions_res) or type(positions_res).__name__
+            print(f"⚠️ Error fetching positions for account {account_id}: {error_str}", flush=True)
+            positions_list = []
+            if '425' in error_str or '3012' in error_str or 'Too Early' in error_str:
+                status = 'syncing'
+            else:
+                status = 'error'
+        else:
+            positions_list = positions_res
+
+        # Net equity = positions + cash, where cash is NEGATIVE on a margin
+        # account (the margin debit). We compute this explicitly rather than
+        # trusting list_user_accounts' balance.total — that field is often
+        # null/stale, and the previous fallback to a bare positions sum
+        # silently dropped margin debt (inflating margin accounts).
+        positions_sum = sum(pos.value for pos in positions_list)
+        if isinstance(cash_res, BaseException):
+            print(f"⚠️ Cash/balance fetch failed for {account_id}: {(str(cash_res) or type(cash_res).__name__)[:80]}", flush=True)
+            # Fall back to list_user_accounts balance if available, else gross positions.
+            account_balance = account_model.get_balance()
+            cash = (account_balance - positions_sum) if account_balance > 0 else 0.0
+        else:
+            cash = cash_res
+        total_value = positions_sum + cash
+
+        account = account_model.to_account(
+            positions=positions_list,
+            total_value=total_value,
+            status=status
+        )
+        return account, status
+
     async def has_active_connection(self, user_id: str) -> bool:
         """Check if user has an active connection"""
         session = await self._get_session(user_id)
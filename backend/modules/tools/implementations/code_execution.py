@@ -14,6 +14,7 @@ from e2b.sandbox.commands.command_handle import CommandExitException
 from e2b.exceptions import TimeoutException
 from modules.agent.context import AgentContext
 from schemas.sse import SSEEvent
+from services.sandbox_listing import sandbox_listing
 from typing import Optional, Dict, Any, AsyncGenerator, List
 from pydantic import BaseModel, Field
 from utils.logger import get_logger
@@ -22,6 +23,7 @@ import hashlib
 import json
 import time
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
@@ -54,7 +56,175 @@ class _SandboxEntry:
 
 # user_id → _SandboxEntry  (in-process cache; rebuilt from DB on server restart)
 _sandboxes: Dict[str, _SandboxEntry] = {}
-_sandboxes_lock = asyncio.Lock()
+
+# Per-user locks serialize resolve/connect/create/upload for one user without
+# making other users wait behind a cold start. Entries are refcounted and
+# dropped once nobody holds or waits on them, so the table stays small.
+_sandbox_locks: Dict[str, asyncio.Lock] = {}
+_sandbox_lock_refs: Dict[str, int] = {}
+
+
+@asynccontextmanager
+async def _user_sandbox_lock(user_id: str):
+    lock = _sandbox_locks.setdefault(user_id, asyncio.Lock())
+    _sandbox_lock_refs[user_id] = _sandbox_lock_refs.get(user_id, 0) + 1
+    started = time.monotonic()
+    try:
+        async with lock:
+            _record_timing("lock_wait", time.monotonic() - started)
+            yield
+    finally:
+        _sandbox_lock_refs[user_id] -= 1
+        if _sandbox_lock_refs[user_id] == 0:
+            _sandbox_lock_refs.pop(user_id, None)
+            _sandbox_locks.pop(user_id, None)
+
+
+# ---------------------------------------------------------------------------
+# Lifecycle timings (lock wait / connect / create / skills upload / pool claim)
+# ---------------------------------------------------------------------------
+
+_timings: Dict[str, Dict[str, float]] = {}
+
+
+def _record_timing(phase: str, seconds: float) -> None:
+    t = _timings.setdefault(phase, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+    t["count"] += 1
+    t["total_s"] += seconds
+    t["max_s"] = max(t["max_s"], seconds)
+    if seconds >= 5:
+        logger.info(f"sandbox {phase} took {seconds:.1f}s")
+
+
+def get_sandbox_metrics() -> Dict[str, Any]:
+    """Per-phase timing aggregates plus live/pool/lock counts."""
+    return {
+        "live": len(_sandboxes),
+        "pool_ready": len(_warm_pool),
+        "locks_held": len(_sandbox_locks),
+        "phases": {
+            phase: {**t, "avg_s": round(t["total_s"] / t["count"], 3) if t["count"] else 0.0}
+            for phase, t in _timings.items()
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Pre-warmed sandbox pool
+# ---------------------------------------------------------------------------
+# When E2B_SANDBOX_POOL_SIZE > 0, a background loop keeps that many sandboxes
+# created with skills, API docs, packages and store layout already in place.
+# A user with no live or resumable sandbox claims one instead of paying for
+# beta_create + upload on the request path.
+#
+# Pool members are created without auto-pause and are not in the DB, so
+# nothing would ever resume one: every member that is discarded, fails to
+# prepare, or is still pooled at shutdown is killed rather than left to idle
+# out. A claimed member therefore ends at its idle timeout instead of pausing,
+# and that user's next call starts a new sandbox.
+
+_warm_pool: List[_SandboxEntry] = []
+_POOL_REFILL_INTERVAL = 60  # seconds
+
+
+async def _create_sandbox(envs: Dict[str, str], auto_pause: bool = True):
+    from e2b_code_interpreter import AsyncSandbox
+    from core.config import Config
+
+    started = time.monotonic()
+    sbx = await AsyncSandbox.beta_create(
+        **({"template": Config.E2B_TEMPLATE_ID} if Config.E2B_TEMPLATE_ID else {}),
+        api_key=Config.E2B_API_KEY,
+        timeout=SANDBOX_IDLE_TIMEOUT,
+        auto_pause=auto_pause,
+        envs=envs,
+    )
+    _record_timing("create", time.monotonic() - started)
+    return sbx
+
+
+async def _load_skills(entry: _SandboxEntry) -> None:
+    started = time.monotonic()
+    new_hash, _ = await asyncio.gather(
+        _upload_skills(entry.sbx),
+        _upload_api_docs(entry.sbx),
+    )
+    await _install_skill_packages(entry.sbx)
+    entry.skills_loaded = True
+    entry.skills_hash = new_hash
+    _record_timing("skills_upload", time.monotonic() - started)
+
+
+async def _kill_quietly(sbx) -> None:
+    try:
+        await sbx.kill()
+    except Exception as e:
+        logger.debug(f"Failed to kill sandbox {sbx.sandbox_id}: {e}")
+
+
+async def _claim_pooled_sandbox() -> Optional[_SandboxEntry]:
+    """Pop a live pre-warmed sandbox, killing any that died while idle."""
+    while _warm_pool:
+        entry = _warm_pool.pop()
+        try:
+            await entry.sbx.set_timeout(SANDBOX_IDLE_TIMEOUT)
+            return entry
+        except Exception as e:
+            logger.debug(f"Discarding dead pooled sandbox {entry.sbx.sandbox_id}: {e}")
+            await _kill_quietly(entry.sbx)
+    return None
+
+
+async def _refill_pool_once(target: int) -> None:
+    # Keep idle members alive; E2B would otherwise kill them at the idle timeout.
+    dead: List[_SandboxEntry] = []
+    for entry in list(_warm_pool):
+        try:
+            await entry.sbx.set_timeout(SANDBOX_IDLE_TIMEOUT)
+        except Exception:
+            dead.append(entry)
+    _warm_pool[:] = [e for e in _warm_pool if e not in dead]
+    for entry in dead:
+        await _kill_quietly(entry.sbx)
+
+    while len(_warm_pool) < target:
+        sbx = await _create_sandbox({}, auto_pause=False)
+        entry = _SandboxEntry(sbx=sbx, skills_loaded=False, envs={})
+        try:
+            await _load_skills(entry)
+            await _ensure_store_layout(sbx)
+        except asyncio.CancelledError:
+            await _kill_quietly(sbx)
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to prepare pooled sandbox {sbx.sandbox_id}: {e}")
+            await _kill_quietly(sbx)
+            return
+        _warm_pool.append(entry)
+        logger.info(f"Pre-warmed sandbox {sbx.sandbox_id} ({len(_warm_pool)}/{target})")
+
+
+async def drain_sandbox_pool() -> int:
+    """Kill every pooled sandbox; returns how many. Called from main on shutdown."""
+    members, _warm_pool[:] = list(_warm_pool), []
+    await asyncio.gather(*(_kill_quietly(e.sbx) for e in members))
+    return len(members)
+
+
+async def run_sandbox_pool_loop() -> None:
+    """Keep E2B_SANDBOX_POOL_SIZE pre-warmed sandboxes ready. Started from main."""
+    from core.config import Config
+
+    target = Config.E2B_SANDBOX_POOL_SIZE
+    if target <= 0 or not Config.E2B_API_KEY:
+        return
+    logger.info(f"Sandbox pool enabled (size={target})")
+    while True:
+        try:
+            await _refill_pool_once(target)
+        except Exception as e:
+            logger.warning(f"Sandbox pool refill failed: {e}")
+        await asyncio.sleep(_POOL_REFILL_INTERVAL)
 
 
 # ---------------------------------------------------------------------------
@@ -128,15 +298,23 @@ async def get_or_create_sandbox(user_id: str, envs: Dict[str, str]) -> _SandboxE
     Resolution order:
     1. In-process cache hit → renew timeout, refresh envs, check hash.
     2. DB record exists → reconnect via AsyncSandbox.connect(); check hash.
-    3. No record / dead sandbox → create new sandbox, upload everything.
+    3. No record / dead sandbox → claim a pre-warmed sandbox from the pool,
+       or create a new one and upload everything.
+
+    Only calls for the same user wait on each other; a cold start for one
+    user never blocks another user's bash call.
 
     The skills hash covers skill files and (when no template is set) the pip
-    package list. Any change triggers a full re-upload automatically.
+    package list. Any change triggers a delta upload of the changed files.
     """
     from e2b_code_interpreter import AsyncSandbox
     from core.config import Config
 
-    async with _sandboxes_lock:
+    # Cached manifest lookup; only walks the skills tree when the throttle
+    # window has passed, and never while holding the lock.
+    current_hash = await asyncio.to_thread(_compute_skills_hash_from_fs)
+
+    async with _user_sandbox_lock(user_id):
         # Scratchpad is wiped only when the sandbox is (re)connected, not on
         # warm cache hits — its lifetime is one running sandbox session.
         fresh_connection = False
@@ -158,11 +336,13 @@ async def get_or_create_sandbox(user_id: str, envs: Dict[str, str]) -> _SandboxE
             record = await _get_user_sandbox_record(user_id)
             if record:
                 try:
+                    started = time.monotonic()
                     sbx = await AsyncSandbox.connect(
                         record.sandbox_id,
                         api_key=Config.E2B_API_KEY,
                         timeout=SANDBOX_IDLE_TIMEOUT,
                     )
+                    _record_timing("connect", time.monotonic() - started)
                     entry = _SandboxEntry(
                         sbx=sbx,
                         skills_loaded=record.skills_loaded,
@@ -182,33 +362,30 @@ async def get_or_create_sandbox(user_id: str, envs: Dict[str, str]) -> _SandboxE
                     )
                     await _delete_user_sandbox_record(user_id)
 
-        # --- 3. Create new sandbox ---
+        # --- 3. Claim a pre-warmed sandbox, or create a new one ---
         if entry is None:
-            sbx = await AsyncSandbox.beta_create(
-                **({"template": Config.E2B_TEMPLATE_ID} if Config.E2B_TEMPLATE_ID else {}),
-                api_key=Config.E2B_API_KEY,
-                timeout=SANDBOX_IDLE_TIMEOUT,
-                auto_pause=True,
-                envs=envs,
-            )
-            entry = _SandboxEntry(sbx=sbx, skills_loaded=False, envs=envs)
+            started = time.monotonic()
+            entry = await _claim_pooled_sandbox()
+            if entry is not None:
+                _record_timing("pool_claim", time.monotonic() - started)
+                entry.envs = envs
+                logger.info(f"Claimed pre-warmed sandbox {entry.sbx.sandbox_id} for user {user_id}")
+            else:
+                sbx = await _create_sandbox(envs)
+                entry = _SandboxEntry(sbx=sbx, skills_loaded=False, envs=envs)
+                logger.info(f"Created new persistent sandbox {sbx.sandbox_id} for user {user_id}")
             _sandboxes[user_id] = entry
             fresh_connection = True
-            await _upsert_user_sandbox(user_id, sbx.sandbox_id, skills_loaded=False)
-            logger.info(f"Created new persistent sandbox {sbx.sandbox_id} for user {user_id}")
+            await _upsert_user_sandbox(
+                user_id, entry.sbx.sandbox_id,
+                skills_loaded=entry.skills_loaded, skills_hash=entry.skills_hash or None,
+            )
 
         # --- 4. Upload skills + runner files if hash has changed ---
-        current_hash = _compute_skills_hash_from_fs()
         if not entry.skills_loaded or entry.skills_hash != current_hash:
             logger.info(f"Uploading skills to sandbox {entry.sbx.sandbox_id} (hash changed or first load)")
-            new_hash, _ = await asyncio.gather(
-                _upload_skills(entry.sbx),
-                _upload_api_docs(entry.sbx),
-            )
-            await _install_skill_packages(entry.sbx)
-            entry.skills_loaded = True
-            entry.skills_hash = new_hash
-            await _upsert_user_sandbox(user_id, entry.sbx.sandbox_id, skills_loaded=True, skills_hash=new_hash)
+            await _load_skills(entry)
+            await _upsert_user_sandbox(user_id, entry.sbx.sandbox_id, skills_loaded=True, skills_hash=entry.skills_hash)
 
         # --- 5. Ensure store directory layout exists ---
         await _ensure_store_layout(entry.sbx)
@@ -317,8 +494,9 @@ async def reset_sandbox(user_id: str) -> None:
     record, and evict from cache. The next execution will create a fresh
     sandbox and re-load skills onto it.
     """
-    async with _sandboxes_lock:
+    async with _user_sandbox_lock(user_id):
         entry = _sandboxes.pop(user_id, None)
+    sandbox_listing.invalidate(user_id)
 
     if entry:
         try:
@@ -351,8 +529,10 @@ async def kill_sandbox(chat_id: str) -> None:
 
 def _compute_skills_hash_from_fs() -> str:
     """
-    MD5 over all files that get uploaded to the sandbox:
-    - backend/skills/** (skill code + SKILL.md files)
+    Hash over everything that gets uploaded to the sandbox:
+    - backend/skills/** via the incrementally maintained skills manifest
+      (path + per-file content hash; re-stat is throttled, so warm calls are
+      a cached lookup)
 
     When no E2B template is configured, also includes the sorted package list
     so that adding/removing a `requires.bins` entry triggers a re-install.
@@ -360,19 +540,13 @@ def _compute_skills_hash_from_fs() -> str:
     When a template is configured, packages are baked into the image and
     excluded from the hash.
 
-    Any change to any of these files invalidates the hash and triggers a full
-    re-upload on the next sandbox run.
+    Any change to any of these files invalidates the hash and triggers a delta
+    upload on the next sandbox run.
     """
     from core.config import Config
+    from modules.tools.skills_manifest import skills_manifest
 
-    h = hashlib.md5()
-
-    # Skills files
-    if _HOST_SKILLS_DIR.exists():
-        for path in sorted(_HOST_SKILLS_DIR.rglob("*")):
-            if path.is_file() and "__pycache__" not in path.parts:
-                h.update(str(path.relative_to(_HOST_SKILLS_DIR)).encode())
-                h.update(path.read_bytes())
+    h = hashlib.md5(skills_manifest.digest.encode())
 
     if not Config.E2B_TEMPLATE_ID:
         from modules.tools.skills_registry import get_all_skill_packages
@@ -382,52 +556,63 @@ def _compute_skills_hash_from_fs() -> str:
     return h.hexdigest()
 
 
+_SKILLS_MANIFEST_PATH = f"{SKILLS_DIR}/.manifest.json"
+_SKILLS_ARCHIVE_PATH = "/tmp/_skills_sync.tar.gz"
+
+
+async def _read_sandbox_skills_manifest(sbx) -> Optional[Dict[str, str]]:
+    """path → md5 of the skill files already on the sandbox volume, or None."""
+    try:
+        raw = await sbx.files.read(_SKILLS_MANIFEST_PATH, format="text")
+        data = json.loads(raw)
+        return data if isinstance(data, dict) else None
+    except Exception:
+        return None
+
+
 async def _upload_skills(sbx) -> str:
     """
-    Upload all skill directories from backend/skills/ to /home/user/skills/
-    on the sandbox volume. Reads directly from the filesystem — no DB needed.
+    Sync backend/skills/ to /home/user/skills/ on the sandbox volume.
+
+    Diffs the host manifest against the one left on the sandbox by the last
+    sync, then ships only changed files as one tar archive, extracts it in a
+    single command and deletes removed files. A sandbox with no manifest
+    gets the full tree (still one archive).
     Returns a hash of the uploaded content so callers can detect future changes.
     """
+    import shlex
+    from modules.tools.skills_manifest import skills_manifest
+
     try:
         if not _HOST_SKILLS_DIR.exists():
             logger.warning(f"Skills directory not found at {_HOST_SKILLS_DIR}")
             return ""
 
-        skill_dirs = [p for p in _HOST_SKILLS_DIR.iterdir() if p.is_dir()]
-        if not skill_dirs:
-            logger.warning(f"No skill subdirectories found in {_HOST_SKILLS_DIR}")
-            return ""
-
-        upload_tasks = []
-        total_files = 0
-
-        for skill_dir in skill_dirs:
-            for file_path in skill_dir.rglob("*"):
-                if not file_path.is_file():
-                    continue
-                if "__pycache__" in file_path.parts:
-                    continue
-                rel = file_path.relative_to(_HOST_SKILLS_DIR)
-                sandbox_path = f"{SKILLS_DIR}/{rel}"
-                try:
-                    content = file_path.read_bytes()
-                    upload_tasks.append((sandbox_path, content))
-                    total_files += 1
-                except Exception as e:
-                    logger.warning(f"Could not read skill file {file_path}: {e}")
-
-        upload_tasks.append((f"{SKILLS_DIR}/__init__.py", b""))
+        await asyncio.to_thread(skills_manifest.refresh, True)
+        remote = await _read_sandbox_skills_manifest(sbx)
+        changed, removed = skills_manifest.diff(remote)
 
-        # Upload files sequentially in small batches to avoid E2B read timeouts
-        BATCH_SIZE = 5
-        for i in range(0, len(upload_tasks), BATCH_SIZE):
-            batch = upload_tasks[i:i + BATCH_SIZE]
-            await asyncio.gather(*[
-                sbx.files.write(path, content, request_timeout=60)
-                for path, content in batch
-            ])
+        archive = await asyncio.to_thread(
+            skills_manifest.build_archive,
+            changed,
+            {"__init__.py": b"", ".manifest.json": skills_manifest.manifest_json()},
+        )
+        await sbx.files.write(_SKILLS_ARCHIVE_PATH, archive, request_timeout=60)
 
-        logger.info(f"Uploaded {len(skill_dirs)} skills ({total_files} files) from {_HOST_SKILLS_DIR}")
+        script = (
+            f"mkdir -p {SKILLS_DIR} && tar -xzf {_SKILLS_ARCHIVE_PATH} -C {SKILLS_DIR}"
+            f" && rm -f {_SKILLS_ARCHIVE_PATH}"
+        )
+        if removed:
+            script += " && cd " + SKILLS_DIR + " && rm -f " + " ".join(shlex.quote(r) for r in removed)
+        result = await sbx.commands.run(script, timeout=60)
+        if result.exit_code != 0:
+            raise RuntimeError((result.stderr or result.stdout or "").strip())
+
+        logger.info(
+            f"Synced skills to sandbox: {len(changed)} changed, {len(removed)} removed "
+            f"({'delta' if remote is not None else 'full'}, {len(archive)} bytes)"
+        )
         return _compute_skills_hash_from_fs()
     except Exception as e:
         logger.warning(f"Failed to upload system skills: {e}", exc_info=True)
@@ -719,6 +904,135 @@ async def _maybe_spill_to_file(sbx, stdout: str, stderr: str) -> tuple:
     return stdout_out, stderr_out, spill_note
 
 
+# ---------------------------------------------------------------------------
+# Live output streaming
+# ---------------------------------------------------------------------------
+
+# E2B callbacks push lines into a bounded queue; the SSE side drains it in
+# chunks bounded by time, line count and size so a chatty script doesn't turn
+# into one SSE event per line. When the queue is full the E2B reader waits
+# (backpressure) instead of buffering without limit.
+_STREAM_BUFFER_LINES = 2000
+_STREAM_FLUSH_SECS = 0.25
+_STREAM_FLUSH_LINES = 200
+_STREAM_FLUSH_CHARS = 16000
+_FLUSH_DUE = object()
+
+
+async def _run_streaming(
+    sbx,
+    cmd: str,
+    envs: Dict[str, str],
+    queue: asyncio.Queue,
+    stdout_lines: List[str],
+    stderr_lines: List[str],
+) -> int:
+    """Run `cmd`, feeding each output line to `queue` as it arrives.
+
+    Full output is still collected into stdout_lines/stderr_lines for the
+    LLM-facing result. A `None` sentinel marks the end of the stream.
+    Returns the exit code.
+    """
+    cancelled = False
+
+    async def on_stdout(msg):
+        line = msg.line if hasattr(msg, 'line') else str(msg)
+        stdout_lines.append(line)
+        await queue.put(("stdout", line))
+
+    async def on_stderr(msg):
+        line = msg.line if hasattr(msg, 'line') else str(msg)
+        stderr_lines.append(line)
+        logger.warning(f"STDERR: {line}")
+        await queue.put(("stderr", line))
+
+    try:
+        run_result = await sbx.commands.run(
+            cmd,
+            cwd=WORKSPACE_DIR,
+            timeout=EXECUTION_TIMEOUT,
+            envs=envs,
+            on_stdout=on_stdout,
+            on_stderr=on_stderr,
+        )
+        return run_result.exit_code
+    except TimeoutException:
+        logger.warning(f"bash timed out after {EXECUTION_TIMEOUT}s")
+        line = f"Command timed out after {EXECUTION_TIMEOUT} seconds."
+        stderr_lines.append(line)
+        await queue.put(("stderr", line))
+        return 124  # standard timeout exit code
+    except CommandExitException as e:
+        return e.exit_code if hasattr(e, 'exit_code') else 1
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        if cancelled:
+            _end_stream_nowait(queue)
+        else:
+            await queue.put(None)
+
+
+def _end_stream_nowait(queue: asyncio.Queue) -> None:
+    """Queue the end sentinel without waiting. On cancellation the reader may be
+    gone, so a full queue can't be waited out; the oldest lines make room
+    (everything is still in stdout_lines/stderr_lines)."""
+    while True:
+        try:
+            queue.put_nowait(None)
+            return
+        except asyncio.QueueFull:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+
+
+async def _coalesce_output(queue: asyncio.Queue) -> AsyncGenerator[tuple, None]:
+    """Drain `queue` into (stream, content) chunks of consecutive same-stream lines.
+
+    A chunk is flushed when the stream switches, when it reaches the line or
+    char cap, or _STREAM_FLUSH_SECS after its first line — whichever is first.
+    Lines within a chunk are newline-joined, matching how the UI appends them.
+    """
+    loop = asyncio.get_running_loop()
+    chunk_stream: Optional[str] = None
+    chunk: List[str] = []
+    chunk_chars = 0
+    deadline: Optional[float] = None
+
+    while True:
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            item = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            item = _FLUSH_DUE
+
+        if item is None or item is _FLUSH_DUE:
+            if chunk:
+                yield chunk_stream, "\n".join(chunk)
+            if item is None:
+                return
+            chunk, chunk_chars, deadline = [], 0, None
+            continue
+
+        stream, line = item
+        line = line.rstrip()
+        if chunk and (
+            stream != chunk_stream
+            or len(chunk) >= _STREAM_FLUSH_LINES
+            or chunk_chars + len(line) > _STREAM_FLUSH_CHARS
+        ):
+            yield chunk_stream, "\n".join(chunk)
+            chunk, chunk_chars = [], 0
+        if not chunk:
+            chunk_stream = stream
+            deadline = loop.time() + _STREAM_FLUSH_SECS
+        chunk.append(line)
+        chunk_chars += len(line)
+
+
 # ---------------------------------------------------------------------------
 # Main execution entry point
 # ---------------------------------------------------------------------------
@@ -765,30 +1079,22 @@ async def bash_impl(
         stdout_lines: List[str] = []
         stderr_lines: List[str] = []
 
+        # Output is forwarded while the command runs rather than after it exits.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_STREAM_BUFFER_LINES)
+        run_task = asyncio.create_task(
+            _run_streaming(sbx, cmd, entry.envs, queue, stdout_lines, stderr_lines)
+        )
         try:
-            run_result = await sbx.commands.run(
-                cmd,
-                cwd=WORKSPACE_DIR,
-                timeout=EXECUTION_TIMEOUT,
-                envs=entry.envs,
-                on_stdout=lambda msg: stdout_lines.append(msg.line if hasattr(msg, 'line') else str(msg)),
-                on_stderr=lambda msg: (
-                    stderr_lines.append(msg.line if hasattr(msg, 'line') else str(msg)),
-                    logger.warning(f"STDERR: {msg.line if hasattr(msg, 'line') else str(msg)}")
-                ),
-            )
-            exit_code = run_result.exit_code
-        except TimeoutException:
-            logger.warning(f"bash timed out after {EXECUTION_TIMEOUT}s")
-            stderr_lines.append(f"Command timed out after {EXECUTION_TIMEOUT} seconds.")
-            exit_code = 124  # standard timeout exit code
-        except CommandExitException as e:
-            exit_code = e.exit_code if hasattr(e, 'exit_code') else 1
-
-        for line in stdout_lines:
-            yield SSEEvent(event="code_output", data={"stream": "stdout", "content": line.rstrip()})
-        for line in stderr_lines:
-            yield SSEEvent(event="code_output", data={"stream": "stderr", "content": line.rstrip()})
+            async for stream, content in _coalesce_output(queue):
+                yield SSEEvent(event="code_output", data={"stream": stream, "content": content})
+            exit_code = await run_task
+        finally:
+            if not run_task.done():
+                run_task.cancel()
+            # Any command may have created, moved or deleted files, even one
+            # that timed out, failed or was cancelled part-way through
+            sandbox_listing.invalidate(context.user_id)
+
         stdout_text = "\n".join(stdout_lines)
         stderr_text = "\n".join(stderr_lines)
 
@@ -846,10 +1152,10 @@ async def bash_impl(
         })
 
         try:
-            from modules.tools.implementations.file_management import process_sync_manifest
-            await process_sync_manifest(context)
+            from modules.tools.implementations.file_management import schedule_sync_manifest
+            schedule_sync_manifest(context, sbx)
         except Exception as e:
-            logger.debug(f"Sync manifest processing skipped: {e}")
+            logger.debug(f"Sync manifest scheduling skipped: {e}")
 
         message = f"[{severity}] Done"
         if spill_note:
@@ -7,9 +7,14 @@ No database storage for file content — only Resource entries for UI sidebar.
 """
 from modules.agent.context import AgentContext
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
+from services.sandbox_listing import sandbox_listing
 from utils.logger import get_logger
+from collections import OrderedDict
+import asyncio
+import hashlib
 import re
+import shlex
 
 logger = get_logger(__name__)
 
@@ -75,6 +80,13 @@ async def _get_sandbox(user_id: str):
     return await get_or_create_sandbox(user_id, envs={})
 
 
+def _sandbox_connector(user_id: str):
+    """Sandbox factory for sandbox_listing misses (creates the sandbox if needed)."""
+    async def connect():
+        return (await _get_sandbox(user_id)).sbx
+    return connect
+
+
 _STOCK_ANALYSIS_MD_PATTERN = re.compile(r"^stocks/([A-Z0-9.]+)/([^/]+\.md)$", re.IGNORECASE)
 _VISUALIZATION_HTML_PATTERN = re.compile(r"^visualizations/[^/]+\.html$", re.IGNORECASE)
 _VISUALIZATION_JS_PATTERN = re.compile(r"^visualizations/[^/]+\.js$", re.IGNORECASE)
@@ -108,20 +120,24 @@ def _extract_title(content: str) -> str | None:
 async def _maybe_sync_stock_analysis(
     filename: str, content: str, context: AgentContext,
     *, sync_to_analysis: bool = True,
-):
-    """If filename matches stocks/{SYMBOL}/*.md, upsert note to DB and add to watchlist."""
+) -> bool:
+    """If filename matches stocks/{SYMBOL}/*.md, upsert note to DB and add to watchlist.
+
+    Returns False only when the DB write failed (worth retrying); files that
+    need no sync count as done.
+    """
     m = _STOCK_ANALYSIS_MD_PATTERN.match(filename)
     if not m:
-        return
+        return True
     symbol = m.group(1).upper()
     md_filename = m.group(2)
 
     if not _is_valid_ticker(symbol):
         logger.warning(f"Rejected invalid ticker '{symbol}' from filename '{filename}' — skipping sync")
-        return
+        return True
 
     if not sync_to_analysis:
-        return
+        return True
 
     title = _extract_title(content)
     try:
@@ -174,9 +190,13 @@ async def _maybe_sync_stock_analysis(
                 {"user_id": context.user_id, "symbol": symbol, "list_id": ai_list_id},
             )
             await db.commit()
+        from services.market_monitor import subscribers as alert_subscribers
+        alert_subscribers.invalidate(context.user_id)
         logger.info(f"Auto-synced stock analysis + watchlist for {symbol}/{md_filename} (user {context.user_id})")
+        return True
     except Exception as e:
         logger.warning(f"Stock analysis sync failed for {symbol} (non-fatal): {e}")
+        return False
 
 
 def _extract_html_title(content: str) -> str | None:
@@ -328,59 +348,117 @@ async def _read_sandbox_text(user_id: str, filename: str, context: AgentContext)
 
 
 SYNC_MANIFEST_PATH = f"{FALLBACK_FILES_DIR}/.sync_pending"
+# Workspaces (and files per workspace) whose last-synced digests are kept.
+_MAX_SYNC_WORKSPACES = 256
+_MAX_SYNC_FILES = 1024
+
+# (user_id, files_dir) → {filename: md5 of the content last synced}, both LRU
+_synced_digests: "OrderedDict[Tuple[str, str], OrderedDict[str, str]]" = OrderedDict()
+# (user_id, files_dir) → running background sync, plus the latest request
+# that arrived while it ran (it re-runs once for that instead of stacking).
+_sync_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+_sync_rerun: Dict[Tuple[str, str], tuple] = {}
+
+
+def _workspace_digests(context: AgentContext) -> "OrderedDict[str, str]":
+    key = (context.user_id, _files_dir(context))
+    seen = _synced_digests.get(key)
+    if seen is None:
+        seen = _synced_digests[key] = OrderedDict()
+        while len(_synced_digests) > _MAX_SYNC_WORKSPACES:
+            _synced_digests.popitem(last=False)
+    else:
+        _synced_digests.move_to_end(key)
+    return seen
+
+
+def _remember_digest(seen: "OrderedDict[str, str]", filename: str, digest: Optional[str]) -> None:
+    """Record what was last synced for filename (None forgets it)."""
+    seen.pop(filename, None)
+    if digest is None:
+        return
+    seen[filename] = digest
+    while len(seen) > _MAX_SYNC_FILES:
+        seen.popitem(last=False)
+
+
+def _journal_cmd() -> str:
+    """Drain .sync_pending atomically: move it aside, print it, remove it.
+    Lines appended after the mv land in a fresh manifest for the next drain."""
+    manifest = shlex.quote(SYNC_MANIFEST_PATH)
+    return (
+        f"t={manifest}.$$; "
+        f'if [ -s {manifest} ] && mv {manifest} "$t" 2>/dev/null; then cat "$t"; rm -f "$t"; fi; true'
+    )
 
 
-async def process_sync_manifest(context: AgentContext):
-    """Scan visualizations/ for .js/.html files and sync to DB. Also processes .sync_pending manifest."""
-    from modules.tools.implementations.code_execution import read_sandbox_file, get_or_create_sandbox
+def _parse_journal(stdout: str) -> List[str]:
+    """Pending filenames, first occurrence order, duplicates dropped."""
+    return list(dict.fromkeys(line.strip() for line in stdout.splitlines() if line.strip()))
 
-    synced = 0
 
-    # Scan visualizations/ directory for any .js or .html files
-    try:
-        entry = await get_or_create_sandbox(context.user_id, envs={})
-        viz_dir = f"{_files_dir(context)}/visualizations"
-        try:
-            entries = await entry.sbx.files.list(viz_dir, depth=1)
-        except Exception:
-            entries = []
+async def process_sync_manifest(context: AgentContext, sbx=None) -> int:
+    """
+    Sync files the last command created or changed to the DB.
 
-        for e in entries:
-            if e.type == "dir":
-                continue
-            name_lower = e.name.lower()
-            if not (name_lower.endswith(".js") or name_lower.endswith(".html")):
-                continue
-            filename = f"visualizations/{e.name}"
-            content = await _read_sandbox_text(context.user_id, filename, context)
-            if content:
-                await _maybe_sync_visualization(filename, content, context)
-                synced += 1
-    except Exception as e:
-        logger.debug(f"Viz directory scan skipped: {e}")
-
-    # Also process legacy .sync_pending manifest
-    data = await read_sandbox_file(context.user_id, SYNC_MANIFEST_PATH)
-    if data:
-        filenames = [
-            line.strip() for line in data.decode("utf-8", errors="replace").splitlines()
-            if line.strip()
-        ]
-        for filename in filenames:
-            content = await _read_sandbox_text(context.user_id, filename, context)
-            if content is None:
-                continue
-            await _maybe_sync_visualization(filename, content, context)
-            await _maybe_sync_stock_analysis(filename, content, context)
-            synced += 1
+    One sandbox command drains the .sync_pending manifest. Only files whose
+    content hash differs from what was last synced for this workspace are
+    synced. Returns the count.
+    """
+    if sbx is None:
+        sbx = (await _get_sandbox(context.user_id)).sbx
+    seen = _workspace_digests(context)
+
+    result = await sbx.commands.run(_journal_cmd(), timeout=15)
+    pending = _parse_journal(result.stdout or "")
+    if not pending:
+        return 0
+
+    contents = await asyncio.gather(
+        *(_read_sandbox_text(context.user_id, f, context) for f in pending)
+    )
 
-        try:
-            await entry.sbx.files.write(SYNC_MANIFEST_PATH, "")
-        except Exception:
-            pass
+    synced = 0
+    for filename, content in zip(pending, contents):
+        if not content:
+            continue
+        digest = hashlib.md5(content.encode("utf-8")).hexdigest()
+        if seen.get(filename) == digest:
+            continue
+        # A failed sync is forgotten, so the next drain that lists it retries.
+        ok = await _maybe_sync_stock_analysis(filename, content, context)
+        _remember_digest(seen, filename, digest if ok else None)
+        if ok:
+            synced += 1
 
     if synced:
-        logger.info(f"Synced {synced} visualization(s) for user {context.user_id}")
+        logger.info(f"Synced {synced} changed file(s) for user {context.user_id}")
+    return synced
+
+
+def schedule_sync_manifest(context: AgentContext, sbx) -> None:
+    """Run process_sync_manifest in the background, one at a time per workspace."""
+    key = (context.user_id, _files_dir(context))
+    task = _sync_tasks.get(key)
+    if task and not task.done():
+        _sync_rerun[key] = (context, sbx)
+        return
+    _sync_tasks[key] = asyncio.create_task(_run_sync(key, context, sbx))
+
+
+async def _run_sync(key: Tuple[str, str], context: AgentContext, sbx) -> None:
+    try:
+        while True:
+            try:
+                await process_sync_manifest(context, sbx)
+            except Exception as e:
+                logger.debug(f"Sync manifest processing skipped: {e}")
+            nxt = _sync_rerun.pop(key, None)
+            if nxt is None:
+                break
+            context, sbx = nxt
+    finally:
+        _sync_tasks.pop(key, None)
 
 
 # ============================================================================
@@ -409,11 +487,15 @@ async def write_chat_file_impl(
             await entry.sbx.commands.run(f"mkdir -p {chat_dir}", timeout=5)
 
         await entry.sbx.files.write(full_path, content)
+        sandbox_listing.invalidate(context.user_id)
 
         # Only sync analysis/viz for relative paths (chat workspace files)
         if not filename.startswith("/"):
-            await _maybe_sync_stock_analysis(filename, content, context, sync_to_analysis=sync_to_analysis)
+            ok = await _maybe_sync_stock_analysis(filename, content, context, sync_to_analysis=sync_to_analysis)
             await _maybe_sync_visualization(filename, content, context)
+            # Keep the post-bash journal from re-syncing (or wrongly skipping) this file.
+            _remember_digest(_workspace_digests(context), filename,
+                             hashlib.md5(content.encode("utf-8")).hexdigest() if ok and sync_to_analysis else None)
 
         yield {
             "success": True,
@@ -596,9 +678,12 @@ async def replace_in_chat_file_impl(
         # Write back to sandbox
         entry = await _get_sandbox(context.user_id)
         await entry.sbx.files.write(_sandbox_path(filename, context), content)
+        sandbox_listing.invalidate(context.user_id)
 
-        await _maybe_sync_stock_analysis(filename, content, context)
+        ok = await _maybe_sync_stock_analysis(filename, content, context)
         await _maybe_sync_visualization(filename, content, context)
+        _remember_digest(_workspace_digests(context), filename,
+                         hashlib.md5(content.encode("utf-8")).hexdigest() if ok else None)
 
         yield {
             "success": True,
@@ -652,19 +737,16 @@ async def list_chat_files_impl(
 ):
     """List files on sandbox in the bot's chat_files directory."""
     try:
-        entry = await _get_sandbox(context.user_id)
-
         base_dir = _files_dir(context)
         target_dir = base_dir
         dir_path = directory.strip().strip('/')
         if dir_path:
             target_dir = f"{base_dir}/{dir_path}"
 
-        try:
-            entries = await entry.sbx.files.list(target_dir, depth=1)
-        except Exception:
-            # Directory doesn't exist yet
-            entries = []
+        # Missing directories list as empty
+        entries = await sandbox_listing.list_dir(
+            context.user_id, target_dir, connect=_sandbox_connector(context.user_id)
+        ) or []
 
         subdirs = []
         files = []
@@ -675,7 +757,7 @@ async def list_chat_files_impl(
                 files.append({
                     "name": e.name,
                     "type": _detect_file_type(e.name),
-                    "size": e.size or 0,
+                    "size": e.size,
                 })
 
         # Format output
@@ -714,13 +796,10 @@ async def list_chat_files_impl(
 async def show_filesystem_tree_impl(context: AgentContext):
     """Show chat filesystem tree from sandbox."""
     try:
-        entry = await _get_sandbox(context.user_id)
         base_dir = _files_dir(context)
-
-        try:
-            entries = await entry.sbx.files.list(base_dir, depth=10)
-        except Exception:
-            entries = []
+        entries = await sandbox_listing.list_tree(
+            context.user_id, base_dir, max_depth=10, connect=_sandbox_connector(context.user_id)
+        ) or []
 
         if not entries:
             return {
@@ -743,7 +822,7 @@ async def show_filesystem_tree_impl(context: AgentContext):
             tree_lines.append(f"{indent}├── {name}")
             if e.type != "dir":
                 file_count += 1
-                total_size += e.size or 0
+                total_size += e.size
 
         tree_lines.append("```\n")
         tree_lines.append(f"**Statistics:**")
@@ -2,7 +2,10 @@
 Models for tool system
 """
 import copy
-from typing import Any, Dict, Optional, Callable
+import inspect
+from typing import Any, Dict, Optional, Callable, Tuple, Type
+
+from pydantic import BaseModel
 
 # Injected into every visible tool's schema so the model narrates each call.
 # The value rides along in `arguments` (and thus the tool_call_start SSE event)
@@ -64,3 +67,73 @@ class Tool:
             }
         }
 
+
+
+class InvocationPlan:
+    """
+    How to call a tool's handler, worked out once from its signature.
+
+    ToolRunner used to re-inspect the handler on every call; the registry now
+    compiles one of these per tool at registration, so binding LLM arguments
+    is a dict lookup plus at most one `model_validate`.
+    """
+
+    __slots__ = ("model_param", "is_async", "is_async_gen")
+
+    def __init__(
+        self,
+        model_param: Optional[Tuple[str, Type[BaseModel]]],
+        is_async: bool,
+        is_async_gen: bool,
+    ):
+        self.model_param = model_param
+        self.is_async = is_async
+        self.is_async_gen = is_async_gen
+
+    @classmethod
+    def compile(cls, tool: "Tool") -> "InvocationPlan":
+        # First parameter (other than context) annotated with a Pydantic model
+        # receives the whole argument dict; everything else is plain kwargs.
+        model_param = None
+        for param_name, param in inspect.signature(tool.handler).parameters.items():
+            if param_name == "context":
+                continue
+            annotation = param.annotation
+            try:
+                if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+                    model_param = (param_name, annotation)
+                    break
+            except TypeError:
+                # Generic aliases (list[int], ...) pass isinstance but not issubclass
+                continue
+        return cls(
+            model_param=model_param,
+            is_async=tool.is_async,
+            is_async_gen=inspect.isasyncgenfunction(tool.handler),
+        )
+
+    def bind(self, arguments: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        """Handler kwargs for LLM `arguments` (minus the UI-only intent param)."""
+        args = {k: v for k, v in arguments.items() if k != INTENT_PARAM}
+        kwargs: Dict[str, Any] = {"context": context}
+        if self.model_param is None:
+            kwargs.update(args)
+            return kwargs
+
+        param_name, param_class = self.model_param
+        if param_name not in args:
+            # Flattened: {"data_series": ..., "plot_type": ...}
+            kwargs[param_name] = param_class.model_validate(args)
+            return kwargs
+
+        value = args[param_name]
+        if isinstance(value, BaseModel):
+            kwargs[param_name] = value
+        elif isinstance(value, dict):
+            kwargs[param_name] = param_class.model_validate(value)
+        else:
+            raise TypeError(
+                f"Parameter '{param_name}' must be a dict or {param_class.__name__} instance, "
+                f"got {type(value).__name__}. Received: {repr(value)[:200]}"
+            )
+        return kwargs
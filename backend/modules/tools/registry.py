@@ -1,9 +1,11 @@
 """
 Tool registry for managing and executing tools
 """
-from typing import Dict, List, Optional, Any, Callable
+import hashlib
+import json
+from typing import Dict, List, Optional, Any, Callable, Tuple
 
-from .models import Tool
+from .models import Tool, InvocationPlan
 from modules.agent.context import AgentContext
 from utils.logger import get_logger
 
@@ -17,6 +19,11 @@ class ToolRegistry:
     
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        # Compiled once per tool at registration; never rebuilt per LLM call.
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._plans: Dict[str, InvocationPlan] = {}
+        # tool-name tuple → (serialized JSON, sha256 of it)
+        self._schema_sets: Dict[Tuple[str, ...], Tuple[str, str]] = {}
     
     def register(self, tool: Tool) -> None:
         """Register a tool"""
@@ -24,6 +31,9 @@ class ToolRegistry:
             raise ValueError(f"Tool '{tool.name}' is already registered")
         
         self._tools[tool.name] = tool
+        self._schemas[tool.name] = tool.to_openai_schema()
+        self._plans[tool.name] = InvocationPlan.compile(tool)
+        self._schema_sets.clear()
         logger.info(f"Registered tool: {tool.name} (category: {tool.category})")
     
     def register_function(self, func: Callable) -> None:
@@ -45,6 +55,10 @@ class ToolRegistry:
         """Get a tool by name"""
         return self._tools.get(name)
     
+    def get_plan(self, name: str) -> Optional[InvocationPlan]:
+        """Get the compiled invocation plan for a tool"""
+        return self._plans.get(name)
+    
     def list_tools(
         self, 
         category: Optional[str] = None,
@@ -104,7 +118,8 @@ class ToolRegistry:
             requires_auth: Filter by auth requirement (only if tool_names not provided)
         
         Returns:
-            List of OpenAI-compatible tool schemas (excluding api_docs_only tools)
+            List of OpenAI-compatible tool schemas (excluding api_docs_only tools),
+            a fresh copy the caller may mutate
         """
         if tool_names is not None:
             # Get specific tools by name
@@ -114,13 +129,34 @@ class ToolRegistry:
             tools = self.list_tools(category=category, requires_auth=requires_auth)
         
         # Filter out api_docs_only tools - those are for filesystem discovery only
-        tools = [t for t in tools if not t.api_docs_only]
+        names = tuple(t.name for t in tools if not t.api_docs_only)
+        return json.loads(self._schema_set(names)[0])
+    
+    def _schema_set(self, names: Tuple[str, ...]) -> Tuple[str, str]:
+        """
+        Memoized (serialized tools block, short sha256) for an ordered tool-name tuple.
         
-        return [t.to_openai_schema() for t in tools]
+        The serialized block is the source of truth: callers get schemas decoded
+        from it, so the tools block sent to the LLM is byte-identical call to call
+        and a caller mutating its copy (cache_control, provider transforms) can't
+        leak into later turns or the prompt-cache fingerprint.
+        """
+        cached = self._schema_sets.get(names)
+        if cached is None:
+            serialized = json.dumps([self._schemas[n] for n in names], separators=(",", ":"))
+            digest = hashlib.sha256(serialized.encode()).hexdigest()[:16]
+            cached = self._schema_sets[names] = (serialized, digest)
+        return cached
+    
+    def get_openai_tools_fingerprint(self, tool_names: List[str]) -> str:
+        """Short hash of the serialized tools block for `tool_names` (cache diagnostics)."""
+        names = tuple(t.name for t in self.get_tools_by_names(tool_names) if not t.api_docs_only)
+        return self._schema_set(names)[1]
     
     def get_all_schemas(self) -> List[Dict[str, Any]]:
         """Get all OpenAI tool schemas (excluding api_docs_only tools)"""
-        return [t.to_openai_schema() for t in self._tools.values() if not t.api_docs_only]
+        names = tuple(t.name for t in self._tools.values() if not t.api_docs_only)
+        return json.loads(self._schema_set(names)[0])
     
     def get_api_docs_only_tools(self) -> List[Tool]:
         """Get tools marked as api_docs_only for filesystem mounting"""
@@ -8,9 +8,9 @@ import traceback
 import inspect
 import time
 
-from pydantic import BaseModel
 from modules.agent.context import AgentContext
 from modules.agent.tracing_utils import ToolTracer
+from .models import InvocationPlan
 from .registry import tool_registry
 from schemas.sse import SSEEvent
 from utils.sentry import capture_tool_exception
@@ -19,6 +19,30 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Per-tool aggregates: argument binding (our overhead) vs handler run time.
+# Run time includes streaming, so for generator tools it spans the whole call.
+_timings: Dict[str, Dict[str, float]] = {}
+
+
+def _record_timing(tool_name: str, bind_s: float, run_s: float) -> None:
+    t = _timings.setdefault(tool_name, {"calls": 0, "bind_total_s": 0.0, "run_total_s": 0.0, "run_max_s": 0.0})
+    t["calls"] += 1
+    t["bind_total_s"] += bind_s
+    t["run_total_s"] += run_s
+    t["run_max_s"] = max(t["run_max_s"], run_s)
+
+
+def get_tool_timings() -> Dict[str, Dict[str, float]]:
+    """Per-tool call counts with average bind overhead (µs) and run time (ms)."""
+    return {
+        name: {
+            **t,
+            "bind_avg_us": round(t["bind_total_s"] / t["calls"] * 1e6, 1),
+            "run_avg_ms": round(t["run_total_s"] / t["calls"] * 1e3, 2),
+        }
+        for name, t in _timings.items()
+    }
+
 
 class ToolRunner:
     """
@@ -87,75 +111,26 @@ class ToolRunner:
                 logger.debug(f"Tool arguments: {arguments}")
                 logger.debug(f"Argument types: {[(k, type(v).__name__) for k, v in arguments.items()]}")
                 
-                # Inspect function signature to detect Pydantic model parameters
-                sig = inspect.signature(tool.handler)
-                kwargs = {"context": context}
+                plan = self.registry.get_plan(tool_name)
+                if plan is None:
+                    plan = InvocationPlan.compile(tool)
 
-                # `intent` is a UI-only label injected into every tool schema
-                # (see models.INTENT_PARAM); handlers don't declare it, so drop
-                # it before binding arguments.
-                tool_arguments = {k: v for k, v in arguments.items() if k != "intent"}
-                arguments = tool_arguments
-                
-                # Check if any parameter (excluding 'context') is a Pydantic model
-                pydantic_param = None
-                for param_name, param in sig.parameters.items():
-                    if param_name == 'context':
-                        continue
-                    
-                    # Check if this parameter is a Pydantic BaseModel
-                    param_annotation = param.annotation
-                    try:
-                        if (isinstance(param_annotation, type) and 
-                            issubclass(param_annotation, BaseModel)):
-                            # Found a Pydantic model parameter
-                            pydantic_param = (param_name, param_annotation)
-                            break
-                    except TypeError:
-                        # param_annotation is not a class (e.g., it's a typing construct)
-                        continue
-                
-                # If we found a Pydantic parameter, construct it from arguments
-                if pydantic_param:
-                    param_name, param_class = pydantic_param
-                    logger.debug(f"Detected Pydantic parameter: {param_name} of type {param_class.__name__}")
-                    
-                    # Check if arguments are already wrapped in the parameter name
-                    if param_name in arguments:
-                        arg_value = arguments[param_name]
-                        
-                        # Check if it's already a Pydantic model instance
-                        if isinstance(arg_value, BaseModel):
-                            logger.debug(f"'{param_name}' is already a Pydantic model instance")
-                            kwargs[param_name] = arg_value
-                        # Check if it's a dict that needs to be converted to the model
-                        elif isinstance(arg_value, dict):
-                            logger.debug(f"Arguments already wrapped in '{param_name}', constructing {param_class.__name__}")
-                            try:
-                                kwargs[param_name] = param_class(**arg_value)
-                            except Exception as e:
-                                logger.error(f"Failed to construct {param_class.__name__} from dict: {e}", exc_info=True)
-                                raise
-                        else:
-                            # Invalid type - try to convert or raise error
-                            logger.error(f"Invalid type for '{param_name}': {type(arg_value).__name__}, expected dict or {param_class.__name__}")
-                            logger.error(f"Received arguments: {arguments}")
-                            logger.error(f"Expected schema for {param_class.__name__}: {param_class.model_json_schema()}")
-                            raise TypeError(f"Parameter '{param_name}' must be a dict or {param_class.__name__} instance, got {type(arg_value).__name__}. Received: {repr(arg_value)[:200]}")
-                    else:
-                        # Not wrapped, assume all arguments are for the model: {"data_series": ..., "plot_type": ...}
-                        logger.debug(f"Arguments flattened, constructing {param_class.__name__} from: {list(tool_arguments.keys())}")
-                        kwargs[param_name] = param_class(**tool_arguments)
-                else:
-                    # No Pydantic models, just unpack arguments normally
-                    kwargs.update(tool_arguments)
+                bind_started = time.perf_counter()
+                try:
+                    kwargs = plan.bind(arguments, context)
+                except Exception as e:
+                    if plan.model_param:
+                        logger.error(f"Failed to bind arguments for {tool_name} into {plan.model_param[1].__name__}: {e}")
+                        logger.error(f"Received arguments: {arguments}")
+                    raise
+                bound = time.perf_counter()
                 
                 # Execute tool (async or sync)
                 event_count = 0
-                if tool.is_async:
+                if plan.is_async:
                     result = tool.handler(**kwargs)
                     # Check if it's an async generator (tool yields events)
-                    if inspect.isasyncgen(result):
+                    if plan.is_async_gen or inspect.isasyncgen(result):
                         logger.debug(f"Tool {tool_name} is async generator, streaming events")
                         final_result = None
                         async for item in result:
@@ -173,6 +148,7 @@ class ToolRunner:
                         result = await result
                 else:
                     result = tool.handler(**kwargs)
+                _record_timing(tool_name, bound - bind_started, time.perf_counter() - bound)
                 
                 # Ensure result is a dict
                 if not isinstance(result, dict):
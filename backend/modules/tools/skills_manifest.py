@@ -0,0 +1,139 @@
+"""
+Skills Manifest - per-file index of backend/skills/ for sandbox delta sync.
+
+Keeps {relative path → (size, mtime_ns, md5)} for every file that gets
+uploaded to the sandbox. The tree is hashed once at startup; later refreshes
+only stat files and re-hash the ones whose size/mtime moved, and are throttled
+to at most one walk per REFRESH_INTERVAL so warm bash calls never touch disk.
+
+The manifest digest replaces the old whole-tree MD5 as the sandbox's
+skills_hash. The per-file hashes are also written into the sandbox, so the
+next upload can diff against what's actually there and ship only the changed
+files as a single tar archive.
+"""
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_HOST_SKILLS_DIR = Path(__file__).parent.parent.parent / "skills"
+
+# Seconds between stat walks. Skills only change on deploy (or while editing
+# locally), so a short delay before a local edit is picked up is fine.
+REFRESH_INTERVAL = 30.0
+
+
+def _file_md5(path: Path) -> str:
+    return hashlib.md5(path.read_bytes()).hexdigest()
+
+
+class SkillsManifest:
+    """Incrementally maintained path → (size, mtime_ns, md5) index of a directory."""
+
+    def __init__(self, root: Path = _HOST_SKILLS_DIR, refresh_interval: float = REFRESH_INTERVAL):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        self._files: Dict[str, Tuple[int, int, str]] = {}
+        self._digest: str = ""
+        self._checked_at: float = 0.0
+        self._lock = threading.Lock()
+
+    def _walk(self) -> Dict[str, Tuple[int, int]]:
+        stats: Dict[str, Tuple[int, int]] = {}
+        if not self.root.exists():
+            return stats
+        for path in self.root.rglob("*"):
+            if "__pycache__" in path.parts or not path.is_file():
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue  # deleted between rglob and stat
+            stats[str(path.relative_to(self.root))] = (st.st_size, st.st_mtime_ns)
+        return stats
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-stat the tree (throttled) and re-hash changed files. Returns True if anything changed."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked_at and now - self._checked_at < self.refresh_interval:
+                return False
+            self._checked_at = now
+
+            stats = self._walk()
+            changed = False
+            files: Dict[str, Tuple[int, int, str]] = {}
+            for rel, (size, mtime) in stats.items():
+                prev = self._files.get(rel)
+                if prev and prev[0] == size and prev[1] == mtime:
+                    files[rel] = prev
+                    continue
+                try:
+                    files[rel] = (size, mtime, _file_md5(self.root / rel))
+                except OSError as e:
+                    logger.warning(f"Could not hash skill file {rel}: {e}")
+                    continue
+                changed = True
+            if set(files) != set(self._files):
+                changed = True
+
+            if changed or not self._digest:
+                self._files = files
+                h = hashlib.md5()
+                for rel in sorted(files):
+                    h.update(rel.encode())
+                    h.update(files[rel][2].encode())
+                self._digest = h.hexdigest()
+            return changed
+
+    @property
+    def digest(self) -> str:
+        """Hash over every (path, content hash) pair."""
+        self.refresh()
+        return self._digest
+
+    def hashes(self) -> Dict[str, str]:
+        """path → content md5, the form stored in the sandbox."""
+        self.refresh()
+        return {rel: meta[2] for rel, meta in self._files.items()}
+
+    def diff(self, remote: Optional[Dict[str, str]]) -> Tuple[List[str], List[str]]:
+        """(changed_or_new, removed) paths relative to a remote path → md5 map.
+
+        A missing remote manifest means everything is new.
+        """
+        local = self.hashes()
+        remote = remote or {}
+        changed = sorted(rel for rel, h in local.items() if remote.get(rel) != h)
+        removed = sorted(rel for rel in remote if rel not in local)
+        return changed, removed
+
+    def build_archive(self, paths: List[str], extra: Optional[Dict[str, bytes]] = None) -> bytes:
+        """gzip'd tar of `paths` (relative to root) plus any `extra` name → bytes members."""
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+            for rel in paths:
+                try:
+                    tar.add(str(self.root / rel), arcname=rel, recursive=False)
+                except OSError as e:
+                    logger.warning(f"Could not archive skill file {rel}: {e}")
+            for name, data in (extra or {}).items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(data))
+        return buf.getvalue()
+
+    def manifest_json(self) -> bytes:
+        return json.dumps(self.hashes(), sort_keys=True).encode()
+
+
+skills_manifest = SkillsManifest()
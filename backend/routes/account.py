@@ -85,7 +85,12 @@ async def update_preferences(
             raise HTTPException(status_code=400, detail=str(e))
 
     async with get_db_session() as db:
-        return await prefs_crud.update_user_preferences(db, user_id, updates)
+        saved = await prefs_crud.update_user_preferences(db, user_id, updates)
+    if "heartbeat_enabled" in updates:
+        # Heartbeat users get monitor tripwires instead of direct pushes.
+        from services.market_monitor import subscribers as alert_subscribers
+        alert_subscribers.invalidate(user_id)
+    return saved
 
 
 @router.delete("/{user_id}")
@@ -75,34 +75,21 @@ async def get_chat_files(
     await verify_user_access(user_id, authenticated_user_id)
 
     try:
-        from modules.tools.implementations.code_execution import _get_or_reconnect_sandbox
-        sbx = await _get_or_reconnect_sandbox(user_id)
-        if not sbx:
+        from services.sandbox_listing import sandbox_listing
+        entries = await sandbox_listing.list_tree(user_id, files_dir, max_depth=7)
+        if not entries:
             return []
 
         prefix = files_dir.rstrip("/") + "/"
-
-        async def _recurse(path: str, depth: int = 0) -> list:
-            if depth > 6:
-                return []
-            try:
-                entries = await sbx.files.list(path)
-            except Exception:
-                return []
-            result = []
-            for entry in entries:
-                if entry.type == "dir":
-                    result.extend(await _recurse(entry.path, depth + 1))
-                else:
-                    rel_path = entry.path[len(prefix):] if entry.path.startswith(prefix) else entry.name
-                    result.append(ChatFileResponse(
-                        filename=rel_path,
-                        file_type=_detect_file_type(entry.name),
-                        size_bytes=entry.size or 0,
-                    ))
-            return result
-
-        return await _recurse(files_dir)
+        return [
+            ChatFileResponse(
+                filename=e.path[len(prefix):] if e.path.startswith(prefix) else e.name,
+                file_type=_detect_file_type(e.name),
+                size_bytes=e.size,
+            )
+            for e in entries
+            if e.type != "dir"
+        ]
 
     except HTTPException:
         raise
@@ -196,12 +183,14 @@ async def delete_chat_file(
 
     try:
         from modules.tools.implementations.code_execution import _get_or_reconnect_sandbox
+        from services.sandbox_listing import sandbox_listing
         sbx = await _get_or_reconnect_sandbox(user_id)
         if not sbx:
             raise HTTPException(status_code=404, detail="Sandbox not available")
 
         path = f"{files_dir}/{filename}"
         await sbx.commands.run(f"rm -f {shlex.quote(path)}")
+        sandbox_listing.invalidate(user_id)
         return {"success": True, "message": f"Deleted {filename}"}
 
     except HTTPException:
@@ -242,6 +231,7 @@ async def upload_file_to_sandbox(
             _get_or_reconnect_sandbox,
             get_or_create_sandbox,
         )
+        from services.sandbox_listing import sandbox_listing
         sbx = await _get_or_reconnect_sandbox(user_id)
         if not sbx:
             # No sandbox yet (e.g. first action in a fresh chat). Provision one now
@@ -264,6 +254,7 @@ async def upload_file_to_sandbox(
 
         dest_path = f"{safe_dest}/{safe_filename}"
         await sbx.files.write(dest_path, content, request_timeout=60)
+        sandbox_listing.invalidate(user_id)
 
         return {
             "filename": file.filename,
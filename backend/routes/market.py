@@ -375,18 +375,14 @@ async def get_stock_peers_endpoint(symbol: str, limit: int = 6):
 @router.get("/batch-quotes")
 async def get_batch_quotes(symbols: str = Query(..., description="Comma-separated tickers, e.g. AAPL,MSFT,GOOGL")):
     """Return real-time quotes for multiple symbols at once."""
-    cleaned = ",".join(s.strip().upper() for s in symbols.split(",") if s.strip())
+    cleaned = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
     if not cleaned:
         raise HTTPException(status_code=400, detail="Provide at least one symbol")
 
-    from skills.financial_modeling_prep.scripts.market.quote import get_quote_snapshot
-
-    try:
-        data = await asyncio.to_thread(get_quote_snapshot, cleaned)
-    except Exception:
-        return []
+    from services.quote_service import quote_service
 
-    return data if isinstance(data, list) else []
+    quotes = await quote_service.get_quotes(cleaned)
+    return [quotes[s] for s in cleaned if s in quotes]
 
 
 # ---------------------------------------------------------------------------
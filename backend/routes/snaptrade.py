@@ -327,6 +327,8 @@ async def get_portfolio(
                     portfolio_data=result,
                     computed_at=datetime.now(timezone.utc),
                 ))
+            from services.market_monitor import subscribers as alert_subscribers
+            alert_subscribers.invalidate(user_id)
         except Exception:
             pass
 
@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_async_db
 from auth.dependencies import get_current_user_id, verify_user_access
 from models.brokerage import UserWatchlist, WatchlistList
+from services.market_monitor import subscribers as alert_subscribers
 
 logger = logging.getLogger(__name__)
 
@@ -242,6 +243,7 @@ async def delete_watchlist_list(
             {"id": list_id, "user_id": user_id},
         )
         await db.commit()
+        alert_subscribers.invalidate(user_id)
         return {"success": True}
     except HTTPException:
         raise
@@ -343,6 +345,7 @@ async def add_to_watchlist(
             {"user_id": user_id, "symbol": symbol, "list_id": target_list_id},
         )
         await db.commit()
+        alert_subscribers.invalidate(user_id)
         return {"success": True, "symbol": symbol, "list_id": target_list_id}
 
     except HTTPException:
@@ -373,6 +376,7 @@ async def remove_from_watchlist(
 
         await db.execute(stmt)
         await db.commit()
+        alert_subscribers.invalidate(user_id)
         return {"success": True}
 
     except HTTPException:
@@ -433,6 +437,7 @@ async def sync_robinhood_watchlist(
         )
         await _insert_symbols(user_id, list_id, symbols, "robinhood", db)
         await db.commit()
+        alert_subscribers.invalidate(user_id)
     except Exception as e:
         logger.error(f"Robinhood watchlist sync write failed for {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to save synced watchlist")
@@ -469,6 +474,7 @@ async def import_watchlist_screenshot(
         target_list_id = await _resolve_target_list(user_id, request.list_id, db)
         await _insert_symbols(user_id, target_list_id, [r["symbol"] for r in resolved], "screenshot", db)
         await db.commit()
+        alert_subscribers.invalidate(user_id)
     except Exception as e:
         logger.error(f"Screenshot import write failed for {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to save imported symbols")
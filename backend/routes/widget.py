@@ -191,19 +191,19 @@ async def get_widget_data(widget_id: str, user_id: str = Depends(get_current_use
 # ──────────────────────────────────────────────────────────────────────────
 @router.get("/shared/{slug}", response_model=PublicWidgetResponse)
 async def get_shared_widget(slug: str):
+    from services.widget_views import view_counter
+
     async with get_db_session() as db:
         w = await crud.get_widget_by_slug(db, slug)
         if not w:
             raise HTTPException(status_code=404, detail="Widget not found or not public")
-        # Fire-and-forget view count; a failed increment must not break the read.
-        try:
-            await crud.increment_view_count(db, w.id)
-        except Exception:
-            logger.warning("widget view-count increment failed for %s", slug)
-        return PublicWidgetResponse(
-            id=w.id, slug=w.slug, title=w.title, description=w.description, emoji=w.emoji,
-            tags=w.tags, spec=w.spec, view_count=w.view_count, clone_count=w.clone_count,
-        )
+    # Buffered; written in batches by services/widget_views.
+    view_counter.record(w.id)
+    return PublicWidgetResponse(
+        id=w.id, slug=w.slug, title=w.title, description=w.description, emoji=w.emoji,
+        tags=w.tags, spec=w.spec, view_count=w.view_count + view_counter.pending(w.id),
+        clone_count=w.clone_count,
+    )
 
 
 @router.get("/shared/{slug}/data")
@@ -213,6 +213,6 @@ async def get_shared_widget_data(slug: str):
         if not w:
             raise HTTPException(status_code=404, detail="Widget not found or not public")
         spec = w.spec
-    from services.widget_data import resolve_widget_data
-    # viewer_user_id=None → personal-binding tiles render a "connect" empty state.
-    return await resolve_widget_data(spec, viewer_user_id=None)
+    from services.widget_data import resolve_public_widget_data
+    # Anonymous viewer → personal-binding tiles render a "connect" empty state.
+    return await resolve_public_widget_data(slug, spec)
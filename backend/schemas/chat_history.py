@@ -5,10 +5,12 @@ Provides clean abstractions for managing chat history throughout the agent loop.
 """
 from typing import List, Optional, Dict, Any, Literal, Tuple, Set, Union
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 import json
 import logging
 
+from core.token_accounting import content_tokens
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,6 +51,20 @@ def _sanitize_tool_calls(tool_calls: Optional[List[Dict[str, Any]]]) -> Tuple[Li
     return valid, removed_ids
 
 
+def _db_message_data(db_msg) -> Dict[str, Any]:
+    return {
+        "role": db_msg.role,
+        "content": db_msg.content,
+        "tool_call_id": db_msg.tool_call_id,
+        "name": db_msg.name,
+        "resource_id": db_msg.resource_id,
+        "sequence": db_msg.sequence,
+        "timestamp": db_msg.timestamp,
+        "tool_calls": db_msg.tool_calls,
+        "token_count": getattr(db_msg, "token_count", None),
+    }
+
+
 class ToolCall(BaseModel):
     """Represents a tool call in a message"""
     id: str
@@ -82,6 +98,13 @@ class ChatMessage(BaseModel):
     sequence: Optional[int] = None
     timestamp: Optional[datetime] = None
     resource_id: Optional[str] = None
+    token_count: Optional[int] = None
+    
+    def tokens(self) -> int:
+        """Token count of content + tool call args (persisted count if loaded from DB)."""
+        if self.token_count is None:
+            self.token_count = content_tokens(self.content, self.tool_calls)
+        return self.token_count
     
     def to_openai_format(self) -> Dict[str, Any]:
         """Convert to OpenAI/Anthropic API format."""
@@ -128,6 +151,7 @@ class ChatMessage(BaseModel):
             resource_id=data.get("resource_id"),
             sequence=data.get("sequence"),
             timestamp=data.get("timestamp"),
+            token_count=data.get("token_count"),
         )
     
     @classmethod
@@ -153,6 +177,7 @@ class ChatMessage(BaseModel):
             resource_id=db_row.resource_id,
             sequence=db_row.sequence,
             timestamp=db_row.timestamp,
+            token_count=getattr(db_row, "token_count", None),
         )
 
 
@@ -167,11 +192,22 @@ class ChatHistory(BaseModel):
     chat_id: Optional[str] = None
     user_id: Optional[str] = None
     
+    _token_total: int = PrivateAttr(default=0)
+    
+    def model_post_init(self, __context: Any) -> None:
+        self._token_total = sum(m.tokens() for m in self.messages)
+    
+    @property
+    def token_total(self) -> int:
+        """Tokens across all messages, kept up to date by add_message."""
+        return self._token_total
+    
     def add_message(self, message: ChatMessage) -> None:
         """Add a message, auto-assigning sequence if needed."""
         if message.sequence is None:
             message.sequence = len(self.messages)
         self.messages.append(message)
+        self._token_total += message.tokens()
     
     def add_user_message(
         self, 
@@ -281,22 +317,15 @@ class ChatHistory(BaseModel):
         temp_messages = []
 
         for db_msg in db_messages:
-            msg_data = {
-                "role": db_msg.role,
-                "content": db_msg.content,
-                "tool_call_id": db_msg.tool_call_id,
-                "name": db_msg.name,
-                "resource_id": db_msg.resource_id,
-                "sequence": db_msg.sequence,
-                "timestamp": db_msg.timestamp,
-                "tool_calls": db_msg.tool_calls,
-            }
+            msg_data = _db_message_data(db_msg)
 
             # Sanitize tool_calls and collect valid IDs
             if db_msg.role == "assistant" and db_msg.tool_calls:
                 valid_tcs, removed = _sanitize_tool_calls(db_msg.tool_calls)
                 removed_tool_call_ids.update(removed)
                 msg_data["tool_calls"] = valid_tcs if valid_tcs else None
+                if removed:
+                    msg_data["token_count"] = None  # recount without the dropped calls
 
                 for tc in (valid_tcs or []):
                     tc_id = tc.get("id")
@@ -338,6 +367,31 @@ class ChatHistory(BaseModel):
 
         return history
     
+    def append_db_message(self, db_msg) -> bool:
+        """
+        Apply one newly persisted row, as from_db_messages would have.
+
+        Covers the rows a turn normally writes. Returns False without changing
+        anything when the row needs the full pass instead — a compaction row,
+        malformed tool calls, or a tool result with no matching tool call.
+        """
+        if db_msg.role == "compaction":
+            return False
+        msg_data = _db_message_data(db_msg)
+        if db_msg.role == "assistant" and db_msg.tool_calls:
+            _, removed = _sanitize_tool_calls(db_msg.tool_calls)
+            if removed:
+                return False
+        elif db_msg.role == "tool" and db_msg.tool_call_id:
+            if not any(
+                tc.id == db_msg.tool_call_id
+                for m in reversed(self.messages) if m.tool_calls
+                for tc in m.tool_calls
+            ):
+                return False
+        self.add_message(ChatMessage.from_dict(msg_data))
+        return True
+    
     def __len__(self) -> int:
         return len(self.messages)
     
@@ -402,8 +456,7 @@ class ChatHistory(BaseModel):
             if msg.role == "tool":
                 stats["tool_results_count"] += 1
         
-        # Estimate tokens (rough approximation: 4 chars per token)
-        stats["estimated_tokens"] = stats["total_chars"] // 4
+        stats["estimated_tokens"] = self.token_total
         
         return stats
     
@@ -0,0 +1,155 @@
+"""
+ChatHistoryCache — parsed chat history kept in-process between turns.
+
+Every turn used to read the whole thread (twice when cleanup removed
+something), rebuild ChatHistory from it, and then the compactor read and
+parsed it all again. Long-lived heartbeat and job chats paid that dozens of
+times a day. Now:
+
+- Each cached chat holds a snapshot of its rows from the latest compaction
+  row on (older rows never reach the LLM) plus the parsed ChatHistory.
+- Before use, one aggregate query (row count, max id) confirms nothing was
+  inserted or deleted behind our back; on a mismatch only the tail since the
+  latest compaction is reloaded.
+- Rows written through crud.chat_async.create_message are applied to the
+  cached copy as they land, so the next turn is usually a hit.
+- Bounded by chat count (LRU) and total content size.
+
+Callers get a copy of the history and may append to it freely.
+"""
+import copy
+from collections import OrderedDict, namedtuple
+from typing import List, Optional
+
+from core.config import Config
+from schemas.chat_history import ChatHistory
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Detached copy of the ChatMessageDB columns history building reads.
+_Row = namedtuple(
+    "_Row",
+    "id role content tool_calls tool_call_id name resource_id sequence timestamp token_count",
+)
+
+
+def _snapshot(db_msg) -> _Row:
+    return _Row(
+        id=db_msg.id,
+        role=db_msg.role,
+        content=db_msg.content,
+        tool_calls=db_msg.tool_calls,
+        tool_call_id=db_msg.tool_call_id,
+        name=db_msg.name,
+        resource_id=db_msg.resource_id,
+        sequence=db_msg.sequence,
+        timestamp=db_msg.timestamp,
+        token_count=getattr(db_msg, "token_count", None),
+    )
+
+
+def _row_chars(row: _Row) -> int:
+    return len(row.content or "")
+
+
+class _Entry:
+    __slots__ = ("rows", "count", "max_id", "history", "chars")
+
+    def __init__(self, rows: List[_Row], count: int, max_id: Optional[int]):
+        self.rows = rows
+        self.count = count
+        self.max_id = max_id
+        self.history: Optional[ChatHistory] = None
+        self.chars = sum(_row_chars(r) for r in rows)
+
+
+def _copy_history(history: ChatHistory, chat_id: str, user_id: Optional[str]) -> ChatHistory:
+    # Messages are shared; list content (multimodal / tool_use blocks) is
+    # copied because request building may annotate those dicts in place.
+    messages = [
+        m.model_copy(update={"content": copy.deepcopy(m.content)}) if isinstance(m.content, list) else m
+        for m in history.messages
+    ]
+    return history.model_copy(update={"chat_id": chat_id, "user_id": user_id, "messages": messages})
+
+
+class ChatHistoryCache:
+    def __init__(self, max_chats: Optional[int] = None, max_chars: Optional[int] = None):
+        self.max_chats = max_chats or Config.CHAT_HISTORY_CACHE_SIZE
+        self.max_chars = max_chars or Config.CHAT_HISTORY_CACHE_MAX_CHARS
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._chars = 0
+        self._stats = {"hits": 0, "misses": 0, "appended": 0, "reparsed": 0}
+
+    async def _entry(self, db, chat_id: str) -> _Entry:
+        from crud import chat_async
+
+        count, max_id, compaction_sequence = await chat_async.get_history_state(db, chat_id)
+        entry = self._entries.get(chat_id)
+        if entry is not None and entry.count == count and entry.max_id == max_id:
+            self._stats["hits"] += 1
+            self._entries.move_to_end(chat_id)
+            return entry
+
+        self._stats["misses"] += 1
+        rows = await chat_async.get_chat_messages(db, chat_id, from_sequence=compaction_sequence)
+        entry = _Entry([_snapshot(r) for r in rows], count, max_id)
+        self._drop(chat_id)
+        self._entries[chat_id] = entry
+        self._chars += entry.chars
+        self._evict()
+        return entry
+
+    async def rows(self, db, chat_id: str) -> List[_Row]:
+        """Current rows from the latest compaction row on, ordered by sequence."""
+        return list((await self._entry(db, chat_id)).rows)
+
+    async def load(self, db, chat_id: str, user_id: Optional[str]) -> ChatHistory:
+        """ChatHistory equivalent to from_db_messages over the chat's rows."""
+        entry = await self._entry(db, chat_id)
+        if entry.history is None:
+            self._stats["reparsed"] += 1
+            entry.history = ChatHistory.from_db_messages(entry.rows, chat_id, user_id)
+        return _copy_history(entry.history, chat_id, user_id)
+
+    def record(self, db_msg) -> None:
+        """Apply a row that was just inserted to the cached copy, if any."""
+        entry = self._entries.get(db_msg.chat_id)
+        if entry is None:
+            return
+        row = _snapshot(db_msg)
+        entry.count += 1
+        entry.max_id = row.id if entry.max_id is None else max(entry.max_id, row.id)
+        self._chars -= entry.chars
+        if row.role == "compaction":
+            entry.rows = [row]
+            entry.chars = 0
+            entry.history = None
+        else:
+            entry.rows.append(row)
+            if entry.history is not None and not entry.history.append_db_message(row):
+                entry.history = None
+        entry.chars += _row_chars(row)
+        self._chars += entry.chars
+        self._stats["appended"] += 1
+        self._evict()
+
+    def invalidate(self, chat_id: str) -> None:
+        self._drop(chat_id)
+
+    def _drop(self, chat_id: str) -> None:
+        entry = self._entries.pop(chat_id, None)
+        if entry is not None:
+            self._chars -= entry.chars
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_chats or self._chars > self.max_chars):
+            _, entry = self._entries.popitem(last=False)
+            self._chars -= entry.chars
+
+    def stats(self) -> dict:
+        return {**self._stats, "chats": len(self._entries), "chars": self._chars}
+
+
+chat_history_cache = ChatHistoryCache()
@@ -15,15 +15,24 @@ Two behaviours vary per job and are columns on the row, not special cases here:
 
 Limits per user: RECURRING_LIMIT recurring + ONEOFF_LIMIT one-off active jobs.
 Built-ins (system_key set) don't count against either.
+
+Claimed runs execute concurrently: at most JOB_MAX_CONCURRENCY per instance and
+JOB_MAX_PER_USER per user (across instances), handed out round-robin across
+users so one user's backlog can't delay everyone else's. A claim is a lease the
+worker heartbeats while the run is in flight; if the worker dies the lease
+lapses and any instance's waker puts the row back to pending.
 """
+import os
 import re
 import uuid
+import socket
 import asyncio
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from sqlalchemy import select, func, update
+from sqlalchemy import select, func, update, or_
 
+from core.config import Config
 from core.database import get_db_session
 from models.jobs import ScheduledJob
 from schemas.jobs import Job, JobCreate, JobUpdate, JobList
@@ -35,6 +44,11 @@ RECURRING_LIMIT = 5
 ONEOFF_LIMIT = 10
 ACTIVE = ("pending", "running", "paused")
 CLAIM_BATCH = 25
+LEASE_SECONDS = 300          # a claim without a heartbeat for this long is requeued
+HEARTBEAT_SECONDS = 60
+
+# Identifies this process's claims (several instances share the table).
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
 
 
 def _now() -> datetime:
@@ -308,35 +322,119 @@ async def update_job(user_id: str, job_id: str, patch: JobUpdate) -> Optional[Jo
 # ── scheduling / running ─────────────────────────────────────────────────────
 
 async def reset_stale_running() -> int:
-    """On startup, reset jobs stuck in 'running' (crash mid-run) to 'pending'."""
+    """Requeue 'running' jobs whose lease lapsed (worker crashed or was
+    redeployed mid-run). Rows with no lease predate leases and are treated as
+    lapsed. Safe to call from every instance on every tick."""
     async with get_db_session() as db:
         result = await db.execute(
-            update(ScheduledJob).where(ScheduledJob.status == "running").values(status="pending")
+            update(ScheduledJob)
+            .where(ScheduledJob.status == "running",
+                   or_(ScheduledJob.lease_expires_at.is_(None),
+                       ScheduledJob.lease_expires_at < _now()))
+            .values(status="pending", claimed_by=None, lease_expires_at=None)
         )
         await db.commit()
         n = result.rowcount or 0
     if n:
-        logger.info(f"Reset {n} stale 'running' job(s) to pending")
+        logger.info(f"Requeued {n} 'running' job(s) with a lapsed lease")
     return n
 
 
-async def _claim_due(now: datetime) -> List[Job]:
-    """Atomically claim due jobs (mark running) so they never double-run."""
+def _pick_fair(rows: list, running: Dict[str, int], slots: int, per_user: int) -> list:
+    """Choose up to `slots` rows, one per user per round in order of each
+    user's oldest due job, never exceeding `per_user` in flight for a user.
+    `rows` must be ordered by run_at; `running` is the current per-user count."""
+    running = dict(running)
+    queues: Dict[str, list] = {}
+    for r in rows:
+        queues.setdefault(r.user_id, []).append(r)
+
+    picked: list = []
+    while len(picked) < slots:
+        progressed = False
+        for uid, queue in queues.items():
+            if len(picked) >= slots:
+                break
+            if queue and running.get(uid, 0) < per_user:
+                picked.append(queue.pop(0))
+                running[uid] = running.get(uid, 0) + 1
+                progressed = True
+        if not progressed:
+            break
+    return picked
+
+
+async def _claim_due(now: datetime, slots: int) -> List[Job]:
+    """Atomically claim up to `slots` due jobs (mark running, take a lease) so
+    they never double-run. Candidates are pre-limited to each user's oldest
+    JOB_MAX_PER_USER due rows so one user's backlog can't fill the batch, and
+    the per-user cap holds across instances."""
+    if slots <= 0:
+        return []
+    per_user = max(Config.JOB_MAX_PER_USER, 1)
     async with get_db_session() as db:
+        ranked = (
+            select(
+                ScheduledJob.id,
+                func.row_number().over(
+                    partition_by=ScheduledJob.user_id, order_by=ScheduledJob.run_at
+                ).label("rn"),
+            )
+            .where(ScheduledJob.status == "pending", ScheduledJob.run_at <= now)
+            .subquery()
+        )
         rows = (await db.execute(
             select(ScheduledJob)
-            .where(ScheduledJob.status == "pending", ScheduledJob.run_at <= now)
+            .where(ScheduledJob.id.in_(select(ranked.c.id).where(ranked.c.rn <= per_user)),
+                   ScheduledJob.status == "pending")
             .order_by(ScheduledJob.run_at)
             .limit(CLAIM_BATCH)
             .with_for_update(skip_locked=True)
         )).scalars().all()
-        claimed = [_to_dto(r) for r in rows]
-        for r in rows:
+        if not rows:
+            return []
+
+        # SKIP LOCKED only covers the pending rows picked here and the running
+        # count is a plain read, so two instances could each see a user at 0
+        # and claim past the cap. A per-user transaction lock serializes
+        # count + claim across instances; taken in sorted order so two
+        # claimers can't deadlock, released at commit.
+        for user_id in sorted({r.user_id for r in rows}):
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(user_id))))
+
+        running = dict((await db.execute(
+            select(ScheduledJob.user_id, func.count())
+            .where(ScheduledJob.status == "running",
+                   ScheduledJob.lease_expires_at > _now(),
+                   ScheduledJob.user_id.in_({r.user_id for r in rows}))
+            .group_by(ScheduledJob.user_id)
+        )).all())
+
+        chosen = _pick_fair(rows, running, slots, per_user)
+        claimed = [_to_dto(r) for r in chosen]
+        lease = _now() + timedelta(seconds=LEASE_SECONDS)
+        for r in chosen:
             r.status = "running"
+            r.claimed_by = WORKER_ID
+            r.lease_expires_at = lease
         await db.commit()
     return claimed
 
 
+async def _heartbeat(job_ids: List[str]) -> None:
+    """Extend the leases this worker holds."""
+    if not job_ids:
+        return
+    async with get_db_session() as db:
+        await db.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.id.in_(job_ids), ScheduledJob.claimed_by == WORKER_ID,
+                   ScheduledJob.status == "running")
+            .values(lease_expires_at=_now() + timedelta(seconds=LEASE_SECONDS))
+        )
+        await db.commit()
+
+
 async def _user_credits(user_id: str) -> int:
     try:
         from services.credits import CreditsService
@@ -346,26 +444,46 @@ async def _user_credits(user_id: str) -> int:
         return 0
 
 
-async def _finalize(job: Job, *, error: Optional[str], credits: int = 0) -> None:
+async def _release(job_id: str, values_for) -> bool:
+    """Hand a claimed row back with `values_for(row)`, only if this worker
+    still holds it. A lease that lapsed and was requeued (claimed_by NULL) or
+    re-claimed elsewhere is left alone. Returns True if the row was updated."""
     async with get_db_session() as db:
         row = (await db.execute(
-            select(ScheduledJob).where(ScheduledJob.id == job.id)
+            select(ScheduledJob).where(ScheduledJob.id == job_id)
         )).scalars().first()
-        if not row:
-            return
-        row.last_error = error
+        if not row or row.claimed_by != WORKER_ID:
+            return False
+        res = await db.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.id == job_id, ScheduledJob.claimed_by == WORKER_ID,
+                   ScheduledJob.status == "running")
+            .values(claimed_by=None, lease_expires_at=None, **values_for(row))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return res.rowcount > 0
+
+
+def _next_status(row: ScheduledJob, done: str) -> dict:
+    if row.recurrence:
+        return {"run_at": _advance_past_now(row.run_at, row.recurrence), "status": "pending"}
+    return {"status": done}
+
+
+async def _finalize(job: Job, *, error: Optional[str], credits: int = 0) -> None:
+    def values_for(row: ScheduledJob) -> dict:
+        values = {"last_error": error, **_next_status(row, "done" if error is None else "failed")}
         if error is None:
-            row.run_count = (row.run_count or 0) + 1
-            row.last_run_at = _now()
+            values["run_count"] = func.coalesce(ScheduledJob.run_count, 0) + 1
+            values["last_run_at"] = _now()
         if credits > 0:
-            row.last_run_credits = credits
-            row.credits_spent = (row.credits_spent or 0) + credits
-        if row.recurrence:
-            row.run_at = _advance_past_now(row.run_at, row.recurrence)
-            row.status = "pending"
-        else:
-            row.status = "done" if error is None else "failed"
-        await db.commit()
+            values["last_run_credits"] = credits
+            values["credits_spent"] = func.coalesce(ScheduledJob.credits_spent, 0) + credits
+        return values
+
+    if not await _release(job.id, values_for):
+        logger.warning(f"Job {job.id}: lease lost before finalize — result not recorded")
 
 
 async def _run_outcome_snippet(chat_id: str, max_len: int = 280) -> Optional[str]:
@@ -413,18 +531,9 @@ async def _skip_inactive(job: Job) -> None:
     """Advance a claimed job's schedule without running it (user inactive).
     No credits spent, no run recorded — run_count stays put so the next real
     run reuses the pending fresh-chat slot."""
-    async with get_db_session() as db:
-        row = (await db.execute(
-            select(ScheduledJob).where(ScheduledJob.id == job.id)
-        )).scalars().first()
-        if not row:
-            return
-        if row.recurrence:
-            row.run_at = _advance_past_now(row.run_at, row.recurrence)
-            row.status = "pending"
-        else:
-            row.status = "done"  # one-off tripwire: quietly drop it
-        await db.commit()
+    # A one-off tripwire is quietly dropped ("done").
+    if not await _release(job.id, lambda row: _next_status(row, "done")):
+        return
     logger.info(f"Skipped job {job.id} ({job.name}) — user inactive >72h")
 
 
@@ -480,25 +589,85 @@ async def run_job(job: Job) -> None:
         await _record_run_event(job, chat_id, error=str(e)[:300])
 
 
+# ── waker ────────────────────────────────────────────────────────────────────
+
+_inflight: Dict[str, asyncio.Task] = {}   # job_id -> running task (this instance)
+_slot_freed = asyncio.Event()
+_lag = {"runs": 0, "total_s": 0.0, "max_s": 0.0, "last_s": 0.0}
+
+
+def scheduler_stats() -> dict:
+    """In-flight count and scheduling lag (actual start minus run_at)."""
+    runs = _lag["runs"]
+    return {
+        "worker_id": WORKER_ID,
+        "in_flight": len(_inflight),
+        "lag_runs": runs,
+        "lag_avg_s": round(_lag["total_s"] / runs, 1) if runs else 0.0,
+        "lag_max_s": round(_lag["max_s"], 1),
+        "lag_last_s": round(_lag["last_s"], 1),
+    }
+
+
+def _record_lag(job: Job) -> None:
+    lag = max(0.0, (_now() - _utc(job.run_at)).total_seconds())
+    _lag["runs"] += 1
+    _lag["total_s"] += lag
+    _lag["max_s"] = max(_lag["max_s"], lag)
+    _lag["last_s"] = lag
+    if lag > 300:
+        logger.warning(f"Job {job.id} ({job.name}) started {lag:.0f}s after its run_at")
+
+
+async def _run_tracked(job: Job) -> None:
+    _record_lag(job)
+    try:
+        await run_job(job)
+    except Exception as e:
+        logger.error(f"Job {job.id} crashed outside run_job: {e}")
+    finally:
+        _inflight.pop(job.id, None)
+        _slot_freed.set()
+
+
 async def run_due_once(now: Optional[datetime] = None) -> int:
-    claimed = await _claim_due(now or _now())
+    """Claim as many due jobs as there are free slots and start them.
+    Returns the number started; runs continue in the background."""
+    slots = max(Config.JOB_MAX_CONCURRENCY, 1) - len(_inflight)
+    claimed = await _claim_due(now or _now(), slots)
     for job in claimed:
-        await run_job(job)
+        _inflight[job.id] = asyncio.create_task(_run_tracked(job))
     return len(claimed)
 
 
+async def _heartbeat_loop() -> None:
+    while True:
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        try:
+            await _heartbeat(list(_inflight))
+        except Exception as e:
+            logger.error(f"Job lease heartbeat failed: {e}")
+
+
 async def run_job_loop(interval_seconds: int = 60) -> None:
-    """Background waker: recover stale jobs, then run due jobs every interval."""
-    logger.info(f"Job scheduler loop started (every {interval_seconds}s)")
-    try:
-        await reset_stale_running()
-    except Exception as e:
-        logger.error(f"Stale recovery failed: {e}")
+    """Background waker: requeue lapsed leases, then start due jobs into free
+    slots every interval — or as soon as a run finishes, so a backlog drains
+    without waiting for the next tick."""
+    logger.info(
+        f"Job scheduler loop started (every {interval_seconds}s, worker={WORKER_ID}, "
+        f"concurrency={Config.JOB_MAX_CONCURRENCY}, per_user={Config.JOB_MAX_PER_USER})"
+    )
+    asyncio.create_task(_heartbeat_loop())
     while True:
+        _slot_freed.clear()
         try:
+            await reset_stale_running()
             n = await run_due_once()
             if n:
-                logger.info(f"Job scheduler ran {n} due job(s)")
+                logger.info(f"Job scheduler started {n} due job(s) ({len(_inflight)} in flight)")
         except Exception as e:
             logger.error(f"Job loop error: {e}")
-        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.wait_for(_slot_freed.wait(), timeout=interval_seconds)
+        except asyncio.TimeoutError:
+            pass
@@ -217,7 +217,7 @@ async def _review_user(user_id: str, symbols: Dict[str, float],
 
 async def review_once(now_et: Optional[datetime] = None) -> int:
     """One sweep: review every eligible user not yet reviewed today."""
-    from services.portfolio_digest import _batch_quotes
+    from services.quote_service import quote_service
 
     now_et = now_et or datetime.now(ET)
     day = now_et.strftime("%Y-%m-%d")
@@ -245,7 +245,7 @@ async def review_once(now_et: Optional[datetime] = None) -> int:
         return 0
 
     all_symbols = sorted(set().union(*(set(list(s.keys())[:MAX_SYMBOLS_PER_USER]) for s in todo.values())) | {"SPY"})
-    quotes = await _batch_quotes(all_symbols)
+    quotes = await quote_service.get_quotes(all_symbols)
     if not quotes:
         return 0
     spy = quotes.get("SPY")
@@ -14,20 +14,27 @@ Design choices for v1:
 - Alert dedup state is in-memory, keyed (user, symbol, day, band) — fine for a
   single-instance deploy; worst case after a restart a user gets one repeat.
 - Hard cap per user per day so a wild market day never becomes spam.
+- Who watches what lives in an in-memory symbol → users index (SubscriberIndex).
+  Write paths for watchlists, the holdings cache, device tokens and heartbeat
+  prefs mark the user dirty; a pass reloads only dirty users, then does one
+  batched quote fetch and visits only the symbols that crossed a band. A full
+  rebuild every RESYNC_SECONDS catches writes that don't notify (other
+  instances, manual SQL).
 """
 import asyncio
 import csv
 import io
 import logging
+import time
 from datetime import datetime
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from zoneinfo import ZoneInfo
 
 from sqlalchemy import select
 
 from core.database import get_db_session
 from models.brokerage import PortfolioHoldingsCache, UserWatchlist
-from models.user import DeviceToken
+from models.user import DeviceToken, UserSettings
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +43,7 @@ ET = ZoneInfo("America/New_York")
 CHECK_INTERVAL_SECONDS = 5 * 60
 ALERT_BANDS = (5.0, 10.0)  # abs % move thresholds, escalating
 MAX_ALERTS_PER_USER_PER_DAY = 6
+RESYNC_SECONDS = 30 * 60
 
 # (user_id, symbol, YYYY-MM-DD, band) already alerted
 _alerted: Set[Tuple[str, str, str, float]] = set()
@@ -62,52 +70,121 @@ def _symbols_from_cached_portfolio(portfolio_data: dict) -> List[str]:
     return symbols
 
 
-async def _gather_user_symbols() -> Dict[str, Set[str]]:
-    """Map of user_id -> watched symbols, for users with a registered device."""
-    async with get_db_session() as db:
-        result = await db.execute(select(DeviceToken.user_id).distinct())
-        user_ids = {row[0] for row in result.all()}
-        if not user_ids:
-            return {}
-
-        watched: Dict[str, Set[str]] = {uid: set() for uid in user_ids}
-
-        result = await db.execute(
-            select(UserWatchlist.user_id, UserWatchlist.symbol).where(
-                UserWatchlist.user_id.in_(user_ids)
-            )
-        )
-        for uid, sym in result.all():
-            watched[uid].add(sym.upper())
-
-        result = await db.execute(
-            select(PortfolioHoldingsCache.user_id, PortfolioHoldingsCache.portfolio_data).where(
-                PortfolioHoldingsCache.user_id.in_(user_ids)
-            )
-        )
-        for uid, data in result.all():
-            watched[uid].update(_symbols_from_cached_portfolio(data))
-
-    return {uid: syms for uid, syms in watched.items() if syms}
+class SubscriberIndex:
+    """symbol → push-capable users watching it, plus their heartbeat pref.
+
+    Per user it keeps the watchlist ∪ holdings symbol set; the inverted
+    symbol map is patched from the old/new set difference whenever a user is
+    reloaded, so a pass never rescans every user's holdings.
+    """
+
+    def __init__(self):
+        self._user_symbols: Dict[str, Set[str]] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._heartbeat: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._synced_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, user_id: str) -> None:
+        """Reload this user on the next pass. Cheap; safe to call from any write path."""
+        if user_id:
+            self._dirty.add(user_id)
+
+    def _set_user(self, user_id: str, symbols: Set[str], heartbeat: bool) -> None:
+        old = self._user_symbols.get(user_id, set())
+        for sym in old - symbols:
+            users = self._by_symbol.get(sym)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._by_symbol[sym]
+        for sym in symbols - old:
+            self._by_symbol.setdefault(sym, set()).add(user_id)
+        if symbols:
+            self._user_symbols[user_id] = symbols
+        else:
+            self._user_symbols.pop(user_id, None)
+        if heartbeat and symbols:
+            self._heartbeat.add(user_id)
+        else:
+            self._heartbeat.discard(user_id)
+
+    async def _load(self, only: Optional[Set[str]] = None) -> None:
+        """Reload `only` these users (all push-capable users when None)."""
+        async with get_db_session() as db:
+            q = select(DeviceToken.user_id).distinct()
+            if only is not None:
+                q = q.where(DeviceToken.user_id.in_(only))
+            user_ids = {row[0] for row in (await db.execute(q)).all()}
+
+            watched: Dict[str, Set[str]] = {uid: set() for uid in user_ids}
+            heartbeat: Set[str] = set()
+            if user_ids:
+                result = await db.execute(
+                    select(UserWatchlist.user_id, UserWatchlist.symbol).where(
+                        UserWatchlist.user_id.in_(user_ids)
+                    )
+                )
+                for uid, sym in result.all():
+                    watched[uid].add(sym.upper())
+
+                result = await db.execute(
+                    select(PortfolioHoldingsCache.user_id, PortfolioHoldingsCache.portfolio_data).where(
+                        PortfolioHoldingsCache.user_id.in_(user_ids)
+                    )
+                )
+                for uid, data in result.all():
+                    watched[uid].update(_symbols_from_cached_portfolio(data))
+
+                result = await db.execute(
+                    select(UserSettings.user_id, UserSettings.settings).where(
+                        UserSettings.user_id.in_(user_ids)
+                    )
+                )
+                for uid, settings in result.all():
+                    prefs = (settings or {}).get("preferences") or {}
+                    if prefs.get("heartbeat_enabled"):
+                        heartbeat.add(uid)
+
+        # Users that lost their last device (or were never push-capable) drop out.
+        stale = (set(self._user_symbols) if only is None else only) - user_ids
+        for uid in stale:
+            self._set_user(uid, set(), False)
+        for uid, symbols in watched.items():
+            self._set_user(uid, symbols, uid in heartbeat)
+
+    async def refresh(self) -> None:
+        """Bring the index up to date: full rebuild when due, else dirty users only."""
+        async with self._lock:
+            if not self._synced_at or time.monotonic() - self._synced_at >= RESYNC_SECONDS:
+                self._dirty.clear()
+                await self._load()
+                self._synced_at = time.monotonic()
+            elif self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                try:
+                    await self._load(dirty)
+                except Exception:
+                    self._dirty |= dirty
+                    raise
+
+    def symbols(self) -> List[str]:
+        return sorted(self._by_symbol)
+
+    def subscribers(self, symbol: str) -> Set[str]:
+        return self._by_symbol.get(symbol, set())
+
+    def heartbeat_enabled(self, user_id: str) -> bool:
+        return user_id in self._heartbeat
+
+
+subscribers = SubscriberIndex()
 
 
 async def _fetch_quotes(symbols: List[str]) -> Dict[str, dict]:
-    from skills.financial_modeling_prep.scripts.api import fmp
-
-    quotes: Dict[str, dict] = {}
-    for i in range(0, len(symbols), 100):
-        chunk = ",".join(symbols[i:i + 100])
-        try:
-            data = await asyncio.to_thread(fmp, f"/quote/{chunk}")
-        except Exception:
-            continue
-        if isinstance(data, dict):
-            data = [data]
-        if isinstance(data, list):
-            for q in data:
-                if isinstance(q, dict) and q.get("symbol"):
-                    quotes[q["symbol"].upper()] = q
-    return quotes
+    from services.quote_service import quote_service
+    return await quote_service.get_quotes(symbols)
 
 
 def _crossed_band(pct: float) -> float | None:
@@ -119,17 +196,7 @@ def _crossed_band(pct: float) -> float | None:
     return crossed
 
 
-async def _heartbeat_enabled(user_id: str) -> bool:
-    try:
-        from crud.user_preferences import get_user_preferences
-        async with get_db_session() as db:
-            prefs = await get_user_preferences(db, user_id)
-        return bool(prefs.get("heartbeat_enabled"))
-    except Exception:
-        return False
-
-
-async def _send_alert(user_id: str, symbol: str, quote: dict) -> None:
+async def _send_alert(user_id: str, symbol: str, quote: dict, heartbeat: bool = False) -> None:
     from services.move_explainer import explain_move
     from services.push_notifications import send_push_notification
 
@@ -140,7 +207,7 @@ async def _send_alert(user_id: str, symbol: str, quote: dict) -> None:
     # Heartbeat users get ONE source of alerts: the tripwire wakes their
     # heartbeat agent, which investigates and decides whether to alert
     # (report_insight). Everyone else keeps the direct templated push.
-    if await _heartbeat_enabled(user_id):
+    if heartbeat:
         from services.system_jobs import trigger_heartbeat_now
         await trigger_heartbeat_now(user_id, f"{symbol} moved {pct:+.1f}% today")
         return
@@ -174,26 +241,31 @@ async def _send_alert(user_id: str, symbol: str, quote: dict) -> None:
 
 async def check_once() -> int:
     """Run one monitor pass. Returns the number of alerts sent."""
-    watched = await _gather_user_symbols()
-    if not watched:
+    await subscribers.refresh()
+    all_symbols = subscribers.symbols()
+    if not all_symbols:
         return 0
 
-    all_symbols = sorted(set().union(*watched.values()))
     quotes = await _fetch_quotes(all_symbols)
     if not quotes:
         return 0
 
+    # Only symbols past a band matter; biggest moves first so they win the
+    # per-user daily cap.
+    movers: List[Tuple[str, dict, float]] = []
+    for symbol, quote in quotes.items():
+        if quote.get("changesPercentage") is None:
+            continue
+        band = _crossed_band(float(quote["changesPercentage"]))
+        if band is not None:
+            movers.append((symbol, quote, band))
+    movers.sort(key=lambda m: -abs(float(m[1]["changesPercentage"])))
+
     day = datetime.now(ET).strftime("%Y-%m-%d")
     sent = 0
-    for user_id, symbols in watched.items():
-        if _alert_counts.get((user_id, day), 0) >= MAX_ALERTS_PER_USER_PER_DAY:
-            continue
-        for symbol in symbols:
-            quote = quotes.get(symbol)
-            if not quote or quote.get("changesPercentage") is None:
-                continue
-            band = _crossed_band(float(quote["changesPercentage"]))
-            if band is None:
+    for symbol, quote, band in movers:
+        for user_id in sorted(subscribers.subscribers(symbol)):
+            if _alert_counts.get((user_id, day), 0) >= MAX_ALERTS_PER_USER_PER_DAY:
                 continue
             key = (user_id, symbol, day, band)
             if key in _alerted:
@@ -204,11 +276,9 @@ async def check_once() -> int:
             for lower in ALERT_BANDS:
                 if lower < band:
                     _alerted.add((user_id, symbol, day, lower))
-            await _send_alert(user_id, symbol, quote)
+            await _send_alert(user_id, symbol, quote, heartbeat=subscribers.heartbeat_enabled(user_id))
             sent += 1
             _alert_counts[(user_id, day)] = _alert_counts.get((user_id, day), 0) + 1
-            if _alert_counts[(user_id, day)] >= MAX_ALERTS_PER_USER_PER_DAY:
-                break
 
     # Prune state from previous days.
     stale = [k for k in _alerted if k[2] != day]
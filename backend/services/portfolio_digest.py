@@ -61,23 +61,8 @@ async def _watchlist_symbols(user_id: str) -> List[str]:
 
 
 async def _batch_quotes(symbols: List[str]) -> Dict[str, dict]:
-    from skills.financial_modeling_prep.scripts.api import fmp
-
-    quotes: Dict[str, dict] = {}
-    # FMP handles long symbol lists, but chunk defensively.
-    for i in range(0, len(symbols), 50):
-        chunk = ",".join(symbols[i:i + 50])
-        try:
-            data = await asyncio.to_thread(fmp, f"/quote/{chunk}")
-        except Exception:
-            continue
-        if isinstance(data, dict):
-            data = [data]
-        if isinstance(data, list):
-            for q in data:
-                if isinstance(q, dict) and q.get("symbol"):
-                    quotes[q["symbol"].upper()] = q
-    return quotes
+    from services.quote_service import quote_service
+    return await quote_service.get_quotes(symbols)
 
 
 async def get_portfolio_digest(user_id: str) -> Dict[str, Any]:
@@ -118,9 +103,8 @@ async def _build_digest(user_id: str) -> Dict[str, Any]:
             return {"success": True, "mode": "empty"}
         holdings = [{"symbol": s, "quantity": 0.0, "value": 0.0} for s in symbols[:30]]
 
-    quotes = await _batch_quotes([h["symbol"] for h in holdings])
-    spy_quotes = await _batch_quotes(["SPY"])
-    spy = spy_quotes.get("SPY")
+    quotes = await _batch_quotes([h["symbol"] for h in holdings] + ["SPY"])
+    spy = quotes.get("SPY")
 
     movers = []
     day_change_total = 0.0
@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from models.user import DeviceToken, Notification
+from services.market_monitor import subscribers as alert_subscribers
 
 logger = logging.getLogger(__name__)
 
@@ -29,11 +30,17 @@ async def register_device_token(
     )
     await db.execute(stmt)
     await db.commit()
+    alert_subscribers.invalidate(user_id)
 
 
 async def unregister_device_token(db: AsyncSession, token: str) -> None:
-    await db.execute(delete(DeviceToken).where(DeviceToken.token == token))
+    result = await db.execute(
+        delete(DeviceToken).where(DeviceToken.token == token).returning(DeviceToken.user_id)
+    )
+    user_ids = result.scalars().all()
     await db.commit()
+    for user_id in user_ids:
+        alert_subscribers.invalidate(user_id)
 
 
 async def get_user_tokens(db: AsyncSession, user_id: str) -> list[DeviceToken]:
@@ -0,0 +1,185 @@
+"""
+QuoteService — one shared path for FMP real-time quotes.
+
+Quotes are the bulk of our upstream FMP traffic, and the monitor, ledger
+review, digest, widgets and /market/batch-quotes each asked for them on their
+own. Everything now goes through `quote_service`:
+
+- Per-symbol cache with a short TTL. A symbol fetched for one user's digest
+  is reused by the next widget render, whatever batch it arrived in (the FMP
+  URL cache underneath only hits on an identical symbol list).
+- Batching window. Misses that arrive within BATCH_WINDOW_SECONDS of each
+  other (e.g. 30 widgets resolving at once) are merged into multi-symbol
+  `/quote/A,B,C` calls of up to CHUNK_SIZE symbols. A symbol already queued
+  or in flight is awaited, not re-requested.
+- Chunks run concurrently, gated by a token bucket sized to the FMP plan
+  (FMP_QUOTES_PER_MINUTE), so a big monitor pass can't starve other callers
+  into 429s.
+
+Failed chunks resolve to "no quote" for their symbols and aren't cached;
+symbols FMP doesn't know are cached as missing for the TTL.
+"""
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.config import Config
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUOTE_TTL_SECONDS = 15.0
+BATCH_WINDOW_SECONDS = 0.005
+CHUNK_SIZE = 100
+
+
+class _TokenBucket:
+    """Async token bucket: `rate` tokens/sec, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _parse_quotes(data) -> Optional[Dict[str, dict]]:
+    """symbol → quote from an FMP /quote response, or None if the call failed."""
+    if isinstance(data, dict):
+        if data.get("error"):
+            return None
+        data = [data] if data.get("symbol") else []
+    if not isinstance(data, list):
+        return None
+    return {
+        q["symbol"].upper(): q
+        for q in data
+        if isinstance(q, dict) and q.get("symbol")
+    }
+
+
+class QuoteService:
+    def __init__(
+        self,
+        ttl: float = QUOTE_TTL_SECONDS,
+        window: float = BATCH_WINDOW_SECONDS,
+        chunk_size: int = CHUNK_SIZE,
+        per_minute: Optional[int] = None,
+    ):
+        self.ttl = ttl
+        self.window = window
+        self.chunk_size = chunk_size
+        per_minute = per_minute or Config.FMP_QUOTES_PER_MINUTE
+        self._bucket = _TokenBucket(rate=per_minute / 60.0, burst=max(1.0, per_minute / 60.0 * 5))
+        # symbol → (fetched_at, quote or None when FMP had nothing for it)
+        self._cache: Dict[str, Tuple[float, Optional[dict]]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._queue: List[str] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {"requested": 0, "cache_hits": 0, "joined": 0, "upstream_calls": 0, "upstream_errors": 0}
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        # Futures and timers belong to one loop; start clean if it changed
+        # (tests, or a worker that re-created its loop).
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = {}
+            self._queue = []
+            self._flush_handle = None
+            self._bucket._lock = asyncio.Lock()
+        return loop
+
+    async def get_quotes(self, symbols: Iterable[str]) -> Dict[str, dict]:
+        """symbol → FMP quote for every symbol FMP returned. Never raises."""
+        loop = self._bind_loop()
+        wanted = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        self._stats["requested"] += len(wanted)
+
+        now = time.monotonic()
+        out: Dict[str, dict] = {}
+        waits: Dict[str, asyncio.Future] = {}
+        for sym in wanted:
+            hit = self._cache.get(sym)
+            if hit and now - hit[0] < self.ttl:
+                self._stats["cache_hits"] += 1
+                if hit[1] is not None:
+                    out[sym] = hit[1]
+                continue
+            fut = self._pending.get(sym)
+            if fut is not None:
+                self._stats["joined"] += 1
+            else:
+                fut = loop.create_future()
+                self._pending[sym] = fut
+                self._queue.append(sym)
+            waits[sym] = fut
+
+        if self._queue:
+            if len(self._queue) >= self.chunk_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+
+        if waits:
+            results = await asyncio.gather(*(asyncio.shield(f) for f in waits.values()))
+            for sym, quote in zip(waits, results):
+                if quote is not None:
+                    out[sym] = quote
+        return out
+
+    async def get_quote(self, symbol: str) -> Optional[dict]:
+        return (await self.get_quotes([symbol])).get(symbol.strip().upper())
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._queue = self._queue, []
+        for i in range(0, len(batch), self.chunk_size):
+            asyncio.ensure_future(self._fetch_chunk(batch[i:i + self.chunk_size]))
+
+    async def _fetch_chunk(self, symbols: List[str]) -> None:
+        from skills.financial_modeling_prep.scripts.api import fmp
+
+        found: Optional[Dict[str, dict]] = None
+        try:
+            await self._bucket.acquire()
+            self._stats["upstream_calls"] += 1
+            found = _parse_quotes(await asyncio.to_thread(fmp, f"/quote/{','.join(symbols)}"))
+        except Exception as e:
+            logger.warning(f"Quote batch of {len(symbols)} failed: {e}")
+        if found is None:
+            self._stats["upstream_errors"] += 1
+
+        now = time.monotonic()
+        for sym in symbols:
+            quote = found.get(sym) if found is not None else None
+            if found is not None:
+                self._cache[sym] = (now, quote)
+            fut = self._pending.pop(sym, None)
+            if fut is not None and not fut.done():
+                fut.set_result(quote)
+
+        # Drop expired entries now and then so one-off symbols don't pile up.
+        if len(self._cache) > 5000:
+            self._cache = {s: v for s, v in self._cache.items() if now - v[0] < self.ttl}
+
+    def stats(self) -> dict:
+        return {**self._stats, "cached_symbols": len(self._cache), "pending": len(self._pending)}
+
+
+quote_service = QuoteService()
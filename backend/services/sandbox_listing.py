@@ -0,0 +1,155 @@
+"""
+SandboxListing — whole-tree sandbox directory listings in one round-trip.
+
+The file panel used to walk the sandbox with one awaited `files.list` per
+directory, which for deep stocks/{SYMBOL}/ trees meant dozens of sequential
+E2B calls. Now a single `find -printf` returns every entry (type, size,
+mtime, path) under a root, and the parsed result is cached per user until:
+
+- a tool that writes files invalidates it (write_chat_file, replace_in_chat_file,
+  bash, uploads/deletes from the file panel, sandbox reset), or
+- LISTING_TTL seconds pass, to pick up writes that bypass those hooks.
+
+Shallower listings of a cached root are answered by filtering the cached tree.
+"""
+import itertools
+import shlex
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LISTING_TTL = 60.0
+_MAX_USERS = 512
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    path: str
+    name: str
+    type: str  # "file" | "dir"
+    size: int
+    mtime: float
+
+
+def _find_cmd(root: str, max_depth: int) -> str:
+    # Missing roots list as empty rather than failing the command.
+    return (
+        f"find {shlex.quote(root)} -mindepth 1 -maxdepth {int(max_depth)} "
+        "-printf '%y\\t%s\\t%T@\\t%p\\n' 2>/dev/null; true"
+    )
+
+
+def parse_find_output(stdout: str) -> List[FileEntry]:
+    entries = []
+    for line in stdout.splitlines():
+        parts = line.split("\t", 3)
+        if len(parts) != 4:
+            continue
+        kind, size, mtime, path = parts
+        try:
+            entries.append(FileEntry(
+                path=path,
+                name=path.rsplit("/", 1)[-1],
+                type="dir" if kind == "d" else "file",
+                size=int(size) if kind != "d" else 0,
+                mtime=float(mtime),
+            ))
+        except ValueError:
+            continue
+    return entries
+
+
+def _depth(root: str, path: str) -> int:
+    """Levels below root (root itself is 0)."""
+    rel = path[len(root):].strip("/")
+    return rel.count("/") + 1 if rel else 0
+
+
+async def _reconnect(user_id: str):
+    from modules.tools.implementations.code_execution import _get_or_reconnect_sandbox
+    return await _get_or_reconnect_sandbox(user_id)
+
+
+class SandboxListing:
+    def __init__(self, ttl: float = LISTING_TTL):
+        self.ttl = ttl
+        # user_id → {(root, max_depth): (fetched_at, entries)}
+        self._cache: Dict[str, Dict[Tuple[str, int], Tuple[float, List[FileEntry]]]] = {}
+        # user_id → stamp of the last invalidate(). A listing only stores its
+        # result if no invalidate() landed while its `find` was in flight.
+        self._generation: Dict[str, int] = {}
+        self._stamps = itertools.count(1)
+
+    def invalidate(self, user_id: str) -> None:
+        self._cache.pop(user_id, None)
+        self._generation.pop(user_id, None)
+        if len(self._generation) >= _MAX_USERS:
+            self._generation.pop(next(iter(self._generation)))
+        self._generation[user_id] = next(self._stamps)
+
+    def _cached(self, user_id: str, root: str, max_depth: int) -> Optional[List[FileEntry]]:
+        now = time.monotonic()
+        for (r, d), (fetched_at, entries) in self._cache.get(user_id, {}).items():
+            if r == root and d >= max_depth and now - fetched_at < self.ttl:
+                if d == max_depth:
+                    return entries
+                return [e for e in entries if _depth(root, e.path) <= max_depth]
+        return None
+
+    async def list_tree(
+        self,
+        user_id: str,
+        root: str,
+        max_depth: int = 8,
+        connect: Optional[Callable[[], Awaitable]] = None,
+    ) -> Optional[List[FileEntry]]:
+        """
+        Every file and directory under root, up to max_depth levels deep.
+        `connect` returns the sandbox to query on a miss (defaults to
+        reconnecting without creating one). Returns None if there is no sandbox.
+        """
+        root = root.rstrip("/") or "/"
+        hit = self._cached(user_id, root, max_depth)
+        if hit is not None:
+            return hit
+
+        generation = self._generation.get(user_id, 0)
+        sbx = await (connect or (lambda: _reconnect(user_id)))()
+        if sbx is None:
+            return None
+        started = time.monotonic()
+        result = await sbx.commands.run(_find_cmd(root, max_depth), timeout=15)
+        entries = parse_find_output(result.stdout or "")
+        logger.debug(f"Listed {len(entries)} entries under {root} for {user_id} "
+                     f"in {time.monotonic() - started:.2f}s")
+
+        if self._generation.get(user_id, 0) != generation:
+            return entries  # invalidated mid-flight; may predate the write
+        if user_id not in self._cache and len(self._cache) >= _MAX_USERS:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache.setdefault(user_id, {})[(root, max_depth)] = (time.monotonic(), entries)
+        return entries
+
+    async def list_dir(
+        self,
+        user_id: str,
+        directory: str,
+        connect: Optional[Callable[[], Awaitable]] = None,
+    ) -> Optional[List[FileEntry]]:
+        """Direct children of directory (served from any cached tree that covers it)."""
+        directory = directory.rstrip("/")
+        now = time.monotonic()
+        for (root, depth), (fetched_at, entries) in self._cache.get(user_id, {}).items():
+            if now - fetched_at >= self.ttl:
+                continue
+            if (directory == root or directory.startswith(root + "/")) and _depth(root, directory) < depth:
+                prefix = directory + "/"
+                return [e for e in entries if e.path.startswith(prefix) and "/" not in e.path[len(prefix):]]
+        return await self.list_tree(user_id, directory, max_depth=1, connect=connect)
+
+
+sandbox_listing = SandboxListing()
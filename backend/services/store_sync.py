@@ -1,18 +1,86 @@
 """
 Store Sync — reads store/ files from the E2B sandbox and syncs them to the
 store_files DB table so the frontend Memory Store panel can display them.
+
+One sandbox command hashes every store file; only files whose md5 differs from
+the content already in the DB are read (concurrently, at most
+READ_CONCURRENCY at a time) and they are written back in one bulk upsert.
+An unchanged store costs one command and one query.
+
+Both sides hash the same bytes: the sandbox hashes each file decoded the way
+_decode stores it (UTF-8, undecodable bytes replaced) and re-encoded, which is
+what Postgres' md5(content) sees.
 """
+import asyncio
+import json
 import logging
+import shlex
+from typing import Dict
 
 logger = logging.getLogger(__name__)
 
+HOME_DIR = "/home/user"
+STORE_DIR = f"{HOME_DIR}/store"
+READ_CONCURRENCY = 8
+
+# argv: base dir, dir to walk. Prints {path relative to base: md5} as JSON.
+_HASH_SCRIPT = """
+import hashlib, json, os, sys
+base, root = sys.argv[1], sys.argv[2]
+out = {}
+for d, _, names in os.walk(root):
+    for n in names:
+        p = os.path.join(d, n)
+        if not n.endswith((".md", ".py", ".txt")) or not os.path.isfile(p):
+            continue
+        try:
+            with open(p, "rb") as f:
+                text = f.read().decode("utf-8", "replace")
+        except OSError:
+            continue
+        out[os.path.relpath(p, base)] = hashlib.md5(text.encode("utf-8")).hexdigest()
+print(json.dumps(out))
+"""
+_HASH_CMD = f"python3 -c {shlex.quote(_HASH_SCRIPT)} {HOME_DIR} {STORE_DIR} 2>/dev/null"
+
+
+def _decode(raw: bytes) -> str:
+    """File bytes → the text stored in store_files (must match _HASH_SCRIPT)."""
+    return bytes(raw).decode("utf-8", "replace")
+
+
+def _parse_digests(stdout: str) -> Dict[str, str]:
+    """Parse _HASH_CMD output into {relative_path: md5}."""
+    try:
+        digests = json.loads(stdout)
+    except ValueError:
+        return {}
+    return digests if isinstance(digests, dict) else {}
+
+
+async def _read_files(sbx, rel_paths) -> Dict[str, str]:
+    """Read store files from the sandbox with bounded concurrency. Skips failures."""
+    sem = asyncio.Semaphore(READ_CONCURRENCY)
+
+    async def read(rel):
+        async with sem:
+            try:
+                return rel, _decode(await sbx.files.read(f"{HOME_DIR}/{rel}", format="bytes"))
+            except Exception as e:
+                logger.debug(f"Failed to read {rel}: {e}")
+                return rel, None
+
+    results = await asyncio.gather(*(read(rel) for rel in rel_paths))
+    return {rel: content for rel, content in results if content is not None}
+
 
 async def sync_store_files(user_id: str) -> int:
-    """Walk /home/user/store/ in the sandbox and upsert each file to store_files.
-    Returns the number of files synced."""
+    """Upsert new or changed files under /home/user/store/ to store_files.
+    Returns the number of files written; unchanged files are skipped and not
+    counted, so 0 means the DB already matched the sandbox."""
     from modules.tools.implementations.code_execution import _get_or_reconnect_sandbox
     from core.database import get_db_session
-    from crud.store import upsert_store_file
+    from crud.store import get_store_file_digests, bulk_upsert_store_files
 
     sbx = await _get_or_reconnect_sandbox(user_id)
     if not sbx:
@@ -20,31 +88,30 @@ async def sync_store_files(user_id: str) -> int:
         return 0
 
     try:
-        result = await sbx.commands.run(
-            "find /home/user/store -type f \\( -name '*.md' -o -name '*.py' -o -name '*.txt' \\) 2>/dev/null",
-            timeout=10,
-        )
+        result = await sbx.commands.run(_HASH_CMD, timeout=10)
         if result.exit_code != 0 or not result.stdout:
             return 0
 
-        paths = [p.strip() for p in result.stdout.strip().split("\n") if p.strip()]
-        if not paths:
+        sandbox_digests = _parse_digests(result.stdout)
+        if not sandbox_digests:
             return 0
 
-        synced = 0
         async with get_db_session() as db:
-            for abs_path in paths:
-                try:
-                    content = await sbx.files.read(abs_path, format="text")
-                    if content is None:
-                        continue
-                    rel = abs_path.replace("/home/user/", "")
-                    await upsert_store_file(db, user_id, rel, content=content)
-                    synced += 1
-                except Exception as e:
-                    logger.debug(f"Failed to sync {abs_path}: {e}")
-
-        logger.info(f"Synced {synced} store files for user {user_id}")
+            db_digests = await get_store_file_digests(db, user_id)
+        changed = [rel for rel, digest in sandbox_digests.items() if db_digests.get(rel) != digest]
+        if not changed:
+            logger.debug(f"Store unchanged for user {user_id} ({len(sandbox_digests)} files)")
+            return 0
+
+        # Read with no DB session open; the upsert takes a fresh one.
+        contents = await _read_files(sbx, changed)
+        if not contents:
+            return 0
+        async with get_db_session() as db:
+            synced = await bulk_upsert_store_files(db, user_id, contents)
+            await db.commit()
+
+        logger.info(f"Synced {synced} store files for user {user_id} ({len(sandbox_digests)} checked)")
         return synced
 
     except Exception as e:
@@ -143,20 +143,19 @@ def _returns(idea: TradeIdea, exit_price: float) -> Dict[str, float]:
 async def daily_bars(symbol: str, start: datetime, end: datetime) -> List[Dict]:
     """Daily OHLC for a symbol over [start, end], oldest first.
 
-    FMP returns newest-first and its client is sync + cached, so this reverses
-    and offloads it the way services/widget_data.py does.
+    Served from the local bar store (closed months are read from disk, only
+    the current one hits FMP). The store is sync, so this offloads it the way
+    services/widget_data.py does.
     """
     import asyncio
-    from skills.financial_modeling_prep.scripts.api import fmp
+    from skills._shared.bar_store import bar_store, to_bar_dicts
 
     def _fetch() -> List[Dict]:
-        r = fmp(f"/historical-price-full/{symbol}",
-                {"from": start.date().isoformat(), "to": end.date().isoformat()})
-        rows = r.get("historical", []) if isinstance(r, dict) else []
+        bars = bar_store.get(symbol, start.date().isoformat(), end.date().isoformat(),
+                             "day", provider="fmp")
         return [
-            {"date": b["date"], "high": float(b["high"]),
-             "low": float(b["low"]), "close": float(b["close"])}
-            for b in reversed(rows)
+            {"date": b["date"], "high": b["high"], "low": b["low"], "close": b["close"]}
+            for b in to_bar_dicts(bars, daily=True)
             # The proposal day itself is excluded: entry_ref is that day's price,
             # so its own range would score the idea against its own bar.
             if b["date"] > start.date().isoformat()
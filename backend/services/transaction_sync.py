@@ -5,14 +5,19 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import asyncio
-from core.database import SessionLocal
+from core.database import get_db_session
 from crud import transactions as tx_crud
-from crud.snaptrade_user import get_user_by_id as get_snaptrade_user
+from crud.snaptrade_user import get_user_by_id_async as get_snaptrade_user
 from modules.tools.clients.snaptrade import snaptrade_tools
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# SnapTrade returns at most this many activities per request.
+_ACTIVITY_PAGE_SIZE = 1000
+# A full page of history is a much heavier call than positions/balances.
+_ACTIVITY_PAGE_TIMEOUT = 60.0
+
 
 class TransactionSyncService:
     """Handles syncing transactions from SnapTrade to local database"""
@@ -23,7 +28,7 @@ class TransactionSyncService:
         self._sync_cooldown_seconds = 300  # 5 minutes default
         self._background_sync_enabled = True  # Enable background syncs
     
-    def _should_sync(self, user_id: str, force_resync: bool) -> bool:
+    async def _should_sync(self, user_id: str, force_resync: bool) -> bool:
         """Check if we should sync based on last sync time"""
         if force_resync:
             return True
@@ -32,17 +37,14 @@ class TransactionSyncService:
         
         # If not in cache, check database for recent sync
         if not last_sync:
-            db = SessionLocal()
-            try:
-                latest_job = tx_crud.get_latest_sync_job(db, user_id)
-                if latest_job and latest_job.status == "completed" and latest_job.completed_at:
-                    # Initialize cache from DB
-                    self._last_sync_time[user_id] = latest_job.completed_at
-                    last_sync = latest_job.completed_at
-                else:
-                    return True  # No recent sync, do it
-            finally:
-                db.close()
+            async with get_db_session() as db:
+                latest_job = await tx_crud.get_latest_sync_job_async(db, user_id)
+            if latest_job and latest_job.status == "completed" and latest_job.completed_at:
+                # Initialize cache from DB
+                self._last_sync_time[user_id] = latest_job.completed_at
+                last_sync = latest_job.completed_at
+            else:
+                return True  # No recent sync, do it
         
         if not last_sync:
             return True
@@ -72,9 +74,8 @@ class TransactionSyncService:
             Dictionary with sync results
         """
         # Get info about last sync
-        db_for_check = SessionLocal()
-        latest_job = tx_crud.get_latest_sync_job(db_for_check, user_id)
-        db_for_check.close()
+        async with get_db_session() as db:
+            latest_job = await tx_crud.get_latest_sync_job_async(db, user_id)
         
         # Calculate staleness
         last_sync_time = self._last_sync_time.get(user_id)
@@ -85,7 +86,7 @@ class TransactionSyncService:
         staleness_seconds = int((datetime.now(timezone.utc) - last_sync_time).total_seconds()) if last_sync_time else None
         
         # Check if we should sync (throttle)
-        should_sync = self._should_sync(user_id, force_resync)
+        should_sync = await self._should_sync(user_id, force_resync)
         
         if not should_sync:
             # Within cooldown - return cached data
@@ -129,28 +130,26 @@ class TransactionSyncService:
         # Need fresh sync (data is very old or force requested)
         logger.info(f"🔄 Starting foreground sync for {user_id} (force={force_resync}, staleness={staleness_seconds}s)")
         
-        db = SessionLocal()
-        
+        job = None
         try:
-            # Create sync job
-            job = tx_crud.create_sync_job(
-                db,
-                user_id=user_id,
-                status="running",
-                data={
-                    "start_date": start_date.isoformat() if start_date else None,
-                    "end_date": end_date.isoformat() if end_date else None,
-                    "force_resync": force_resync,
-                    "started_at": datetime.now(timezone.utc).isoformat()
-                }
-            )
+            # Create sync job and get user's SnapTrade connection
+            async with get_db_session() as db:
+                job = await tx_crud.create_sync_job_async(
+                    db,
+                    user_id=user_id,
+                    status="running",
+                    data={
+                        "start_date": start_date.isoformat() if start_date else None,
+                        "end_date": end_date.isoformat() if end_date else None,
+                        "force_resync": force_resync,
+                        "started_at": datetime.now(timezone.utc).isoformat()
+                    }
+                )
+                snaptrade_user = await get_snaptrade_user(db, user_id)
             
-            # Get user's SnapTrade connection
-            snaptrade_user = get_snaptrade_user(db, user_id)
             if not snaptrade_user or not snaptrade_user.is_connected:
-                tx_crud.update_sync_job(
-                    db,
-                    str(job.id),
+                await self._update_sync_job(
+                    job.id,
                     status="failed",
                     data={**job.data, "error": "No active brokerage connection"},
                     completed_at=datetime.now(timezone.utc)
@@ -173,9 +172,8 @@ class TransactionSyncService:
             )
             
             if not accounts:
-                tx_crud.update_sync_job(
-                    db,
-                    str(job.id),
+                await self._update_sync_job(
+                    job.id,
                     status="completed",
                     data={**job.data, "accounts_synced": 0, "message": "No accounts found"},
                     completed_at=datetime.now(timezone.utc)
@@ -212,9 +210,8 @@ class TransactionSyncService:
                 total_updated += result["updated"]
             
             # Update sync job as completed
-            tx_crud.update_sync_job(
-                db,
-                str(job.id),
+            await self._update_sync_job(
+                job.id,
                 status="completed",
                 data={
                     **job.data,
@@ -247,21 +244,26 @@ class TransactionSyncService:
             logger.error(f"Error syncing transactions for user {user_id}: {str(e)}", exc_info=True)
             
             # Update sync job as failed
-            if 'job' in locals():
-                tx_crud.update_sync_job(
-                    db,
-                    str(job.id),
-                    status="failed",
-                    data={**job.data, "error": str(e)},
-                    completed_at=datetime.now(timezone.utc)
-                )
+            if job is not None:
+                try:
+                    await self._update_sync_job(
+                        job.id,
+                        status="failed",
+                        data={**job.data, "error": str(e)},
+                        completed_at=datetime.now(timezone.utc)
+                    )
+                except Exception as update_error:
+                    logger.warning(f"Could not mark sync job {job.id} failed: {update_error}")
             
             return {
                 "success": False,
                 "message": f"Sync failed: {str(e)}"
             }
-        finally:
-            db.close()
+    
+    async def _update_sync_job(self, job_id, **fields) -> None:
+        """Write sync job bookkeeping in its own short async session."""
+        async with get_db_session() as db:
+            await tx_crud.update_sync_job_async(db, job_id, **fields)
     
     async def _background_sync(
         self,
@@ -291,9 +293,7 @@ class TransactionSyncService:
     ) -> List[Dict[str, Any]]:
         """Get all accounts for a user from SnapTrade"""
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
+            response = await snaptrade_tools.call_sdk(
                 lambda: snaptrade_tools.client.account_information.list_user_accounts(
                     user_id=user_id,
                     user_secret=user_secret
@@ -308,6 +308,39 @@ class TransactionSyncService:
             logger.error(f"Error fetching accounts for user {user_id}: {str(e)}")
             return []
     
+    async def _fetch_account_activities(
+        self,
+        snaptrade_user_id: str,
+        user_secret: str,
+        account_id: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Dict[str, Any]]:
+        """Page through every activity for an account in the date range."""
+        activities: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            response = await snaptrade_tools.call_sdk(
+                lambda offset=offset: snaptrade_tools.client.account_information.get_account_activities(
+                    user_id=snaptrade_user_id,
+                    user_secret=user_secret,
+                    account_id=account_id,
+                    start_date=start_date.date(),  # Pass date object, not string
+                    end_date=end_date.date(),
+                    offset=offset,
+                    limit=_ACTIVITY_PAGE_SIZE,
+                ),
+                timeout=_ACTIVITY_PAGE_TIMEOUT,
+            )
+
+            # New API returns {data: [...], pagination: {...}}
+            result = response.body if hasattr(response, 'body') else response
+            page = result.get('data', []) if isinstance(result, dict) else (result or [])
+            activities.extend(page)
+            if len(page) < _ACTIVITY_PAGE_SIZE:
+                return activities
+            offset += _ACTIVITY_PAGE_SIZE
+
     async def _sync_account_transactions(
         self,
         db_user_id: str,
@@ -325,60 +358,34 @@ class TransactionSyncService:
         """
 
         try:
-            # Call SnapTrade activities API (NEW API)
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: snaptrade_tools.client.account_information.get_account_activities(
-                    user_id=snaptrade_user_id,
-                    user_secret=user_secret,
-                    account_id=account_id,
-                    start_date=start_date.date(),  # Pass date object, not string
-                    end_date=end_date.date()
-                )
+            activities = await self._fetch_account_activities(
+                snaptrade_user_id, user_secret, account_id, start_date, end_date
             )
-            
-            # New API returns {data: [...], pagination: {...}}
-            result = response.body if hasattr(response, 'body') else response
-            activities = result.get('data', []) if isinstance(result, dict) else result
-            
             if not activities:
                 return {"fetched": 0, "inserted": 0, "updated": 0}
-            
-            fetched = len(activities)
-            inserted = 0
-            updated = 0
-            
-            db = SessionLocal()
-            try:
-                for activity in activities:
-                    tx_data = self._parse_snaptrade_activity(activity)
-                    if tx_data is None:
-                        continue
 
-                    _, is_new = tx_crud.upsert_transaction(
-                        db,
-                        user_id=db_user_id,
-                        account_id=account_id,
-                        symbol=tx_data["symbol"],
-                        transaction_type=tx_data["transaction_type"],
-                        transaction_date=tx_data["transaction_date"],
-                        data=tx_data["data"],
-                        external_id=tx_data.get("external_id"),
-                        auto_commit=False,
-                    )
+            rows = []
+            for activity in activities:
+                tx_data = self._parse_snaptrade_activity(activity)
+                if tx_data is None:
+                    continue
+                rows.append({
+                    "user_id": db_user_id,
+                    "account_id": account_id,
+                    "symbol": tx_data["symbol"],
+                    "transaction_type": tx_data["transaction_type"],
+                    "transaction_date": tx_data["transaction_date"],
+                    "external_id": tx_data.get("external_id"),
+                    "data": tx_data["data"],
+                })
 
-                    if is_new:
-                        inserted += 1
-                    else:
-                        updated += 1
+            inserted = updated = 0
+            if rows:
+                async with get_db_session() as db:
+                    inserted, updated = await tx_crud.bulk_upsert_transactions_async(db, rows)
 
-                db.commit()
-            finally:
-                db.close()
-            
             return {
-                "fetched": fetched,
+                "fetched": len(activities),
                 "inserted": inserted,
                 "updated": updated
             }
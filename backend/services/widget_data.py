@@ -13,6 +13,10 @@ fetch.
 Personal bindings (user_portfolio / user_watchlist) are per-viewer and bypass
 the shared cache; with viewer_user_id=None (public page) they return an "empty"
 shape that the renderer turns into a "connect your portfolio" CTA.
+
+Public share pages go one level further: the whole resolved payload is cached
+per (slug, spec) for the shortest TTL among the widget's sources, through the
+same single-flight cache, so concurrent anonymous viewers share one resolve.
 """
 import asyncio
 import json
@@ -72,22 +76,28 @@ def _cache_key(source: str, params: dict) -> str:
     return f"{source}|{json.dumps(params, sort_keys=True, default=str)}"
 
 
-async def _cached(source: str, params: dict, fetch):
-    """Double-checked-locking single-flight cache around an async `fetch`."""
-    ttl = _TTL_BY_SOURCE.get(source, 60)
+async def _cached(source: str, params: dict, fetch, ttl: Optional[float] = None, ttl_for=None):
+    """Double-checked-locking single-flight cache around an async `fetch`.
+    `ttl_for(data)`, if given, can shorten the lifetime of a particular result."""
+    if ttl is None:
+        ttl = _TTL_BY_SOURCE.get(source, 60)
     key = _cache_key(source, params)
 
+    def fresh(entry) -> bool:
+        return bool(entry) and (time.monotonic() - entry["at"]) < min(ttl, entry["ttl"])
+
     entry = _cache.get(key)
-    if entry and (time.monotonic() - entry["at"]) < ttl:
+    if fresh(entry):
         return entry["data"]
 
     lock = _locks.setdefault(key, asyncio.Lock())
     async with lock:
         entry = _cache.get(key)
-        if entry and (time.monotonic() - entry["at"]) < ttl:
+        if fresh(entry):
             return entry["data"]
         data = await fetch()
-        _cache[key] = {"at": time.monotonic(), "data": data}
+        _cache[key] = {"at": time.monotonic(), "data": data,
+                       "ttl": ttl_for(data) if ttl_for else ttl}
         if len(_cache) > 500:
             for k, _ in sorted(_cache.items(), key=lambda kv: kv[1]["at"])[:100]:
                 _cache.pop(k, None)
@@ -113,14 +123,13 @@ def _downsample(points: List[dict], cap: int = 400) -> List[dict]:
 
 # ── fetchers (return the shape payloads) ────────────────────────────────────
 async def _fetch_quote_table(symbols: List[str]) -> dict:
-    from skills.financial_modeling_prep.scripts.market.quote import get_quote_snapshot
+    from services.quote_service import quote_service
 
-    data = await asyncio.to_thread(get_quote_snapshot, ",".join(symbols))
-    if isinstance(data, dict):
-        data = [data] if data.get("symbol") else []
+    quotes = await quote_service.get_quotes(symbols)
     rows = []
-    for q in data or []:
-        if not isinstance(q, dict) or not q.get("symbol"):
+    for sym in dict.fromkeys(s.strip().upper() for s in symbols if s.strip()):
+        q = quotes.get(sym)
+        if not q:
             continue
         rows.append([
             q.get("symbol"),
@@ -139,10 +148,9 @@ async def _fetch_quote_table(symbols: List[str]) -> dict:
 
 
 async def _fetch_quote_number(symbol: str) -> dict:
-    from skills.financial_modeling_prep.scripts.market.quote import get_quote_snapshot
+    from services.quote_service import quote_service
 
-    data = await asyncio.to_thread(get_quote_snapshot, symbol)
-    q = data[0] if isinstance(data, list) and data else (data if isinstance(data, dict) else {})
+    q = await quote_service.get_quote(symbol) or {}
     price = q.get("price")
     change = q.get("change")
     change_pct = q.get("changesPercentage")
@@ -616,3 +624,41 @@ async def resolve_widget_data(
         else:
             out[tile["id"]] = res
     return out
+
+
+def public_ttl(spec: dict) -> int:
+    """Cache lifetime for a widget's anonymous payload: the shortest TTL among
+    its tiles' shared sources. Inline and personal bindings (empty for
+    anonymous viewers) never change, so an all-static widget gets the longest."""
+    ttls = []
+    for tile in spec.get("tiles", []):
+        queries = [tile.get("query")] if tile.get("query") else [
+            part.get("query") for part in (tile.get("queries") or {}).values()
+        ]
+        for query in queries:
+            source = (query or {}).get("source")
+            if source in _TTL_BY_SOURCE:
+                ttls.append(_TTL_BY_SOURCE[source])
+    return min(ttls) if ttls else max(_TTL_BY_SOURCE.values())
+
+
+# A public payload with a failed tile is only reused this long, so one
+# upstream blip doesn't pin an error on the share page for the full TTL.
+PUBLIC_ERROR_TTL = 5.0
+
+
+async def resolve_public_widget_data(slug: str, spec: dict) -> Dict[str, Any]:
+    """resolve_widget_data for an anonymous viewer, cached per (slug, spec)."""
+    ttl = public_ttl(spec)
+
+    def ttl_for(payload: Dict[str, Any]) -> float:
+        failed = any(isinstance(p, dict) and p.get("shape") == "error" for p in payload.values())
+        return min(ttl, PUBLIC_ERROR_TTL) if failed else ttl
+
+    return await _cached(
+        "public",
+        {"slug": slug, "spec": spec},
+        lambda: resolve_widget_data(spec, viewer_user_id=None),
+        ttl=ttl,
+        ttl_for=ttl_for,
+    )
@@ -0,0 +1,62 @@
+"""
+Widget view counter — buffers public-page views in memory and writes them in
+one batched UPDATE every FLUSH_INTERVAL_SECONDS.
+
+A viral shared widget used to turn into one row UPDATE (and commit) per page
+view, all on the same hot row. Now views are summed per widget in-process and
+applied with a single `view_count = view_count + CASE id ...` statement per
+flush. Counts are best-effort: views buffered on an instance that dies before
+its next flush are lost, which is acceptable for a vanity counter.
+"""
+import asyncio
+from typing import Dict
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 15
+
+
+class ViewCounter:
+    def __init__(self):
+        self._pending: Dict[str, int] = {}
+
+    def record(self, widget_id: str) -> None:
+        self._pending[widget_id] = self._pending.get(widget_id, 0) + 1
+
+    def pending(self, widget_id: str) -> int:
+        """Views recorded here but not yet written (added to the DB count on reads)."""
+        return self._pending.get(widget_id, 0)
+
+    async def flush(self) -> int:
+        """Write all buffered views in one statement. Returns the number of views written."""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+
+        from core.database import get_db_session
+        from crud.widget import add_view_counts
+
+        try:
+            async with get_db_session() as db:
+                await add_view_counts(db, batch)
+        except Exception:
+            # Put the views back so the next flush retries them.
+            for widget_id, n in batch.items():
+                self._pending[widget_id] = self._pending.get(widget_id, 0) + n
+            raise
+        return sum(batch.values())
+
+
+view_counter = ViewCounter()
+
+
+async def run_view_flush_loop() -> None:
+    logger.info("Widget view flush loop started")
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            await view_counter.flush()
+        except Exception:
+            logger.exception("Widget view flush failed")
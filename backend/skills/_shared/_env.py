@@ -3,9 +3,13 @@ Sandbox environment helpers — direct HTTP calls using API keys from env vars.
 """
 import os
 import json
+import threading
+import time
 import urllib.request
 import urllib.error
 import urllib.parse
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Any, Dict, Optional
 
 
@@ -13,6 +17,58 @@ def _get(env_var: str) -> Optional[str]:
     return os.getenv(env_var) or None
 
 
+class _TokenBucket:
+    """Thread-safe token bucket: `rate` calls/sec, bursting to `burst`."""
+
+    def __init__(self, rate: float, burst: float, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"token bucket needs rate > 0 and burst >= 1, got rate={rate}, burst={burst}")
+        self.rate, self.burst = rate, burst
+        self._clock, self._sleep = clock, sleep
+        self._tokens, self._updated = burst, clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+def _bucket(env_var: str, default: str) -> _TokenBucket:
+    rps = float(os.getenv(env_var, default))
+    if rps <= 0:
+        raise ValueError(f"{env_var} must be > 0, got {rps}")
+    return _TokenBucket(rate=rps, burst=max(rps, 1.0))
+
+
+# Per-service request budgets (FMP Starter ≈ 300/min), charged once per
+# upstream request — but only where the caller opted in: everywhere inside the
+# sandbox (CODE_SANDBOX), and inside rate_limited() blocks elsewhere. The
+# backend server shares this module and must not queue its own traffic here.
+RATE_LIMITS = {
+    "polygon": _bucket("POLYGON_MAX_RPS", "20"),
+    "fmp": _bucket("FMP_MAX_RPS", "5"),
+}
+_limited: ContextVar[bool] = ContextVar("provider_rate_limited", default=bool(os.getenv("CODE_SANDBOX")))
+
+
+@contextmanager
+def rate_limited():
+    """Charge fmp/polygon requests made in this block (this thread) to RATE_LIMITS."""
+    token = _limited.set(True)
+    try:
+        yield
+    finally:
+        _limited.reset(token)
+
+
 def call_proxy(
     service: str,
     method: str = "GET",
@@ -24,6 +80,9 @@ def call_proxy(
     Make a direct HTTP call to an external API, injecting the API key from env vars.
 
     service: "fmp" | "polygon" | "serper"
+
+    Inside the sandbox or a rate_limited() block, fmp and polygon requests
+    first wait on that service's RATE_LIMITS bucket.
     """
     service = service.lower()
     params = dict(params or {})
@@ -54,6 +113,8 @@ def call_proxy(
         parsed.scheme, parsed.netloc, parsed.path,
         urllib.parse.urlencode(merged, doseq=True), parsed.fragment,
     ))
+    if service in RATE_LIMITS and _limited.get():
+        RATE_LIMITS[service].acquire()
     if method.upper() == "GET":
         req = urllib.request.Request(full_url, headers={"User-Agent": "Mozilla/5.0"})
     else:
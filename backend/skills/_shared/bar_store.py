@@ -0,0 +1,407 @@
+"""
+Local OHLCV bar store — fetch each closed session once, then read it from disk.
+
+Historical bars never change after the session closes, yet day_trading,
+trade_ideas, portfolio_history and alpha_research all re-downloaded the same
+history on every run. The store keeps bars as NumPy structured arrays, one
+`.npy` file per partition:
+
+    {BAR_STORE_DIR}/{provider}/{SYMBOL}/{timespan}/{partition}.npy
+
+    intraday timespans ('1min' … '1hour') → one partition per ET weekday
+    'day'                                 → one partition per ET month
+
+A request loads the partitions on disk (memory-mapped, so a single-partition
+read is a zero-copy view), fetches only the missing ones in as few upstream
+calls as the provider's page size allows, and persists those that are fully
+in the past. Partitions that include today are always fetched live and never
+written. Days with no bars (holidays) are stored as empty partitions so they
+aren't refetched either.
+
+Both providers return split-adjusted prices, so a split rewrites every bar
+before it. Each symbol directory is stamped with the latest split date
+(adjustment.json, re-checked once per ET day); when a new split shows up, the
+symbol's partitions are dropped and refetched on demand, rather than mixing
+pre- and post-split scales.
+
+Usage:
+    from skills._shared.bar_store import bar_store, to_bar_dicts
+
+    bars = bar_store.get("NVDA", "2025-01-02", "2025-01-31", "1min")   # structured array
+    closes = bars["close"]                                             # float64 view
+    dicts = to_bar_dicts(bars)      # same dicts polygon's format_bars returns
+
+Providers: 'polygon' (any timespan) and 'fmp' ('day' only).
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from zoneinfo import ZoneInfo
+    _ET = ZoneInfo("America/New_York")
+except Exception as e:
+    # A fixed UTC-5 offset would file every summer bar under the wrong ET
+    # date — and persist it. Refuse to run instead.
+    raise ImportError("bar_store needs the IANA tz database (pip install tzdata)") from e
+
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", "/tmp/finch_bar_store")
+
+BAR_DTYPE = np.dtype([
+    ("timestamp", "<i8"),   # unix ms (bar open)
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("vwap", "<f8"),
+    ("trades", "<f8"),      # NaN when the provider doesn't report it
+])
+
+INTRADAY_TIMESPANS = {
+    "1min": (1, "minute"),
+    "5min": (5, "minute"),
+    "15min": (15, "minute"),
+    "30min": (30, "minute"),
+    "1hour": (1, "hour"),
+}
+TIMESPANS = {**INTRADAY_TIMESPANS, "day": (1, "day")}
+
+# Calendar days per upstream request, sized so extended-hours bars stay under
+# Polygon's 50k-results page.
+_CHUNK_DAYS = {"1min": 30, "5min": 150, "15min": 400, "30min": 800, "1hour": 1500, "day": 3650}
+POLYGON_LIMIT = 50_000
+
+
+class BarFetchError(RuntimeError):
+    """An upstream fetch failed and nothing was available locally."""
+
+
+# ── partitions ──────────────────────────────────────────────────────────────
+def _et_date(ts_ms: int) -> date:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=_ET).date()
+
+
+def _et_midnight_ms(d: date) -> int:
+    return int(datetime(d.year, d.month, d.day, tzinfo=_ET).timestamp() * 1000)
+
+
+def _partition_key(d: date, timespan: str) -> str:
+    return d.strftime("%Y-%m") if timespan == "day" else d.isoformat()
+
+
+def _partition_span(key: str, timespan: str) -> Tuple[date, date]:
+    if timespan != "day":
+        d = date.fromisoformat(key)
+        return d, d
+    first = date.fromisoformat(key + "-01")
+    nxt = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, nxt - timedelta(days=1)
+
+
+def _partitions(start: date, end: date, timespan: str) -> List[str]:
+    keys: List[str] = []
+    d = start
+    while d <= end:
+        if timespan == "day" or d.weekday() < 5:  # weekends never trade intraday
+            k = _partition_key(d, timespan)
+            if not keys or keys[-1] != k:
+                keys.append(k)
+        d += timedelta(days=1)
+    return keys
+
+
+def _adjacent(prev_hi: date, lo: date, timespan: str) -> bool:
+    """No partition lies between prev_hi and lo (weekends don't count intraday)."""
+    gap = [prev_hi + timedelta(days=i) for i in range(1, (lo - prev_hi).days)]
+    return not gap if timespan == "day" else all(d.weekday() >= 5 for d in gap)
+
+
+def _spans(keys: List[str], timespan: str) -> List[Tuple[date, date]]:
+    """Group partitions into contiguous date ranges no longer than one request."""
+    out: List[Tuple[date, date]] = []
+    for k in keys:
+        lo, hi = _partition_span(k, timespan)
+        if out and _adjacent(out[-1][1], lo, timespan) and (hi - out[-1][0]).days < _CHUNK_DAYS[timespan]:
+            out[-1] = (out[-1][0], hi)
+        else:
+            out.append((lo, hi))
+    return out
+
+
+# ── providers ───────────────────────────────────────────────────────────────
+def _rows_to_array(rows: List[tuple]) -> np.ndarray:
+    arr = np.array(rows, dtype=BAR_DTYPE) if rows else np.empty(0, dtype=BAR_DTYPE)
+    return np.sort(arr, order="timestamp")
+
+
+def _num(v) -> float:
+    return float(v) if v is not None else np.nan
+
+
+def fetch_polygon(symbol: str, timespan: str, start: date, end: date) -> Tuple[np.ndarray, bool]:
+    """Polygon aggregates → (bars, truncated)."""
+    from skills.polygon_io.scripts._client import call_polygon_api
+
+    mult, unit = TIMESPANS[timespan]
+    resp = call_polygon_api(
+        f"/v2/aggs/ticker/{symbol}/range/{mult}/{unit}/{start.isoformat()}/{end.isoformat()}",
+        {"adjusted": "true", "sort": "asc", "limit": POLYGON_LIMIT},
+    )
+    if not isinstance(resp, dict) or "error" in resp:
+        raise BarFetchError((resp or {}).get("error", "polygon request failed"))
+    results = resp.get("results") or []
+    rows = [
+        (int(r["t"]), _num(r.get("o")), _num(r.get("h")), _num(r.get("l")), _num(r.get("c")),
+         _num(r.get("v")), _num(r.get("vw")), _num(r.get("n")))
+        for r in results if r.get("t") is not None
+    ]
+    return _rows_to_array(rows), len(results) >= POLYGON_LIMIT
+
+
+def fetch_fmp(symbol: str, timespan: str, start: date, end: date) -> Tuple[np.ndarray, bool]:
+    """FMP daily history → (bars, truncated). Timestamps are ET midnight, like Polygon's."""
+    from skills.financial_modeling_prep.scripts.api import fmp
+
+    if timespan != "day":
+        raise BarFetchError("fmp provider only serves timespan='day'")
+    resp = fmp(f"/historical-price-full/{symbol}", {"from": start.isoformat(), "to": end.isoformat()})
+    if isinstance(resp, dict) and resp.get("error"):
+        raise BarFetchError(str(resp["error"]))
+    hist = resp.get("historical", []) if isinstance(resp, dict) else []
+    rows = []
+    for r in hist:
+        try:
+            d = date.fromisoformat(r["date"][:10])
+        except (KeyError, ValueError):
+            continue
+        rows.append((_et_midnight_ms(d), _num(r.get("open")), _num(r.get("high")), _num(r.get("low")),
+                     _num(r.get("close")), _num(r.get("volume")), _num(r.get("vwap")), np.nan))
+    return _rows_to_array(rows), False
+
+
+def split_dates_polygon(symbol: str) -> List[str]:
+    """Recent split execution dates ('YYYY-MM-DD') per Polygon, newest first."""
+    from skills.polygon_io.scripts._client import call_polygon_api
+
+    resp = call_polygon_api("/v3/reference/splits",
+                            {"ticker": symbol, "sort": "execution_date", "order": "desc", "limit": 10})
+    if not isinstance(resp, dict) or "error" in resp:
+        raise BarFetchError((resp or {}).get("error", "polygon splits request failed"))
+    return [r["execution_date"] for r in resp.get("results") or [] if r.get("execution_date")]
+
+
+def split_dates_fmp(symbol: str) -> List[str]:
+    """Split dates ('YYYY-MM-DD') per FMP."""
+    from skills.financial_modeling_prep.scripts.api import fmp
+
+    resp = fmp(f"/historical-price-full/stock_split/{symbol}")
+    if isinstance(resp, dict) and resp.get("error"):
+        raise BarFetchError(str(resp["error"]))
+    hist = resp.get("historical", []) if isinstance(resp, dict) else []
+    return [r["date"][:10] for r in hist if r.get("date")]
+
+
+Fetcher = Callable[[str, str, date, date], Tuple[np.ndarray, bool]]
+PROVIDERS: Dict[str, Fetcher] = {"polygon": fetch_polygon, "fmp": fetch_fmp}
+SplitSource = Callable[[str], List[str]]
+SPLIT_SOURCES: Dict[str, SplitSource] = {"polygon": split_dates_polygon, "fmp": split_dates_fmp}
+
+
+# ── store ───────────────────────────────────────────────────────────────────
+class BarStore:
+    def __init__(self, root: str = BAR_STORE_DIR, providers: Optional[Dict[str, Fetcher]] = None,
+                 today: Optional[Callable[[], date]] = None,
+                 split_sources: Optional[Dict[str, SplitSource]] = None):
+        self.root = root
+        self.providers = providers or PROVIDERS
+        self.split_sources = SPLIT_SOURCES if split_sources is None else split_sources
+        self._today = today or (lambda: datetime.now(_ET).date())
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._split_checked: Dict[tuple, date] = {}
+        self.stats = {"partitions_read": 0, "partitions_fetched": 0, "requests": 0, "split_resets": 0}
+
+    def _dir(self, provider: str, symbol: str, timespan: str) -> str:
+        return os.path.join(self.root, provider, symbol, timespan)
+
+    def _check_splits(self, provider: str, symbol: str, today: date) -> None:
+        """
+        Drop the symbol's stored partitions if its latest split differs from
+        the one they were adjusted for. Checked once per ET day; a failed check
+        keeps the stored bars and retries on the next call.
+        """
+        source = self.split_sources.get(provider)
+        if source is None or self._split_checked.get((provider, symbol)) == today:
+            return
+        sym_dir = os.path.join(self.root, provider, symbol)
+        stamp_path = os.path.join(sym_dir, "adjustment.json")
+        with self._lock((provider, symbol)):
+            try:
+                with open(stamp_path) as f:
+                    stamp = json.load(f)
+            except (FileNotFoundError, ValueError):
+                stamp = None
+            if stamp and stamp.get("checked") == today.isoformat():
+                self._split_checked[(provider, symbol)] = today
+                return
+            try:
+                # Announced splits don't adjust anything until they take effect.
+                latest = max((d for d in source(symbol) if d <= today.isoformat()), default=None)
+            except Exception:
+                return
+            if stamp is None or stamp.get("latest_split") != latest:
+                # Unstamped directories predate the check; their adjustment is unknown.
+                for name in os.listdir(sym_dir) if os.path.isdir(sym_dir) else []:
+                    if name in TIMESPANS:
+                        shutil.rmtree(os.path.join(sym_dir, name), ignore_errors=True)
+                        self.stats["split_resets"] += 1
+            os.makedirs(sym_dir, exist_ok=True)
+            tmp = os.path.join(sym_dir, f".adjustment.{uuid.uuid4().hex}.json")
+            with open(tmp, "w") as f:
+                json.dump({"latest_split": latest, "checked": today.isoformat()}, f)
+            os.replace(tmp, stamp_path)
+            self._split_checked[(provider, symbol)] = today
+
+    def _lock(self, key: tuple) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _load(path: str) -> Optional[np.ndarray]:
+        try:
+            return np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        except ValueError:  # zero-length partitions can't be mapped on some platforms
+            return np.load(path)
+
+    def _save(self, directory: str, key: str, arr: np.ndarray) -> None:
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, f".{key}.{uuid.uuid4().hex}.npy")
+        np.save(tmp, np.ascontiguousarray(arr, dtype=BAR_DTYPE))
+        os.replace(tmp, os.path.join(directory, f"{key}.npy"))
+
+    def get(self, symbol: str, start: str, end: str, timespan: str = "1min",
+            provider: str = "polygon") -> np.ndarray:
+        """
+        Bars for symbol over the ET dates [start, end] (inclusive, 'YYYY-MM-DD'),
+        ascending. Reads closed partitions from disk and fetches only what's
+        missing. Raises BarFetchError if a fetch failed and no bars came back.
+        """
+        if timespan not in TIMESPANS:
+            raise ValueError(f"Invalid timespan '{timespan}'. Valid options: {', '.join(TIMESPANS)}")
+        symbol = symbol.upper()
+        lo, hi = date.fromisoformat(start[:10]), date.fromisoformat(end[:10])
+        today = self._today()
+        self._check_splits(provider, symbol, today)
+        directory = self._dir(provider, symbol, timespan)
+
+        parts: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        for key in _partitions(lo, hi, timespan):
+            sealed = _partition_span(key, timespan)[1] < today
+            arr = self._load(os.path.join(directory, f"{key}.npy")) if sealed else None
+            if arr is None:
+                missing.append(key)
+            else:
+                parts[key] = arr
+                self.stats["partitions_read"] += 1
+
+        error = None
+        if missing:
+            with self._lock((provider, symbol, timespan)):
+                try:
+                    parts.update(self._fetch_missing(provider, symbol, timespan, missing, directory, today))
+                except BarFetchError as e:
+                    error = e
+
+        ordered = [parts[k] for k in sorted(parts) if len(parts[k])]
+        if not ordered:
+            if error:
+                raise error
+            return np.empty(0, dtype=BAR_DTYPE)
+        bars = ordered[0] if len(ordered) == 1 else np.concatenate(ordered)
+        # Month partitions (and live fetches) can reach past the requested dates.
+        lo_ms, hi_ms = _et_midnight_ms(lo), _et_midnight_ms(hi + timedelta(days=1))
+        ts = bars["timestamp"]
+        if len(ts) and (ts[0] < lo_ms or ts[-1] >= hi_ms):
+            bars = bars[(ts >= lo_ms) & (ts < hi_ms)]
+        return bars
+
+    def _fetch_missing(self, provider: str, symbol: str, timespan: str, missing: List[str],
+                       directory: str, today: date) -> Dict[str, np.ndarray]:
+        # Another thread may have filled some while we waited for the lock.
+        still, found = [], {}
+        for key in missing:
+            arr = self._load(os.path.join(directory, f"{key}.npy")) \
+                if _partition_span(key, timespan)[1] < today else None
+            if arr is None:
+                still.append(key)
+            else:
+                found[key] = arr
+
+        fetch = self.providers[provider]
+        wanted = set(still)
+        for span_lo, span_hi in _spans(still, timespan):
+            lo = span_lo
+            while True:
+                self.stats["requests"] += 1
+                bars, truncated = fetch(symbol, timespan, lo, span_hi)
+                keys = np.array([_partition_key(_et_date(t), timespan) for t in bars["timestamp"].tolist()]) \
+                    if len(bars) else np.empty(0, dtype="<U10")
+                # A full page may stop mid-partition: keep everything before the
+                # last partition it reached, then resume from that partition.
+                cut = keys[-1] if (truncated and len(keys)) else None
+                resume = _partition_span(cut, timespan)[0] if cut is not None else None
+                if resume is not None and resume <= lo:
+                    cut = None  # one partition exceeds a page; take what we got, unsaved
+                for key in _partitions(lo, span_hi, timespan):
+                    if key not in wanted or (cut is not None and key >= cut):
+                        continue
+                    arr = bars[keys == key] if len(keys) else bars
+                    found[key] = arr
+                    if _partition_span(key, timespan)[1] < today and not (truncated and len(keys) and key == keys[-1]):
+                        self._save(directory, key, arr)
+                        self.stats["partitions_fetched"] += 1
+                if cut is None:
+                    break
+                lo = resume
+        return found
+
+
+bar_store = BarStore()
+
+
+# ── compatibility ───────────────────────────────────────────────────────────
+def _opt(v):
+    return None if v != v else v  # NaN → None
+
+
+def to_bar_dicts(bars: np.ndarray, daily: bool = False) -> List[Dict]:
+    """Structured bars → the dicts polygon's format_bars returns. With
+    daily=True 'date' is the ET trading date ('YYYY-MM-DD') instead of a timestamp string."""
+    out = []
+    for ts, o, h, l, c, v, vw, n in bars.tolist():
+        out.append({
+            "timestamp": ts,
+            "date": _et_date(ts).isoformat() if daily
+                    else datetime.fromtimestamp(ts / 1000).strftime("%Y-%m-%d %H:%M:%S"),
+            "open": _opt(o), "high": _opt(h), "low": _opt(l), "close": _opt(c),
+            "volume": _opt(v), "vwap": _opt(vw),
+            "trades": None if n != n else int(n),
+        })
+    return out
+
+
+def daily_closes(symbol: str, start: str, end: str, provider: str = "fmp") -> Dict[str, float]:
+    """{'YYYY-MM-DD': close} for symbol over [start, end] from the store."""
+    bars = bar_store.get(symbol, start, end, "day", provider=provider)
+    return {_et_date(ts).isoformat(): c for ts, c in zip(bars["timestamp"].tolist(), bars["close"].tolist())
+            if c == c}
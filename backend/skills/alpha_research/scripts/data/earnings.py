@@ -203,14 +203,17 @@ def _surprise(actual, estimated):
 
 
 def _price_change(symbol, from_date, to_date):
-    from skills.financial_modeling_prep.scripts.market.historical_prices import get_historical_prices
+    from skills._shared.bar_store import daily_closes, BarFetchError
 
     start = (datetime.strptime(from_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-    prices = get_historical_prices(symbol, from_date=start, to_date=to_date)
-    if not prices or isinstance(prices, dict) and "error" in prices or len(prices) < 2:
+    try:
+        closes = daily_closes(symbol, start, to_date)
+    except BarFetchError:
+        return None
+    if len(closes) < 2:
         return None
-    s = sorted(prices, key=lambda p: p.get("date", ""))
-    pre, cur = s[0].get("close"), s[-1].get("close")
+    s = sorted(closes)
+    pre, cur = closes[s[0]], closes[s[-1]]
     if pre and cur and pre > 0:
         return ((cur - pre) / pre) * 100
     return None
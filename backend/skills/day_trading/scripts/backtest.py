@@ -0,0 +1,286 @@
+"""
+Backtest harness — replay the setups over stored history, many symbols at once.
+
+Each symbol is an independent job (its sessions replay in order), so symbols
+fan out over a process pool. Bars come from the local bar store
+(skills._shared.bar_store), so a re-run over the same range is disk-only.
+Every session replays through the same code the live agent calls:
+
+    orb           — streaming.OpeningRange fed bar by bar; at the first
+                    non-"forming" orb_signal() a resting stop entry is placed at
+                    the OR boundary (fills at the level, or the open on a gap)
+    vwap          — streaming.SessionVWAP; the first long vwap_state() trigger
+                    inside the first `vwap_window_minutes` enters at that close
+    connors_rsi2  — connors_rsi2_signal() on daily closes; enter at the close,
+                    exit at the first close above the 5-day SMA or after
+                    max_hold_days, catastrophe stop at 2×ATR(14)
+
+Sizing and targets come from risk.plan_trade (rr=10 by default, the ORB payoff
+profile); intraday trades exit at stop, target or the session close. When one
+bar spans both stop and target the stop is assumed first. Results are scored
+with journal.score_trades, so they read exactly like journal.setup_stats():
+
+    from skills.day_trading.scripts.backtest import backtest, benchmark
+
+    r = backtest(["NVDA", "AMD", "MU"], "2023-01-01", "2024-12-31")
+    r["stats"]["orb"]          # {"n", "wins", "win_rate", "total_pnl", "avg_pnl", "by_phase"}
+    benchmark(["NVDA", "AMD"], "2024-01-01", "2024-03-31")   # bars/sec
+
+Long only, one trade per setup per symbol per session, no slippage/commissions.
+"""
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .clock import group_rth_by_day, session, to_et
+from .journal import score_trades
+from .risk import plan_trade
+from .setups import connors_rsi2_signal, orb_signal, vwap_state
+from .streaming import OpeningRange, SessionVWAP, WilderATR
+
+SETUPS = ("orb", "vwap", "connors_rsi2")
+DAILY_WARMUP_DAYS = 420  # calendar days of daily history for SMA(200)/ATR(14)
+
+Loader = Callable[[str, str, str, str], List[Dict]]
+
+
+@dataclass
+class BacktestConfig:
+    equity: float = 100_000.0
+    risk_pct: float = 0.01
+    rr: float = 10.0
+    setups: Tuple[str, ...] = SETUPS
+    or_minutes: int = 5
+    stop_atr_mult: float = 0.10
+    max_chase_r: float = 0.5
+    vwap_lookback: int = 6
+    vwap_window_minutes: int = 60
+    max_hold_days: int = 5
+    catastrophe_atr_mult: float = 2.0
+
+
+def load_store_bars(symbol: str, start: str, end: str, timespan: str) -> List[Dict]:
+    """Default loader: bar dicts from the local bar store (Polygon)."""
+    from skills._shared.bar_store import bar_store
+
+    arr = bar_store.get(symbol, start, end, timespan)
+    names = arr.dtype.names
+    return [dict(zip(names, row)) for row in arr.tolist()]
+
+
+# ── fills ───────────────────────────────────────────────────────────────────
+def _exit_long(bar: Dict, stop: float, target: float) -> Optional[Tuple[float, str]]:
+    """Stop/target fill inside one bar (gaps fill at the open; stop wins ties)."""
+    o, h, l = float(bar["open"]), float(bar["high"]), float(bar["low"])
+    if l <= stop:
+        return min(stop, o), "stop"
+    if h >= target:
+        return max(target, o), "target"
+    return None
+
+
+def _trade(symbol: str, setup: str, bar: Dict, plan: Dict, exit_px: float, reason: str,
+           daily: bool = False) -> Dict[str, Any]:
+    et = to_et(int(bar["timestamp"]))
+    pnl = plan["shares"] * (exit_px - plan["entry"])
+    return {
+        "symbol": symbol, "setup": setup, "date": et.date().isoformat(),
+        "phase": None if daily else session(et)["phase"],
+        "side": "long", "entry": plan["entry"], "stop": plan["stop"], "target": plan["target"],
+        "shares": plan["shares"], "exit": round(exit_px, 4), "exit_reason": reason,
+        "pnl": round(pnl, 2),
+        "r_multiple": round((exit_px - plan["entry"]) / plan["r_per_share"], 2) if plan["r_per_share"] else None,
+    }
+
+
+def _manage(symbol: str, setup: str, entry_bar: Dict, plan: Dict, rest: Sequence[Dict]) -> Dict[str, Any]:
+    """Hold an intraday long from the bar after entry to stop, target or the close."""
+    for b in rest:
+        hit = _exit_long(b, plan["stop"], plan["target"])
+        if hit:
+            return _trade(symbol, setup, entry_bar, plan, hit[0], hit[1])
+    last = rest[-1] if rest else entry_bar
+    return _trade(symbol, setup, entry_bar, plan, float(last["close"]), "close")
+
+
+def _plan(cfg: BacktestConfig, entry: float, stop: float) -> Optional[Dict]:
+    if stop >= entry:
+        return None
+    plan = plan_trade(cfg.equity, entry, stop, risk_pct=cfg.risk_pct, rr=cfg.rr)
+    return plan if plan["shares"] > 0 else None
+
+
+# ── setups ──────────────────────────────────────────────────────────────────
+def _replay_orb(symbol: str, day: List[Dict], atr14: Optional[float], cfg: BacktestConfig):
+    st = OpeningRange(cfg.or_minutes)
+    order = None
+    for i, b in enumerate(day):
+        if order is None:
+            st.update(b)
+            sig = orb_signal(st, atr14=atr14, stop_atr_mult=cfg.stop_atr_mult,
+                             max_chase_r=cfg.max_chase_r)
+            if sig["state"] == "forming":
+                continue
+            if sig["direction"] != "long":
+                return None
+            order = sig  # resting buy-stop at the OR high, placed as the range completes
+        if float(b["high"]) > order["entry"]:
+            plan = _plan(cfg, max(order["entry"], float(b["open"])), order["stop"])
+            return _manage(symbol, "orb", b, plan, day[i + 1:]) if plan else None
+    return None
+
+
+def _replay_vwap(symbol: str, day: List[Dict], atr14: Optional[float], cfg: BacktestConfig):
+    st = SessionVWAP(keep=cfg.vwap_lookback)
+    window_end = int(day[0]["timestamp"]) + cfg.vwap_window_minutes * 60 * 1000
+    for i, b in enumerate(day):
+        if int(b["timestamp"]) >= window_end:
+            return None
+        st.update(b)
+        sig = vwap_state(st, atr14=atr14, lookback=cfg.vwap_lookback)
+        if sig["signal"] == "long":
+            plan = _plan(cfg, sig["entry"], sig["stop"])
+            return _manage(symbol, "vwap", b, plan, day[i + 1:]) if plan else None
+    return None
+
+
+def _replay_connors(symbol: str, daily: List[Dict], first_day: str, cfg: BacktestConfig) -> List[Dict]:
+    trades, closes = [], []
+    atr = WilderATR(14)
+    pos = None  # (entry_bar, plan, days_held)
+    for b in daily:
+        d = to_et(int(b["timestamp"])).date().isoformat()
+        if pos is not None:
+            entry_bar, plan, held = pos
+            hit = _exit_long(b, plan["stop"], plan["target"])
+            closes.append(float(b["close"]))
+            held += 1
+            if hit:
+                trades.append(_trade(symbol, "connors_rsi2", entry_bar, plan, hit[0], hit[1], daily=True))
+                pos = None
+            elif closes[-1] > sum(closes[-5:]) / 5 or held >= cfg.max_hold_days:
+                trades.append(_trade(symbol, "connors_rsi2", entry_bar, plan, closes[-1],
+                                     "sma5" if held < cfg.max_hold_days else "time", daily=True))
+                pos = None
+            else:
+                pos = (entry_bar, plan, held)
+            atr.update(b)
+            continue
+        closes.append(float(b["close"]))
+        atr.update(b)
+        if d < first_day or atr.value is None:
+            continue
+        sig = connors_rsi2_signal(closes[-300:])
+        if sig["signal"] == "long":
+            entry = closes[-1]
+            plan = _plan(cfg, entry, entry - cfg.catastrophe_atr_mult * atr.value)
+            if plan:
+                pos = (b, plan, 0)
+    if pos is not None:
+        entry_bar, plan, _ = pos
+        trades.append(_trade(symbol, "connors_rsi2", entry_bar, plan, closes[-1], "open", daily=True))
+    return trades
+
+
+# ── per-symbol job ──────────────────────────────────────────────────────────
+def _atr_before(daily: List[Dict]) -> Callable[[str], Optional[float]]:
+    """date → daily ATR(14) through the last close BEFORE that date's session."""
+    dates, values, atr = [], [], WilderATR(14)
+    for b in daily:
+        atr.update(b)
+        dates.append(to_et(int(b["timestamp"])).date().isoformat())
+        values.append(atr.value)
+    return lambda d: values[i - 1] if (i := bisect_left(dates, d)) else None
+
+
+def run_symbol(job: Tuple[str, str, str, BacktestConfig, Optional[Loader]]) -> Dict[str, Any]:
+    """One symbol over [start, end]. Top-level so the process pool can pickle it."""
+    symbol, start, end, cfg, loader = job
+    loader = loader or load_store_bars
+    warm = (date.fromisoformat(start) - timedelta(days=DAILY_WARMUP_DAYS)).isoformat()
+    trades: List[Dict] = []
+    n_bars = sessions = 0
+    try:
+        daily = loader(symbol, warm, end, "day")
+        n_bars += len(daily)
+        atr_before = _atr_before(daily)
+        if "connors_rsi2" in cfg.setups:
+            trades += _replay_connors(symbol, daily, start, cfg)
+
+        if {"orb", "vwap"} & set(cfg.setups):
+            for d, day in sorted(group_rth_by_day(loader(symbol, start, end, "1min")).items()):
+                if not day:
+                    continue
+                sessions += 1
+                n_bars += len(day)
+                atr14 = atr_before(d)
+                for name, replay in (("orb", _replay_orb), ("vwap", _replay_vwap)):
+                    if name in cfg.setups:
+                        t = replay(symbol, day, atr14, cfg)
+                        if t:
+                            trades.append(t)
+    except Exception as e:
+        return {"symbol": symbol, "trades": trades, "bars": n_bars, "sessions": sessions, "error": str(e)}
+    return {"symbol": symbol, "trades": trades, "bars": n_bars, "sessions": sessions, "error": None}
+
+
+def backtest(symbols: Sequence[str], start: str, end: str,
+             config: Optional[BacktestConfig] = None, workers: Optional[int] = None,
+             loader: Optional[Loader] = None) -> Dict[str, Any]:
+    """
+    Replay the configured setups for every symbol over the ET dates [start, end].
+
+    workers: process count (default: CPU count). 0 or 1 runs inline — use that
+    with a custom `loader`, which must be a module-level function to reach a
+    pool. loader(symbol, start, end, timespan) returns bar dicts oldest first
+    ('day' and '1min' are requested).
+
+    Returns {"stats": {setup: setup_stats-shaped dict}, "trades": [...],
+    "errors": {symbol: message}, "symbols", "sessions", "bars", "seconds",
+    "bars_per_sec", "config"}.
+    """
+    cfg = config or BacktestConfig()
+    jobs = [(s.upper(), start, end, cfg, loader) for s in symbols]
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    t0 = time.perf_counter()
+    if workers <= 1 or len(jobs) <= 1:
+        results = [run_symbol(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(run_symbol, jobs))
+    seconds = time.perf_counter() - t0
+
+    trades = sorted((t for r in results for t in r["trades"]), key=lambda t: (t["date"], t["symbol"]))
+    bars = sum(r["bars"] for r in results)
+    return {
+        "stats": score_trades(trades),
+        "trades": trades,
+        "errors": {r["symbol"]: r["error"] for r in results if r["error"]},
+        "symbols": len(jobs),
+        "sessions": sum(r["sessions"] for r in results),
+        "bars": bars,
+        "seconds": round(seconds, 3),
+        "bars_per_sec": round(bars / seconds) if seconds > 0 else None,
+        "config": asdict(cfg),
+    }
+
+
+def benchmark(symbols: Sequence[str], start: str, end: str,
+              workers: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+    """
+    Throughput check. Runs the backtest twice — the first pass warms the bar
+    store so the second measures replay speed, not downloads — and reports
+    bars/second for the timed pass.
+    """
+    backtest(symbols, start, end, workers=workers, **kwargs)
+    r = backtest(symbols, start, end, workers=workers, **kwargs)
+    out = {k: r[k] for k in ("symbols", "sessions", "bars", "seconds", "bars_per_sec")}
+    out["workers"] = workers if workers is not None else (os.cpu_count() or 1)
+    print(f"⏱  {out['bars']:,} bars · {out['sessions']:,} sessions · {out['symbols']} symbols "
+          f"in {out['seconds']:.2f}s → {out['bars_per_sec'] or 0:,} bars/sec "
+          f"({out['workers']} workers)", flush=True)
+    return out
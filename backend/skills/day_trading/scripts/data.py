@@ -5,7 +5,8 @@ Split across two providers because the Polygon tier blocks SAME-DAY data
 (today's bars and the market snapshot both return "not authorized"; multi-day
 ranges silently truncate at yesterday) while FMP serves it fine:
 
-  - Polygon: history — prior-day 1-min bars (RVOL baseline) + daily bars (ATR).
+  - Polygon: history — prior-day 1-min bars (RVOL baseline) + daily bars (ATR),
+    both through the local bar store so closed sessions are fetched once.
   - FMP: everything same-day — today's intraday bars, and the movers/quote
     fallback when the Polygon snapshot is denied.
 
@@ -16,15 +17,22 @@ Two-stage scan keeps API usage sane:
                           (price, gap %, volume vs typical).
   2. refine_candidates() — per surviving symbol: TRUE first-5-min RVOL
                           (vs 14-day baseline, the Zarattini filter) + ATR(14)
-                          + today's RTH bars, ready for orb_signal().
+                          + today's RTH bars, ready for orb_signal(). Symbols
+                          are fetched concurrently under per-provider rate
+                          limits — the stage has to fit inside the 5-min OR.
 
 Plus rth_today_bars(), a session-correct replacement for get_today_bars()
 (which trusts the server clock and includes premarket — both wrong here).
 """
-from datetime import datetime, timedelta
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 from typing import Dict, Any, List, Optional
 
 from skills.financial_modeling_prep.scripts.api import fmp
+from skills._shared._env import rate_limited
+from skills._shared.bar_store import bar_store, BarFetchError
 from skills.polygon_io.scripts.api import polygon
 from skills.polygon_io.scripts.market.intraday import get_intraday_bars
 from .clock import _ET, _et_offset, now_et, to_et, rth_only, group_rth_by_day
@@ -154,64 +162,168 @@ def _scan_market_fmp(min_price: float, max_price: float, min_day_volume: float,
     return out[:top_n]
 
 
+_TRANSIENT = ("429", "too many", "rate limit", "timeout", "timed out", "502", "503", "504",
+              "connection", "temporarily")
+
+
+def _transient(err: Any) -> bool:
+    msg = str(err).lower()
+    return any(t in msg for t in _TRANSIENT)
+
+
+def _retrying(fn, *args, retries: int = 3, base_delay: float = 0.25):
+    """
+    fn(*args), retrying transient failures — raised exceptions or {"error": ...}
+    results that look like rate limits, timeouts or 5xx — with full-jitter
+    exponential backoff. Pacing is call_proxy's job; see _refine_worker.
+    """
+    for attempt in range(retries + 1):
+        try:
+            out = fn(*args)
+        except Exception as e:
+            if attempt == retries or not _transient(e):
+                raise
+        else:
+            if not (isinstance(out, dict) and "error" in out and _transient(out["error"])) \
+                    or attempt == retries:
+                return out
+        time.sleep(random.uniform(0, base_delay * 2 ** attempt))
+
+
+def _refine_one(sym: str, today: date, start: str, baseline_days: int,
+                min_rvol: float, min_atr: float) -> Optional[Dict[str, Any]]:
+    """Fetch + score one symbol. Returns the candidate (with per-stage `timing`
+    in ms) when it clears min_rvol/min_atr, else None."""
+    timing: Dict[str, float] = {}
+    t = time.perf_counter()
+    # Polygon serves the prior-day baseline even on the tier that blocks
+    # same-day data (the range just truncates at yesterday) …
+    intra = _retrying(get_intraday_bars, sym, start, today.isoformat(), "1min")
+    timing["intraday_ms"] = round((time.perf_counter() - t) * 1000, 1)
+    if "error" in intra:
+        return None
+    t = time.perf_counter()
+    try:
+        daily = _retrying(bar_store.get, sym, start, today.isoformat(), "day")
+    except BarFetchError:
+        return None
+    timing["daily_ms"] = round((time.perf_counter() - t) * 1000, 1)
+    if not len(daily):
+        return None
+    by_day = group_rth_by_day(intra["bars"])
+    # … so today's bars come from FMP whenever Polygon didn't include them.
+    today_bars = by_day.get(today.isoformat())
+    if not today_bars:
+        t = time.perf_counter()
+        today_bars = rth_only(_retrying(fmp_intraday_bars, sym, today.isoformat()), today)
+        timing["today_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    t = time.perf_counter()
+    prior = [d for d in sorted(by_day) if d != today.isoformat()][-baseline_days:]
+
+    def first5_vol(day_bars):
+        first_ts = int(day_bars[0]["timestamp"])
+        return sum(float(b["volume"]) for b in day_bars
+                   if int(b["timestamp"]) < first_ts + 5 * 60 * 1000)
+
+    base = [first5_vol(by_day[d]) for d in prior if by_day[d]]
+    if not base or not today_bars:
+        return None
+    rvol = first5_vol(today_bars) / (sum(base) / len(base)) if sum(base) else 0
+
+    # Exclude today's partial daily bar by date — on the blocked tier it's
+    # simply absent, and the old [:-1] slice would have dropped yesterday.
+    dbars = [{"high": h, "low": l, "close": c, "timestamp": ts}
+             for ts, h, l, c in zip(daily["timestamp"].tolist(), daily["high"].tolist(),
+                                    daily["low"].tolist(), daily["close"].tolist())
+             if to_et(ts).date() != today]
+    a = atr(dbars, 14)
+    price = float(today_bars[-1]["close"])
+    timing["compute_ms"] = round((time.perf_counter() - t) * 1000, 1)
+    if rvol >= min_rvol and a and a >= min_atr:
+        return {"symbol": sym.upper(), "rvol": round(rvol, 2),
+                "atr14": round(a, 3), "price": round(price, 2),
+                "bars": today_bars, "timing": timing}
+    return None
+
+
+def _refine_worker(*args) -> Optional[Dict[str, Any]]:
+    # Pool threads start without the caller's context, so opt in here: every
+    # upstream request this symbol makes waits on its provider's token bucket.
+    with rate_limited():
+        return _refine_one(*args)
+
+
+class Refined(list):
+    """refine_candidates() result: the candidate list, plus `.timing` for the stage."""
+    timing: Dict[str, Any]
+
+
 def refine_candidates(symbols: List[str], min_rvol: float = 1.5,
                       min_atr: float = 0.50, baseline_days: int = 14,
-                      top_n: int = 10) -> List[Dict[str, Any]]:
+                      top_n: int = 10, max_workers: int = 8,
+                      stop_at_top_n: bool = False) -> List[Dict[str, Any]]:
     """
     Stage 2: per surviving symbol (keep the input list ≤ ~25 — 2-3 API calls each):
     true first-5-minute RVOL vs the prior `baseline_days`, daily ATR(14), and
     today's RTH 1-min bars. Returns, sorted by RVOL desc, top_n of:
 
-        {"symbol", "rvol", "atr14", "price", "bars": [...today's RTH 1-min...]}
+        {"symbol", "rvol", "atr14", "price", "bars": [...today's RTH 1-min...],
+         "timing": {"intraday_ms", "daily_ms", ["today_ms",] "compute_ms"}}
+
+    Symbols are fetched concurrently (max_workers threads); every upstream
+    request waits on its provider's token bucket (POLYGON_MAX_RPS / FMP_MAX_RPS)
+    and 429s/timeouts are retried with jitter. stop_at_top_n=True cancels the remaining symbols
+    as soon as top_n have qualified — faster at the open, but those top_n are
+    the first to qualify (input order ≈ scan rank), not necessarily the best.
+    The returned list's `.timing` has the stage totals:
+    {"total_s", "symbols", "completed", "qualified", "cancelled", "errors"},
+    where errors maps each symbol whose fetch raised to the error message.
 
     These are the "stocks in play". Feed `bars` + `atr14` straight into
     orb_signal(); pass the list to the LLM for catalyst triage (see SKILL.md).
     """
+    t0 = time.perf_counter()
     today = now_et().date()
     start = (today - timedelta(days=baseline_days * 2)).isoformat()  # calendar pad for weekends
-    refined = []
-    for sym in symbols:
-        # Polygon serves the prior-day baseline even on the tier that blocks
-        # same-day data (the range just truncates at yesterday) …
-        intra = get_intraday_bars(sym, start, today.isoformat(), "1min")
-        daily = polygon(f"/v2/aggs/ticker/{sym.upper()}/range/1/day/{start}/{today.isoformat()}",
-                        {"adjusted": "true", "sort": "asc", "limit": 120})
-        if "error" in intra or not (daily or {}).get("results"):
-            continue
-        by_day = group_rth_by_day(intra["bars"])
-        # … so today's bars come from FMP whenever Polygon didn't include them.
-        today_bars = by_day.get(today.isoformat()) or rth_only(
-            fmp_intraday_bars(sym, today.isoformat()), today)
-        prior = [d for d in sorted(by_day) if d != today.isoformat()][-baseline_days:]
-
-        def first5_vol(day_bars):
-            first_ts = int(day_bars[0]["timestamp"])
-            return sum(float(b["volume"]) for b in day_bars
-                       if int(b["timestamp"]) < first_ts + 5 * 60 * 1000)
-
-        base = [first5_vol(by_day[d]) for d in prior if by_day[d]]
-        if not base or not today_bars:
-            continue
-        rvol = first5_vol(today_bars) / (sum(base) / len(base)) if sum(base) else 0
-
-        # Exclude today's partial daily bar by date — on the blocked tier it's
-        # simply absent, and the old [:-1] slice would have dropped yesterday.
-        dbars = [{"high": r["h"], "low": r["l"], "close": r["c"], "timestamp": r["t"]}
-                 for r in daily["results"]
-                 if to_et(int(r["t"])).date() != today]
-        a = atr(dbars, 14)
-        price = float(today_bars[-1]["close"])
-        if rvol >= min_rvol and a and a >= min_atr:
-            refined.append({"symbol": sym.upper(), "rvol": round(rvol, 2),
-                            "atr14": round(a, 3), "price": round(price, 2),
-                            "bars": today_bars})
+    refined: List[Dict[str, Any]] = []
+    errors: Dict[str, str] = {}
+    completed = cancelled = 0
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols) or 1)))
+    try:
+        futures = {pool.submit(_refine_worker, sym, today, start, baseline_days, min_rvol, min_atr): sym
+                   for sym in symbols}
+        for fut in as_completed(futures):
+            completed += 1
+            try:
+                c = fut.result()
+            except Exception as e:
+                errors[futures[fut].upper()] = str(e) or type(e).__name__
+                c = None
+            if c:
+                refined.append(c)
+            if stop_at_top_n and len(refined) >= top_n:
+                cancelled = sum(f.cancel() for f in futures)
+                break
+    finally:
+        pool.shutdown(wait=not stop_at_top_n, cancel_futures=stop_at_top_n)
     refined.sort(key=lambda x: x["rvol"], reverse=True)
-    return refined[:top_n]
+    out = Refined(refined[:top_n])
+    out.timing = {"total_s": round(time.perf_counter() - t0, 2), "symbols": len(symbols),
+                  "completed": completed, "qualified": len(refined), "cancelled": cancelled,
+                  "errors": errors}
+    return out
 
 
 def stocks_in_play(top_n: int = 10, scan_top_n: int = 25,
                    min_rvol: float = 1.5) -> List[Dict[str, Any]]:
-    """Stage 1 + stage 2 in one call. ~1 + 2-3×scan_top_n API calls."""
+    """Stage 1 + stage 2 in one call. ~1 + 2-3×scan_top_n API calls (stage 2
+    concurrent). `.timing` on the result covers both stages."""
+    t0 = time.perf_counter()
     coarse = scan_market(top_n=scan_top_n)
-    return refine_candidates([c["symbol"] for c in coarse],
-                             min_rvol=min_rvol, top_n=top_n)
+    scan_s = round(time.perf_counter() - t0, 2)
+    out = refine_candidates([c["symbol"] for c in coarse],
+                            min_rvol=min_rvol, top_n=top_n)
+    out.timing = {"scan_s": scan_s, "refine": out.timing,
+                  "total_s": round(time.perf_counter() - t0, 2)}
+    return out
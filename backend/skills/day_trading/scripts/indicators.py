@@ -10,6 +10,9 @@ dicts shaped like the output of polygon_io's get_intraday_bars():
 These are the building blocks behind the setups in setups.py. They are written
 to match the standard (Wilder) definitions used in the research so backtests are
 reproducible — see SKILL.md for citations.
+
+For many symbols at once (scans, backtests) use vectorized.py: the same
+definitions over NumPy column arrays / symbol×time matrices, full series out.
 """
 from typing import List, Dict, Optional, Tuple
 
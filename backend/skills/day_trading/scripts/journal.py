@@ -8,6 +8,8 @@ reads the same history:
     /home/user/store/day_trading/plan.md        — TODAY's plan (written nightly)
     /home/user/store/day_trading/notebook.md    — running diary + next_steps
     /home/user/store/day_trading/strategy.md    — the evolving rules (free-form)
+    /home/user/store/day_trading/state/…json    — resumable indicator state
+                                                  (streaming.SymbolSession)
 
 Events are linked by trade_id so one trade's lifecycle is unambiguous:
 
@@ -34,6 +36,7 @@ JOURNAL_DIR = os.environ.get("DAY_TRADING_JOURNAL_DIR", "/home/user/store/day_tr
 TRADES_PATH = os.path.join(JOURNAL_DIR, "trades.jsonl")
 NOTEBOOK_PATH = os.path.join(JOURNAL_DIR, "notebook.md")
 PLAN_PATH = os.path.join(JOURNAL_DIR, "plan.md")
+STATE_DIR = os.path.join(JOURNAL_DIR, "state")
 
 TERMINAL = {"closed", "rejected", "cancelled", "expired", "skipped"}
 
@@ -190,11 +193,19 @@ def setup_stats() -> Dict[str, Dict[str, Any]]:
     A setup that's negative after ~20 trades is a setup to retire (write that
     in strategy.md).
     """
-    stats: Dict[str, Dict[str, Any]] = {}
+    closed = []
     for tid, events in _lifecycles().items():
         m = _merged(events)
-        if m.get("status") != "closed" or m.get("pnl") is None:
-            continue
+        if m.get("status") == "closed" and m.get("pnl") is not None:
+            closed.append(m)
+    return score_trades(closed)
+
+
+def score_trades(trades: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """setup_stats() over any closed trades carrying setup/pnl/phase — shared
+    with backtest.py so simulated and live scorecards compare like for like."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    for m in trades:
         s = stats.setdefault(m.get("setup") or "unknown",
                              {"n": 0, "wins": 0, "total_pnl": 0.0, "by_phase": {}})
         pnl = float(m["pnl"])
@@ -210,6 +221,31 @@ def setup_stats() -> Dict[str, Dict[str, Any]]:
     return stats
 
 
+# ── resumable state ──────────────────────────────────────────────────────────
+
+def write_state(name: str, payload: Dict[str, Any]) -> None:
+    """Persist a JSON-safe dict under state/{name}.json (atomic replace, so a
+    run killed mid-write leaves the previous state intact)."""
+    path = os.path.join(STATE_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex[:6]}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def read_state(name: str) -> Optional[Dict[str, Any]]:
+    """The dict saved by write_state(name, ...), or None if missing/corrupt."""
+    path = os.path.join(STATE_DIR, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
 # ── plan & notebook ──────────────────────────────────────────────────────────
 
 def write_plan(content: str, date_et: Optional[str] = None) -> str:
@@ -14,13 +14,19 @@ ORB states are the contract with the execution layer:
     missed    — breakout printed but price ran beyond the chase guard; entering
                 now destroys the asymmetry that makes the edge work. Skip.
 
+orb_signal and vwap_state also accept the streaming states (streaming.py's
+OpeningRange / SessionVWAP, or a SymbolSession) in place of the bar list, so a
+poller that feeds bars incrementally gets the same answer without rescanning
+the day.
+
 See SKILL.md for citations and win-rate/payoff profiles.
 """
-from typing import List, Dict, Optional, Literal
+from typing import List, Dict, Optional, Literal, Union
 from .indicators import opening_range, vwap, vwap_series, rsi, sma
+from .streaming import OpeningRange, SessionVWAP, SymbolSession
 
 
-def orb_signal(bars: List[Dict], atr14: Optional[float] = None,
+def orb_signal(bars: Union[List[Dict], OpeningRange, SymbolSession], atr14: Optional[float] = None,
                or_minutes: int = 5, stop_atr_mult: float = 0.10,
                max_chase_r: float = 0.5,
                long_only: bool = True) -> dict:
@@ -38,32 +44,48 @@ def orb_signal(bars: List[Dict], atr14: Optional[float] = None,
     long_only=True because Robinhood cannot short; short breakouts come back
     as state="short_blocked" so the caller knows the setup existed.
 
-    Bars must be today's RTH 1-min bars.
+    Bars must be today's RTH 1-min bars — or the day's OpeningRange /
+    SymbolSession state (its own window length then applies, not or_minutes).
     """
-    if not bars:
-        return {"setup": "orb", "state": "forming", "signal": None, "reason": "no bars"}
-    rng = opening_range(bars, or_minutes)
-    window_end = int(bars[0]["timestamp"]) + or_minutes * 60 * 1000
-    in_window = [b for b in bars if int(b["timestamp"]) < window_end]
-    post = [b for b in bars if int(b["timestamp"]) >= window_end]
-    if not rng or not in_window or not post:
-        return {"setup": "orb", "state": "forming", "signal": None,
-                "reason": "opening range still forming"}
-    or_high, or_low = rng
-    # Direction from the whole opening-range candle:
-    direction = ("long" if float(in_window[-1]["close"]) >= float(in_window[0]["open"])
-                 else "short")
-    last = float(post[-1]["close"])
+    if isinstance(bars, SymbolSession):
+        bars = bars.orb
+    if isinstance(bars, OpeningRange):
+        st = bars
+        if not st.n:
+            return {"setup": "orb", "state": "forming", "signal": None, "reason": "no bars"}
+        if not st.complete:
+            return {"setup": "orb", "state": "forming", "signal": None,
+                    "reason": "opening range still forming"}
+        or_high, or_low = st.or_high, st.or_low
+        direction = "long" if st.or_close >= st.or_open else "short"
+        post_high, post_low, last = st.post_high, st.post_low, st.last_close
+    else:
+        if not bars:
+            return {"setup": "orb", "state": "forming", "signal": None, "reason": "no bars"}
+        rng = opening_range(bars, or_minutes)
+        window_end = int(bars[0]["timestamp"]) + or_minutes * 60 * 1000
+        in_window = [b for b in bars if int(b["timestamp"]) < window_end]
+        post = [b for b in bars if int(b["timestamp"]) >= window_end]
+        if not rng or not in_window or not post:
+            return {"setup": "orb", "state": "forming", "signal": None,
+                    "reason": "opening range still forming"}
+        or_high, or_low = rng
+        # Direction from the whole opening-range candle:
+        direction = ("long" if float(in_window[-1]["close"]) >= float(in_window[0]["open"])
+                     else "short")
+        post_high = max(float(b["high"]) for b in post)
+        post_low = min(float(b["low"]) for b in post)
+        last = float(post[-1]["close"])
 
     if direction == "long":
         entry, opp = or_high, or_low
         stop = entry - stop_atr_mult * atr14 if atr14 else opp
-        broke = any(float(b["high"]) > or_high for b in post)
+        broke = post_high > or_high
         chase_ok = last <= entry + max_chase_r * abs(entry - stop)
     else:
         entry, opp = or_low, or_high
         stop = entry + stop_atr_mult * atr14 if atr14 else opp
-        broke = any(float(b["low"]) < or_low for b in post)
+        broke = post_low < or_low
         chase_ok = last >= entry - max_chase_r * abs(entry - stop)
 
     if direction == "short" and long_only:
@@ -92,7 +114,7 @@ def orb_signal(bars: List[Dict], atr14: Optional[float] = None,
     }
 
 
-def vwap_state(bars: List[Dict], touch_atr_frac: float = 0.15,
+def vwap_state(bars: Union[List[Dict], SessionVWAP, SymbolSession], touch_atr_frac: float = 0.15,
                atr14: Optional[float] = None, lookback: int = 6) -> dict:
     """
     VWAP regime + pullback trigger, kept honest by separating the two:
@@ -104,21 +126,32 @@ def vwap_state(bars: List[Dict], touch_atr_frac: float = 0.15,
                 above the pullback bars' average.
 
     Long entry = trigger with bias "long"; stop below the pullback low (never ON
-    VWAP — wicks). Best in the first hour. Bars must be RTH-only.
+    VWAP — wicks). Best in the first hour. Bars must be RTH-only — or the
+    session's SessionVWAP / SymbolSession state (keep ≥ lookback).
     """
-    if len(bars) < lookback + 2:
-        return {"setup": "vwap", "bias": None, "trigger": False, "signal": None,
-                "reason": "not enough bars"}
-    v = vwap(bars)
-    vs = vwap_series(bars)
-    last = float(bars[-1]["close"])
+    if isinstance(bars, SymbolSession):
+        bars = bars.vwap
+    if isinstance(bars, SessionVWAP):
+        if bars.n < lookback + 2 or len(bars.recent) < lookback:
+            return {"setup": "vwap", "bias": None, "trigger": False, "signal": None,
+                    "reason": "not enough bars"}
+        v = bars.value
+        recent = list(bars.recent)[-lookback:]
+        recent_vwap = list(bars.recent_vwap)[-lookback:]
+    else:
+        if len(bars) < lookback + 2:
+            return {"setup": "vwap", "bias": None, "trigger": False, "signal": None,
+                    "reason": "not enough bars"}
+        v = vwap(bars)
+        recent = bars[-lookback:]
+        recent_vwap = vwap_series(bars)[-lookback:]
+    last = float(recent[-1]["close"])
     bias = "long" if last > v else "short"
     tol = (touch_atr_frac * atr14) if atr14 else last * 0.001
 
-    recent = bars[-lookback:]
     touched = held = False
     pull_low, pull_high = float("inf"), float("-inf")
-    for b, w in zip(recent, vs[-lookback:]):
+    for b, w in zip(recent, recent_vwap):
         lo, hi = float(b["low"]), float(b["high"])
         pull_low, pull_high = min(pull_low, lo), max(pull_high, hi)
         if bias == "long":
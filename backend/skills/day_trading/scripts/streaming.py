@@ -0,0 +1,330 @@
+"""
+Streaming indicators — O(1) per bar, resumable across runs.
+
+indicators.py recomputes from the first 09:30 bar on every call, so polling a
+symbol every minute costs O(n²) over a session. These objects take one bar at a
+time and keep only the running state the definitions need:
+
+    EMA(period)              — SMA-seeded exponential average
+    WilderRSI(period)        — Wilder's RSI
+    WilderATR(period)        — Wilder's ATR
+    SessionVWAP(keep=30)     — cumulative VWAP + the last `keep` bars/VWAPs
+    OpeningRange(minutes=5)  — OR high/low, OR candle, post-OR extremes
+    RelativeVolume(prior)    — first-N-minute volume vs prior days
+    SymbolSession            — OR + VWAP + RVOL for one symbol's day
+
+Values are identical to indicators.py (same seeds and summation order).
+Every state is a plain dataclass: `to_dict()` is JSON-safe and `from_dict()`
+restores it, and SymbolSession.save()/load() round-trip through the journal
+store so the next automation run resumes without replaying the day:
+
+    s = SymbolSession.load("MU", today) or SymbolSession("MU", today)
+    s.extend(rth_today_bars("MU"))      # bars already seen are skipped
+    sig = orb_signal(s.orb, atr14=atr)  # setups accept the states directly
+    s.save()
+
+`update(bar)` ignores bars whose timestamp is not newer than the last one, so
+feeding the whole day's bar list every poll only costs the new bars.
+"""
+from collections import deque
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class _State:
+    """to_dict/from_dict for the dataclass states below."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        for f in fields(self):
+            if isinstance(getattr(self, f.name), deque):
+                d[f.name] = list(getattr(self, f.name))
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]):
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in d.items() if k in known})
+
+    def extend(self, bars: Iterable[Dict]):
+        for b in bars:
+            self.update(b)
+        return self
+
+    def _fresh(self, bar: Dict) -> bool:
+        ts = int(bar["timestamp"])
+        if self.last_ts is not None and ts <= self.last_ts:
+            return False
+        self.last_ts = ts
+        return True
+
+
+# ── running averages ────────────────────────────────────────────────────────
+@dataclass
+class EMA(_State):
+    """ema() one value at a time. `value` is None until `period` values are in."""
+    period: int
+    value: Optional[float] = None
+    n: int = 0
+    _sum: float = 0
+    last_ts: Optional[int] = None
+
+    def update(self, bar: Dict) -> Optional[float]:
+        return self.push(bar["close"]) if self._fresh(bar) else self.value
+
+    def push(self, v: float) -> Optional[float]:
+        v = float(v)
+        self.n += 1
+        if self.n < self.period:
+            self._sum += v
+        elif self.n == self.period:
+            self.value = (self._sum + v) / self.period
+        else:
+            k = 2 / (self.period + 1)
+            self.value = v * k + self.value * (1 - k)
+        return self.value
+
+
+@dataclass
+class _Wilder(_State):
+    period: int
+    value: Optional[float] = None
+    n: int = 0
+    _sum: float = 0
+
+    def _smooth(self, x: float) -> Optional[float]:
+        self.n += 1
+        if self.n < self.period:
+            self._sum += x
+        elif self.n == self.period:
+            self.value = (self._sum + x) / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + x) / self.period
+        return self.value
+
+
+@dataclass
+class WilderRSI(_State):
+    """rsi() one close at a time. `value` is None until period+1 closes are in."""
+    period: int = 14
+    prev: Optional[float] = None
+    last_ts: Optional[int] = None
+    gain: Optional[Dict] = None
+    loss: Optional[Dict] = None
+
+    def __post_init__(self):
+        self._gain = _Wilder.from_dict(self.gain) if self.gain else _Wilder(self.period)
+        self._loss = _Wilder.from_dict(self.loss) if self.loss else _Wilder(self.period)
+
+    @property
+    def value(self) -> Optional[float]:
+        g, l = self._gain.value, self._loss.value
+        if g is None:
+            return None
+        if l == 0:
+            return 100.0
+        return 100.0 - (100.0 / (1.0 + g / l))
+
+    def update(self, bar: Dict) -> Optional[float]:
+        return self.push(bar["close"]) if self._fresh(bar) else self.value
+
+    def push(self, close: float) -> Optional[float]:
+        close = float(close)
+        if self.prev is not None:
+            ch = close - self.prev
+            self._gain._smooth(max(ch, 0.0))
+            self._loss._smooth(max(-ch, 0.0))
+        self.prev = close
+        return self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"period": self.period, "prev": self.prev, "last_ts": self.last_ts,
+                "gain": self._gain.to_dict(), "loss": self._loss.to_dict()}
+
+
+@dataclass
+class WilderATR(_State):
+    """atr() one bar at a time. `value` is None until period+1 bars are in."""
+    period: int = 14
+    prev_close: Optional[float] = None
+    last_ts: Optional[int] = None
+    tr: Optional[Dict] = None
+
+    def __post_init__(self):
+        self._tr = _Wilder.from_dict(self.tr) if self.tr else _Wilder(self.period)
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._tr.value
+
+    def update(self, bar: Dict) -> Optional[float]:
+        if "timestamp" in bar and not self._fresh(bar):
+            return self.value
+        h, l, c = float(bar["high"]), float(bar["low"]), float(bar["close"])
+        if self.prev_close is not None:
+            pc = self.prev_close
+            self._tr._smooth(max(h - l, abs(h - pc), abs(l - pc)))
+        self.prev_close = c
+        return self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"period": self.period, "prev_close": self.prev_close,
+                "last_ts": self.last_ts, "tr": self._tr.to_dict()}
+
+
+# ── session state ───────────────────────────────────────────────────────────
+@dataclass
+class SessionVWAP(_State):
+    """
+    Cumulative session VWAP. Also keeps the last `keep` bars and their running
+    VWAPs — everything vwap_state() looks at — so the setup never needs the
+    full day. One instance per session (VWAP resets at the open).
+    """
+    keep: int = 30
+    cum_pv: float = 0.0
+    cum_v: float = 0.0
+    n: int = 0
+    last_ts: Optional[int] = None
+    recent: Any = None        # deque of compact bars {open, high, low, close, volume}
+    recent_vwap: Any = None   # deque of running VWAP at each of those bars
+
+    def __post_init__(self):
+        self.recent = deque(self.recent or [], maxlen=self.keep)
+        self.recent_vwap = deque(self.recent_vwap or [], maxlen=self.keep)
+
+    @property
+    def value(self) -> Optional[float]:
+        """Same as indicators.vwap(bars): None until there is volume."""
+        return self.cum_pv / self.cum_v if self.cum_v else None
+
+    def update(self, bar: Dict) -> Optional[float]:
+        if not self._fresh(bar):
+            return self.value
+        h, l, c, v = float(bar["high"]), float(bar["low"]), float(bar["close"]), float(bar["volume"])
+        tp = (h + l + c) / 3.0
+        self.cum_pv += tp * v
+        self.cum_v += v
+        self.n += 1
+        self.recent.append({"open": float(bar["open"]), "high": h, "low": l, "close": c, "volume": v})
+        self.recent_vwap.append(self.cum_pv / self.cum_v if self.cum_v else tp)
+        return self.value
+
+
+@dataclass
+class OpeningRange(_State):
+    """
+    Opening range of the first `minutes` after the first bar, plus what
+    orb_signal() needs from the bars after it: the OR candle's open/close,
+    the post-range high/low (did it break?) and the last close.
+    """
+    minutes: int = 5
+    start_ts: Optional[int] = None
+    last_ts: Optional[int] = None
+    or_high: Optional[float] = None
+    or_low: Optional[float] = None
+    or_open: Optional[float] = None
+    or_close: Optional[float] = None
+    post_high: Optional[float] = None
+    post_low: Optional[float] = None
+    last_close: Optional[float] = None
+    n: int = 0
+
+    @property
+    def window_end(self) -> Optional[int]:
+        return None if self.start_ts is None else self.start_ts + self.minutes * 60 * 1000
+
+    @property
+    def complete(self) -> bool:
+        """True once a bar after the range has printed."""
+        return self.post_high is not None
+
+    @property
+    def range(self) -> Optional[Tuple[float, float]]:
+        return (self.or_high, self.or_low) if self.or_high is not None else None
+
+    def update(self, bar: Dict) -> Optional[Tuple[float, float]]:
+        if not self._fresh(bar):
+            return self.range
+        ts, h, l = int(bar["timestamp"]), float(bar["high"]), float(bar["low"])
+        self.n += 1
+        if self.start_ts is None:
+            self.start_ts = ts
+            self.or_open = float(bar["open"])
+        if ts < self.window_end:
+            self.or_high = h if self.or_high is None else max(self.or_high, h)
+            self.or_low = l if self.or_low is None else min(self.or_low, l)
+            self.or_close = float(bar["close"])
+        else:
+            self.post_high = h if self.post_high is None else max(self.post_high, h)
+            self.post_low = l if self.post_low is None else min(self.post_low, l)
+        self.last_close = float(bar["close"])
+        return self.range
+
+
+@dataclass
+class RelativeVolume(_State):
+    """Today's first-`minutes` volume vs the prior days' (see indicators.relative_volume)."""
+    prior_open_volumes: List[float] = field(default_factory=list)
+    minutes: int = 5
+    start_ts: Optional[int] = None
+    last_ts: Optional[int] = None
+    open_volume: float = 0.0
+
+    @property
+    def value(self) -> Optional[float]:
+        from .indicators import relative_volume
+        return relative_volume(self.open_volume, self.prior_open_volumes)
+
+    def update(self, bar: Dict) -> Optional[float]:
+        if not self._fresh(bar):
+            return self.value
+        ts = int(bar["timestamp"])
+        if self.start_ts is None:
+            self.start_ts = ts
+        if ts < self.start_ts + self.minutes * 60 * 1000:
+            self.open_volume += float(bar["volume"])
+        return self.value
+
+
+# ── per-symbol bundle ───────────────────────────────────────────────────────
+@dataclass
+class SymbolSession(_State):
+    """Everything the intraday setups need for one symbol on one ET day."""
+    symbol: str
+    date: str                       # ET 'YYYY-MM-DD' — states never carry across days
+    or_minutes: int = 5
+    prior_open_volumes: List[float] = field(default_factory=list)
+    orb: Any = None
+    vwap: Any = None
+    rvol: Any = None
+
+    def __post_init__(self):
+        self.symbol = self.symbol.upper()
+        self.orb = OpeningRange.from_dict(self.orb) if isinstance(self.orb, dict) \
+            else self.orb or OpeningRange(self.or_minutes)
+        self.vwap = SessionVWAP.from_dict(self.vwap) if isinstance(self.vwap, dict) \
+            else self.vwap or SessionVWAP()
+        self.rvol = RelativeVolume.from_dict(self.rvol) if isinstance(self.rvol, dict) \
+            else self.rvol or RelativeVolume(list(self.prior_open_volumes), self.or_minutes)
+
+    def update(self, bar: Dict) -> "SymbolSession":
+        self.orb.update(bar)
+        self.vwap.update(bar)
+        self.rvol.update(bar)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"symbol": self.symbol, "date": self.date, "or_minutes": self.or_minutes,
+                "prior_open_volumes": list(self.prior_open_volumes),
+                "orb": self.orb.to_dict(), "vwap": self.vwap.to_dict(), "rvol": self.rvol.to_dict()}
+
+    def save(self) -> None:
+        from . import journal
+        journal.write_state(f"stream/{self.date}/{self.symbol}", self.to_dict())
+
+    @classmethod
+    def load(cls, symbol: str, date: str) -> Optional["SymbolSession"]:
+        """The saved state for symbol on that ET date, or None (start fresh)."""
+        from . import journal
+        d = journal.read_state(f"stream/{date}/{symbol.upper()}")
+        return cls.from_dict(d) if d and d.get("date") == date else None
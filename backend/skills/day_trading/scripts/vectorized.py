@@ -0,0 +1,212 @@
+"""
+Vectorized indicators — the indicators.py definitions over NumPy arrays.
+
+indicators.py walks lists of bar dicts and returns only the last value; that's
+fine for one symbol, too slow for scoring a whole scan in the minutes after the
+open. These take column arrays and return the FULL series, and every function
+works on a 1-D series (T,) or a symbol×time matrix (S, T) in one call:
+
+    batch = BarBatch.stack([BarBatch.from_bars(c["bars"]) for c in candidates])
+    vw = vwap_series(batch.high, batch.low, batch.close, batch.volume)  # (S, T)
+    a = atr(batch.high, batch.low, batch.close, 14)[:, -1]                # latest per symbol
+
+Conventions:
+  - Time runs along the last axis, oldest first.
+  - NaN means "no bar": rows of different lengths are LEFT-padded with NaN by
+    BarBatch.stack, so column -1 is every symbol's latest bar. NaNs are skipped,
+    never treated as zero.
+  - Output is NaN wherever the list version would return None (too few points).
+
+Results are identical to indicators.py — same seeds (SMA of the first `period`),
+same Wilder smoothing, same summation order — not just close; the parity tests
+in tests/test_indicator_parity.py compare them with ==.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+# ── bar batches ─────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class BarBatch:
+    """Struct-of-arrays bars: each field is (T,) for one symbol or (S, T) for many."""
+    timestamp: np.ndarray  # unix ms as float64 (NaN on padding)
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    _FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+    @classmethod
+    def from_bars(cls, bars: List[Dict]) -> "BarBatch":
+        """From bar dicts (get_intraday_bars / rth_today_bars shape)."""
+        cols = {f: np.array([float(b[f]) for b in bars], dtype=np.float64) for f in cls._FIELDS}
+        return cls(**cols)
+
+    @classmethod
+    def from_structured(cls, arr: np.ndarray) -> "BarBatch":
+        """From a bar_store structured array (columns are views where the dtype allows)."""
+        return cls(**{f: np.asarray(arr[f], dtype=np.float64) for f in cls._FIELDS})
+
+    @classmethod
+    def stack(cls, batches: Sequence["BarBatch"]) -> "BarBatch":
+        """1-D batches → one (S, T) batch, left-padded with NaN to the longest."""
+        width = max((len(b.close) for b in batches), default=0)
+        return cls(**{f: _left_pad([getattr(b, f) for b in batches], width) for f in cls._FIELDS})
+
+    def __len__(self) -> int:
+        return self.close.shape[-1]
+
+
+def _left_pad(rows: Sequence[np.ndarray], width: int) -> np.ndarray:
+    out = np.full((len(rows), width), np.nan)
+    for i, r in enumerate(rows):
+        if len(r):
+            out[i, width - len(r):] = r
+    return out
+
+
+def _f64(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def _cols(x: np.ndarray) -> Tuple[np.ndarray, bool]:
+    """View x as (S, T); remember whether to squeeze the result back to 1-D."""
+    return (x[None, :], True) if x.ndim == 1 else (x, False)
+
+
+# ── moving averages ─────────────────────────────────────────────────────────
+def sma(values, period: int) -> np.ndarray:
+    """Simple moving average of the trailing `period` values at every point."""
+    x = _f64(values)
+    out = np.full(x.shape, np.nan)
+    n = x.shape[-1]
+    if period <= 0 or n < period:
+        return out
+    # Accumulate the window left to right so sums match Python's sum() exactly.
+    s = np.zeros(x.shape[:-1] + (n - period + 1,))
+    for i in range(period):
+        s = s + x[..., i:n - period + 1 + i]
+    out[..., period - 1:] = s / period
+    return out
+
+
+def ema(values, period: int) -> np.ndarray:
+    """Exponential moving average, seeded with the SMA of the first `period` values."""
+    x, squeeze = _cols(_f64(values))
+    out = np.full(x.shape, np.nan)
+    if period <= 0:
+        return out[0] if squeeze else out
+    k = 2 / (period + 1)
+    e = np.zeros(x.shape[0])
+    seen = np.zeros(x.shape[0], dtype=np.int64)
+    for t in range(x.shape[1]):
+        v = x[:, t]
+        ok = ~np.isnan(v)
+        seen += ok
+        seeding = ok & (seen <= period)
+        e = np.where(seeding, e + np.where(ok, v, 0.0), e)
+        e = np.where(ok & (seen == period), e / period, e)
+        e = np.where(ok & (seen > period), v * k + e * (1 - k), e)
+        out[:, t] = np.where(seen >= period, e, np.nan)
+    return out[0] if squeeze else out
+
+
+def _wilder(changes: np.ndarray, valid: np.ndarray, period: int) -> np.ndarray:
+    """Wilder smoothing of (S, T) `changes`: SMA seed of the first `period`
+    valid values, then avg = (avg*(period-1) + x) / period. NaN until seeded."""
+    out = np.full(changes.shape, np.nan)
+    a = np.zeros(changes.shape[0])
+    seen = np.zeros(changes.shape[0], dtype=np.int64)
+    for t in range(changes.shape[1]):
+        ok = valid[:, t]
+        x = np.where(ok, changes[:, t], 0.0)
+        seen += ok
+        a = np.where(ok & (seen <= period), a + x, a)
+        a = np.where(ok & (seen == period), a / period, a)
+        a = np.where(ok & (seen > period), (a * (period - 1) + x) / period, a)
+        out[:, t] = np.where(seen >= period, a, np.nan)
+    return out
+
+
+def _prev_valid(x: np.ndarray) -> np.ndarray:
+    """Previous non-NaN value along the time axis of (S, T) x (NaN if none)."""
+    idx = np.where(~np.isnan(x), np.arange(x.shape[1]), -1)
+    idx = np.maximum.accumulate(idx, axis=1)
+    prev = np.full(x.shape, np.nan)
+    prev[:, 1:] = np.take_along_axis(x, np.maximum(idx[:, :-1], 0), axis=1)
+    prev[:, 1:][idx[:, :-1] < 0] = np.nan
+    return prev
+
+
+# ── oscillators / volatility ────────────────────────────────────────────────
+def rsi(values, period: int = 14) -> np.ndarray:
+    """Wilder's RSI at every point (0..100). Needs period+1 values to start."""
+    x, squeeze = _cols(_f64(values))
+    if period <= 0:
+        out = np.full(x.shape, np.nan)
+        return out[0] if squeeze else out
+    ch = x - _prev_valid(x)
+    valid = ~np.isnan(ch)
+    gains = _wilder(np.maximum(ch, 0.0), valid, period)
+    losses = _wilder(np.maximum(-ch, 0.0), valid, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(losses == 0, 100.0, 100.0 - (100.0 / (1.0 + gains / losses)))
+    out = np.where(np.isnan(gains), np.nan, out)
+    return out[0] if squeeze else out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """max(H-L, |H-prevC|, |L-prevC|); NaN on each row's first bar."""
+    h, squeeze = _cols(_f64(high))
+    l, _ = _cols(_f64(low))
+    c, _ = _cols(_f64(close))
+    pc = _prev_valid(c)
+    tr = np.maximum(np.maximum(h - l, np.abs(h - pc)), np.abs(l - pc))
+    return tr[0] if squeeze else tr
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Wilder's Average True Range at every point. Needs period+1 bars to start."""
+    tr = true_range(high, low, close)
+    t, squeeze = _cols(tr)
+    if period <= 0:
+        out = np.full(t.shape, np.nan)
+    else:
+        out = _wilder(t, ~np.isnan(t), period)
+    return out[0] if squeeze else out
+
+
+# ── session levels ──────────────────────────────────────────────────────────
+def vwap_series(high, low, close, volume) -> np.ndarray:
+    """Running session VWAP of the typical price; before any volume it is the
+    typical price itself. Pass one session per row — VWAP resets at the open."""
+    h, l, c, v = _f64(high), _f64(low), _f64(close), _f64(volume)
+    tp = (h + l + c) / 3.0
+    ok = ~np.isnan(tp)
+    cum_pv = np.cumsum(np.where(ok, tp * v, 0.0), axis=-1)
+    cum_v = np.cumsum(np.where(ok, v, 0.0), axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(cum_v != 0, cum_pv / cum_v, tp)
+    return np.where(ok, out, np.nan)
+
+
+def opening_range(timestamp, high, low, minutes: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (or_high, or_low) per row: extremes of the bars within `minutes` of each
+    row's first bar. NaN for rows with no bars. Shapes are () for 1-D input,
+    (S,) for a matrix.
+    """
+    ts, squeeze = _cols(_f64(timestamp))
+    h, _ = _cols(_f64(high))
+    l, _ = _cols(_f64(low))
+    has = ~np.isnan(ts)
+    first = np.where(has, ts, np.inf).min(axis=1, keepdims=True)
+    inside = has & (ts < first + minutes * 60 * 1000)
+    any_in = inside.any(axis=1)
+    or_high = np.where(any_in, np.where(inside, h, -np.inf).max(axis=1), np.nan)
+    or_low = np.where(any_in, np.where(inside, l, np.inf).min(axis=1), np.nan)
+    return (or_high[0], or_low[0]) if squeeze else (or_high, or_low)
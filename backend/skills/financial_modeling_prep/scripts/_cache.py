@@ -1,7 +1,17 @@
-"""Shared disk cache for FMP API responses (historical data never changes)."""
+"""Shared caches for FMP API responses.
+
+- `load_cache`/`save_cache`: plain JSON files for data that never changes
+  (historical filings, N-PORT snapshots).
+- `TieredCache`: TTL cache for live API responses behind `api.fmp()`.
+"""
 import json
 import os
 import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
 
 
 def cache_key(*parts: str) -> str:
@@ -20,3 +30,184 @@ def save_cache(cache_dir: str, key: str, data) -> None:
     os.makedirs(cache_dir, exist_ok=True)
     with open(os.path.join(cache_dir, f'{key}.json'), 'w') as f:
         json.dump(data, f)
+
+
+# ─── Tiered TTL cache for live API responses ─────────────────────────────────
+# L1 is an in-process LRU bounded by approximate payload bytes. L2 is a SQLite
+# file shared by every process on the host (API workers, background loops and
+# sandbox scripts), so one process's fetch warms the others. Concurrent misses
+# for the same key are coalesced: one caller fetches, the rest wait for it.
+
+_L2_SWEEP_EVERY = 500   # sweep expired L2 rows every N writes
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class TieredCache:
+    """Memory LRU → shared SQLite → upstream, with single-flight fetches."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, db_path: str | None = None):
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self._lru: OrderedDict[str, tuple[Any, float, int]] = OrderedDict()  # key -> (data, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+        self._local = threading.local()
+        self._writes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    # ── L2 (SQLite) ──────────────────────────────────────────────────────────
+
+    def _conn(self) -> sqlite3.Connection | None:
+        if not self.db_path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.db_path, timeout=2, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache "
+                    "(key TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+            except sqlite3.Error:
+                # Read-only FS or locked file — run memory-only rather than fail the call.
+                self.db_path = None
+                return None
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, key: str, now: float):
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT data, expires_at FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return row[0], row[1]
+
+    def _disk_set(self, key: str, blob: str, expires_at: float) -> None:
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, data, expires_at) VALUES (?, ?, ?)",
+                (key, blob, expires_at),
+            )
+            self._writes += 1
+            if self._writes % _L2_SWEEP_EVERY == 0:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error:
+            pass
+
+    # ── L1 (memory) ──────────────────────────────────────────────────────────
+
+    def _mem_get(self, key: str, now: float):
+        entry = self._lru.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            self._drop(key)
+            return None
+        self._lru.move_to_end(key)
+        return entry
+
+    def _mem_set(self, key: str, data, expires_at: float, size: int) -> None:
+        if key in self._lru:
+            self._drop(key)
+        if size > self.max_bytes:
+            return
+        self._lru[key] = (data, expires_at, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._lru))
+            self._drop(oldest)
+            self.stats["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._lru.pop(key)
+        self._bytes -= size
+
+    # ── public API ───────────────────────────────────────────────────────────
+
+    def get_or_fetch(self, key: str, ttl: int, fetch: Callable[[], Any],
+                     cacheable: Callable[[Any], bool] = lambda _: True):
+        """Return the cached value for `key`, or call `fetch` exactly once
+        across concurrent callers and cache the result for `ttl` seconds."""
+        now = time.time()
+        with self._lock:
+            entry = self._mem_get(key, now)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry[0]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            disk = self._disk_get(key, now)
+            if disk is not None:
+                blob, expires_at = disk
+                result = json.loads(blob)
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                    self._mem_set(key, result, expires_at, len(blob))
+            else:
+                with self._lock:
+                    self.stats["misses"] += 1
+                result = fetch()
+                if cacheable(result):
+                    blob = json.dumps(result)
+                    expires_at = time.time() + ttl
+                    self._disk_set(key, blob, expires_at)
+                    with self._lock:
+                        self._mem_set(key, result, expires_at, len(blob))
+            flight.result = result
+            return result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._bytes = 0
+        conn = self._conn()
+        if conn is not None:
+            try:
+                conn.execute("DELETE FROM cache")
+            except sqlite3.Error:
+                pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._lru), "bytes": self._bytes}
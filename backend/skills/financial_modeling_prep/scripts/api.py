@@ -1,15 +1,20 @@
-"""Universal FMP API caller with in-memory TTL cache."""
+"""Universal FMP API caller with a tiered, single-flight TTL cache."""
 
-import time
+import os
 import json
+from ._cache import TieredCache
 from ._client import call_fmp_api, call_fmp_stable_api
 
-# ─── Unified in-memory cache ──────────────────────────────────────────────────
+# ─── Unified cache ────────────────────────────────────────────────────────────
 # Every FMP call is cached by (endpoint, params) with a TTL based on data type.
-# This dramatically reduces API calls and improves latency.
+# Memory LRU (byte-bounded) → SQLite file shared by every process on the host
+# → upstream. N concurrent misses for the same key make one upstream call.
+
+_CACHE_PATH = os.getenv("FMP_CACHE_PATH", "/tmp/finch_fmp_cache.sqlite")
+_MAX_BYTES = int(os.getenv("FMP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_cache = TieredCache(max_bytes=_MAX_BYTES, db_path=_CACHE_PATH or None)
 
-_cache: dict[str, tuple] = {}  # key -> (data, expires_at)
-_MAX_ENTRIES = 1000
 
 # TTL rules based on endpoint pattern
 def _ttl_for(endpoint: str) -> int:
@@ -36,21 +41,14 @@ def _cache_key(endpoint: str, params: dict | None) -> str:
     return f"{endpoint}|{p}"
 
 
-def _get(key: str):
-    entry = _cache.get(key)
-    if entry and entry[1] > time.time():
-        return entry[0]
-    return None
+def _cacheable(result) -> bool:
+    # Don't cache errors
+    return not (isinstance(result, dict) and result.get("error"))
 
 
-def _set(key: str, data, endpoint: str):
-    _cache[key] = (data, time.time() + _ttl_for(endpoint))
-    # Evict expired entries when cache grows large
-    if len(_cache) > _MAX_ENTRIES:
-        now = time.time()
-        expired = [k for k, (_, exp) in _cache.items() if exp < now]
-        for k in expired:
-            del _cache[k]
+def cache_stats() -> dict:
+    """Hit/miss/coalesce counters and current memory footprint."""
+    return _cache.snapshot()
 
 
 def fmp(endpoint: str, params: dict | None = None):
@@ -64,34 +62,17 @@ def fmp(endpoint: str, params: dict | None = None):
     Returns:
         dict or list: API response
     """
-    key = _cache_key(endpoint, params)
-    cached = _get(key)
-    if cached is not None:
-        return cached
-
-    result = call_fmp_api(endpoint, params)
-
-    # Don't cache errors
-    if isinstance(result, dict) and result.get("error"):
-        return result
-
-    _set(key, result, endpoint)
-    return result
+    return _cache.get_or_fetch(
+        _cache_key(endpoint, params), _ttl_for(endpoint),
+        lambda: call_fmp_api(endpoint, params), _cacheable,
+    )
 
 
 def fmp_stable(endpoint: str, params: dict | None = None):
     """
     Call FMP Stable API endpoint (cached, uses /stable/ base).
     """
-    key = _cache_key(f"stable:{endpoint}", params)
-    cached = _get(key)
-    if cached is not None:
-        return cached
-
-    result = call_fmp_stable_api(endpoint, params)
-
-    if isinstance(result, dict) and result.get("error"):
-        return result
-
-    _set(key, result, endpoint)
-    return result
+    return _cache.get_or_fetch(
+        _cache_key(f"stable:{endpoint}", params), _ttl_for(endpoint),
+        lambda: call_fmp_stable_api(endpoint, params), _cacheable,
+    )
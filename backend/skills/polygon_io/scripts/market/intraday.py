@@ -39,7 +39,7 @@ Example:
         df = pd.DataFrame(response['bars'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
 """
-from .._client import call_polygon_api, format_bars
+from skills._shared.bar_store import bar_store, to_bar_dicts, BarFetchError
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Union, Literal
 
@@ -105,36 +105,31 @@ def get_intraday_bars(
     
     Note:
         - Intraday data requires Polygon Stocks Starter plan or higher
+        - Past sessions are cached on disk (skills._shared.bar_store); use
+          bar_store.get() directly for NumPy arrays instead of dicts
         - For daily/weekly data, use get_historical_prices() instead
     """
     if timespan not in TIMESPANS:
         valid_options = ', '.join(TIMESPANS.keys())
         return {"error": f"Invalid timespan '{timespan}'. Valid options: {valid_options}"}
     
-    multiplier, unit = TIMESPANS[timespan]
-    
-    # Extract just the date part for the API
+    # Extract just the date part; closed sessions are served from the local
+    # bar store and only missing days go to Polygon.
     from_date = from_datetime.split(' ')[0]
     to_date = to_datetime.split(' ')[0]
-    
-    endpoint = f"/v2/aggs/ticker/{symbol.upper()}/range/{multiplier}/{unit}/{from_date}/{to_date}"
-    
-    result = call_polygon_api(endpoint, params={
-        'adjusted': 'true',
-        'sort': 'asc',
-        'limit': 50000
-    })
-    
-    if 'error' in result:
-        return result
-    
-    if result.get('resultsCount', 0) == 0:
+
+    try:
+        arr = bar_store.get(symbol, from_date, to_date, timespan, provider='polygon')
+    except BarFetchError as e:
+        return {"error": str(e)}
+
+    if len(arr) == 0:
         return {
             "error": f"No intraday data found for {symbol}. "
                      "Note: Intraday data requires Polygon Stocks Starter plan or higher."
         }
     
-    bars = format_bars(result.get('results', []))
+    bars = to_bar_dicts(arr)
     return {
         'symbol': symbol.upper(),
         'from': from_datetime,
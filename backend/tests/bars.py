@@ -0,0 +1,23 @@
+"""
+Synthetic minute bars shared by the indicator tests.
+
+A seeded gaussian walk starting at the 09:30 ET bar, so every test that asks
+for the same (n, seed) sees the same session.
+"""
+import random
+
+OPEN_MS = 1_741_012_200_000  # a 09:30 ET bar
+
+
+def synthetic_bars(n, seed, flat_from=None):
+    """n one-minute OHLCV bars; from index `flat_from` on the close stops moving."""
+    rnd = random.Random(seed)
+    bars, prev = [], 50.0
+    for i in range(n):
+        c = prev if flat_from is not None and i >= flat_from else round(max(1.0, prev + rnd.gauss(0, 0.3)), 2)
+        h = round(max(prev, c) + rnd.random() * 0.2, 2)
+        l = round(min(prev, c) - rnd.random() * 0.2, 2)
+        bars.append({"timestamp": OPEN_MS + i * 60_000, "open": prev, "high": h, "low": l,
+                     "close": c, "volume": float(rnd.randint(0, 5000))})
+        prev = c
+    return bars
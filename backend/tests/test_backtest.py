@@ -0,0 +1,108 @@
+"""
+Backtest harness tests — skills/day_trading/scripts/backtest.py.
+
+Synthetic sessions with known outcomes: the ORB resting stop fills at the
+range high and is sized/targeted by risk.plan_trade, short ranges never trade
+(long only), results come back in journal.setup_stats' shape, and the process
+pool gives the same answer as the inline run.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from skills.day_trading.scripts import backtest as bt
+from skills.day_trading.scripts.journal import score_trades
+from skills.day_trading.scripts.risk import plan_trade
+
+DAY = "2025-03-03"          # Monday, EST (09:30 ET = 14:30 UTC)
+OPEN_MS = 1_741_012_200_000
+
+
+def _bar(ts, o, h, l, c, v=1000.0):
+    return {"timestamp": ts, "open": o, "high": h, "low": l, "close": c, "volume": v}
+
+
+def _daily(end: str, n: int = 260):
+    """Flat-ish daily history, range 2.0 → ATR(14) == 2.0."""
+    out, d = [], date.fromisoformat(end) - timedelta(days=1)
+    while len(out) < n:
+        if d.weekday() < 5:
+            ts = int(datetime(d.year, d.month, d.day, 5, tzinfo=timezone.utc).timestamp() * 1000)
+            out.append(_bar(ts, 100.0, 101.0, 99.0, 100.0))
+        d -= timedelta(days=1)
+    return out[::-1]
+
+
+def _orb_day(long: bool = True):
+    """5 OR bars 100→101 (or 101→100), then a breakout and a grind higher to the close."""
+    bars = []
+    for i in range(5):
+        o, c = (100.0 + i * 0.2, 100.2 + i * 0.2) if long else (101.0 - i * 0.2, 100.8 - i * 0.2)
+        bars.append(_bar(OPEN_MS + i * 60_000, o, max(o, c) + 0.05, min(o, c) - 0.05, c))
+    px = bars[-1]["close"]
+    for i in range(5, 390):
+        o, c = px, px + 0.01
+        bars.append(_bar(OPEN_MS + i * 60_000, o, c + 0.02, o - 0.005, c))
+        px = c
+    return bars
+
+
+def make_loader(long=True):
+    def loader(symbol, start, end, timespan):
+        if timespan == "day":
+            return _daily(DAY)
+        return _orb_day(long) if start <= DAY <= end else []
+    return loader
+
+
+def long_loader(symbol, start, end, timespan):
+    return make_loader(True)(symbol, start, end, timespan)
+
+
+def test_orb_resting_stop_fills_at_range_high_and_uses_plan_trade():
+    r = bt.backtest(["MU"], DAY, DAY, bt.BacktestConfig(setups=("orb",)), workers=0, loader=make_loader())
+    assert r["errors"] == {}
+    (t,) = r["trades"]
+    day = _orb_day()
+    or_high = max(b["high"] for b in day[:5])
+    plan = plan_trade(100_000.0, or_high, round(or_high - 0.1 * 2.0, 4), risk_pct=0.01, rr=10.0)
+    assert (t["entry"], t["stop"], t["target"], t["shares"]) == \
+        (plan["entry"], plan["stop"], plan["target"], plan["shares"])
+    assert t["exit_reason"] == "target"
+    assert t["pnl"] == round(plan["shares"] * (t["exit"] - plan["entry"]), 2)
+    assert t["phase"] == "opening" and t["date"] == DAY
+
+
+def test_short_range_is_not_traded():
+    r = bt.backtest(["MU"], DAY, DAY, bt.BacktestConfig(setups=("orb",)), workers=0,
+                    loader=make_loader(long=False))
+    assert r["trades"] == [] and r["stats"] == {}
+
+
+def test_stats_have_setup_stats_shape():
+    r = bt.backtest(["MU", "AMD"], DAY, DAY, workers=0, loader=make_loader())
+    assert r["stats"] == score_trades(r["trades"])
+    orb = r["stats"]["orb"]
+    assert set(orb) == {"n", "wins", "total_pnl", "by_phase", "win_rate", "avg_pnl"}
+    assert orb["n"] == 2 and orb["by_phase"] == {"opening": 2}
+    assert r["sessions"] == 2 and r["bars"] == 2 * (390 + 260)
+    assert r["bars_per_sec"] and r["bars_per_sec"] > 0
+
+
+def test_loader_errors_are_reported_per_symbol():
+    def broken(symbol, start, end, timespan):
+        raise RuntimeError("no data")
+    r = bt.backtest(["MU"], DAY, DAY, workers=0, loader=broken)
+    assert r["errors"] == {"MU": "no data"} and r["trades"] == []
+
+
+def test_process_pool_matches_inline():
+    cfg = bt.BacktestConfig(setups=("orb", "vwap"))
+    inline = bt.backtest(["MU", "AMD", "NVDA"], DAY, DAY, cfg, workers=0, loader=long_loader)
+    pooled = bt.backtest(["MU", "AMD", "NVDA"], DAY, DAY, cfg, workers=2, loader=long_loader)
+    assert pooled["trades"] == inline["trades"]
+    assert pooled["stats"] == inline["stats"]
+
+
+def test_benchmark_reports_throughput(capsys):
+    out = bt.benchmark(["MU"], DAY, DAY, workers=0, loader=make_loader())
+    assert out["bars"] == 390 + 260 and out["bars_per_sec"] > 0
+    assert "bars/sec" in capsys.readouterr().out
@@ -0,0 +1,196 @@
+"""
+Local bar store tests — skills/_shared/bar_store.BarStore.
+
+The store's job is to make history a one-time download: closed sessions are
+fetched once (in as few requests as possible) and then read from disk,
+today is always live, holidays and truncated pages are handled without
+re-downloading or persisting partial days, a new split drops the stored
+(differently adjusted) history, and the dict view still matches polygon's
+format_bars shape.
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from skills._shared.bar_store import BAR_DTYPE, BarFetchError, BarStore, _ET, to_bar_dicts
+
+TODAY = date(2025, 3, 14)  # Friday
+
+
+def _ts(d: date, hh: int, mm: int) -> int:
+    return int(datetime(d.year, d.month, d.day, hh, mm, tzinfo=_ET).timestamp() * 1000)
+
+
+class FakeFetcher:
+    """Two 1-min bars per weekday (none on `holidays`), one day bar per weekday."""
+
+    def __init__(self, holidays=(), truncate_after=None, fail=False):
+        self.calls = []
+        self.holidays = set(holidays)
+        self.truncate_after = truncate_after
+        self.fail = fail
+
+    def __call__(self, symbol, timespan, start, end):
+        self.calls.append((symbol, timespan, start, end))
+        if self.fail:
+            raise BarFetchError("upstream down")
+        rows = []
+        d = start
+        while d <= end:
+            if d.weekday() < 5 and d not in self.holidays:
+                times = [(0, 0)] if timespan == "day" else [(9, 30), (9, 31)]
+                for hh, mm in times:
+                    px = float(d.toordinal() % 100)
+                    rows.append((_ts(d, hh, mm), px, px + 1, px - 1, px + 0.5, 1000.0, px, 10.0))
+            d = date.fromordinal(d.toordinal() + 1)
+        arr = np.array(rows, dtype=BAR_DTYPE)
+        if self.truncate_after is not None and len(arr) > self.truncate_after:
+            n, self.truncate_after = self.truncate_after, None  # only the first page is short
+            return arr[:n], True
+        return arr, False
+
+
+class FakeSplits:
+    def __init__(self, dates=()):
+        self.dates = list(dates)
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, symbol):
+        self.calls += 1
+        if self.fail:
+            raise BarFetchError("splits endpoint down")
+        return self.dates
+
+
+def _store(tmp_path, fetcher, splits=None, today=TODAY):
+    splits = splits or FakeSplits()
+    return BarStore(root=str(tmp_path), providers={"polygon": fetcher, "fmp": fetcher},
+                    today=lambda: today, split_sources={"polygon": splits, "fmp": splits})
+
+
+def test_closed_sessions_fetched_once(tmp_path):
+    f = FakeFetcher()
+    s = _store(tmp_path, f)
+    first = s.get("nvda", "2025-03-03", "2025-03-07", "1min")
+    assert len(first) == 10 and len(f.calls) == 1  # one request for the whole week
+    second = s.get("NVDA", "2025-03-03", "2025-03-07", "1min")
+    assert len(f.calls) == 1
+    assert np.array_equal(first, second)
+    assert list(second.dtype.names) == list(BAR_DTYPE.names)
+
+
+def test_single_partition_read_is_memory_mapped(tmp_path):
+    s = _store(tmp_path, FakeFetcher())
+    s.get("NVDA", "2025-03-03", "2025-03-03", "1min")
+    bars = s.get("NVDA", "2025-03-03", "2025-03-03", "1min")
+    assert isinstance(bars, np.memmap)
+
+
+def test_only_missing_days_are_fetched(tmp_path):
+    f = FakeFetcher()
+    s = _store(tmp_path, f)
+    s.get("NVDA", "2025-03-05", "2025-03-06", "1min")
+    f.calls.clear()
+    bars = s.get("NVDA", "2025-03-03", "2025-03-07", "1min")
+    assert len(bars) == 10
+    assert [(c[2], c[3]) for c in f.calls] == [
+        (date(2025, 3, 3), date(2025, 3, 4)),
+        (date(2025, 3, 7), date(2025, 3, 7)),
+    ]
+    assert np.all(np.diff(bars["timestamp"]) > 0)
+
+
+def test_today_is_never_persisted(tmp_path):
+    f = FakeFetcher()
+    s = _store(tmp_path, f)
+    s.get("NVDA", "2025-03-13", TODAY.isoformat(), "1min")
+    s.get("NVDA", "2025-03-13", TODAY.isoformat(), "1min")
+    assert [(c[2], c[3]) for c in f.calls] == [(date(2025, 3, 13), TODAY), (TODAY, TODAY)]
+    assert not (tmp_path / "polygon" / "NVDA" / "1min" / f"{TODAY.isoformat()}.npy").exists()
+
+
+def test_holidays_are_stored_empty(tmp_path):
+    holiday = date(2025, 3, 5)
+    f = FakeFetcher(holidays={holiday})
+    s = _store(tmp_path, f)
+    assert len(s.get("NVDA", "2025-03-03", "2025-03-07", "1min")) == 8
+    assert len(s.get("NVDA", "2025-03-05", "2025-03-05", "1min")) == 0
+    assert len(f.calls) == 1
+
+
+def test_truncated_page_resumes_from_the_cut_partition(tmp_path):
+    f = FakeFetcher(truncate_after=3)  # Mon full, Tue cut after one bar
+    s = _store(tmp_path, f)
+    assert len(s.get("NVDA", "2025-03-03", "2025-03-04", "1min")) == 4
+    assert [(c[2], c[3]) for c in f.calls] == [
+        (date(2025, 3, 3), date(2025, 3, 4)),
+        (date(2025, 3, 4), date(2025, 3, 4)),
+    ]
+    part_dir = tmp_path / "polygon" / "NVDA" / "1min"
+    assert np.load(part_dir / "2025-03-04.npy").shape == (2,)
+
+
+def test_daily_month_partitions_are_trimmed_to_range(tmp_path):
+    f = FakeFetcher()
+    s = _store(tmp_path, f)
+    bars = s.get("SPY", "2025-01-10", "2025-02-05", "day", provider="fmp")
+    days = [r["date"] for r in to_bar_dicts(bars, daily=True)]
+    assert days[0] == "2025-01-10" and days[-1] == "2025-02-05"
+    assert len(f.calls) == 1 and (f.calls[0][2], f.calls[0][3]) == (date(2025, 1, 1), date(2025, 2, 28))
+    s.get("SPY", "2025-01-02", "2025-02-20", "day", provider="fmp")
+    assert len(f.calls) == 1
+
+
+def test_errors_are_raised_and_not_persisted(tmp_path):
+    f = FakeFetcher(fail=True)
+    s = _store(tmp_path, f)
+    with pytest.raises(BarFetchError):
+        s.get("NVDA", "2025-03-03", "2025-03-03", "1min")
+    assert not (tmp_path / "polygon" / "NVDA" / "1min" / "2025-03-03.npy").exists()
+
+
+def test_bar_dicts_match_format_bars_shape(tmp_path):
+    s = _store(tmp_path, FakeFetcher())
+    bars = s.get("NVDA", "2025-03-03", "2025-03-03", "1min")
+    d = to_bar_dicts(bars)[0]
+    assert set(d) == {"timestamp", "date", "open", "high", "low", "close", "volume", "vwap", "trades"}
+    assert d["timestamp"] == _ts(date(2025, 3, 3), 9, 30)
+    assert isinstance(d["trades"], int) and isinstance(d["close"], float)
+
+
+def test_new_split_drops_stored_history(tmp_path):
+    f, splits = FakeFetcher(), FakeSplits(["2020-08-31"])
+    _store(tmp_path, f, splits).get("NVDA", "2025-03-03", "2025-03-07", "1min")
+    _store(tmp_path, f, splits).get("NVDA", "2025-03-03", "2025-03-07", "1min")
+    assert len(f.calls) == 1
+
+    splits.dates = ["2025-03-17", "2020-08-31"]  # noticed on the next day's check
+    s = _store(tmp_path, f, splits, today=date(2025, 3, 17))
+    s.get("NVDA", "2025-03-03", "2025-03-07", "1min")
+    assert len(f.calls) == 2 and s.stats["split_resets"] == 1
+    s.get("NVDA", "2025-03-03", "2025-03-07", "1min")
+    assert len(f.calls) == 2
+
+
+def test_splits_checked_once_per_day_and_announced_ones_ignored(tmp_path):
+    f, splits = FakeFetcher(), FakeSplits(["2025-04-01"])  # announced, not yet effective
+    s = _store(tmp_path, f, splits)
+    s.get("NVDA", "2025-03-03", "2025-03-03", "1min")
+    s.get("NVDA", "2025-03-04", "2025-03-04", "1min")
+    assert splits.calls == 1
+    _store(tmp_path, f, splits).get("NVDA", "2025-03-03", "2025-03-04", "1min")
+    assert splits.calls == 1 and len(f.calls) == 2  # stamp on disk says checked today
+
+    _store(tmp_path, f, splits, today=date(2025, 3, 17)).get("NVDA", "2025-03-03", "2025-03-04", "1min")
+    assert splits.calls == 2 and len(f.calls) == 2
+
+
+def test_failed_split_check_keeps_stored_bars(tmp_path):
+    f, splits = FakeFetcher(), FakeSplits()
+    _store(tmp_path, f, splits).get("NVDA", "2025-03-03", "2025-03-03", "1min")
+    splits.fail = True
+    s = _store(tmp_path, f, splits, today=date(2025, 3, 17))
+    assert len(s.get("NVDA", "2025-03-03", "2025-03-03", "1min")) == 2
+    assert len(f.calls) == 1 and s.stats["split_resets"] == 0
@@ -0,0 +1,146 @@
+"""
+Live bash output tests — code_execution._run_streaming / _coalesce_output.
+
+The E2B command is faked: it calls the on_stdout/on_stderr callbacks and
+returns (or raises) like the SDK does. These pin how lines are batched into
+SSE chunks (line cap, char cap, stream switch, flush latency), that exit codes
+and errors come back from the runner, that a cancelled run always ends the
+stream even when the buffer is full, and that bash_impl drops the cached
+file listing however the command ends.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from modules.tools.implementations import code_execution as ce
+
+
+class _Commands:
+    def __init__(self, lines=(), exit_code=0, raises=None, gate=None):
+        self.lines = lines
+        self.exit_code = exit_code
+        self.raises = raises
+        self.gate = gate
+
+    async def run(self, cmd, cwd=None, timeout=None, envs=None, on_stdout=None, on_stderr=None):
+        for stream, line in self.lines:
+            await (on_stdout if stream == "stdout" else on_stderr)(SimpleNamespace(line=line))
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.raises is not None:
+            raise self.raises
+        return SimpleNamespace(exit_code=self.exit_code)
+
+
+def _sbx(**kw):
+    return SimpleNamespace(commands=_Commands(**kw))
+
+
+async def _drain(queue):
+    return [chunk async for chunk in ce._coalesce_output(queue)]
+
+
+async def _feed(items, maxsize=0):
+    queue = asyncio.Queue(maxsize=maxsize)
+    for item in items:
+        queue.put_nowait(item)
+    return queue
+
+
+@pytest.mark.asyncio
+async def test_lines_are_batched_up_to_the_line_cap():
+    queue = await _feed([("stdout", f"l{i}") for i in range(450)] + [None])
+    chunks = await _drain(queue)
+    assert [len(c.split("\n")) for _, c in chunks] == [200, 200, 50]
+    assert chunks[0][1].startswith("l0\nl1") and chunks[-1][1].endswith("l449")
+
+
+@pytest.mark.asyncio
+async def test_char_cap_and_stream_switch_flush(monkeypatch):
+    monkeypatch.setattr(ce, "_STREAM_FLUSH_CHARS", 10)
+    queue = await _feed([("stdout", "aaaa"), ("stdout", "bbbb"), ("stdout", "cccc"),
+                         ("stderr", "oops\n"), ("stdout", "d"), None])
+    assert await _drain(queue) == [
+        ("stdout", "aaaa\nbbbb"), ("stdout", "cccc"), ("stderr", "oops"), ("stdout", "d"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_partial_chunk_flushes_after_latency_window(monkeypatch):
+    monkeypatch.setattr(ce, "_STREAM_FLUSH_SECS", 0.01)
+    queue = asyncio.Queue()
+    chunks = ce._coalesce_output(queue)
+    await queue.put(("stdout", "first"))
+    # Nothing else arrives, yet the line is delivered without the end sentinel.
+    assert await asyncio.wait_for(chunks.__anext__(), 5) == ("stdout", "first")
+    await queue.put(("stdout", "second"))
+    await queue.put(None)
+    assert [c async for c in chunks] == [("stdout", "second")]
+
+
+@pytest.mark.asyncio
+async def test_runner_collects_output_and_returns_exit_code():
+    queue, out, err = asyncio.Queue(), [], []
+    sbx = _sbx(lines=[("stdout", "hi"), ("stderr", "warn")], exit_code=3)
+    assert await ce._run_streaming(sbx, "x", {}, queue, out, err) == 3
+    assert out == ["hi"] and err == ["warn"]
+    assert await _drain(queue) == [("stdout", "hi"), ("stderr", "warn")]
+
+
+@pytest.mark.asyncio
+async def test_nonzero_exit_exception_becomes_exit_code(monkeypatch):
+    class _Exit(Exception):
+        exit_code = 2
+
+    monkeypatch.setattr(ce, "CommandExitException", _Exit)
+    queue = asyncio.Queue()
+    assert await ce._run_streaming(_sbx(raises=_Exit()), "x", {}, queue, [], []) == 2
+    assert await _drain(queue) == []
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_propagates_and_ends_stream():
+    queue = asyncio.Queue()
+    with pytest.raises(RuntimeError, match="sandbox gone"):
+        await ce._run_streaming(_sbx(raises=RuntimeError("sandbox gone")), "x", {}, queue, [], [])
+    assert await _drain(queue) == []
+
+
+@pytest.mark.asyncio
+async def test_cancel_with_full_queue_still_ends_stream():
+    queue = asyncio.Queue(maxsize=2)
+    sbx = _sbx(lines=[("stdout", f"l{i}") for i in range(5)])  # blocks on the 3rd line
+    task = asyncio.create_task(ce._run_streaming(sbx, "x", {}, queue, [], []))
+    while not queue.full():
+        await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, 5)
+    items = [queue.get_nowait() for _ in range(queue.qsize())]
+    assert items[-1] is None
+
+
+@pytest.mark.asyncio
+async def test_failed_command_still_invalidates_listing(monkeypatch):
+    from core.config import Config
+
+    invalidated = []
+    sbx = _sbx(raises=RuntimeError("sandbox gone"))
+
+    async def fake_sandbox(user_id, envs):
+        return SimpleNamespace(sbx=sbx, envs={})
+
+    async def fake_env(context):
+        return {}
+
+    monkeypatch.setattr(Config, "E2B_API_KEY", "test", raising=False)
+    monkeypatch.setattr(ce, "_build_sandbox_env", fake_env)
+    monkeypatch.setattr(ce, "get_or_create_sandbox", fake_sandbox)
+    monkeypatch.setattr(ce.sandbox_listing, "invalidate", invalidated.append)
+
+    context = SimpleNamespace(user_id="u1", chat_id="c1")
+    results = [r async for r in ce.bash_impl(ce.BashParams(cmd="rm -rf x"), context)]
+    assert results[-1]["success"] is False
+    assert invalidated == ["u1"]
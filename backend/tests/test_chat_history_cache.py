@@ -0,0 +1,148 @@
+"""
+ChatHistoryCache: validated against (count, max id), loads only the tail
+since the latest compaction, applies appended rows in place, and always
+matches ChatHistory.from_db_messages over the same rows.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from crud import chat_async
+from schemas.chat_history import ChatHistory
+from services.chat_history_cache import ChatHistoryCache
+
+
+class FakeStore:
+    def __init__(self):
+        self.rows = []
+        self.loads = []
+        self.next_id = 1
+
+    def add(self, role, content="", chat_id="c1", **kw):
+        row = SimpleNamespace(
+            id=self.next_id, chat_id=chat_id, role=role, content=content,
+            sequence=len(self.rows), timestamp=datetime.now(timezone.utc),
+            tool_calls=kw.get("tool_calls"), tool_call_id=kw.get("tool_call_id"),
+            name=kw.get("name"), resource_id=None, token_count=None,
+        )
+        self.rows.append(row)
+        self.next_id += 1
+        return row
+
+    async def get_history_state(self, db, chat_id):
+        rows = [r for r in self.rows if r.chat_id == chat_id]
+        compactions = [r.sequence for r in rows if r.role == "compaction"]
+        return len(rows), max((r.id for r in rows), default=None), max(compactions, default=None)
+
+    async def get_chat_messages(self, db, chat_id, from_sequence=None):
+        self.loads.append((chat_id, from_sequence))
+        return [r for r in self.rows if r.chat_id == chat_id and (from_sequence is None or r.sequence >= from_sequence)]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    s = FakeStore()
+    monkeypatch.setattr(chat_async, "get_history_state", s.get_history_state)
+    monkeypatch.setattr(chat_async, "get_chat_messages", s.get_chat_messages)
+    return s
+
+
+def _tc(tc_id, args='{"q": 1}'):
+    return {"id": tc_id, "type": "function", "function": {"name": "search", "arguments": args}}
+
+
+def _dump(history):
+    return [m.model_dump() for m in history.messages]
+
+
+def _expected(store, chat_id="c1"):
+    rows = [r for r in store.rows if r.chat_id == chat_id]
+    return _dump(ChatHistory.from_db_messages(rows, chat_id, "u1"))
+
+
+async def test_hit_after_first_load(store):
+    cache = ChatHistoryCache(max_chats=10, max_chars=10**6)
+    store.add("user", "hi")
+    store.add("assistant", "hello")
+    first = await cache.load(None, "c1", "u1")
+    second = await cache.load(None, "c1", "u1")
+    assert _dump(first) == _dump(second) == _expected(store)
+    assert len(store.loads) == 1
+    assert cache.stats()["hits"] == 1
+
+
+async def test_recorded_appends_stay_in_sync(store):
+    cache = ChatHistoryCache(max_chats=10, max_chars=10**6)
+    store.add("user", "hi")
+    await cache.load(None, "c1", "u1")
+    cache.record(store.add("assistant", "", tool_calls=[_tc("t1")]))
+    cache.record(store.add("tool", "result", tool_call_id="t1", name="search"))
+    cache.record(store.add("assistant", "done"))
+    assert _dump(await cache.load(None, "c1", "u1")) == _expected(store)
+    assert len(store.loads) == 1
+    assert cache.stats()["reparsed"] == 1
+
+
+async def test_malformed_and_orphaned_rows_fall_back_to_full_pass(store):
+    cache = ChatHistoryCache(max_chats=10, max_chars=10**6)
+    store.add("user", "hi")
+    await cache.load(None, "c1", "u1")
+    cache.record(store.add("assistant", "", tool_calls=[_tc("t1", '{"q": ')]))
+    cache.record(store.add("tool", "result", tool_call_id="t1"))
+    cache.record(store.add("tool", "stray", tool_call_id="zz"))
+    assert _dump(await cache.load(None, "c1", "u1")) == _expected(store)
+    assert len(store.loads) == 1
+    assert cache.stats()["reparsed"] == 2
+
+
+async def test_external_write_forces_reload(store):
+    cache = ChatHistoryCache(max_chats=10, max_chars=10**6)
+    store.add("user", "hi")
+    await cache.load(None, "c1", "u1")
+    store.add("assistant", "written by another worker")
+    assert _dump(await cache.load(None, "c1", "u1")) == _expected(store)
+    assert len(store.loads) == 2
+
+    store.rows.pop()
+    store.add("assistant", "replaced")  # same count, new id
+    assert _dump(await cache.load(None, "c1", "u1"))[-1]["content"] == "replaced"
+    assert len(store.loads) == 3
+
+
+async def test_loads_only_tail_since_compaction(store):
+    cache = ChatHistoryCache(max_chats=10, max_chars=10**6)
+    for i in range(5):
+        store.add("user", f"old {i}")
+    store.add("compaction", "summary")
+    store.add("user", "new")
+    history = await cache.load(None, "c1", "u1")
+    assert store.loads == [("c1", 5)]
+    assert _dump(history) == _expected(store)
+
+    cache.record(store.add("compaction", "summary 2"))
+    assert _dump(await cache.load(None, "c1", "u1")) == _expected(store)
+    assert len(store.loads) == 1
+
+
+async def test_returned_history_is_a_copy(store):
+    cache = ChatHistoryCache(max_chats=10, max_chars=10**6)
+    store.add("user", '[{"type": "text", "text": "hi"}]')
+    history = await cache.load(None, "c1", "u1")
+    history.add_user_message("not persisted")
+    history.messages[0].content[0]["cache_control"] = {"type": "ephemeral"}
+    again = await cache.load(None, "c1", "u1")
+    assert _dump(again) == _expected(store)
+    assert history.token_total > again.token_total
+
+
+async def test_bounded_by_chats_and_chars(store):
+    cache = ChatHistoryCache(max_chats=2, max_chars=100)
+    for chat in ("a", "b", "c"):
+        store.add("user", "x" * 10, chat_id=chat)
+        await cache.load(None, chat, "u1")
+    assert cache.stats()["chats"] == 2
+
+    store.add("user", "y" * 200, chat_id="d")
+    await cache.load(None, "d", "u1")
+    assert cache.stats()["chars"] <= 100
@@ -0,0 +1,115 @@
+"""
+ChatLogger write-behind: appends are batched off the request path,
+conversation.json is materialized from messages.jsonl only when due, and
+reopening a log reads meta.json instead of the whole history.
+"""
+import json
+
+import pytest
+
+from modules.agent import chat_logger as cl
+from modules.agent.chat_logger import ChatLogger, chat_log_writer
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(chat_log_writer, "_ensure_thread", lambda: None)
+    d = tmp_path / "master"
+    yield d
+    chat_log_writer._states.pop(d, None)
+
+
+def _usage(read=80, created=10, prompt=100):
+    return {"prompt_tokens": prompt, "cache": {"read_tokens": read, "creation_tokens": created, "cache_hit": True}}
+
+
+def test_nothing_written_until_flush(log_dir):
+    log = ChatLogger("u1", "c1", log_dir)
+    log.add_message({"role": "user", "content": "hi"})
+    log.log_llm_turn([], {"role": "assistant", "content": "hello"}, usage_data=_usage(), model="m1",
+                     system_prompt=[{"type": "text", "text": "sys"}])
+    assert not (log_dir / "messages.jsonl").exists()
+
+    log.flush()
+    lines = (log_dir / "messages.jsonl").read_text().splitlines()
+    assert [json.loads(line)["content"] for line in lines] == ["hi", "hello"]
+    data = json.loads((log_dir / "conversation.json").read_text())
+    assert data["model"] == "m1" and data["system_prompt"] == "sys"
+    assert data["message_count"] == 2
+    assert [m["role"] for m in data["messages"]] == ["user", "assistant"]
+    assert data["cache_summary"]["this_turn"]["cache_read_tokens"] == 80
+
+
+def test_snapshot_is_throttled(log_dir, monkeypatch):
+    writes = []
+    monkeypatch.setattr(cl._LogState, "write_snapshot", lambda self, h, m: writes.append(m["message_count"]))
+    log = ChatLogger("u1", "c1", log_dir)
+    for i in range(5):
+        log.add_message({"role": "user", "content": str(i)})
+        chat_log_writer.flush()
+    assert writes == [1]
+    assert len((log_dir / "messages.jsonl").read_text().splitlines()) == 5
+
+    chat_log_writer.flush(force=True)
+    assert writes == [1, 5]
+
+
+def test_reopen_reads_meta_not_history(log_dir, monkeypatch):
+    log = ChatLogger("u1", "c1", log_dir)
+    log.model = "m1"
+    log.add_message({"role": "user", "content": "hi"})
+    log.log_llm_turn([], {"role": "assistant", "content": "x"}, usage_data=_usage())
+    log.flush()
+    chat_log_writer._states.pop(log_dir)
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda p, *a, **k: opened.append(str(p)) or real_open(p, *a, **k))
+    again = ChatLogger("u1", "c1", log_dir)
+    assert again.model == "m1"
+    assert again.message_count == 2
+    assert len(again.cache_history) == 1
+    assert not any(p.endswith(("messages.jsonl", "conversation.json")) for p in opened)
+
+
+def test_loggers_on_same_dir_share_state(log_dir):
+    first = ChatLogger("u1", "c1", log_dir)
+    first.model = "m1"
+    first.add_message({"role": "user", "content": "hi"})
+    second = ChatLogger("u1", "c1", log_dir)
+    assert second.model == "m1"
+    second.add_message({"role": "assistant", "content": "hello"})
+    second.flush()
+    assert len((log_dir / "messages.jsonl").read_text().splitlines()) == 2
+
+
+def test_legacy_dir_without_meta(log_dir):
+    log_dir.mkdir(parents=True)
+    (log_dir / "messages.jsonl").write_text('{"role": "user"}\n{"role": "assistant"}\n')
+    (log_dir / "conversation.json").write_text(json.dumps({"model": "old", "cache_summary": {"history": [{"turn": 1}]}}))
+    log = ChatLogger("u1", "c1", log_dir)
+    assert (log.model, log.message_count, log.cache_history) == ("old", 2, [{"turn": 1}])
+
+
+def test_identity_survives_idle_eviction(log_dir, monkeypatch):
+    log = ChatLogger("u1", "c1", log_dir)
+    log.add_message({"role": "user", "content": "hi"})
+    chat_log_writer.flush()
+    monkeypatch.setattr(cl, "_IDLE_SECONDS", -1.0)
+    chat_log_writer.flush()
+    assert log_dir not in chat_log_writer._states
+
+    log.add_message({"role": "assistant", "content": "hello"})
+    log.flush()
+    data = json.loads((log_dir / "conversation.json").read_text())
+    assert (data["user_id"], data["chat_id"], data["agent_type"]) == ("u1", "c1", "master")
+    assert data["message_count"] == 2
+
+
+def test_log_conversation_supersedes_queued_appends(log_dir):
+    log = ChatLogger("u1", "c1", log_dir)
+    log.add_message({"role": "user", "content": "stale"})
+    log.log_conversation([{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}])
+    lines = (log_dir / "messages.jsonl").read_text().splitlines()
+    assert [json.loads(line)["content"] for line in lines] == ["a", "b"]
+    assert log.message_count == 2
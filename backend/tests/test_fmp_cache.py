@@ -0,0 +1,105 @@
+"""
+FMP response cache tests — skills/financial_modeling_prep/scripts/_cache.TieredCache.
+
+Every worker, sandbox and background loop goes through `fmp()`, so these pin
+the properties the quota depends on: concurrent misses coalesce into one
+upstream call, errors are never cached, the memory tier respects its byte
+budget, and a second process sees the first one's fetch through the disk tier.
+"""
+import threading
+import time
+
+import pytest
+
+from skills.financial_modeling_prep.scripts._cache import TieredCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "fmp.sqlite")
+
+
+def test_hit_after_miss(db_path):
+    c = TieredCache(db_path=db_path)
+    calls = []
+    fetch = lambda: calls.append(1) or {"price": 1}
+    assert c.get_or_fetch("k", 30, fetch) == {"price": 1}
+    assert c.get_or_fetch("k", 30, fetch) == {"price": 1}
+    assert len(calls) == 1
+    s = c.snapshot()
+    assert s["misses"] == 1 and s["hits"] == 1
+
+
+def test_concurrent_misses_make_one_upstream_call(db_path):
+    c = TieredCache(db_path=db_path)
+    calls = []
+    gate = threading.Event()
+
+    def slow_fetch():
+        calls.append(1)
+        gate.wait(2)
+        return [{"symbol": "NVDA"}]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(c.get_or_fetch("/quote/NVDA|", 30, slow_fetch)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [[{"symbol": "NVDA"}]] * 8
+    assert c.snapshot()["coalesced"] == 7
+
+
+def test_errors_are_not_cached(db_path):
+    c = TieredCache(db_path=db_path)
+    not_error = lambda r: not (isinstance(r, dict) and r.get("error"))
+    calls = []
+    fetch = lambda: calls.append(1) or {"error": "429"}
+    c.get_or_fetch("k", 30, fetch, not_error)
+    c.get_or_fetch("k", 30, fetch, not_error)
+    assert len(calls) == 2
+
+
+def test_fetch_exception_propagates_and_clears_flight(db_path):
+    c = TieredCache(db_path=db_path)
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        c.get_or_fetch("k", 30, boom)
+    assert c.get_or_fetch("k", 30, lambda: 5) == 5
+
+
+def test_expired_entries_refetch(db_path):
+    c = TieredCache(db_path=db_path)
+    calls = []
+    fetch = lambda: calls.append(1) or len(calls)
+    c.get_or_fetch("k", 0, fetch)
+    c.get_or_fetch("k", 0, fetch)
+    assert len(calls) == 2
+
+
+def test_memory_tier_respects_byte_budget():
+    c = TieredCache(max_bytes=100, db_path=None)
+    for i in range(10):
+        c.get_or_fetch(f"k{i}", 30, lambda: "x" * 30)
+    s = c.snapshot()
+    assert s["bytes"] <= 100
+    assert s["evictions"] > 0
+
+
+def test_disk_tier_is_shared_between_instances(db_path):
+    """Two caches on one file stand in for two processes on one host."""
+    a = TieredCache(db_path=db_path)
+    b = TieredCache(db_path=db_path)
+    a.get_or_fetch("k", 30, lambda: {"v": 1})
+    assert b.get_or_fetch("k", 30, lambda: pytest.fail("should hit disk")) == {"v": 1}
+    assert b.snapshot()["disk_hits"] == 1
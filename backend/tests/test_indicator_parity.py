@@ -0,0 +1,102 @@
+"""
+Parity tests — skills/day_trading/scripts/vectorized.py vs indicators.py.
+
+The vectorized engine is only safe to swap into scans and backtests if it
+reproduces the list definitions bit for bit: every point of each full series
+must equal the list function evaluated on the prefix ending there, and a
+ragged symbol×time batch must equal the rows computed one at a time.
+"""
+import math
+import random
+
+import numpy as np
+import pytest
+
+from skills.day_trading.scripts import indicators as ind
+from skills.day_trading.scripts import vectorized as vec
+from tests.bars import synthetic_bars as _bars
+
+
+def _walk(n, seed, start=100.0):
+    rnd = random.Random(seed)
+    out, px = [], start
+    for _ in range(n):
+        px = max(1.0, px + rnd.gauss(0, 1))
+        out.append(round(px, 2))
+    return out
+
+
+def _same(list_value, vec_value):
+    if list_value is None:
+        return math.isnan(vec_value)
+    return list_value == vec_value
+
+
+@pytest.mark.parametrize("period", [1, 2, 5, 14])
+def test_sma_ema_rsi_match_prefixes(period):
+    values = _walk(60, seed=period)
+    s, e, r = vec.sma(values, period), vec.ema(values, period), vec.rsi(values, period)
+    for i in range(len(values)):
+        prefix = values[: i + 1]
+        assert _same(ind.sma(prefix, period), s[i])
+        assert _same(ind.ema(prefix, period), e[i])
+        assert _same(ind.rsi(prefix, period), r[i])
+
+
+def test_rsi_all_gains_is_100():
+    r = vec.rsi([1.0, 2.0, 3.0, 4.0], 2)
+    assert r[-1] == ind.rsi([1.0, 2.0, 3.0, 4.0], 2) == 100.0
+
+
+@pytest.mark.parametrize("period", [2, 14])
+def test_atr_matches_prefixes(period):
+    bars = _bars(40, seed=period)
+    b = vec.BarBatch.from_bars(bars)
+    a = vec.atr(b.high, b.low, b.close, period)
+    for i in range(len(bars)):
+        assert _same(ind.atr(bars[: i + 1], period), a[i])
+
+
+def test_vwap_series_matches_including_zero_volume_start():
+    bars = _bars(30, seed=7)
+    bars[0]["volume"] = bars[1]["volume"] = 0.0
+    b = vec.BarBatch.from_bars(bars)
+    assert vec.vwap_series(b.high, b.low, b.close, b.volume).tolist() == ind.vwap_series(bars)
+
+
+@pytest.mark.parametrize("minutes", [1, 5, 15])
+def test_opening_range_matches(minutes):
+    bars = _bars(30, seed=minutes)
+    b = vec.BarBatch.from_bars(bars)
+    hi, lo = vec.opening_range(b.timestamp, b.high, b.low, minutes)
+    assert (float(hi), float(lo)) == ind.opening_range(bars, minutes)
+
+
+def test_ragged_batch_equals_rows_one_at_a_time():
+    rows = [_bars(n, seed=n, flat_from=n // 2) for n in (10, 25, 40)]
+    batch = vec.BarBatch.stack([vec.BarBatch.from_bars(r) for r in rows])
+    assert batch.close.shape == (3, 40)
+
+    a = vec.atr(batch.high, batch.low, batch.close, 5)
+    r = vec.rsi(batch.close, 5)
+    e = vec.ema(batch.close, 5)
+    vw = vec.vwap_series(batch.high, batch.low, batch.close, batch.volume)
+    hi, lo = vec.opening_range(batch.timestamp, batch.high, batch.low, 5)
+    for i, bars in enumerate(rows):
+        closes = [b["close"] for b in bars]
+        assert _same(ind.atr(bars, 5), a[i, -1])
+        assert _same(ind.rsi(closes, 5), r[i, -1])
+        assert _same(ind.ema(closes, 5), e[i, -1])
+        assert vw[i, -len(bars):].tolist() == ind.vwap_series(bars)
+        assert np.isnan(vw[i, : 40 - len(bars)]).all()
+        assert (hi[i], lo[i]) == ind.opening_range(bars, 5)
+
+
+def test_from_structured_bar_store_array():
+    from skills._shared.bar_store import BAR_DTYPE
+
+    bars = _bars(20, seed=3)
+    arr = np.array([(b["timestamp"], b["open"], b["high"], b["low"], b["close"], b["volume"], np.nan, np.nan)
+                    for b in bars], dtype=BAR_DTYPE)
+    b = vec.BarBatch.from_structured(arr)
+    assert vec.atr(b.high, b.low, b.close, 14)[-1] == ind.atr(bars, 14)
@@ -3,15 +3,17 @@ Scheduled-job logic tests — the pure parts of services/job_scheduler.
 
 An automation is a time + an instruction. These cover how the time advances
 (recurrence, backlog collapsing) and which chat a run lands in, since those are
-what the waker depends on.
+what the waker depends on, plus how due rows are claimed fairly and under a
+per-user lock.
 """
 from datetime import datetime, timezone, timedelta
 from types import SimpleNamespace
 
 import pytest
 
+import services.job_scheduler as js
 from services.job_scheduler import (
-    next_occurrence, _advance_past_now, _run_chat_id, _to_dto,
+    next_occurrence, _advance_past_now, _run_chat_id, _to_dto, _pick_fair,
 )
 
 
@@ -113,3 +115,68 @@ def test_one_off_projects_nothing():
     dto = _to_dto(_row(recurrence=None, last_run_credits=10, run_count=1,
                        last_run_at=_dt(2026, 8, 6)))
     assert dto.projected_weekly_credits == 0
+
+
+# ── fair claiming ────────────────────────────────────────────────────────────
+
+def _due(job_id, user_id):
+    return SimpleNamespace(id=job_id, user_id=user_id)
+
+
+def test_claims_round_robin_across_users():
+    """A user with a deep backlog can't take every slot."""
+    rows = [_due("a1", "a"), _due("a2", "a"), _due("a3", "a"), _due("b1", "b"), _due("c1", "c")]
+    picked = _pick_fair(rows, {}, slots=3, per_user=2)
+    assert [r.id for r in picked] == ["a1", "b1", "c1"]
+
+
+def test_per_user_limit_counts_runs_already_in_flight():
+    rows = [_due("a1", "a"), _due("b1", "b")]
+    picked = _pick_fair(rows, {"a": 1}, slots=5, per_user=1)
+    assert [r.id for r in picked] == ["b1"]
+
+
+def test_leftover_slots_go_to_remaining_users():
+    rows = [_due("a1", "a"), _due("a2", "a"), _due("b1", "b")]
+    picked = _pick_fair(rows, {}, slots=3, per_user=2)
+    assert [r.id for r in picked] == ["a1", "b1", "a2"]
+
+
+def test_no_slots_claims_nothing():
+    assert _pick_fair([_due("a1", "a")], {}, slots=0, per_user=1) == []
+
+
+@pytest.mark.asyncio
+async def test_claim_locks_each_user_before_counting_running(monkeypatch):
+    """The running count is only trustworthy under a per-user lock; other
+    instances may be claiming the same users' rows."""
+    rows = [SimpleNamespace(id="b1", user_id="b"), SimpleNamespace(id="a1", user_id="a")]
+    statements = []
+
+    class _Result:
+        def scalars(self):
+            return SimpleNamespace(all=lambda: rows)
+
+        def all(self):
+            return []
+
+    class _Session:
+        async def execute(self, stmt):
+            statements.append(str(stmt.compile(compile_kwargs={"literal_binds": True})))
+            return _Result()
+
+        async def commit(self):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(js, "get_db_session", _Session)
+    monkeypatch.setattr(js, "_to_dto", lambda r: r.id)
+    assert sorted(await js._claim_due(_dt(2026, 8, 6), slots=5)) == ["a1", "b1"]
+    locks = [s for s in statements if "pg_advisory_xact_lock" in s]
+    assert [("'a'" in s, "'b'" in s) for s in locks] == [(True, False), (False, True)]
+    assert statements.index(locks[-1]) < next(i for i, s in enumerate(statements) if "count(*)" in s)
@@ -0,0 +1,70 @@
+"""
+Market monitor subscriber index + pass tests (no DB: the index is fed
+directly and quotes/alerts are stubbed).
+"""
+import pytest
+
+from services import market_monitor as mm
+
+
+def _index(users):
+    idx = mm.SubscriberIndex()
+    for uid, (symbols, hb) in users.items():
+        idx._set_user(uid, set(symbols), hb)
+    return idx
+
+
+def test_set_user_maintains_inverted_map():
+    idx = _index({"u1": ({"AAPL", "NVDA"}, False), "u2": ({"NVDA"}, True)})
+    assert idx.symbols() == ["AAPL", "NVDA"]
+    assert idx.subscribers("NVDA") == {"u1", "u2"}
+    assert idx.heartbeat_enabled("u2") and not idx.heartbeat_enabled("u1")
+
+    idx._set_user("u1", {"MSFT"}, False)
+    assert idx.symbols() == ["MSFT", "NVDA"]
+    assert idx.subscribers("NVDA") == {"u2"}
+
+    idx._set_user("u2", set(), True)
+    assert idx.symbols() == ["MSFT"]
+    assert not idx.heartbeat_enabled("u2")
+
+
+def test_invalidate_marks_dirty():
+    idx = mm.SubscriberIndex()
+    idx.invalidate("u1")
+    idx.invalidate("")
+    assert idx._dirty == {"u1"}
+
+
+@pytest.mark.asyncio
+async def test_check_once_only_alerts_movers(monkeypatch):
+    idx = _index({"u1": ({"AAPL", "NVDA"}, False), "u2": ({"NVDA", "TSLA"}, True)})
+
+    async def refresh():
+        return None
+
+    async def quotes(symbols):
+        assert symbols == ["AAPL", "NVDA", "TSLA"]
+        return {
+            "AAPL": {"symbol": "AAPL", "changesPercentage": 1.2},
+            "NVDA": {"symbol": "NVDA", "changesPercentage": -6.0},
+            "TSLA": {"symbol": "TSLA", "changesPercentage": 11.0},
+        }
+
+    sent = []
+
+    async def send(user_id, symbol, quote, heartbeat=False):
+        sent.append((user_id, symbol, heartbeat))
+
+    monkeypatch.setattr(idx, "refresh", refresh)
+    monkeypatch.setattr(mm, "subscribers", idx)
+    monkeypatch.setattr(mm, "_fetch_quotes", quotes)
+    monkeypatch.setattr(mm, "_send_alert", send)
+    monkeypatch.setattr(mm, "_alerted", set())
+    monkeypatch.setattr(mm, "_alert_counts", {})
+
+    assert await mm.check_once() == 3
+    # Biggest move first.
+    assert sent == [("u2", "TSLA", True), ("u1", "NVDA", False), ("u2", "NVDA", True)]
+    # Same bands again → deduped.
+    assert await mm.check_once() == 0
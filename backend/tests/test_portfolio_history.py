@@ -0,0 +1,147 @@
+"""
+Portfolio-history replay parity tests.
+
+build_portfolio_history used to walk every calendar day, copying the holdings
+dict per weekday and valuing it with a 3-day backward price search. The
+columnar engine (_replay_holdings + _price_matrix) must reproduce that output
+exactly; the reference below is the old loop, kept verbatim as the oracle.
+"""
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pytest
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from modules.tools.clients.portfolio_history import (
+    _SKIP_UNITS, _price_matrix, _replay_holdings,
+)
+
+
+def _reference(activities, first_date, last_date, holdings0, cash0, prices_by_sym):
+    holdings = defaultdict(float, holdings0)
+    cumulative_cash = cash0
+    by_date = defaultdict(list)
+    for a in activities:
+        by_date[a["date"]].append(a)
+
+    daily_state = []
+    current = first_date
+    while current <= last_date:
+        d = current.isoformat()
+        for a in by_date.get(d, []):
+            sym = a.get("symbol")
+            atype = a.get("type", "")
+            if atype == "_SPLIT" and sym and sym in holdings and holdings[sym] > 0:
+                holdings[sym] = holdings[sym] * a["split_ratio"]
+            elif sym and a.get("units") and atype not in _SKIP_UNITS:
+                holdings[sym] += a["units"]
+                if abs(holdings[sym]) < 0.01:
+                    del holdings[sym]
+            cumulative_cash += a.get("amount", 0)
+        if current.weekday() < 5:
+            clean = {s: q for s, q in holdings.items() if q > 0.01}
+            daily_state.append((d, dict(clean), cumulative_cash))
+        current += timedelta(days=1)
+
+    values = []
+    for d, h, _ in daily_state:
+        stock_value = 0.0
+        for sym, qty in h.items():
+            prices = prices_by_sym.get(sym, {})
+            price = prices.get(d)
+            if price is None:
+                dt = date.fromisoformat(d)
+                for i in range(1, 4):
+                    p = (dt - timedelta(days=i)).isoformat()
+                    if p in prices:
+                        price = prices[p]
+                        break
+            if price is not None:
+                stock_value += qty * price
+        values.append(stock_value)
+    return daily_state, values
+
+
+def _random_history(seed):
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    syms = [f"S{i}" for i in range(12)]
+    acts = []
+    for _ in range(300):
+        d = (start + timedelta(days=rng.randrange(200))).isoformat()
+        sym = rng.choice(syms + [""])
+        kind = rng.random()
+        if kind < 0.1:
+            acts.append({"type": "_SPLIT", "symbol": sym, "date": d, "units": 0,
+                         "amount": 0, "split_ratio": rng.choice([2.0, 0.5, 3.0])})
+        elif kind < 0.2:
+            acts.append({"type": "DIVIDEND", "symbol": sym, "date": d, "units": 5.0,
+                         "amount": round(rng.uniform(1, 50), 2)})
+        else:
+            units = round(rng.choice([1, -1]) * rng.uniform(0.001, 40), 3)
+            acts.append({"type": "BUY" if units > 0 else "SELL", "symbol": sym, "date": d,
+                         "units": units, "amount": round(-units * rng.uniform(5, 500), 2)})
+    acts.sort(key=lambda a: a["date"])
+
+    prices = {}
+    for sym in syms:
+        series = {}
+        for i in range(-5, 205):
+            if rng.random() < 0.8:
+                series[(start + timedelta(days=i)).isoformat()] = (
+                    None if rng.random() < 0.03 else round(rng.uniform(5, 500), 2)
+                )
+        prices[sym] = series
+    return start, acts, prices
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_replay_matches_day_by_day_loop(seed):
+    start, acts, prices = _random_history(seed)
+    first, last = start, start + timedelta(days=210)
+    holdings0 = {"S1": 3.0, "S2": 0.5} if seed % 2 else {}
+    cash0 = 1000.0 if seed % 2 else 0.0
+
+    ref_state, ref_values = _reference(acts, first, last, holdings0, cash0, prices)
+    days, symbols, qty, cash = _replay_holdings(acts, first, last, holdings0, cash0)
+
+    assert days == [d for d, _, _ in ref_state]
+    assert cash.tolist() == [c for _, _, c in ref_state]
+    for t, (_, h, _) in enumerate(ref_state):
+        got = {s: qty[t, j] for j, s in enumerate(symbols) if qty[t, j] != 0}
+        assert got == h
+
+    values = (qty * _price_matrix(days, symbols, prices)).sum(axis=1)
+    assert [round(v, 2) for v in values] == [round(v, 2) for v in ref_values]
+
+
+def test_activity_outside_window_is_ignored():
+    acts = [
+        {"type": "BUY", "symbol": "A", "date": "2024-01-01", "units": 10.0, "amount": -100.0},
+        {"type": "BUY", "symbol": "A", "date": "2024-01-03", "units": 1.0, "amount": -10.0},
+    ]
+    days, symbols, qty, cash = _replay_holdings(acts, date(2024, 1, 2), date(2024, 1, 3), {}, 0.0)
+    assert days == ["2024-01-02", "2024-01-03"]
+    assert qty[:, symbols.index("A")].tolist() == [0.0, 1.0]
+    assert cash.tolist() == [0.0, -10.0]
+
+
+def test_weekend_activity_lands_on_monday():
+    acts = [{"type": "BUY", "symbol": "A", "date": "2024-01-06", "units": 2.0, "amount": -20.0}]
+    days, symbols, qty, _ = _replay_holdings(acts, date(2024, 1, 5), date(2024, 1, 8), {}, 0.0)
+    assert days == ["2024-01-05", "2024-01-08"]
+    assert qty[:, 0].tolist() == [0.0, 2.0]
+
+
+def test_null_close_stops_the_backward_search():
+    """A present-but-null bar is taken as the fallback and leaves the day unvalued."""
+    prices = {"A": {"2024-01-03": 10.0, "2024-01-04": None}}
+    out = _price_matrix(["2024-01-05"], ["A"], prices)
+    assert out.tolist() == [[0.0]]
+
+
+def test_missing_close_falls_back_up_to_three_days():
+    prices = {"A": {"2024-01-02": 7.0}}
+    out = _price_matrix(["2024-01-05", "2024-01-08"], ["A"], prices)
+    assert out[:, 0].tolist() == [7.0, 0.0]
@@ -0,0 +1,66 @@
+"""
+QuoteService tests: batching window, per-symbol cache, chunking, failures.
+FMP is replaced by a recorder, so nothing hits the network.
+"""
+import asyncio
+
+import pytest
+
+from services.quote_service import QuoteService
+from skills.financial_modeling_prep.scripts import api as fmp_api
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    recorded = []
+
+    def fake_fmp(endpoint, params=None):
+        syms = endpoint.rsplit("/", 1)[1].split(",")
+        recorded.append(syms)
+        if "BOOM" in syms:
+            raise RuntimeError("upstream down")
+        return [{"symbol": s, "price": 1.0} for s in syms if s != "NOPE"]
+
+    monkeypatch.setattr(fmp_api, "fmp", fake_fmp)
+    return recorded
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_call(calls):
+    svc = QuoteService(per_minute=6000)
+    a, b, c = await asyncio.gather(
+        svc.get_quotes(["AAPL"]),
+        svc.get_quotes(["msft", "AAPL"]),
+        svc.get_quote("NVDA"),
+    )
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["AAPL", "MSFT", "NVDA"]
+    assert set(a) == {"AAPL"} and set(b) == {"MSFT", "AAPL"} and c["symbol"] == "NVDA"
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_and_missing_symbols(calls):
+    svc = QuoteService(per_minute=6000)
+    first = await svc.get_quotes(["AAPL", "NOPE"])
+    assert set(first) == {"AAPL"}
+    again = await svc.get_quotes(["AAPL", "NOPE"])
+    assert set(again) == {"AAPL"}
+    assert len(calls) == 1
+    assert svc.stats()["cache_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_chunks_large_requests(calls):
+    svc = QuoteService(per_minute=6000, chunk_size=10)
+    out = await svc.get_quotes([f"S{i}" for i in range(25)])
+    assert len(out) == 25
+    assert sorted(len(c) for c in calls) == [5, 10, 10]
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_is_not_cached(calls):
+    svc = QuoteService(per_minute=6000)
+    assert await svc.get_quotes(["BOOM", "AAPL"]) == {}
+    await svc.get_quotes(["AAPL"])
+    assert len(calls) == 2
+    assert svc.stats()["upstream_errors"] == 1
@@ -0,0 +1,177 @@
+"""
+refine_candidates tests — skills/day_trading/scripts/data.py stage 2.
+
+Providers are replaced with fakes so the tests pin what the open depends on:
+symbols are fetched concurrently, every upstream request waits on its
+provider's token bucket (and only those requests), transient 429s are retried, failures are reported
+per symbol, stop_at_top_n cancels the tail, and every candidate carries its
+per-stage timing.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from skills._shared import _env
+from skills._shared.bar_store import BAR_DTYPE
+from skills.day_trading.scripts import data
+from skills.day_trading.scripts.clock import _ET
+
+TODAY = datetime(2025, 3, 14, 9, 40, tzinfo=_ET)  # Friday, after the 5-min OR
+
+
+def _ms(d, hh, mm):
+    return int(datetime(d.year, d.month, d.day, hh, mm, tzinfo=_ET).timestamp() * 1000)
+
+
+def _session(d, open_vol):
+    return [{"timestamp": _ms(d, 9, 30 + i), "open": 50.0, "high": 50.5, "low": 49.5,
+             "close": 50.0, "volume": open_vol if i < 5 else 100.0} for i in range(10)]
+
+
+class FakeProviders:
+    def __init__(self, delay=0.0, rvol=None, fail_first=(), broken=(), barrier=None):
+        self.delay = delay
+        self.rvol = rvol or {}
+        self.fail_first = set(fail_first)
+        self.broken = set(broken)
+        self.barrier = barrier
+        self.calls = []
+        self.limited = []
+        self.lock = threading.Lock()
+
+    def intraday(self, sym, start, end, timespan):
+        with self.lock:
+            self.calls.append(("intraday", sym))
+            self.limited.append(_env._limited.get())
+            if sym in self.fail_first:
+                self.fail_first.discard(sym)
+                return {"error": "429 Too Many Requests"}
+        if sym in self.broken:
+            raise ValueError(f"bad payload for {sym}")
+        if self.barrier is not None:
+            self.barrier.wait()  # every symbol must be in flight at once to pass
+        time.sleep(self.delay)
+        bars, d = [], TODAY.date() - timedelta(days=20)
+        while d < TODAY.date():
+            if d.weekday() < 5:
+                bars += _session(d, 1000.0)
+            d += timedelta(days=1)
+        bars += _session(TODAY.date(), 1000.0 * self.rvol.get(sym, 3.0))
+        return {"bars": bars}
+
+    def daily(self, sym, start, end, timespan):
+        with self.lock:
+            self.calls.append(("daily", sym))
+        rows = [(_ms(TODAY.date() - timedelta(days=i), 0, 0), 50, 52, 48, 50, 1e6, 50, 1)
+                for i in range(30, 0, -1)]
+        return np.array(rows, dtype=BAR_DTYPE)
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    def install(**kw):
+        p = FakeProviders(**kw)
+        monkeypatch.setattr(data, "now_et", lambda: TODAY)
+        monkeypatch.setattr(data, "get_intraday_bars", p.intraday)
+        monkeypatch.setattr(data.bar_store, "get", p.daily)
+        monkeypatch.setattr(data, "fmp_intraday_bars", lambda *a: [])
+        return p
+    return install
+
+
+def test_symbols_are_fetched_concurrently(providers):
+    p = providers(barrier=threading.Barrier(10, timeout=5))
+    out = data.refine_candidates([f"S{i}" for i in range(10)], max_workers=10, top_n=10)
+    assert len(out) == 10 and out.timing["completed"] == 10
+    assert out.timing["errors"] == {}
+    assert p.limited == [True] * 10  # every worker fetches under the buckets
+
+
+def test_results_sorted_by_rvol_with_timing(providers):
+    providers(rvol={"A": 2.0, "B": 5.0, "C": 1.0})
+    out = data.refine_candidates(["A", "B", "C"], min_rvol=1.5, min_atr=0.5)
+    assert [c["symbol"] for c in out] == ["B", "A"]
+    assert out[0]["rvol"] == 5.0 and out[0]["atr14"] == 4.0
+    assert {"intraday_ms", "daily_ms", "compute_ms"} <= set(out[0]["timing"])
+    assert out.timing["qualified"] == 2 and out.timing["symbols"] == 3
+
+
+def test_transient_errors_are_retried(providers, monkeypatch):
+    monkeypatch.setattr(data.random, "uniform", lambda a, b: 0)
+    p = providers(fail_first={"A"})
+    out = data.refine_candidates(["A"])
+    assert [c["symbol"] for c in out] == ["A"]
+    assert p.calls.count(("intraday", "A")) == 2
+
+
+def test_stop_at_top_n_cancels_the_rest(providers):
+    p = providers(delay=0.05)
+    out = data.refine_candidates([f"S{i}" for i in range(10)], top_n=2,
+                                 max_workers=1, stop_at_top_n=True)
+    assert len(out) == 2
+    assert out.timing["cancelled"] >= 6
+    assert len({s for kind, s in p.calls if kind == "intraday"}) < 10
+
+
+def test_failures_are_reported_per_symbol(providers):
+    providers(broken={"b"})
+    out = data.refine_candidates(["A", "b"])
+    assert [c["symbol"] for c in out] == ["A"]
+    assert out.timing["errors"] == {"B": "bad payload for b"}
+
+
+def test_token_bucket_paces_calls():
+    now, slept = [0.0], []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = _env._TokenBucket(rate=4, burst=1, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        bucket.acquire()
+    assert slept == [0.25] * 4
+
+
+def test_zero_rate_is_rejected(monkeypatch):
+    monkeypatch.setenv("FMP_MAX_RPS", "0")
+    with pytest.raises(ValueError, match="FMP_MAX_RPS"):
+        _env._bucket("FMP_MAX_RPS", "5")
+
+
+def test_only_opted_in_requests_wait_on_their_bucket(monkeypatch):
+    acquired = []
+
+    class _Bucket:
+        def __init__(self, name):
+            self.name = name
+
+        def acquire(self):
+            acquired.append(self.name)
+
+    class _Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def read(self):
+            return b"{}"
+
+    monkeypatch.setenv("POLYGON_API_KEY", "k")
+    monkeypatch.setenv("SERPER_API_KEY", "k")
+    monkeypatch.setattr(_env, "RATE_LIMITS", {"polygon": _Bucket("polygon"), "fmp": _Bucket("fmp")})
+    monkeypatch.setattr(_env.urllib.request, "urlopen", lambda req, timeout=None: _Response())
+    monkeypatch.setattr(_env, "_limited", _env.ContextVar("test_limited", default=False))
+    _env.call_proxy("polygon", url="https://api.polygon.io/v2/x")  # backend traffic
+    assert acquired == []
+
+    with _env.rate_limited():
+        for _ in range(3):
+            _env.call_proxy("polygon", url="https://api.polygon.io/v2/x")
+        _env.call_proxy("serper", url="https://google.serper.dev/search")
+    assert acquired == ["polygon"] * 3
@@ -0,0 +1,122 @@
+"""
+SandboxListing tests — services/sandbox_listing.
+
+A fake sandbox answers the find command from a fixed tree and counts calls,
+so these pin one round-trip per listing, cache reuse and invalidation.
+"""
+import asyncio
+
+import pytest
+
+from services.sandbox_listing import SandboxListing, parse_find_output
+
+_TREE = (
+    "d\t4096\t1700000000.0\t/home/user/stocks\n"
+    "d\t4096\t1700000000.0\t/home/user/stocks/AAPL\n"
+    "f\t120\t1700000001.5\t/home/user/stocks/AAPL/thesis.md\n"
+    "f\t64\t1700000002.0\t/home/user/notes.md\n"
+)
+
+
+class _Result:
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.exit_code = 0
+
+
+class _Commands:
+    def __init__(self):
+        self.calls = []
+
+    async def run(self, cmd, timeout=None):
+        self.calls.append(cmd)
+        return _Result(_TREE)
+
+
+class _Sandbox:
+    def __init__(self):
+        self.commands = _Commands()
+
+
+@pytest.fixture
+def sbx():
+    return _Sandbox()
+
+
+def _connect(sbx):
+    async def connect():
+        return sbx
+    return connect
+
+
+def test_parse_find_output():
+    entries = parse_find_output(_TREE + "garbage line\n")
+    assert [(e.name, e.type, e.size) for e in entries] == [
+        ("stocks", "dir", 0), ("AAPL", "dir", 0), ("thesis.md", "file", 120), ("notes.md", "file", 64),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_tree_is_one_command_and_cached(sbx):
+    listing = SandboxListing()
+    first = await listing.list_tree("u1", "/home/user", max_depth=7, connect=_connect(sbx))
+    again = await listing.list_tree("u1", "/home/user/", max_depth=7, connect=_connect(sbx))
+    assert len(sbx.commands.calls) == 1
+    assert "find /home/user -mindepth 1 -maxdepth 7" in sbx.commands.calls[0]
+    assert first == again and len(first) == 4
+
+
+@pytest.mark.asyncio
+async def test_shallower_tree_and_dir_listing_reuse_cache(sbx):
+    listing = SandboxListing()
+    await listing.list_tree("u1", "/home/user", max_depth=7, connect=_connect(sbx))
+    shallow = await listing.list_tree("u1", "/home/user", max_depth=1, connect=_connect(sbx))
+    assert {e.name for e in shallow} == {"stocks", "notes.md"}
+    children = await listing.list_dir("u1", "/home/user/stocks/AAPL", connect=_connect(sbx))
+    assert [e.name for e in children] == ["thesis.md"]
+    assert len(sbx.commands.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_and_ttl_force_refetch(sbx):
+    listing = SandboxListing()
+    await listing.list_tree("u1", "/home/user", connect=_connect(sbx))
+    listing.invalidate("u1")
+    await listing.list_tree("u1", "/home/user", connect=_connect(sbx))
+    assert len(sbx.commands.calls) == 2
+
+    listing.ttl = 0
+    await listing.list_tree("u1", "/home/user", connect=_connect(sbx))
+    assert len(sbx.commands.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_no_sandbox_returns_none():
+    async def connect():
+        return None
+    assert await SandboxListing().list_tree("u1", "/home/user", connect=connect) is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_listing_is_not_overwritten():
+    listing = SandboxListing()
+    started, release = asyncio.Event(), asyncio.Event()
+
+    class _SlowCommands(_Commands):
+        async def run(self, cmd, timeout=None):
+            self.calls.append(cmd)
+            started.set()
+            await release.wait()  # a write lands while find is running
+            return _Result(_TREE)
+
+    slow = _Sandbox()
+    slow.commands = _SlowCommands()
+    inflight = asyncio.create_task(listing.list_tree("u1", "/home/user", connect=_connect(slow)))
+    await started.wait()
+    listing.invalidate("u1")
+    release.set()
+    assert len(await inflight) == 4
+
+    fresh = _Sandbox()
+    await listing.list_tree("u1", "/home/user", connect=_connect(fresh))
+    assert len(fresh.commands.calls) == 1
@@ -0,0 +1,209 @@
+"""
+Sandbox lifecycle concurrency tests — code_execution per-user locks and the
+pre-warmed pool.
+
+E2B is faked. These pin that a user's lock entry is dropped once nobody holds
+or waits on it, that one user's cold start never blocks another user, that a
+pre-warmed sandbox is handed to exactly one caller, and that pooled sandboxes
+are killed — never left paused — once the pool lets go of them.
+"""
+import asyncio
+
+import pytest
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from modules.tools.implementations import code_execution as ce
+
+
+class _Sbx:
+    _ids = 0
+
+    def __init__(self, alive=True, delay=0.0):
+        _Sbx._ids += 1
+        self.sandbox_id = f"sbx-{_Sbx._ids}"
+        self.alive = alive
+        self.delay = delay
+        self.killed = False
+
+    async def set_timeout(self, seconds):
+        await asyncio.sleep(self.delay)
+        if not self.alive:
+            raise RuntimeError("sandbox not found")
+
+    async def kill(self):
+        self.alive = False
+        self.killed = True
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setattr(ce, "_sandboxes", {})
+    monkeypatch.setattr(ce, "_sandbox_locks", {})
+    monkeypatch.setattr(ce, "_sandbox_lock_refs", {})
+    monkeypatch.setattr(ce, "_warm_pool", [])
+    monkeypatch.setattr(ce, "_timings", {})
+
+
+# ── per-user locks ───────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_lock_entry_dropped_when_last_holder_leaves():
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def holder():
+        async with ce._user_sandbox_lock("u1"):
+            entered.set()
+            await release.wait()
+
+    async def waiter():
+        async with ce._user_sandbox_lock("u1"):
+            pass
+
+    first = asyncio.create_task(holder())
+    await entered.wait()
+    second = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    assert ce._sandbox_lock_refs == {"u1": 2} and "u1" in ce._sandbox_locks
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert ce._sandbox_locks == {} and ce._sandbox_lock_refs == {}
+
+
+@pytest.mark.asyncio
+async def test_lock_entry_dropped_when_body_raises():
+    with pytest.raises(RuntimeError):
+        async with ce._user_sandbox_lock("u1"):
+            raise RuntimeError("connect failed")
+    assert ce._sandbox_locks == {} and ce._sandbox_lock_refs == {}
+
+
+@pytest.mark.asyncio
+async def test_users_do_not_wait_on_each_other():
+    release = asyncio.Event()
+    entered = asyncio.Event()
+
+    async def slow_cold_start():
+        async with ce._user_sandbox_lock("u1"):
+            entered.set()
+            await release.wait()
+
+    blocked = asyncio.create_task(slow_cold_start())
+    await entered.wait()
+
+    async def other_user():
+        async with ce._user_sandbox_lock("u2"):
+            return "done"
+
+    assert await asyncio.wait_for(other_user(), 5) == "done"
+    assert not blocked.done()
+    release.set()
+    await blocked
+
+
+# ── pre-warmed pool ──────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_pooled_sandbox_is_claimed_once():
+    entry = ce._SandboxEntry(sbx=_Sbx(delay=0.01), skills_loaded=True, envs={})
+    ce._warm_pool.append(entry)
+    claims = await asyncio.gather(*(ce._claim_pooled_sandbox() for _ in range(5)))
+    assert [c for c in claims if c is not None] == [entry]
+    assert ce._warm_pool == []
+
+
+@pytest.mark.asyncio
+async def test_dead_pool_members_are_skipped():
+    live = ce._SandboxEntry(sbx=_Sbx(), skills_loaded=True, envs={})
+    dead = ce._SandboxEntry(sbx=_Sbx(alive=False), skills_loaded=True, envs={})
+    ce._warm_pool.extend([live, dead])
+    assert await ce._claim_pooled_sandbox() is live
+    assert await ce._claim_pooled_sandbox() is None
+    assert dead.sbx.killed and not live.sbx.killed
+
+
+@pytest.mark.asyncio
+async def test_refill_tops_up_and_drops_dead_members(monkeypatch):
+    created, pause_flags = [], []
+
+    async def create(envs, auto_pause=True):
+        pause_flags.append(auto_pause)
+        created.append(_Sbx())
+        return created[-1]
+
+    async def prepared(*a):
+        return None
+
+    async def load_skills(entry):
+        entry.skills_loaded = True
+
+    monkeypatch.setattr(ce, "_create_sandbox", create)
+    monkeypatch.setattr(ce, "_load_skills", load_skills)
+    monkeypatch.setattr(ce, "_ensure_store_layout", prepared)
+    dead = _Sbx(alive=False)
+    ce._warm_pool.append(ce._SandboxEntry(sbx=dead, skills_loaded=True, envs={}))
+
+    await ce._refill_pool_once(2)
+    assert [e.sbx for e in ce._warm_pool] == created and len(created) == 2
+    assert all(e.skills_loaded for e in ce._warm_pool)
+    assert pause_flags == [False, False] and dead.killed
+
+
+@pytest.mark.asyncio
+async def test_failed_preparation_kills_the_new_member(monkeypatch):
+    created = []
+
+    async def create(envs, auto_pause=True):
+        created.append(_Sbx())
+        return created[-1]
+
+    async def load_skills(entry):
+        raise RuntimeError("upload failed")
+
+    monkeypatch.setattr(ce, "_create_sandbox", create)
+    monkeypatch.setattr(ce, "_load_skills", load_skills)
+    await ce._refill_pool_once(1)
+    assert ce._warm_pool == [] and created[0].killed
+
+
+@pytest.mark.asyncio
+async def test_drain_kills_every_pooled_sandbox():
+    members = [ce._SandboxEntry(sbx=_Sbx(), skills_loaded=True, envs={}) for _ in range(3)]
+    ce._warm_pool.extend(members)
+    assert await ce.drain_sandbox_pool() == 3
+    assert ce._warm_pool == [] and all(e.sbx.killed for e in members)
+
+
+@pytest.mark.asyncio
+async def test_two_users_never_share_a_pooled_sandbox(monkeypatch):
+    pooled = ce._SandboxEntry(sbx=_Sbx(delay=0.01), skills_loaded=True, envs={}, skills_hash="h")
+    ce._warm_pool.append(pooled)
+    created = []
+
+    async def create(envs, auto_pause=True):
+        created.append(_Sbx())
+        return created[-1]
+
+    async def noop(*a, **kw):
+        return None
+
+    async def load_skills(entry):
+        entry.skills_loaded, entry.skills_hash = True, "h"
+
+    monkeypatch.setattr(ce, "_compute_skills_hash_from_fs", lambda: "h")
+    monkeypatch.setattr(ce, "_get_user_sandbox_record", noop)
+    monkeypatch.setattr(ce, "_upsert_user_sandbox", noop)
+    monkeypatch.setattr(ce, "_create_sandbox", create)
+    monkeypatch.setattr(ce, "_load_skills", load_skills)
+    monkeypatch.setattr(ce, "_ensure_store_layout", noop)
+    monkeypatch.setattr(ce, "_reset_scratchpad", noop)
+
+    a, b = await asyncio.gather(
+        ce.get_or_create_sandbox("u1", {"K": "1"}),
+        ce.get_or_create_sandbox("u2", {"K": "2"}),
+    )
+    assert a is not b
+    assert {a.sbx, b.sbx} == {pooled.sbx, created[0]}
+    assert ce._sandboxes == {"u1": a, "u2": b}
+    assert ce._warm_pool == []
@@ -0,0 +1,118 @@
+"""
+Session pruner tests.
+
+prune_messages used to re-estimate the whole message list before every
+eviction. The running-total version must pick exactly the same results to
+evict; the reference below is the old Phase 1–3 re-estimating loop (on the
+shared token counts) kept as the oracle. Phase 0 is shared.
+"""
+import copy
+import json
+import random
+
+import pytest
+
+from core.config import Config
+from core.token_accounting import message_tokens, messages_tokens
+from modules.agent import session_pruner as sp
+
+
+def _reference(messages):
+    ctx_window = Config.CONTEXT_WINDOW_TOKENS
+    keep_last = Config.CONTEXT_PRUNE_KEEP_LAST_ASSISTANTS
+    single_cap_tokens = int(ctx_window * Config.CONTEXT_SINGLE_TOOL_RESULT_RATIO)
+    budget_tokens = int(ctx_window * Config.CONTEXT_BUDGET_RATIO)
+    overflow_tokens = int(ctx_window * Config.CONTEXT_OVERFLOW_RATIO)
+
+    protected_ids = sp._find_protected_tool_call_ids(messages, keep_last)
+    evicted_ids = set()
+    messages, _ = sp._summarize_file_writes(messages, protected_ids)
+
+    phase1 = []
+    for msg in messages:
+        if msg.get("role") == "tool":
+            tc_id = msg.get("tool_call_id")
+            if message_tokens(msg) > single_cap_tokens and tc_id not in protected_ids:
+                msg_copy = copy.copy(msg)
+                msg_copy["content"] = sp._EVICTED_PLACEHOLDER
+                phase1.append(msg_copy)
+                if tc_id:
+                    evicted_ids.add(tc_id)
+                continue
+        phase1.append(msg)
+
+    if messages_tokens(phase1) > budget_tokens:
+        evictable = [
+            i for i, msg in enumerate(phase1)
+            if msg.get("role") == "tool"
+            and msg.get("tool_call_id") not in protected_ids
+            and msg.get("content") != sp._EVICTED_PLACEHOLDER
+        ]
+        for idx in evictable:
+            if messages_tokens(phase1) <= budget_tokens:
+                break
+            tc_id = phase1[idx].get("tool_call_id")
+            phase1[idx] = copy.copy(phase1[idx])
+            phase1[idx]["content"] = sp._EVICTED_PLACEHOLDER
+            if tc_id:
+                evicted_ids.add(tc_id)
+
+    if evicted_ids:
+        for i, msg in enumerate(phase1):
+            if msg.get("role") == "assistant" and msg.get("tool_calls"):
+                if any(tc.get("id") in evicted_ids for tc in msg["tool_calls"]):
+                    phase1[i] = copy.deepcopy(msg)
+        sp._clear_tool_call_args(phase1, evicted_ids)
+
+    return phase1, messages_tokens(phase1) > overflow_tokens
+
+
+def _session(rng, turns):
+    heredoc = "cat > /tmp/x.py << 'EOF'\n" + "\n".join(f"print({i})" for i in range(20)) + "\nEOF"
+    msgs = [{"role": "system", "content": "sys"}, {"role": "user", "content": "go"}]
+    for t in range(turns):
+        tc_id = f"call_{t}"
+        cmd = heredoc if rng.random() < 0.3 else "ls " + "x" * rng.randint(0, 400)
+        msgs.append({
+            "role": "assistant", "content": "thinking " * rng.randint(0, 50),
+            "tool_calls": [{"id": tc_id, "type": "function",
+                            "function": {"name": "bash", "arguments": json.dumps({"cmd": cmd})}}],
+        })
+        msgs.append({"role": "tool", "tool_call_id": tc_id,
+                     "content": "o" * rng.choice([10, 2_000, 20_000, 150_000])})
+    return msgs
+
+
+@pytest.fixture
+def small_window(monkeypatch):
+    monkeypatch.setattr(Config, "CONTEXT_PRUNE_ENABLED", True)
+    monkeypatch.setattr(Config, "CONTEXT_WINDOW_TOKENS", 200_000)
+    monkeypatch.setattr(Config, "CONTEXT_PRUNE_KEEP_LAST_ASSISTANTS", 3)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_matches_reference(small_window, seed):
+    msgs = _session(random.Random(seed), turns=60)
+    original = copy.deepcopy(msgs)
+    got, got_flag = sp.prune_messages(msgs)
+    want, want_flag = _reference(msgs)
+    assert got == want
+    assert got_flag == want_flag
+    assert msgs == original  # input untouched
+
+
+def test_recent_results_are_protected(small_window):
+    msgs = _session(random.Random(1), turns=40)
+    pruned, _ = sp.prune_messages(msgs)
+    tail = [m for m in pruned if m["role"] == "tool"][-3:]
+    assert all(m["content"] != sp._EVICTED_PLACEHOLDER for m in tail)
+
+
+def test_summary_memo_is_reused(small_window):
+    sp._summary_cache.clear()
+    msgs = _session(random.Random(2), turns=30)
+    sp.prune_messages(msgs)
+    cached = len(sp._summary_cache)
+    assert cached > 0
+    sp.prune_messages(msgs + [{"role": "user", "content": "more"}])
+    assert len(sp._summary_cache) == cached
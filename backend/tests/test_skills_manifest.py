@@ -0,0 +1,99 @@
+"""
+Skills manifest tests — modules/tools/skills_manifest.
+
+The manifest decides what gets shipped to every user's sandbox, so these pin
+the delta semantics: unchanged files are never re-hashed or re-sent, edits and
+deletions are detected, and the digest only moves when content does.
+"""
+import io
+import os
+import tarfile
+
+import pytest
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from modules.tools.skills_manifest import SkillsManifest
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "fmp" / "scripts").mkdir(parents=True)
+    (tmp_path / "fmp" / "SKILL.md").write_text("# fmp")
+    (tmp_path / "fmp" / "scripts" / "api.py").write_text("def fmp(): ...")
+    (tmp_path / "fmp" / "__pycache__").mkdir()
+    (tmp_path / "fmp" / "__pycache__" / "api.pyc").write_bytes(b"\0")
+    return tmp_path
+
+
+def _bump(path, text):
+    path.write_text(text)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_pycache_is_excluded(tree):
+    m = SkillsManifest(tree)
+    assert set(m.hashes()) == {"fmp/SKILL.md", "fmp/scripts/api.py"}
+
+
+def test_missing_remote_means_full_upload(tree):
+    changed, removed = SkillsManifest(tree).diff(None)
+    assert changed == ["fmp/SKILL.md", "fmp/scripts/api.py"]
+    assert removed == []
+
+
+def test_in_sync_remote_means_nothing_to_send(tree):
+    m = SkillsManifest(tree)
+    assert m.diff(m.hashes()) == ([], [])
+
+
+def test_edit_and_delete_are_detected(tree):
+    m = SkillsManifest(tree)
+    remote = m.hashes()
+    digest = m.digest
+
+    _bump(tree / "fmp" / "SKILL.md", "# fmp v2")
+    (tree / "fmp" / "scripts" / "api.py").unlink()
+    assert m.refresh(force=True)
+
+    assert m.diff(remote) == (["fmp/SKILL.md"], ["fmp/scripts/api.py"])
+    assert m.digest != digest
+
+
+def test_refresh_is_throttled(tree):
+    m = SkillsManifest(tree, refresh_interval=3600)
+    digest = m.digest
+    _bump(tree / "fmp" / "SKILL.md", "# changed")
+    # Within the window the cached digest is served without touching disk.
+    assert m.digest == digest
+    m.refresh(force=True)
+    assert m.digest != digest
+
+
+def test_touch_without_content_change_keeps_digest(tree):
+    m = SkillsManifest(tree)
+    digest = m.digest
+    _bump(tree / "fmp" / "SKILL.md", "# fmp")
+    m.refresh(force=True)
+    assert m.digest == digest
+
+
+def test_file_deleted_mid_walk_is_skipped(tree, monkeypatch):
+    gone = tree / "fmp" / "scripts" / "api.py"
+    real_is_file = type(gone).is_file
+
+    def racy_is_file(self):
+        ok = real_is_file(self)
+        if self == gone:
+            self.unlink()  # removed after rglob/is_file, before stat
+        return ok
+
+    monkeypatch.setattr(type(gone), "is_file", racy_is_file)
+    assert set(SkillsManifest(tree).hashes()) == {"fmp/SKILL.md"}
+
+
+def test_archive_contains_only_requested_files(tree):
+    m = SkillsManifest(tree)
+    blob = m.build_archive(["fmp/SKILL.md"], {".manifest.json": m.manifest_json()})
+    with tarfile.open(fileobj=io.BytesIO(blob), mode="r:gz") as tar:
+        assert sorted(tar.getnames()) == [".manifest.json", "fmp/SKILL.md"]
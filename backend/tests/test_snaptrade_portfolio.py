@@ -0,0 +1,79 @@
+"""
+SnapTradeTools.get_portfolio account fan-out tests.
+
+Per-account positions and balance calls are independent blocking SDK calls;
+they run concurrently, and one slow or syncing account must not take the
+others down with it.
+"""
+import asyncio
+import time
+
+import pytest
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from modules.tools.clients.snaptrade import SnapTradeTools, SnapTradeSession
+from schemas.snaptrade import SnapTradeAccountResponse
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    t = SnapTradeTools()
+    session = SnapTradeSession(
+        snaptrade_user_id="u", snaptrade_user_secret="s", is_connected=True,
+        last_activity="", account_ids=["a1", "a2", "a3"],
+    )
+
+    async def get_session(user_id):
+        return session
+
+    async def get_accounts(user_id, secret):
+        return [SnapTradeAccountResponse(id=a, name=a, number="", institution_name="X")
+                for a in session.account_ids]
+
+    monkeypatch.setattr(t, "_get_session", get_session)
+    monkeypatch.setattr(t, "_get_accounts", get_accounts)
+    return t
+
+
+@pytest.mark.asyncio
+async def test_accounts_are_fetched_concurrently(tools, monkeypatch):
+    async def positions(user_id, secret, account_id):
+        await asyncio.sleep(0.2)
+        return []
+
+    async def cash(user_id, secret, account_id):
+        await asyncio.sleep(0.2)
+        return 100.0
+
+    monkeypatch.setattr(tools, "_get_positions_for_account", positions)
+    monkeypatch.setattr(tools, "_get_cash_for_account", cash)
+
+    started = time.monotonic()
+    result = await tools.get_portfolio("u")
+    # 3 accounts x 2 calls x 0.2s would be 1.2s serially.
+    assert time.monotonic() - started < 0.6
+    assert result["success"] is True
+
+
+@pytest.mark.asyncio
+async def test_partial_failures_keep_statuses(tools, monkeypatch):
+    async def positions(user_id, secret, account_id):
+        if account_id == "a1":
+            raise RuntimeError("425 Too Early")
+        if account_id == "a2":
+            raise asyncio.TimeoutError()
+        return []
+
+    async def cash(user_id, secret, account_id):
+        return 50.0
+
+    monkeypatch.setattr(tools, "_get_positions_for_account", positions)
+    monkeypatch.setattr(tools, "_get_cash_for_account", cash)
+
+    loaded = await asyncio.gather(*[
+        tools._load_account("u", "s", a, SnapTradeAccountResponse(
+            id=a, name=a, number="", institution_name="X"))
+        for a in ("a1", "a2", "a3")
+    ])
+    assert [status for _, status in loaded] == ["syncing", "error", None]
+    assert all(account.total_value == 50.0 for account, _ in loaded)
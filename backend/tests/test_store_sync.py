@@ -0,0 +1,149 @@
+"""
+Store sync tests — services/store_sync and crud.store.bulk_upsert_store_files.
+
+The sandbox is faked; the hash script runs locally against a temp dir, and
+the upsert is compiled for Postgres without a database.
+"""
+import asyncio
+import hashlib
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import core.database
+import crud.store
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from crud.store import bulk_upsert_store_files
+from modules.tools.implementations import code_execution
+from services import store_sync
+
+
+def _hash_tree(base):
+    out = subprocess.run([sys.executable, "-c", store_sync._HASH_SCRIPT, str(base), str(base / "store")],
+                         capture_output=True, text=True, check=True).stdout
+    return store_sync._parse_digests(out)
+
+
+def test_hashes_match_the_stored_text(tmp_path):
+    files = {
+        "store/notes.md": b"# notes\n",
+        "store/crlf.txt": b"a\r\nb\r\n",
+        "store/latin1.md": b"caf\xe9\n",
+        "store/a dir/back\\slash.py": b"x = 1\n",
+        "store/new\nline.md": b"y\n",
+        "store/skip.json": b"{}",
+    }
+    for rel, raw in files.items():
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_bytes(raw)
+
+    digests = _hash_tree(tmp_path)
+    assert set(digests) == set(files) - {"store/skip.json"}
+    for rel, digest in digests.items():
+        stored = store_sync._decode(files[rel])  # what the upsert writes
+        assert digest == hashlib.md5(stored.encode("utf-8")).hexdigest()  # Postgres md5(content)
+
+
+def test_unparseable_hash_output_is_empty():
+    assert store_sync._parse_digests("") == {}
+    assert store_sync._parse_digests("not json") == {}
+
+
+class _Files:
+    def __init__(self, contents):
+        self.contents = contents
+        self.active = self.peak = 0
+
+    async def read(self, path, format="bytes"):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+        if path not in self.contents:
+            raise FileNotFoundError(path)
+        return self.contents[path]
+
+
+class _Sandbox:
+    def __init__(self, contents):
+        self.files = _Files(contents)
+
+
+@pytest.mark.asyncio
+async def test_read_files_is_bounded_and_skips_failures(monkeypatch):
+    monkeypatch.setattr(store_sync, "READ_CONCURRENCY", 3)
+    sbx = _Sandbox({f"/home/user/store/{i}.md": str(i).encode() for i in range(10)})
+    rels = [f"store/{i}.md" for i in range(10)] + ["store/gone.md"]
+    got = await store_sync._read_files(sbx, rels)
+    assert got == {f"store/{i}.md": str(i) for i in range(10)}
+    assert sbx.files.peak == 3
+
+
+class _FakeSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_is_one_statement():
+    db = _FakeSession()
+    n = await bulk_upsert_store_files(db, "u1", {"store/a.md": "a", "store/b.md": "b"})
+    assert n == 2
+    assert len(db.statements) == 1
+    assert "ON CONFLICT (user_id, filename) DO UPDATE" in db.statements[0]
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_empty_is_noop():
+    db = _FakeSession()
+    assert await bulk_upsert_store_files(db, "u1", {}) == 0
+    assert db.statements == []
+
+
+@pytest.mark.asyncio
+async def test_reads_happen_with_no_session_open(monkeypatch):
+    open_sessions, written = [0], {}
+
+    class _Session:
+        async def __aenter__(self):
+            open_sessions[0] += 1
+            return self
+
+        async def __aexit__(self, *exc):
+            open_sessions[0] -= 1
+            return False
+
+        async def commit(self):
+            pass
+
+    class _Commands:
+        async def run(self, cmd, timeout=None):
+            return SimpleNamespace(exit_code=0, stdout='{"store/a.md": "stale", "store/b.md": "same"}')
+
+    class _CheckedFiles(_Files):
+        async def read(self, path, format="bytes"):
+            assert open_sessions[0] == 0
+            return await super().read(path, format)
+
+    async def digests(db, user_id):
+        return {"store/b.md": "same"}
+
+    async def upsert(db, user_id, files):
+        written.update(files)
+        return len(files)
+
+    async def sandbox(user_id):
+        return SimpleNamespace(commands=_Commands(), files=_CheckedFiles({"/home/user/store/a.md": b"new"}))
+
+    monkeypatch.setattr(code_execution, "_get_or_reconnect_sandbox", sandbox)
+    monkeypatch.setattr(core.database, "get_db_session", _Session)
+    monkeypatch.setattr(crud.store, "get_store_file_digests", digests)
+    monkeypatch.setattr(crud.store, "bulk_upsert_store_files", upsert)
+    assert await store_sync.sync_store_files("u1") == 1
+    assert written == {"store/a.md": "new"}
@@ -0,0 +1,91 @@
+"""
+Streaming indicator tests — skills/day_trading/scripts/streaming.py.
+
+The states replace full-day rescans in live polling, so they must agree with
+indicators.py / the list-based setups at every bar, skip bars they've already
+seen, and survive a round-trip through the journal store mid-session.
+"""
+import json
+
+import pytest
+
+from skills.day_trading.scripts import indicators as ind
+from skills.day_trading.scripts import journal
+from skills.day_trading.scripts import streaming as st
+from skills.day_trading.scripts.setups import orb_signal, vwap_state
+from tests.bars import synthetic_bars as _bars
+
+
+@pytest.mark.parametrize("period", [2, 14])
+def test_running_indicators_match_list_versions(period):
+    bars = _bars(60, seed=period)
+    e, r, a = st.EMA(period), st.WilderRSI(period), st.WilderATR(period)
+    for i, b in enumerate(bars):
+        prefix = bars[: i + 1]
+        closes = [x["close"] for x in prefix]
+        assert e.update(b) == ind.ema(closes, period)
+        assert r.update(b) == ind.rsi(closes, period)
+        assert a.update(b) == ind.atr(prefix, period)
+
+
+def test_vwap_and_opening_range_match_list_versions():
+    bars = _bars(40, seed=1)
+    v, o = st.SessionVWAP(), st.OpeningRange(5)
+    for i, b in enumerate(bars):
+        v.update(b)
+        o.update(b)
+        assert v.value == ind.vwap(bars[: i + 1])
+        assert v.recent_vwap[-1] == ind.vwap_series(bars[: i + 1])[-1]
+        assert o.range == ind.opening_range(bars[: i + 1], 5)
+
+
+def test_relative_volume_uses_first_minutes_only():
+    bars = _bars(10, seed=2)
+    rv = st.RelativeVolume([1000.0, 3000.0], minutes=5).extend(bars)
+    first5 = sum(b["volume"] for b in bars[:5])
+    assert rv.value == ind.relative_volume(first5, [1000.0, 3000.0])
+
+
+def test_seen_bars_are_skipped():
+    bars = _bars(20, seed=3)
+    v = st.SessionVWAP().extend(bars[:10])
+    v.extend(bars)  # a poller re-feeding the whole day
+    assert v.n == 20 and v.value == ind.vwap(bars)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_setups_accept_states(seed):
+    bars = _bars(45, seed=seed)
+    s = st.SymbolSession("mu", "2025-03-03")
+    for i, b in enumerate(bars):
+        s.update(b)
+        prefix = bars[: i + 1]
+        assert orb_signal(s, atr14=1.2) == orb_signal(prefix, atr14=1.2)
+        assert orb_signal(s.orb) == orb_signal(prefix)
+        assert vwap_state(s, atr14=1.2) == vwap_state(prefix, atr14=1.2)
+
+
+def test_session_round_trips_through_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "STATE_DIR", str(tmp_path))
+    bars = _bars(30, seed=4)
+    s = st.SymbolSession("MU", "2025-03-03", prior_open_volumes=[5000.0]).extend(bars[:12])
+    json.dumps(s.to_dict())
+    s.save()
+
+    resumed = st.SymbolSession.load("mu", "2025-03-03")
+    assert resumed is not None and st.SymbolSession.load("MU", "2025-03-04") is None
+    resumed.extend(bars)
+    fresh = st.SymbolSession("MU", "2025-03-03", prior_open_volumes=[5000.0]).extend(bars)
+    assert resumed.to_dict() == fresh.to_dict()
+    assert orb_signal(resumed) == orb_signal(bars)
+    assert vwap_state(resumed) == vwap_state(bars)
+    assert resumed.rvol.value == fresh.rvol.value
+
+
+def test_rsi_and_atr_states_round_trip():
+    bars = _bars(30, seed=5)
+    r, a = st.WilderRSI(14).extend(bars[:20]), st.WilderATR(14).extend(bars[:20])
+    r2 = st.WilderRSI.from_dict(json.loads(json.dumps(r.to_dict()))).extend(bars)
+    a2 = st.WilderATR.from_dict(json.loads(json.dumps(a.to_dict()))).extend(bars)
+    assert r2.value == ind.rsi([b["close"] for b in bars], 14)
+    assert a2.value == ind.atr(bars, 14)
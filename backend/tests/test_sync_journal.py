@@ -0,0 +1,179 @@
+"""
+Post-bash sync journal tests — file_management.process_sync_manifest.
+
+The sandbox is faked: its one journal command returns the drained
+.sync_pending manifest. These pin that syncs are deduplicated by content
+hash, that a failed sync is retried, that the write tools keep those hashes
+current, and that the hash cache stays bounded.
+"""
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from modules.agent.context import AgentContext
+from modules.tools.implementations import file_management as fm
+
+
+def _md5(text):
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class _Result:
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.exit_code = 0
+
+
+class _Sandbox:
+    """commands.run drains `pending`; files.write stores into `files` by relative name.
+    Syncs of names in `failing` report a failed DB write."""
+
+    def __init__(self, files):
+        self.files_by_name = files
+        self.pending = []
+        self.failing = set()
+        self.runs = []
+        self.commands = SimpleNamespace(run=self._run)
+        self.files = SimpleNamespace(write=self._write)
+
+    async def _run(self, cmd, timeout=None):
+        self.runs.append(cmd)
+        if "mkdir" in cmd:
+            return _Result("")
+        lines, self.pending = self.pending, []
+        return _Result("".join(f"{line}\n" for line in lines))
+
+    async def _write(self, path, content):
+        self.files_by_name[path[len(fm.FALLBACK_FILES_DIR) + 1:]] = content
+
+
+@pytest.fixture
+def env(monkeypatch):
+    files = {}
+    sbx = _Sandbox(files)
+    reads, synced = [], []
+
+    async def read(user_id, filename, context):
+        reads.append(filename)
+        return files.get(filename)
+
+    async def sync_stock(filename, content, context, **kw):
+        if filename in sbx.failing:
+            return False
+        synced.append(filename)
+        return True
+
+    async def get_sandbox(user_id):
+        return SimpleNamespace(sbx=sbx)
+
+    monkeypatch.setattr(fm, "_read_sandbox_text", read)
+    monkeypatch.setattr(fm, "_maybe_sync_stock_analysis", sync_stock)
+    monkeypatch.setattr(fm, "_get_sandbox", get_sandbox)
+    monkeypatch.setattr(fm, "_synced_digests", fm.OrderedDict())
+    ctx = AgentContext(agent_id="a1", user_id="u1", chat_id="c1")
+    return sbx, files, reads, synced, ctx
+
+
+def test_manifest_is_moved_aside_before_reading():
+    cmd = fm._journal_cmd()
+    assert "mv " in cmd and cmd.index("mv ") < cmd.index("cat ") < cmd.index("rm -f")
+    assert ": >" not in cmd and "visualizations" not in cmd
+
+
+@pytest.mark.asyncio
+async def test_pending_manifest_synced_once_per_content(env):
+    sbx, files, reads, synced, ctx = env
+    files["stocks/AAPL/thesis.md"] = "# AAPL"
+    sbx.pending = ["stocks/AAPL/thesis.md", "stocks/AAPL/thesis.md"]
+    assert await fm.process_sync_manifest(ctx, sbx) == 1
+    assert synced == ["stocks/AAPL/thesis.md"]
+    assert reads == ["stocks/AAPL/thesis.md"]
+
+    sbx.pending = ["stocks/AAPL/thesis.md"]
+    assert await fm.process_sync_manifest(ctx, sbx) == 0
+
+    files["stocks/AAPL/thesis.md"] = "# AAPL v2"
+    sbx.pending = ["stocks/AAPL/thesis.md"]
+    assert await fm.process_sync_manifest(ctx, sbx) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_sync_is_retried(env):
+    sbx, files, reads, synced, ctx = env
+    name = "stocks/NVDA/thesis.md"
+    files[name] = "# NVDA"
+    sbx.failing.add(name)
+    sbx.pending = [name]
+    assert await fm.process_sync_manifest(ctx, sbx) == 0
+
+    sbx.failing.clear()
+    sbx.pending = [name]  # same content, listed again by the next bash call
+    assert await fm.process_sync_manifest(ctx, sbx) == 1
+    assert synced == [name]
+
+
+@pytest.mark.asyncio
+async def test_empty_manifest_reads_nothing(env):
+    sbx, files, reads, synced, ctx = env
+    assert await fm.process_sync_manifest(ctx, sbx) == 0
+    assert reads == [] and len(sbx.runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_write_tools_keep_digests_current(env):
+    sbx, files, reads, synced, ctx = env
+    name = "stocks/MU/notes.md"
+    async for _ in fm.write_chat_file_impl(ctx, name, "# MU"):
+        pass
+    sbx.pending = [name]
+    assert await fm.process_sync_manifest(ctx, sbx) == 0  # the tool already synced it
+
+    files[name] = "# MU, edited in bash"
+    sbx.pending = [name]
+    assert await fm.process_sync_manifest(ctx, sbx) == 1
+
+    # Written without syncing → the journal must not treat it as synced.
+    async for _ in fm.write_chat_file_impl(ctx, name, "# draft", sync_to_analysis=False):
+        pass
+    sbx.pending = [name]
+    assert await fm.process_sync_manifest(ctx, sbx) == 1
+
+
+def test_digest_cache_is_bounded(env, monkeypatch):
+    monkeypatch.setattr(fm, "_MAX_SYNC_WORKSPACES", 2)
+    monkeypatch.setattr(fm, "_MAX_SYNC_FILES", 3)
+    contexts = [AgentContext(agent_id="a", user_id=f"u{i}", chat_id="c") for i in range(3)]
+    for c in contexts:
+        fm._workspace_digests(c)
+    assert [k[0] for k in fm._synced_digests] == ["u1", "u2"]
+
+    seen = fm._workspace_digests(contexts[1])
+    for i in range(5):
+        fm._remember_digest(seen, f"f{i}.md", _md5(str(i)))
+    assert list(seen) == ["f2.md", "f3.md", "f4.md"]
+    assert [k[0] for k in fm._synced_digests] == ["u2", "u1"]
+
+
+@pytest.mark.asyncio
+async def test_background_sync_coalesces(env, monkeypatch):
+    sbx, files, reads, synced, ctx = env
+    calls = []
+    gate = asyncio.Event()
+
+    async def slow(context, sbx=None):
+        calls.append(context)
+        await gate.wait()
+
+    monkeypatch.setattr(fm, "process_sync_manifest", slow)
+    monkeypatch.setattr(fm, "_sync_tasks", {})
+    monkeypatch.setattr(fm, "_sync_rerun", {})
+    for _ in range(3):
+        fm.schedule_sync_manifest(ctx, sbx)
+    await asyncio.sleep(0)
+    gate.set()
+    while fm._sync_tasks:
+        await asyncio.sleep(0)
+    assert len(calls) == 2
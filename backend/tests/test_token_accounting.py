@@ -0,0 +1,58 @@
+"""
+Token accounting tests: tokenizer selection, memoization, fallback, and the
+running totals ChatHistory keeps for the compaction check.
+"""
+from types import SimpleNamespace
+
+from core import token_accounting as ta
+from schemas.chat_history import ChatHistory, ChatMessage
+
+
+def test_claude_and_generic_tokenizers():
+    claude_key, _ = ta._tokenizer_for("anthropic/claude-sonnet-4-6")
+    other_key, _ = ta._tokenizer_for("gemini/gemini-2.5-pro")
+    assert claude_key == "claude"
+    assert other_key.startswith("tiktoken:")
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    for model in ("anthropic/claude-sonnet-4-6", "gpt-4o"):
+        n = ta.count_text(text, model)
+        assert 0 < n < len(text) // 2
+
+
+def test_counts_are_memoized(monkeypatch):
+    calls = []
+    monkeypatch.setitem(ta._tokenizers, "fake-model", ("fake", lambda t: calls.append(t) or 7))
+    assert ta.count_text("some text", "fake-model") == 7
+    assert ta.count_text("some text", "fake-model") == 7
+    assert len(calls) == 1
+
+
+def test_chars_fallback(monkeypatch):
+    monkeypatch.setitem(ta._tokenizers, "no-tokenizer", ("chars", None))
+    assert ta.count_text("x" * 40, "no-tokenizer") == 10
+
+
+def test_message_tokens_cover_text_blocks_and_tool_args():
+    msg = {
+        "role": "assistant",
+        "content": [{"type": "text", "text": "hello"}, {"type": "image", "source": {}}],
+        "tool_calls": [{"id": "1", "function": {"name": "bash", "arguments": '{"cmd": "ls"}'}}],
+    }
+    assert ta.message_tokens(msg) == ta.count_text("hello") + ta.count_text('{"cmd": "ls"}')
+
+
+def test_chat_history_running_total_uses_persisted_counts():
+    rows = [
+        SimpleNamespace(role="user", content="hi", tool_call_id=None, name=None, resource_id=None,
+                        sequence=0, timestamp=None, tool_calls=None, token_count=1000),
+        SimpleNamespace(role="assistant", content="hello there", tool_call_id=None, name=None,
+                        resource_id=None, sequence=1, timestamp=None, tool_calls=None, token_count=None),
+    ]
+    history = ChatHistory.from_db_messages(rows, "c1", "u1")
+    expected = 1000 + ta.count_text("hello there")
+    assert history.token_total == expected
+    assert history.get_statistics()["estimated_tokens"] == expected
+
+    history.add_message(ChatMessage(role="user", content="more"))
+    assert history.token_total == expected + ta.count_text("more")
+    assert ChatHistory(messages=history.messages).token_total == history.token_total
@@ -0,0 +1,68 @@
+"""
+ToolRegistry schema caching: schemas are compiled once and the list for a
+given tool-name set is stable (same order, same bytes) and each caller gets
+its own copy, so mutating one can't change what later calls send.
+"""
+import json
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from modules.tools.models import INTENT_PARAM, Tool
+from modules.tools.registry import ToolRegistry
+
+
+def _tool(name, **kw):
+    return Tool(
+        name=name, description=f"{name} tool", handler=lambda: None,
+        parameters_schema={"type": "object", "properties": {"x": {"type": "string"}}},
+        is_async=False, **kw,
+    )
+
+
+def _registry():
+    reg = ToolRegistry()
+    for t in (_tool("a"), _tool("b", hidden_from_ui=True), _tool("docs", api_docs_only=True)):
+        reg.register(t)
+    return reg
+
+
+def test_schema_compiled_once_and_reused(monkeypatch):
+    reg = _registry()
+    calls = []
+    monkeypatch.setattr(Tool, "to_openai_schema", lambda self: calls.append(self.name))
+    first = reg.get_openai_tools(tool_names=["a", "b"])
+    second = reg.get_openai_tools(tool_names=["a", "b"])
+    assert calls == []
+    assert first == second and first is not second
+    assert json.dumps(first, separators=(",", ":")) == reg._schema_set(("a", "b"))[0]
+
+
+def test_mutating_a_result_does_not_leak():
+    reg = _registry()
+    fp = reg.get_openai_tools_fingerprint(["a"])
+    tools = reg.get_openai_tools(tool_names=["a"])
+    tools[0]["cache_control"] = {"type": "ephemeral"}
+    tools[0]["function"]["parameters"]["properties"]["x"]["type"] = "integer"
+    tools.append({"type": "function"})
+    again = reg.get_openai_tools(tool_names=["a"])
+    assert len(again) == 1 and "cache_control" not in again[0]
+    assert again[0]["function"]["parameters"]["properties"]["x"]["type"] == "string"
+    assert reg.get_openai_tools_fingerprint(["a"]) == fp
+
+
+def test_order_follows_names_and_skips_docs_only():
+    reg = _registry()
+    names = [t["function"]["name"] for t in reg.get_openai_tools(tool_names=["b", "docs", "a"])]
+    assert names == ["b", "a"]
+    a = reg.get_openai_tools(tool_names=["a"])[0]
+    assert INTENT_PARAM in a["function"]["parameters"]["properties"]
+
+
+def test_fingerprint_is_stable_and_invalidated_on_register():
+    reg = _registry()
+    fp = reg.get_openai_tools_fingerprint(["a", "b"])
+    assert fp == reg.get_openai_tools_fingerprint(["a", "b"])
+    assert fp != reg.get_openai_tools_fingerprint(["b", "a"])
+    before = json.dumps(reg.get_all_schemas())
+    reg.register(_tool("c"))
+    assert json.dumps(reg.get_all_schemas()) != before
+    assert reg.get_openai_tools_fingerprint(["a", "b"]) == fp
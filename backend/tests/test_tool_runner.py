@@ -0,0 +1,110 @@
+"""
+ToolRunner invocation plans: handlers are inspected once at registration and
+arguments are bound through the compiled plan on every call.
+"""
+import inspect
+
+import pytest
+from pydantic import BaseModel
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from modules.agent.context import AgentContext
+from modules.tools import runner as runner_mod
+from modules.tools.models import InvocationPlan, Tool
+from modules.tools.registry import ToolRegistry
+from modules.tools.runner import ToolRunner, get_tool_timings
+from schemas.sse import SSEEvent
+
+
+class ChartSpec(BaseModel):
+    title: str
+    points: int = 10
+
+
+async def make_chart(*, context: AgentContext, spec: ChartSpec):
+    return {"title": spec.title, "points": spec.points}
+
+
+def add(*, context: AgentContext, a: int, b: int = 1):
+    return a + b
+
+
+async def stream(*, context: AgentContext, n: int):
+    for i in range(n):
+        yield SSEEvent(event="progress", data={"i": i})
+    yield {"count": n}
+
+
+def _runner():
+    reg = ToolRegistry()
+    for fn, is_async in ((make_chart, True), (add, False), (stream, True)):
+        reg.register(Tool(
+            name=fn.__name__, description=fn.__name__, handler=fn,
+            parameters_schema={"type": "object", "properties": {}}, is_async=is_async,
+        ))
+    return ToolRunner(registry=reg)
+
+
+async def _run(runner, name, arguments):
+    ctx = AgentContext(agent_id="a1", user_id="u1", chat_id="c1")
+    return [item async for item in runner.execute(name, arguments, ctx)]
+
+
+def test_plan_compiled_at_registration():
+    reg = _runner().registry
+    chart = reg.get_plan("make_chart")
+    assert chart.model_param == ("spec", ChartSpec)
+    assert chart.is_async and not chart.is_async_gen
+    assert reg.get_plan("add").model_param is None
+    assert reg.get_plan("stream").is_async_gen
+
+
+@pytest.mark.parametrize("arguments", [
+    {"spec": {"title": "t", "points": 3}, "intent": "Drawing"},
+    {"spec": ChartSpec(title="t", points=3)},
+    {"title": "t", "points": 3, "intent": "Drawing"},
+])
+async def test_model_param_binding(arguments):
+    out = await _run(_runner(), "make_chart", arguments)
+    assert out == [{"title": "t", "points": 3, "success": True}]
+
+
+async def test_wrong_type_for_model_param_fails_cleanly():
+    out = await _run(_runner(), "make_chart", {"spec": "oops"})
+    assert out[-1]["success"] is False
+    assert "must be a dict or ChartSpec instance" in out[-1]["error"]
+
+
+async def test_plain_kwargs_and_non_dict_result():
+    out = await _run(_runner(), "add", {"a": 2, "intent": "Adding"})
+    assert out == [{"success": True, "data": 3}]
+
+
+async def test_generator_streams_events_then_result():
+    out = await _run(_runner(), "stream", {"n": 2})
+    assert [type(x) for x in out] == [SSEEvent, SSEEvent, dict]
+    assert out[-1] == {"count": 2, "success": True}
+
+
+async def test_execute_does_not_reinspect(monkeypatch):
+    runner = _runner()
+    monkeypatch.setattr(inspect, "signature", lambda *a, **k: pytest.fail("signature called per call"))
+    out = await _run(runner, "make_chart", {"title": "x"})
+    assert out[-1]["success"] is True
+
+
+async def test_timings_recorded(monkeypatch):
+    monkeypatch.setattr(runner_mod, "_timings", {})
+    runner = _runner()
+    await _run(runner, "add", {"a": 1})
+    await _run(runner, "add", {"a": 1})
+    t = get_tool_timings()["add"]
+    assert t["calls"] == 2
+    assert t["bind_avg_us"] >= 0 and t["run_avg_ms"] >= 0
+    assert t["run_max_s"] >= 0
+
+
+def test_unregistered_tool_plan_compiles_on_demand():
+    tool = Tool(name="add", description="", handler=add, parameters_schema={}, is_async=False)
+    plan = InvocationPlan.compile(tool)
+    assert plan.bind({"a": 1, "intent": "x"}, context=None) == {"context": None, "a": 1}
@@ -0,0 +1,119 @@
+"""
+bulk_upsert_transactions_async tests, plus the sync service's job bookkeeping.
+
+Runs against a fake session that compiles each statement for Postgres, so
+these check the SQL shape, chunking and counting without a database.
+"""
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import modules.agent  # noqa: F401 — must load before modules.tools (circular import)
+from crud.transactions import bulk_upsert_transactions_async
+from services import transaction_sync as ts
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _FakeSession:
+    """Pretends every external_id in `existing` is already stored."""
+
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.statements = []
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        self.statements.append(str(compiled))
+        ext_ids = [v for k, v in compiled.params.items() if k.startswith("external_id")]
+        return _Result([(e not in self.existing,) for e in ext_ids])
+
+
+def _row(ext, symbol="aapl"):
+    return {
+        "user_id": "u1",
+        "account_id": "acc",
+        "symbol": symbol,
+        "transaction_type": "buy",
+        "transaction_date": datetime(2024, 1, 2, tzinfo=timezone.utc),
+        "external_id": ext,
+        "data": {"quantity": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_single_statement_with_conflict_target_and_returning():
+    db = _FakeSession(existing={"a"})
+    inserted, updated = await bulk_upsert_transactions_async(db, [_row("a"), _row("b"), _row("c")])
+    assert (inserted, updated) == (2, 1)
+    assert len(db.statements) == 1
+    sql = db.statements[0]
+    assert "ON CONFLICT (user_id, account_id, external_id) DO UPDATE" in sql
+    assert "RETURNING (xmax = 0)" in sql
+
+
+@pytest.mark.asyncio
+async def test_chunks_and_collapses_duplicate_ids():
+    db = _FakeSession()
+    rows = [_row(str(i)) for i in range(25)] + [_row("3", symbol="msft")]
+    inserted, updated = await bulk_upsert_transactions_async(db, rows, chunk_size=10)
+    assert (inserted, updated) == (25, 0)
+    assert len(db.statements) == 3
+
+
+@pytest.mark.asyncio
+async def test_blank_external_ids_are_not_collapsed():
+    db = _FakeSession()
+    inserted, _ = await bulk_upsert_transactions_async(db, [_row(""), _row(""), _row(None)])
+    assert inserted == 3
+
+
+@pytest.mark.asyncio
+async def test_foreground_sync_keeps_job_bookkeeping_async(monkeypatch):
+    """Every sync-job read/write goes through the async session helpers."""
+    job = SimpleNamespace(id=uuid.uuid4(), data={})
+    updates = []
+
+    class _Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    async def latest(db, user_id):
+        return None
+
+    async def create(db, **kw):
+        return job
+
+    async def update(db, job_id, **fields):
+        updates.append((job_id, fields["status"]))
+
+    async def snaptrade_user(db, user_id):
+        return SimpleNamespace(is_connected=True, snaptrade_user_id="s1", snaptrade_user_secret="x")
+
+    async def no_accounts(*a):
+        return []
+
+    monkeypatch.setattr(ts, "get_db_session", _Session)
+    monkeypatch.setattr(ts.tx_crud, "get_latest_sync_job_async", latest)
+    monkeypatch.setattr(ts.tx_crud, "create_sync_job_async", create)
+    monkeypatch.setattr(ts.tx_crud, "update_sync_job_async", update)
+    monkeypatch.setattr(ts, "get_snaptrade_user", snaptrade_user)
+    service = ts.TransactionSyncService()
+    monkeypatch.setattr(service, "_get_user_accounts", no_accounts)
+
+    result = await service.sync_user_transactions("u1", force_resync=True, background_sync=False)
+    assert result["success"] and result["accounts_synced"] == 0
+    assert updates == [(job.id, "completed")]
+    assert not hasattr(ts, "SessionLocal")
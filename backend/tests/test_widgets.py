@@ -349,3 +349,106 @@ def test_part_series_converts_odds_history():
     })
     assert entries == [{"label": "Cut odds", "points": [
         {"t": "2026-08-01", "v": 24.0}, {"t": "2026-08-02", "v": 25.0}]}]
+
+
+# ── public share page: payload cache + buffered views ────────────────────────
+def test_public_ttl_is_shortest_shared_source():
+    spec = {"tiles": [
+        {"id": "a", "query": {"source": "fred", "series_id": "X"}},
+        {"id": "b", "queries": {"p": {"query": {"source": "series", "symbols": []}}}},
+        {"id": "c", "query": {"source": "user_portfolio"}},
+    ]}
+    assert wd.public_ttl(spec) == 300
+    assert wd.public_ttl({"tiles": [{"id": "t", "query": {"source": "inline"}}]}) == 3600
+
+
+def test_public_payload_coalesced_per_slug(monkeypatch):
+    wd._cache.clear()
+    wd._locks.clear()
+    calls = []
+
+    async def fake_resolve(spec, viewer_user_id=None):
+        calls.append(viewer_user_id)
+        await asyncio.sleep(0.01)
+        return {"t": {"shape": "number", "value": 1}}
+
+    monkeypatch.setattr(wd, "resolve_widget_data", fake_resolve)
+    spec = {"tiles": [{"id": "t", "query": {"source": "quote", "symbols": ["AAPL"]}}]}
+
+    async def go():
+        await asyncio.gather(*[wd.resolve_public_widget_data("s1", spec) for _ in range(10)])
+        await wd.resolve_public_widget_data("s1", spec)
+        await wd.resolve_public_widget_data("s1", {**spec, "title": "edited"})
+
+    asyncio.run(go())
+    assert calls == [None, None]  # one per distinct spec, anonymous viewer
+
+
+
+def test_public_payload_with_error_tile_expires_quickly(monkeypatch):
+    wd._cache.clear()
+    wd._locks.clear()
+    clock = {"t": 1000.0}
+    monkeypatch.setattr(wd.time, "monotonic", lambda: clock["t"])
+    results = [{"t": {"shape": "error", "message": "upstream 502"}},
+               {"t": {"shape": "number", "value": 1}}]
+    calls = []
+
+    async def fake_resolve(spec, viewer_user_id=None):
+        calls.append(spec)
+        return results[min(len(calls), 2) - 1]
+
+    monkeypatch.setattr(wd, "resolve_widget_data", fake_resolve)
+    spec = {"tiles": [{"id": "t", "query": {"source": "fred", "series_id": "X"}}]}
+
+    async def go():
+        first = await wd.resolve_public_widget_data("s1", spec)
+        clock["t"] += wd.PUBLIC_ERROR_TTL - 1
+        cached = await wd.resolve_public_widget_data("s1", spec)
+        clock["t"] += 2
+        recovered = await wd.resolve_public_widget_data("s1", spec)
+        clock["t"] += 600  # healthy payload keeps the source TTL (fred: 3600s)
+        again = await wd.resolve_public_widget_data("s1", spec)
+        return first, cached, recovered, again
+
+    first, cached, recovered, again = asyncio.run(go())
+    assert first["t"]["shape"] == "error" and cached is first
+    assert recovered["t"]["value"] == 1 and again is recovered
+    assert len(calls) == 2
+
+def test_view_counter_buffers_and_requeues_on_failure(monkeypatch):
+    from services import widget_views as wv
+    import core.database
+
+    vc = wv.ViewCounter()
+    for _ in range(3):
+        vc.record("w1")
+    vc.record("w2")
+    assert vc.pending("w1") == 3
+
+    written = []
+
+    class _Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    async def add_counts(db, counts):
+        written.append(dict(counts))
+
+    monkeypatch.setattr(core.database, "get_db_session", _Session)
+    monkeypatch.setattr("crud.widget.add_view_counts", add_counts)
+    assert asyncio.run(vc.flush()) == 4
+    assert written == [{"w1": 3, "w2": 1}]
+    assert vc.pending("w1") == 0
+
+    async def boom(db, counts):
+        raise RuntimeError("db down")
+
+    vc.record("w1")
+    monkeypatch.setattr("crud.widget.add_view_counts", boom)
+    with pytest.raises(RuntimeError):
+        asyncio.run(vc.flush())
+    assert vc.pending("w1") == 1